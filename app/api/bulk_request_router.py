@@ -0,0 +1,45 @@
+"""
+Endpoints para ingestão em lote de solicitações de anonimização.
+
+Este módulo expõe a rota de criação em lote usada pelos sistemas solicitantes
+que enviam cargas noturnas com milhares de pessoas. Todo o lote, incluindo o
+fan-out para os sistemas de processamento, é gravado em uma única transação.
+
+Rotas:
+    POST /request/bulk: Cria um lote de solicitações e seus processos.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from app.db.database import get_db
+from app.models.schemas import RequestBulkCreate, RequestBulkResponse, to_json_bytes
+from app.services.request_service import RequestService
+from app.services.system_registry import get_system_registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/request/bulk", response_model=RequestBulkResponse, status_code=status.HTTP_201_CREATED)
+def create_requests_bulk(payload: RequestBulkCreate, db: Session = Depends(get_db)) -> Response:
+    """Cria um lote de solicitações de anonimização.
+
+    Args:
+        payload: Lote de solicitações a serem criadas
+        db: Sessão do banco de dados
+
+    Returns:
+        Response: RequestBulkResponse em JSON, com os IDs gerados (ou existentes, para as duplicatas), na ordem de envio
+    """
+    request_service = RequestService(db, system_registry=get_system_registry())
+    try:
+        id_requests, created = request_service.create_or_get_requests_bulk(payload.requests)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    logger.info(f"Lote de {created} solicitações criado ({len(id_requests) - created} duplicadas)")
+
+    response = RequestBulkResponse(total=created, id_requests=id_requests, duplicates=len(id_requests) - created)
+    return Response(content=to_json_bytes(response), status_code=status.HTTP_201_CREATED, media_type="application/json")
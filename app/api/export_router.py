@@ -0,0 +1,63 @@
+"""
+Endpoint de exportação em streaming das solicitações para auditoria.
+
+A resposta é gerada sob demanda por app.services.export_service, com cursor no
+servidor, de modo que exportações de dezenas de milhões de linhas usam memória
+constante. A sessão pertence ao fluxo da resposta (aberta na primeira leitura e
+fechada ao final do envio), e não à requisição, pois as dependências com yield
+são encerradas antes do envio de um StreamingResponse.
+
+Rotas:
+    GET /export/requests: Exporta as solicitações de um período com processos e progresso.
+"""
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from app.db.routing import get_routing_session_factory
+from app.services.export_service import ExportService
+from datetime import datetime
+from typing import Optional, Iterator
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+
+def _stream(dt_start: Optional[datetime], dt_end: Optional[datetime], export_format: str,
+            compress: bool, include_archived: bool) -> Iterator[bytes]:
+    db = get_routing_session_factory()()
+    try:
+        yield from ExportService(db).export(dt_start, dt_end, export_format, compress, include_archived)
+    finally:
+        db.close()
+
+
+@router.get("/export/requests")
+def export_requests(
+    start: Optional[datetime] = Query(None, description="Start of the dt_register range (inclusive)"),
+    end: Optional[datetime] = Query(None, description="End of the dt_register range (exclusive)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Output format"),
+    gzip: bool = Query(False, description="Compress the output with gzip"),
+    include_archived: bool = Query(True, description="Also export archived requests")
+) -> StreamingResponse:
+    """Exporta as solicitações de um período com os processos e o histórico de progresso.
+
+    Args:
+        start: Início do período de dt_register (inclusivo)
+        end: Fim do período de dt_register (exclusivo)
+        format: Formato da saída ("ndjson" ou "csv")
+        gzip: Se True, comprime a saída em gzip
+        include_archived: Se True, exporta também as solicitações arquivadas
+
+    Returns:
+        StreamingResponse: Arquivo da exportação, enviado em blocos
+    """
+    filename = f"requests.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        _stream(start, end, format, gzip, include_archived),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,31 @@
+"""
+Endpoint de métricas no formato texto do Prometheus.
+
+Expõe as métricas de app.services.instrumentation: latência e SQL por método de
+serviço e por rota HTTP, totais de SQL, orçamentos de consultas excedidos e eventos
+de log descartados (app.services.structured_logging). As métricas HTTP dependem de
+InstrumentationMiddleware na aplicação e as de SQL de install_sql_instrumentation
+no engine.
+
+Rotas:
+    GET /metrics: Obtém as métricas no formato texto do Prometheus.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.instrumentation import render_metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics() -> PlainTextResponse:
+    """
+    Obtém as métricas de instrumentação no formato texto do Prometheus.
+
+    Returns:
+        PlainTextResponse: Exposição das métricas
+    """
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,54 @@
+"""
+Endpoints para a varredura paginada de solicitações pendentes.
+
+A paginação é por keyset (id_request > cursor, ordenado por id_request), apoiada no
+índice ix_request_pending, de modo que o custo de cada página é constante mesmo com
+backlogs de centenas de milhares de solicitações. A página é validada a partir dos
+objetos ORM (from_attributes) e serializada direto em bytes JSON pelo Pydantic v2.
+
+Rotas:
+    GET /request/pending: Obtém uma página de solicitações pendentes.
+"""
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from app.db.routing import get_routed_db
+from app.models.models import Request
+from app.models.schemas import PendingRequestPage, RequestResponse, to_json_bytes
+from app.services.request_service import RequestService
+
+router = APIRouter()
+
+# Limite superior do tamanho de página aceito pela API
+MAX_PAGE_SIZE = 5000
+
+
+def _to_response(request: Request) -> RequestResponse:
+    response = RequestResponse.model_validate(request)
+    if response.id_person is None and request.ct_payload:
+        # Solicitações antigas, ainda não preenchidas por backfill_person_columns
+        response.id_person = request.ct_payload.get("id_person")
+        response.tp_document = request.ct_payload.get("tp_document")
+    return response
+
+
+@router.get("/request/pending", response_model=PendingRequestPage)
+def get_pending_requests(
+    after_id: int = Query(0, ge=0, description="Last id_request already read (cursor)"),
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    db: Session = Depends(get_routed_db)
+) -> Response:
+    """Obtém uma página de solicitações pendentes a partir de um cursor.
+
+    Args:
+        after_id: Último id_request já lido; 0 para a primeira página
+        limit: Tamanho da página
+        db: Sessão do banco de dados
+
+    Returns:
+        Response: PendingRequestPage em JSON, com as solicitações da página e o cursor da próxima
+    """
+    requests, next_cursor = RequestService(db).get_pending_requests_page(after_id, limit)
+    page = PendingRequestPage(items=[_to_response(request) for request in requests], next_cursor=next_cursor)
+    # Bytes JSON direto do modelo, sem a revalidação por response_model nem jsonable_encoder
+    return Response(content=to_json_bytes(page), media_type="application/json")
@@ -0,0 +1,103 @@
+"""
+Endpoint de assinatura (Server-Sent Events) das mudanças de progresso e de status.
+
+Em vez de consultar o status repetidamente, o sistema solicitante abre um fluxo SSE
+por solicitação. Ao conectar, recebe um evento "snapshot" com os processos e o último
+progresso (uma única leitura do banco); depois, recebe os eventos "progress",
+"verify" e "request" publicados por app.services.progress_events após o commit de
+cada mudança. Enquanto não há mudanças, o fluxo envia apenas comentários de
+keep-alive, sem consultas ao banco. Se o cliente não consumir os eventos a tempo, o
+fluxo termina com um evento "dropped" e o cliente deve reconectar.
+
+Rotas:
+    GET /request/{id_request}/events: Assina as mudanças dos processos de uma solicitação.
+"""
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from app.db.async_database import get_async_session_factory
+from app.services.async_process_service import AsyncProcessService
+from app.services.async_request_service import AsyncRequestService
+from app.services.progress_events import ProgressEvent, Subscription, SubscriptionLimitExceeded, get_event_bus
+from datetime import datetime
+from typing import AsyncIterator, Optional
+import asyncio
+import os
+
+router = APIRouter()
+
+# Intervalo dos comentários de keep-alive e da verificação de desconexão do cliente
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+async def _snapshot(id_request: int) -> Optional[ProgressEvent]:
+    async with get_async_session_factory()() as db:
+        if await AsyncRequestService(db).get_request_by_id(id_request) is None:
+            return None
+        process_service = AsyncProcessService(db)
+        processes = await process_service.get_processes_for_request(id_request)
+        latest = await process_service.get_latest_progress_bulk([id_request])
+    items = []
+    for process in processes:
+        progress = latest.get((id_request, process.id_system_process))
+        items.append({
+            "id_system_process": process.id_system_process,
+            "st_system_verify": process.st_system_verify,
+            "st_system_request": process.st_system_request,
+            "dt_system_conclusion": process.dt_system_conclusion,
+            "progress_percentage": progress.progress_percentage if progress else None,
+            "progress_message": progress.progress_message if progress else None
+        })
+    # id_system_process 0: o snapshot abrange todos os processos da solicitação
+    return ProgressEvent(id_request, 0, "snapshot", {"processes": items}, datetime.now())
+
+
+async def _stream(request: Request, subscription: Subscription, snapshot: ProgressEvent) -> AsyncIterator[str]:
+    try:
+        yield snapshot.to_sse()
+        while True:
+            try:
+                progress_event = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if progress_event is None:
+                yield "event: dropped\ndata: {}\n\n"
+                return
+            yield progress_event.to_sse()
+    finally:
+        subscription.close()
+
+
+@router.get("/request/{id_request}/events")
+async def subscribe_request_events(id_request: int, request: Request) -> StreamingResponse:
+    """Assina as mudanças de progresso e de status dos processos de uma solicitação.
+
+    Args:
+        id_request: ID da solicitação
+        request: Requisição HTTP (usada para detectar a desconexão do cliente)
+
+    Returns:
+        StreamingResponse: Fluxo text/event-stream
+    """
+    try:
+        # Assina antes do snapshot: mudanças confirmadas durante a leitura não se perdem
+        subscription = get_event_bus().subscribe(id_request)
+    except SubscriptionLimitExceeded as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    try:
+        snapshot = await _snapshot(id_request)
+    except Exception:
+        subscription.close()
+        raise
+    if snapshot is None:
+        subscription.close()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Solicitação {id_request} não encontrada")
+
+    return StreamingResponse(
+        _stream(request, subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,104 @@
+"""
+Configuração do engine e das sessões assíncronas do banco de dados.
+
+Usado pelos serviços assíncronos (AsyncRequestService, AsyncProcessService). A URL é
+lida de ASYNC_DATABASE_URL e deve usar um driver assíncrono, por exemplo
+"sqlite+aiosqlite:///./request_manager.db" em desenvolvimento. O engine é criado na
+primeira utilização, para que a aplicação síncrona não dependa do driver assíncrono.
+
+Com ASYNC_REPLICA_DATABASE_URL, as sessões são RoutingSession (app.db.routing): os
+métodos @read_only leem da réplica até a primeira escrita da sessão. O pool da
+réplica é configurado por ASYNC_REPLICA_DB_POOL_SIZE e ASYNC_REPLICA_DB_MAX_OVERFLOW.
+
+Funções:
+    get_async_engine: Retorna o engine assíncrono compartilhado.
+    get_async_replica_engine: Retorna o engine assíncrono da réplica de leitura, se configurada.
+    get_async_session_factory: Retorna a fábrica de AsyncSession compartilhada.
+    get_async_db: Dependência do FastAPI que fornece uma AsyncSession.
+"""
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.db.routing import RoutingSession
+from typing import AsyncIterator, Optional
+import os
+
+_async_engine: Optional[AsyncEngine] = None
+_async_replica_engine: Optional[AsyncEngine] = None
+_async_replica_loaded = False
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def _create_async_engine(database_url: str, role: str) -> AsyncEngine:
+    engine_options = {"pool_pre_ping": True}
+    # O aiosqlite usa NullPool, que não aceita parâmetros de dimensionamento do pool
+    if make_url(database_url).get_backend_name() != "sqlite":
+        engine_options["pool_size"] = int(os.getenv(f"{role}_POOL_SIZE", "10"))
+        engine_options["max_overflow"] = int(os.getenv(f"{role}_MAX_OVERFLOW", "20"))
+    return create_async_engine(database_url, **engine_options)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Retorna o engine assíncrono compartilhado, criando-o na primeira chamada.
+
+    Returns:
+        AsyncEngine: Engine configurado a partir de ASYNC_DATABASE_URL
+
+    Raises:
+        RuntimeError: Se ASYNC_DATABASE_URL não estiver configurada
+    """
+    global _async_engine
+    if _async_engine is None:
+        database_url = os.getenv("ASYNC_DATABASE_URL")
+        if not database_url:
+            raise RuntimeError("ASYNC_DATABASE_URL não configurada")
+        _async_engine = _create_async_engine(database_url, "ASYNC_DB")
+    return _async_engine
+
+
+def get_async_replica_engine() -> Optional[AsyncEngine]:
+    """Retorna o engine assíncrono da réplica de leitura, criando-o na primeira chamada.
+
+    Returns:
+        Optional[AsyncEngine]: Engine de ASYNC_REPLICA_DATABASE_URL, ou None se não configurada
+    """
+    global _async_replica_engine, _async_replica_loaded
+    if not _async_replica_loaded:
+        database_url = os.getenv("ASYNC_REPLICA_DATABASE_URL")
+        if database_url:
+            _async_replica_engine = _create_async_engine(database_url, "ASYNC_REPLICA_DB")
+        _async_replica_loaded = True
+    return _async_replica_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Retorna a fábrica de AsyncSession compartilhada.
+
+    Returns:
+        async_sessionmaker: Fábrica de sessões ligada ao engine assíncrono
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        engine = get_async_engine()
+        replica = get_async_replica_engine()
+        routing_options = {}
+        if replica is not None:
+            routing_options = {
+                "sync_session_class": RoutingSession,
+                "primary": engine.sync_engine,
+                "replica": replica.sync_engine
+            }
+        _async_session_factory = async_sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False, **routing_options
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Fornece uma AsyncSession por requisição e a fecha ao final.
+
+    Yields:
+        AsyncSession: Sessão assíncrona do banco de dados
+    """
+    async with get_async_session_factory()() as session:
+        yield session
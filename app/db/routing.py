@@ -0,0 +1,195 @@
+"""
+Separação de leitura e escrita entre o banco primário e uma réplica de leitura.
+
+Os métodos de consulta marcados com @read_only (consultas de status, páginas de
+pendentes, progresso) são executados na réplica configurada em
+REPLICA_DATABASE_URL; todo o resto, inclusive flush, INSERT, UPDATE e DELETE, vai
+para o primário. Depois da primeira escrita, a sessão passa a ler somente do
+primário até ser fechada, de modo que uma requisição da API sempre enxerga as
+próprias escritas (read-your-writes), mesmo com atraso de replicação.
+
+Sem REPLICA_DATABASE_URL, RoutingSession se comporta como uma Session comum no
+primário. O tamanho do pool é configurado por papel: PRIMARY_DB_POOL_SIZE e
+PRIMARY_DB_MAX_OVERFLOW (se ausentes, usa o engine de app.db.database) e
+REPLICA_DB_POOL_SIZE e REPLICA_DB_MAX_OVERFLOW. Localmente, dois arquivos SQLite
+(ou duas instâncias locais) servem de primário e réplica.
+
+Classes:
+    RoutingSession: Session que escolhe o engine (primário ou réplica) por instrução.
+
+Funções:
+    read_only: Decorador que marca um método de serviço como somente leitura.
+    create_role_engine: Cria o engine de um papel com o pool configurado para ele.
+    get_primary_engine: Retorna o engine do primário.
+    get_replica_engine: Retorna o engine da réplica, se configurada.
+    get_routing_session_factory: Retorna a fábrica de RoutingSession compartilhada.
+    get_routed_db: Dependência do FastAPI que fornece uma RoutingSession.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from app.db.database import engine as default_engine
+from typing import Any, Callable, Dict, Iterator, Optional
+import functools
+import inspect
+import os
+
+# Chaves de Session.info: profundidade de chamadas @read_only e escrita já realizada
+READ_ONLY_DEPTH = "read_only_depth"
+HAS_WRITTEN = "has_written"
+
+_primary_engine: Optional[Engine] = None
+_replica_engine: Optional[Engine] = None
+_replica_loaded = False
+_routing_session_factory: Optional[sessionmaker] = None
+
+
+class RoutingSession(Session):
+    """Session que envia as leituras de métodos @read_only à réplica e todo o resto ao primário."""
+
+    def __init__(self, primary: Optional[Engine] = None, replica: Optional[Engine] = None, **kwargs: Any):
+        """Inicializa a sessão.
+
+        Args:
+            primary: Engine do primário; se None, usa o bind informado
+            replica: Engine da réplica; se None, todas as instruções vão ao primário
+            **kwargs: Argumentos de Session
+        """
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.primary is None or self.replica is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info[HAS_WRITTEN] = True
+            return self.primary
+        if self.info.get(READ_ONLY_DEPTH, 0) and not self.info.get(HAS_WRITTEN):
+            return self.replica
+        return self.primary
+
+
+def _mark(db, delta: int) -> None:
+    info = getattr(db, "info", None)
+    if info is not None:
+        info[READ_ONLY_DEPTH] = info.get(READ_ONLY_DEPTH, 0) + delta
+
+
+def read_only(method: Callable) -> Callable:
+    """Marca um método de serviço (síncrono ou assíncrono) como somente leitura.
+
+    Durante a chamada, as consultas da sessão do serviço (self.db) podem ir para a
+    réplica. Use apenas em métodos que toleram o atraso de replicação: verificações
+    que antecedem escritas (existência, deduplicação) devem continuar no primário.
+
+    Args:
+        method: Método do serviço
+
+    Returns:
+        Callable: Método decorado
+    """
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            _mark(self.db, 1)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                _mark(self.db, -1)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        _mark(self.db, 1)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _mark(self.db, -1)
+    return wrapper
+
+
+def create_role_engine(database_url, role: str, **options: Any) -> Engine:
+    """Cria o engine de um papel ("PRIMARY" ou "REPLICA") com o pool configurado para ele.
+
+    Args:
+        database_url: URL do banco
+        role: Prefixo das variáveis {role}_DB_POOL_SIZE e {role}_DB_MAX_OVERFLOW
+        **options: Argumentos adicionais de create_engine
+
+    Returns:
+        Engine: Engine criado
+    """
+    engine_options: Dict[str, Any] = {"pool_pre_ping": True, **options}
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        # Conexões do pool usadas por threads diferentes (threadpool do FastAPI)
+        engine_options.setdefault("connect_args", {"check_same_thread": False})
+    # SQLite em memória usa SingletonThreadPool, que não aceita dimensionamento
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        engine_options.setdefault("pool_size", int(os.getenv(f"{role}_DB_POOL_SIZE", "5")))
+        engine_options.setdefault("max_overflow", int(os.getenv(f"{role}_DB_MAX_OVERFLOW", "10")))
+    return create_engine(url, **engine_options)
+
+
+def get_primary_engine() -> Engine:
+    """Retorna o engine do primário.
+
+    Com PRIMARY_DB_POOL_SIZE configurada, cria um engine próprio com esse pool;
+    caso contrário, reutiliza o engine de app.db.database.
+
+    Returns:
+        Engine: Engine do primário
+    """
+    global _primary_engine
+    if _primary_engine is None:
+        if os.getenv("PRIMARY_DB_POOL_SIZE"):
+            _primary_engine = create_role_engine(default_engine.url, "PRIMARY")
+        else:
+            _primary_engine = default_engine
+    return _primary_engine
+
+
+def get_replica_engine() -> Optional[Engine]:
+    """Retorna o engine da réplica de leitura, criando-o na primeira chamada.
+
+    Returns:
+        Optional[Engine]: Engine de REPLICA_DATABASE_URL, ou None se não configurada
+    """
+    global _replica_engine, _replica_loaded
+    if not _replica_loaded:
+        database_url = os.getenv("REPLICA_DATABASE_URL")
+        _replica_engine = create_role_engine(database_url, "REPLICA") if database_url else None
+        _replica_loaded = True
+    return _replica_engine
+
+
+def get_routing_session_factory() -> sessionmaker:
+    """Retorna a fábrica de RoutingSession compartilhada.
+
+    Returns:
+        sessionmaker: Fábrica de sessões com primário e réplica
+    """
+    global _routing_session_factory
+    if _routing_session_factory is None:
+        primary = get_primary_engine()
+        _routing_session_factory = sessionmaker(
+            class_=RoutingSession, autoflush=False, bind=primary,
+            primary=primary, replica=get_replica_engine()
+        )
+    return _routing_session_factory
+
+
+def get_routed_db() -> Iterator[RoutingSession]:
+    """Fornece uma RoutingSession por requisição e a fecha ao final.
+
+    Yields:
+        RoutingSession: Sessão com leituras roteadas para a réplica
+    """
+    db = get_routing_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
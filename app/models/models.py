@@ -10,9 +10,16 @@ Classes:
     DomSystem: Modelo para tabela de referu00eancia de domu00ednio do sistema.
     Process: Modelo para armazenar informau00e7u00f5es de status de processamento com chave primu00e1ria composta.
     ProcessProgress: Modelo para armazenar informau00e7u00f5es de progresso de processamento.
+    RequestStatus: Modelo para o resumo (rollup) de status dos processos de cada solicitação.
+    NotificationOutbox: Modelo da fila transacional (outbox) de notificações de status.
+    JobLock: Modelo dos locks de jobs periódicos compartilhados entre workers e nós.
+    RequestArchive: Modelo do arquivo (tabela fria) das solicitações finalizadas.
+    ProcessArchive: Modelo do arquivo dos processos das solicitações arquivadas.
+    ProcessProgressArchive: Modelo do arquivo com o progresso final de cada processo arquivado.
+    RequestStatusArchive: Modelo do arquivo do rollup de status das solicitações arquivadas.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Float, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text, Float, PrimaryKeyConstraint, Index, text
 from sqlalchemy.sql import func
 from app.db.database import Base
 from datetime import datetime
@@ -26,6 +33,29 @@ class Request(Base):
     dt_register = Column(DateTime, default=func.now(), nullable=False)
     ct_payload = Column(JSON, nullable=False)
     nm_system = Column(String(100), nullable=False)
+    st_request = Column(Integer, default=0, nullable=False)  # 0=pending, 1=finished (all processes in 1, 4 or 5)
+    
+    # Chave da pessoa fora do JSON, para a deduplicação das solicitações em andamento
+    id_person = Column(String(100), nullable=True)
+    tp_document = Column(String(20), nullable=True)
+    # Chave de idempotência informada pelo sistema solicitante (única por nm_system)
+    cd_idempotency_key = Column(String(100), nullable=True)
+    
+    __table_args__ = (
+        # Índice para a varredura paginada (keyset) das solicitações pendentes
+        Index('ix_request_pending', 'st_request', 'id_request'),
+        # Busca de solicitações da mesma pessoa por sistema solicitante
+        Index('ix_request_person', 'nm_system', 'id_person', 'tp_document', 'st_request'),
+        # Filtrado: SQL Server admite um único NULL em índices únicos sem filtro
+        Index(
+            'ux_request_idempotency', 'nm_system', 'cd_idempotency_key', unique=True,
+            mssql_where=text('cd_idempotency_key IS NOT NULL'),
+            postgresql_where=text('cd_idempotency_key IS NOT NULL'),
+            sqlite_where=text('cd_idempotency_key IS NOT NULL')
+        ),
+        # IDs nunca reutilizados após o arquivamento (sem AUTOINCREMENT, o SQLite reutiliza o maior rowid removido)
+        {"sqlite_autoincrement": True},
+    )
     
     def __repr__(self):
         return f"<Request id_request={self.id_request}, nm_system={self.nm_system}>"
@@ -62,6 +92,12 @@ class Process(Base):
     # Definiu00e7u00e3o explu00edcita da chave primu00e1ria composta
     __table_args__ = (
         PrimaryKeyConstraint('id_request', 'id_system_process'),
+        # Índice de cobertura da fila de trabalho dos workers de retentativa
+        Index(
+            'ix_process_work_queue', 'st_system_verify', 'st_system_request', 'dt_lease_expires',
+            mssql_include=['id_lease_owner', 'dt_system_verify', 'dt_system_request']
+        ),
+        Index('ix_process_next_attempt', 'dt_next_attempt'),
     )
     
     # Outros campos
@@ -77,6 +113,14 @@ class Process(Base):
     st_system_request = Column(Integer, default=0, nullable=True)  # 0=pending, 1=completed, 2=partial, 3=error, 4=timeout, 5=canceled
     st_system_process = Column(Integer, nullable=True)  # 1=responded, 3=response error
     
+    # Lease de trabalho dos workers de retentativa (ProcessService.claim_due_processes)
+    id_lease_owner = Column(String(100), nullable=True)
+    dt_lease_expires = Column(DateTime, nullable=True)
+    
+    # Agendamento das retentativas (app.services.retry_scheduler)
+    qt_attempts = Column(Integer, default=0, nullable=True)
+    dt_next_attempt = Column(DateTime, nullable=True)  # NULL=nothing scheduled (or attempts exhausted when qt_attempts > 0)
+    
     def __repr__(self):
         return f"<Process(id_request={self.id_request}, id_system_process={self.id_system_process})>"
 
@@ -87,11 +131,226 @@ class ProcessProgress(Base):
     __tablename__ = "tb_process_progress"
 
     id_process_progress = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    id_request = Column(Integer, nullable=False, index=True)
+    id_request = Column(Integer, nullable=False)
     id_system_process = Column(Integer, nullable=False)
     dt_progress_update = Column(DateTime, default=func.now(), nullable=False)
     progress_percentage = Column(Float, nullable=False, default=0.0)
     progress_message = Column(Text)
     
+    # O índice composto atende tanto a busca por id_request quanto a do último progresso
+    # de cada (id_request, id_system_process), substituindo o índice simples em id_request
+    __table_args__ = (
+        Index('ix_process_progress_latest', 'id_request', 'id_system_process', 'dt_progress_update'),
+    )
+    
+    def __repr__(self):
+        return f"<ProcessProgress(id_request={self.id_request}, percentage={self.progress_percentage})>"
+
+
+class RequestStatus(Base):
+    """Model for the per-request rollup of process statuses.
+    
+    Maintained in the same transaction as the tb_process writes, so the overall status of a
+    request and the "all completed/blocked requests" listings are single indexed reads.
+    """
+
+    __tablename__ = "tb_request_status"
+
+    id_request = Column(Integer, primary_key=True, autoincrement=False)
+    qt_process = Column(Integer, nullable=False, default=0)
+    
+    # Contagem de processos por st_system_verify
+    qt_verify_pending = Column(Integer, nullable=False, default=0)
+    qt_verify_approved = Column(Integer, nullable=False, default=0)
+    qt_verify_rejected = Column(Integer, nullable=False, default=0)
+    qt_verify_error = Column(Integer, nullable=False, default=0)
+    qt_verify_timeout = Column(Integer, nullable=False, default=0)
+    
+    # Contagem de processos por st_system_request
+    qt_request_pending = Column(Integer, nullable=False, default=0)
+    qt_request_completed = Column(Integer, nullable=False, default=0)
+    qt_request_partial = Column(Integer, nullable=False, default=0)
+    qt_request_error = Column(Integer, nullable=False, default=0)
+    qt_request_timeout = Column(Integer, nullable=False, default=0)
+    qt_request_canceled = Column(Integer, nullable=False, default=0)
+    
+    st_request_overall = Column(Integer, nullable=False, default=0)  # 0=pending, 1=completed, 2=in progress, 3=blocked
+    dt_update = Column(DateTime, default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index('ix_request_status_overall', 'st_request_overall', 'id_request'),
+    )
+    
+    def __repr__(self):
+        return f"<RequestStatus(id_request={self.id_request}, st_request_overall={self.st_request_overall})>"
+
+
+class NotificationOutbox(Base):
+    """Model for the transactional outbox of status notifications.
+    
+    Rows are written in the same transaction as the tb_process status change and
+    delivered afterwards by the outbox relay, in id order per process.
+    """
+
+    __tablename__ = "tb_notification_outbox"
+
+    id_outbox = Column(Integer, primary_key=True, autoincrement=True)
+    id_request = Column(Integer, nullable=False)
+    id_system_process = Column(Integer, nullable=False)
+    id_system_target = Column(Integer, nullable=True)  # Sistema notificado (solicitante do processo)
+    tp_event = Column(String(20), nullable=False)  # 'verify' or 'request'
+    ct_payload = Column(JSON, nullable=False)
+    st_delivery = Column(Integer, nullable=False, default=0)  # 0=pending, 1=delivered, 2=failed (attempts exhausted)
+    qt_attempts = Column(Integer, nullable=False, default=0)
+    ds_last_error = Column(String(500), nullable=True)
+    dt_created = Column(DateTime, default=func.now(), nullable=False)
+    dt_delivered = Column(DateTime, nullable=True)
+    dt_next_attempt = Column(DateTime, nullable=True)  # NULL=deliverable now; set after a failed or skipped delivery
+    
+    __table_args__ = (
+        Index('ix_notification_outbox_pending', 'st_delivery', 'id_outbox'),
+        Index('ix_notification_outbox_process', 'id_request', 'id_system_process', 'st_delivery', 'id_outbox'),
+    )
+    
+    def __repr__(self):
+        return f"<NotificationOutbox(id_outbox={self.id_outbox}, id_request={self.id_request}, tp_event={self.tp_event})>"
+
+
+class JobLock(Base):
+    """Model for the cluster-wide locks of periodic jobs.
+    
+    One row per job (or per job shard). A worker owns the lock while dt_lease_expires
+    is in the future and renews it with heartbeats; dt_last_run gates interval jobs so
+    each run happens once per cluster.
+    """
+
+    __tablename__ = "tb_job_lock"
+
+    nm_job = Column(String(100), primary_key=True)
+    id_owner = Column(String(100), nullable=True)  # Worker que detém o lock (host:pid)
+    dt_lease_expires = Column(DateTime, nullable=True)
+    dt_heartbeat = Column(DateTime, nullable=True)
+    dt_last_run = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<JobLock(nm_job={self.nm_job}, id_owner={self.id_owner}, dt_lease_expires={self.dt_lease_expires})>"
+
+
+class RequestArchive(Base):
+    """Archive (cold) table of finished requests moved out of tb_request.
+    
+    Same columns as Request, plus the archival date. Rows are moved by
+    app.services.archive_service once every process reached a terminal st_system_request.
+    Idempotency keys stay unique per nm_system here, so a resubmission after archival
+    resolves to the archived request instead of creating a new one.
+    """
+
+    __tablename__ = "tb_request_archive"
+
+    id_request = Column(Integer, primary_key=True, autoincrement=False)
+    dt_register = Column(DateTime, nullable=False)
+    ct_payload = Column(JSON, nullable=False)
+    nm_system = Column(String(100), nullable=False)
+    st_request = Column(Integer, nullable=False)
+    id_person = Column(String(100), nullable=True)
+    tp_document = Column(String(20), nullable=True)
+    cd_idempotency_key = Column(String(100), nullable=True)
+    dt_archived = Column(DateTime, default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # A chave de idempotência continua válida após o arquivamento (busca de duplicatas em request_service)
+        Index(
+            'ux_request_archive_idempotency', 'nm_system', 'cd_idempotency_key', unique=True,
+            mssql_where=text('cd_idempotency_key IS NOT NULL'),
+            postgresql_where=text('cd_idempotency_key IS NOT NULL'),
+            sqlite_where=text('cd_idempotency_key IS NOT NULL')
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<RequestArchive id_request={self.id_request}, nm_system={self.nm_system}>"
+
+
+class ProcessArchive(Base):
+    """Archive (cold) table of the processes of archived requests.
+    
+    Same status columns as Process; lease and retry scheduling columns are dropped,
+    since archived processes are terminal.
+    """
+
+    __tablename__ = "tb_process_archive"
+
+    id_request = Column(Integer, nullable=False)
+    id_system_process = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('id_request', 'id_system_process'),
+    )
+    
+    id_system_requester = Column(Integer, nullable=True)
+    dt_system_verify = Column(DateTime, nullable=True)
+    dt_system_verify_response = Column(DateTime, nullable=True)
+    dt_system_request = Column(DateTime, nullable=True)
+    dt_system_conclusion = Column(DateTime, nullable=True)
+    id_person = Column(String(100), nullable=True)
+    tp_document = Column(String(20), nullable=True)
+    st_system_verify = Column(Integer, nullable=True)
+    ds_reason_verify_refuse = Column(String(500), nullable=True)
+    st_system_request = Column(Integer, nullable=True)
+    st_system_process = Column(Integer, nullable=True)
+    qt_attempts = Column(Integer, nullable=True)
+    
+    def __repr__(self):
+        return f"<ProcessArchive(id_request={self.id_request}, id_system_process={self.id_system_process})>"
+
+
+class ProcessProgressArchive(Base):
+    """Archive (cold) table with the final progress entry of each archived process.
+    
+    The progress history is compacted on archival: only the latest entry of each
+    (id_request, id_system_process) is kept, under its original id_process_progress.
+    """
+
+    __tablename__ = "tb_process_progress_archive"
+
+    id_process_progress = Column(Integer, primary_key=True, autoincrement=False)
+    id_request = Column(Integer, nullable=False)
+    id_system_process = Column(Integer, nullable=False)
+    dt_progress_update = Column(DateTime, nullable=False)
+    progress_percentage = Column(Float, nullable=False)
+    progress_message = Column(Text)
+    
+    __table_args__ = (
+        Index('ix_process_progress_archive_request', 'id_request', 'id_system_process'),
+    )
+    
+    def __repr__(self):
+        return f"<ProcessProgressArchive(id_request={self.id_request}, percentage={self.progress_percentage})>"
+
+
+class RequestStatusArchive(Base):
+    """Archive (cold) table of the status rollup of archived requests."""
+
+    __tablename__ = "tb_request_status_archive"
+
+    id_request = Column(Integer, primary_key=True, autoincrement=False)
+    qt_process = Column(Integer, nullable=False)
+    
+    qt_verify_pending = Column(Integer, nullable=False)
+    qt_verify_approved = Column(Integer, nullable=False)
+    qt_verify_rejected = Column(Integer, nullable=False)
+    qt_verify_error = Column(Integer, nullable=False)
+    qt_verify_timeout = Column(Integer, nullable=False)
+    
+    qt_request_pending = Column(Integer, nullable=False)
+    qt_request_completed = Column(Integer, nullable=False)
+    qt_request_partial = Column(Integer, nullable=False)
+    qt_request_error = Column(Integer, nullable=False)
+    qt_request_timeout = Column(Integer, nullable=False)
+    qt_request_canceled = Column(Integer, nullable=False)
+    
+    st_request_overall = Column(Integer, nullable=False)
+    dt_update = Column(DateTime, nullable=False)
+    
     def __repr__(self):
-        return f"<ProcessProgress(id_request={self.id_request}, percentage={self.progress_percentage})>"
\ No newline at end of file
+        return f"<RequestStatusArchive(id_request={self.id_request}, st_request_overall={self.st_request_overall})>"
@@ -9,6 +9,9 @@ Classes:
     RequestBase: Esquema base para solicitau00e7u00f5es de anonimizau00e7u00e3o.
     RequestCreate: Esquema para criar uma nova solicitau00e7u00e3o de anonimizau00e7u00e3o.
     RequestResponse: Esquema para resposta apu00f3s criar uma solicitau00e7u00e3o.
+    RequestBulkCreate: Esquema para criar um lote de solicitações de anonimização.
+    RequestBulkResponse: Esquema para resposta após criar um lote de solicitações.
+    PendingRequestPage: Esquema para página de solicitações pendentes (paginação por cursor).
     VerificationRequest: Esquema para requisiu00e7u00e3o de endpoint de verificau00e7u00e3o.
     ProcessingRequest: Esquema para requisiu00e7u00e3o de atualizau00e7u00e3o de status de processamento.
     SystemStatusResponse: Esquema para status individual do sistema na resposta de status.
@@ -16,9 +19,17 @@ Classes:
     AdminAdvanceRequest: Esquema para requisiu00e7u00e3o de avanu00e7o administrativo.
     ProcessProgressUpdate: Esquema para atualizau00e7u00e3o de progresso de processo.
     GenericResponse: Esquema de resposta genu00e9rica da API.
+
+Os esquemas usam a API nativa do Pydantic v2 (field_validator, ConfigDict). As
+respostas grandes (listas de solicitações e de status) são validadas e serializadas
+pelos TypeAdapters em cache deste módulo, direto para bytes JSON com dump_json, sem
+o dicionário intermediário de jsonable_encoder.
+
+Funções:
+    to_json_bytes: Serializa um esquema (ou lista de esquemas) direto em bytes JSON.
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationInfo, field_validator
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 
@@ -33,7 +44,11 @@ class RequestBase(BaseModel):
 
 class RequestCreate(RequestBase):
     """Schema for creating a new anonymization request."""
-    pass
+    
+    idempotency_key: Optional[str] = Field(
+        None, max_length=100,
+        description="Client-generated key; resubmissions with the same key return the original request"
+    )
 
 
 class RequestResponse(BaseModel):
@@ -45,8 +60,28 @@ class RequestResponse(BaseModel):
     id_person: Optional[str] = Field(None, description="Person identification")
     tp_document: Optional[str] = Field(None, description="Document type")
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RequestBulkCreate(BaseModel):
+    """Schema for creating a batch of anonymization requests."""
+    
+    requests: List[RequestCreate] = Field(..., min_length=1, description="Requests to be created")
+
+
+class RequestBulkResponse(BaseModel):
+    """Schema for response after creating a batch of requests."""
+    
+    total: int = Field(..., description="Number of requests created")
+    id_requests: List[int] = Field(..., description="Generated request IDs, in submission order")
+    duplicates: int = Field(0, description="Submissions resolved to an existing request instead of creating one")
+
+
+class PendingRequestPage(BaseModel):
+    """Schema for a keyset-paginated page of pending requests."""
+    
+    items: List[RequestResponse] = Field(..., description="Pending requests, ordered by id_request")
+    next_cursor: Optional[int] = Field(None, description="Cursor for the next page (after_id), or null on the last page")
 
 
 class VerificationRequest(BaseModel):
@@ -57,17 +92,19 @@ class VerificationRequest(BaseModel):
     st_system_verify: int = Field(..., description="Verification status (1=approved, 2=rejected)")
     ds_reason_verify_refuse: Optional[str] = Field(None, description="Rejection reason")
     
-    @validator('st_system_verify')
+    @field_validator('st_system_verify')
+    @classmethod
     def validate_status(cls, v):
         """Validate that status is either 1 (approved) or 2 (rejected)."""
         if v not in [1, 2]:
             raise ValueError('st_system_verify must be either 1 (approved) or 2 (rejected)')
         return v
     
-    @validator('ds_reason_verify_refuse')
-    def validate_reason(cls, v, values):
+    @field_validator('ds_reason_verify_refuse')
+    @classmethod
+    def validate_reason(cls, v, info: ValidationInfo):
         """Validate that reason is provided if request is rejected."""
-        if 'st_system_verify' in values and values['st_system_verify'] == 2 and not v:
+        if info.data.get('st_system_verify') == 2 and not v:
             raise ValueError('ds_reason_verify_refuse is required when st_system_verify=2')
         return v
 
@@ -79,7 +116,8 @@ class ProcessingRequest(BaseModel):
     id_system_process: int = Field(..., description="Processing system ID")
     st_system_request: int = Field(..., description="Processing status (1=completed, 3=error)")
     
-    @validator('st_system_request')
+    @field_validator('st_system_request')
+    @classmethod
     def validate_status(cls, v):
         """Validate that status is either 1 (completed) or 3 (error)."""
         if v not in [1, 3]:
@@ -90,6 +128,9 @@ class ProcessingRequest(BaseModel):
 class SystemStatusResponse(BaseModel):
     """Schema for individual system status in status response."""
     
+    # IDs inteiros eram convertidos para str pelo Pydantic v1; v2 exige a opção explícita
+    model_config = ConfigDict(from_attributes=True, coerce_numbers_to_str=True)
+    
     id_system_process: str = Field(..., description="System ID")
     nm_system: str = Field(..., description="System name")
     st_system_verify: int = Field(..., description="Verification status")
@@ -100,6 +141,8 @@ class SystemStatusResponse(BaseModel):
 class StatusResponse(BaseModel):
     """Schema for status query response."""
     
+    model_config = ConfigDict(from_attributes=True)
+    
     id_request: int = Field(..., description="Request ID")
     dt_register: datetime = Field(..., description="Registration date and time")
     current_status: str = Field(..., description="Overall request status")
@@ -128,4 +171,25 @@ class GenericResponse(BaseModel):
     
     success: bool = Field(..., description="Operation success status")
     message: str = Field(..., description="Response message")
-    data: Optional[Dict[str, Any]] = Field(None, description="Response data")
\ No newline at end of file
+    data: Optional[Dict[str, Any]] = Field(None, description="Response data")
+
+
+# TypeAdapters em cache: o schema de validação/serialização é montado uma única vez
+REQUEST_RESPONSE_LIST_ADAPTER = TypeAdapter(List[RequestResponse])
+SYSTEM_STATUS_LIST_ADAPTER = TypeAdapter(List[SystemStatusResponse])
+STATUS_RESPONSE_LIST_ADAPTER = TypeAdapter(List[StatusResponse])
+
+
+def to_json_bytes(value: Union[BaseModel, List[Any]], adapter: Optional[TypeAdapter] = None) -> bytes:
+    """Serializa um esquema, ou uma lista com o TypeAdapter correspondente, direto em bytes JSON.
+
+    Args:
+        value: Instância de esquema ou lista de instâncias
+        adapter: TypeAdapter da lista (por exemplo, STATUS_RESPONSE_LIST_ADAPTER); obrigatório para listas
+
+    Returns:
+        bytes: Documento JSON codificado em UTF-8
+    """
+    if adapter is not None:
+        return adapter.dump_json(value)
+    return value.model_dump_json().encode("utf-8")
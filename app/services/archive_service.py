@@ -0,0 +1,338 @@
+"""
+Arquivamento das solicitações finalizadas em tabelas frias.
+
+Move para tb_request_archive, tb_process_archive, tb_process_progress_archive e
+tb_request_status_archive as solicitações finalizadas (st_request = 1: todos os
+processos em um st_system_request terminal, 1, 4 ou 5, ou recusados ou em timeout
+já na verificação) cujo rollup não muda há
+ARCHIVE_AFTER_DAYS dias e que não têm notificações pendentes no outbox. O histórico
+de progresso é compactado: apenas a última entrada de cada processo é arquivada.
+
+O arquivamento é feito em lotes limitados (ARCHIVE_BATCH_SIZE solicitações), cada
+um com INSERT ... SELECT nas tabelas frias e DELETE nas tabelas quentes na mesma
+transação, de modo que tb_request, tb_process e tb_process_progress ficam restritas
+às solicitações ativas e os bloqueios duram apenas um lote. As consultas de
+RequestService, ProcessService e StatusRollupService recorrem às tabelas frias
+quando a solicitação não está nas tabelas quentes.
+
+Com um JobCoordinator, o arquivamento é um job único ("request_archive") no cluster.
+
+Classes:
+    ArchiveReport: Resultado de um arquivamento.
+    ArchiveService: Move as solicitações finalizadas para as tabelas frias.
+
+Funções:
+    select_archive_candidates: Monta a consulta de um lote de solicitações arquiváveis.
+    select_final_progress: Monta a consulta da última entrada de progresso de cada processo de um lote.
+    build_archive_inserts: Monta os INSERT ... SELECT que copiam um lote para as tabelas frias.
+    build_archive_deletes: Monta os DELETE que removem um lote das tabelas quentes.
+    select_archived_processes: Monta a consulta dos processos arquivados de um lote de solicitações.
+    select_archived_progress: Monta a consulta do progresso arquivado de um lote de solicitações.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, func, insert, literal, select, DateTime, Delete, Insert, Select
+from app.models.models import (
+    NotificationOutbox,
+    Process,
+    ProcessArchive,
+    ProcessProgress,
+    ProcessProgressArchive,
+    Request,
+    RequestArchive,
+    RequestStatus,
+    RequestStatusArchive
+)
+from app.services.status_rollup_service import REQUEST_FINISHED
+from app.services.unit_of_work import commit_or_flush, rollback_or_defer
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, TYPE_CHECKING
+import logging
+import os
+import time
+
+if TYPE_CHECKING:
+    # job_coordinator importa process_service, que importa este módulo
+    from app.services.job_coordinator import JobCoordinator
+
+logger = logging.getLogger(__name__)
+
+# Solicitações movidas por lote (e por transação); no máximo 1000 para as cláusulas IN
+ARCHIVE_BATCH_SIZE = min(int(os.getenv("ARCHIVE_BATCH_SIZE", "500")), 1000)
+
+# Dias sem alteração do rollup até uma solicitação finalizada ser arquivada
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+
+# Nome do job em tb_job_lock
+ARCHIVE_JOB = "request_archive"
+
+# Status de entrega pendente em tb_notification_outbox
+DELIVERY_PENDING = 0
+
+_PROCESS_ARCHIVE_COLUMNS = [column.name for column in ProcessArchive.__table__.columns]
+_STATUS_ARCHIVE_COLUMNS = [column.name for column in RequestStatusArchive.__table__.columns]
+
+
+def select_archive_candidates(cutoff: datetime, after_id: int, limit: int) -> Select:
+    """Monta a consulta de um lote de solicitações arquiváveis, em ordem de ID, com lock das linhas.
+
+    Args:
+        cutoff: Solicitações com rollup alterado antes deste instante são arquiváveis
+        after_id: Último id_request já arquivado (cursor)
+        limit: Quantidade máxima de solicitações
+
+    Returns:
+        Select: Consulta dos id_request arquiváveis
+    """
+    pending_notification = select(NotificationOutbox.id_outbox).where(
+        and_(
+            NotificationOutbox.id_request == Request.id_request,
+            NotificationOutbox.st_delivery == DELIVERY_PENDING
+        )
+    ).exists()
+    return (
+        select(Request.id_request)
+        .join(RequestStatus, RequestStatus.id_request == Request.id_request)
+        .where(
+            and_(
+                Request.st_request == REQUEST_FINISHED,
+                Request.id_request > after_id,
+                RequestStatus.dt_update < cutoff,
+                ~pending_notification
+            )
+        )
+        .order_by(Request.id_request)
+        .limit(limit)
+        .with_for_update()
+    )
+
+
+def select_final_progress(request_ids: List[int]) -> Select:
+    """Monta a consulta da última entrada de progresso de cada processo de um lote de solicitações.
+
+    Mesma ordenação de process_service.select_latest_progress, com as colunas na ordem de
+    tb_process_progress_archive.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        Select: Consulta das colunas da última entrada de cada processo
+    """
+    ranked = select(
+        ProcessProgress.id_process_progress,
+        ProcessProgress.id_request,
+        ProcessProgress.id_system_process,
+        ProcessProgress.dt_progress_update,
+        ProcessProgress.progress_percentage,
+        ProcessProgress.progress_message,
+        func.row_number().over(
+            partition_by=(ProcessProgress.id_request, ProcessProgress.id_system_process),
+            order_by=(
+                ProcessProgress.dt_progress_update.desc(),
+                ProcessProgress.id_process_progress.desc()
+            )
+        ).label("nu_rank")
+    ).where(ProcessProgress.id_request.in_(request_ids)).subquery()
+    return select(
+        ranked.c.id_process_progress,
+        ranked.c.id_request,
+        ranked.c.id_system_process,
+        ranked.c.dt_progress_update,
+        ranked.c.progress_percentage,
+        ranked.c.progress_message
+    ).where(ranked.c.nu_rank == 1)
+
+
+def build_archive_inserts(request_ids: List[int], now: datetime) -> List[Insert]:
+    """Monta os INSERT ... SELECT que copiam um lote de solicitações para as tabelas frias.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo ARCHIVE_BATCH_SIZE)
+        now: Instante gravado em dt_archived
+
+    Returns:
+        List[Insert]: Instruções para tb_request_archive, tb_process_archive,
+        tb_process_progress_archive e tb_request_status_archive
+    """
+    request_columns = [
+        "id_request", "dt_register", "ct_payload", "nm_system", "st_request",
+        "id_person", "tp_document", "cd_idempotency_key"
+    ]
+    requests = select(
+        *(getattr(Request, name) for name in request_columns),
+        literal(now, DateTime)
+    ).where(Request.id_request.in_(request_ids))
+    processes = select(
+        *(getattr(Process, name) for name in _PROCESS_ARCHIVE_COLUMNS)
+    ).where(Process.id_request.in_(request_ids))
+    rollups = select(
+        *(getattr(RequestStatus, name) for name in _STATUS_ARCHIVE_COLUMNS)
+    ).where(RequestStatus.id_request.in_(request_ids))
+    return [
+        insert(RequestArchive).from_select(request_columns + ["dt_archived"], requests),
+        insert(ProcessArchive).from_select(_PROCESS_ARCHIVE_COLUMNS, processes),
+        insert(ProcessProgressArchive).from_select(
+            [column.name for column in ProcessProgressArchive.__table__.columns],
+            select_final_progress(request_ids)
+        ),
+        insert(RequestStatusArchive).from_select(_STATUS_ARCHIVE_COLUMNS, rollups)
+    ]
+
+
+def build_archive_deletes(request_ids: List[int]) -> List[Delete]:
+    """Monta os DELETE que removem um lote de solicitações das tabelas quentes.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        List[Delete]: Instruções para tb_process_progress, tb_process, tb_request_status
+        e tb_request, nesta ordem
+    """
+    return [
+        delete(ProcessProgress).where(ProcessProgress.id_request.in_(request_ids)),
+        delete(Process).where(Process.id_request.in_(request_ids)),
+        delete(RequestStatus).where(RequestStatus.id_request.in_(request_ids)),
+        delete(Request).where(Request.id_request.in_(request_ids))
+    ]
+
+
+def select_archived_processes(request_ids: List[int]) -> Select:
+    """Monta a consulta dos processos arquivados de um lote de solicitações, ordenados pela chave primária.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo IN_CLAUSE_CHUNK_SIZE)
+
+    Returns:
+        Select: Consulta de entidades ProcessArchive
+    """
+    return select(ProcessArchive).where(ProcessArchive.id_request.in_(request_ids)).order_by(
+        ProcessArchive.id_request, ProcessArchive.id_system_process
+    )
+
+
+def select_archived_progress(request_ids: List[int]) -> Select:
+    """Monta a consulta do progresso arquivado (uma entrada por processo) de um lote de solicitações.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo IN_CLAUSE_CHUNK_SIZE)
+
+    Returns:
+        Select: Consulta de entidades ProcessProgressArchive
+    """
+    return select(ProcessProgressArchive).where(ProcessProgressArchive.id_request.in_(request_ids))
+
+
+@dataclass
+class ArchiveReport:
+    """Resultado de um arquivamento.
+
+    Attributes:
+        requests: Solicitações movidas para as tabelas frias
+        processes: Processos movidos
+        progress_archived: Entradas de progresso arquivadas (uma por processo)
+        progress_removed: Entradas de progresso removidas de tb_process_progress
+        batches: Lotes (transações) executados
+        elapsed_seconds: Duração total do arquivamento
+    """
+
+    requests: int = 0
+    processes: int = 0
+    progress_archived: int = 0
+    progress_removed: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class ArchiveService:
+    """Move as solicitações finalizadas para as tabelas frias em lotes limitados."""
+
+    def __init__(self, db: Session, batch_size: int = ARCHIVE_BATCH_SIZE,
+                 older_than_days: int = ARCHIVE_AFTER_DAYS):
+        """Inicializa o serviço.
+
+        Args:
+            db: Sessão do banco de dados; cada lote é confirmado nela
+            batch_size: Solicitações movidas por lote (no máximo 1000)
+            older_than_days: Dias sem alteração do rollup até o arquivamento
+        """
+        self.db = db
+        self.batch_size = min(batch_size, 1000)
+        self.older_than_days = older_than_days
+
+    def archive(self, now: Optional[datetime] = None, max_batches: Optional[int] = None,
+                coordinator: Optional["JobCoordinator"] = None,
+                interval: Optional[float] = None) -> ArchiveReport:
+        """Arquiva as solicitações finalizadas, lote a lote, até não haver candidatas.
+
+        Args:
+            now: Instante de referência; se None, o instante atual
+            max_batches: Quantidade máxima de lotes nesta execução; se None, sem limite
+            coordinator: Coordenador de jobs; se informado, só arquiva se este worker
+                adquirir o lock do job
+            interval: Com coordinator, intervalo mínimo entre execuções no cluster, em segundos
+
+        Returns:
+            ArchiveReport: Contagens e duração (vazio se outro worker executou o job)
+        """
+        if coordinator is not None:
+            report = coordinator.run_once(ARCHIVE_JOB, lambda: self._archive(now, max_batches), interval)
+            return report or ArchiveReport()
+        return self._archive(now, max_batches)
+
+    def _archive(self, now: Optional[datetime], max_batches: Optional[int]) -> ArchiveReport:
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=self.older_than_days)
+        report = ArchiveReport()
+        started = time.perf_counter()
+        after_id = 0
+
+        while max_batches is None or report.batches < max_batches:
+            request_ids = list(self.db.execute(
+                select_archive_candidates(cutoff, after_id, self.batch_size)
+            ).scalars())
+            if not request_ids:
+                commit_or_flush(self.db)
+                break
+            self.archive_batch(request_ids, now, report)
+            after_id = request_ids[-1]
+
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Arquivamento concluído em {report.elapsed_seconds:.3f}s: {report.requests} solicitações, "
+            f"{report.processes} processos e {report.progress_removed} entradas de progresso "
+            f"({report.progress_archived} arquivadas) em {report.batches} lotes"
+        )
+        return report
+
+    def archive_batch(self, request_ids: List[int], now: datetime, report: Optional[ArchiveReport] = None) -> ArchiveReport:
+        """Move um lote de solicitações para as tabelas frias em uma transação.
+
+        Args:
+            request_ids: IDs das solicitações, já selecionadas por select_archive_candidates
+            now: Instante gravado em dt_archived
+            report: Relatório a acumular; se None, um novo
+
+        Returns:
+            ArchiveReport: Relatório com as contagens do lote acumuladas
+        """
+        report = report or ArchiveReport()
+        try:
+            inserts = [self.db.execute(statement) for statement in build_archive_inserts(request_ids, now)]
+            deletes = [
+                self.db.execute(statement, execution_options={"synchronize_session": False})
+                for statement in build_archive_deletes(request_ids)
+            ]
+            commit_or_flush(self.db)
+        except Exception:
+            rollback_or_defer(self.db)
+            raise
+
+        report.progress_archived += inserts[2].rowcount
+        report.progress_removed += deletes[0].rowcount
+        report.processes += deletes[1].rowcount
+        report.requests += deletes[3].rowcount
+        report.batches += 1
+        return report
@@ -0,0 +1,606 @@
+"""
+Serviço assíncrono para gerenciamento de processos de anonimização.
+
+Contraparte assíncrona de ProcessService, baseada em AsyncSession. Mantém a mesma
+superfície de métodos e reutiliza as funções de montagem de instruções e as
+tabelas de transição de process_service, de modo que as duas implementações
+aplicam exatamente as mesmas regras.
+
+Classe:
+    AsyncProcessService: Gerencia operações relacionadas aos processos de anonimização.
+"""
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import read_only
+from app.models.models import Process, ProcessArchive, ProcessProgress, ProcessProgressArchive
+from app.services.archive_service import select_archived_processes, select_archived_progress
+from app.services.circuit_breaker import CircuitBreakerRegistry
+from app.services.progress_buffer import ProgressWriteBuffer
+from app.services.progress_events import queue_progress_event
+from app.services.status_rollup_service import lock_rollups_async, refresh_rollups_async
+from app.services.notification_outbox import build_outbox_insert
+from app.services.system_registry import SystemRegistry
+from app.services.unit_of_work import commit_or_flush_async, rollback_or_defer_async
+from app.services.structured_logging import get_event_logger
+from app.services.process_service import (
+    CLAIM_ATTEMPTS,
+    CLAIM_BATCH_SIZE,
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_RETRY_ATTEMPTS,
+    IN_CLAUSE_CHUNK_SIZE,
+    KEY_CLAUSE_CHUNK_SIZE,
+    OUTBOX_EVENTS,
+    PENDING_PAGE_SIZE,
+    REQUEST_TRANSITIONS,
+    RETRY_INTERVAL_ENV,
+    SCHEDULE_RESET_STATUSES,
+    VERIFY_TRANSITIONS,
+    ProcessService,
+    StatusUpdateResult,
+    UpdateOutcome,
+    build_attempt_rows,
+    build_claim_update,
+    build_lease_update,
+    build_scheduled_claim_update,
+    build_status_update,
+    get_notification_service,
+    parked_systems,
+    select_claim_candidates,
+    select_attempt_counts,
+    select_latest_progress,
+    select_leased_processes,
+    select_max_retry_attempts,
+    select_pending_processes_page,
+    select_process_exists,
+    select_processes_for_requests,
+)
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterable, Tuple, Union
+import logging
+import os
+import random
+
+logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
+
+
+class AsyncProcessService:
+    """Serviço assíncrono para gerenciamento de processos de anonimização."""
+
+    def __init__(self, db: AsyncSession, progress_buffer: Optional[ProgressWriteBuffer] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
+        """Inicializa o serviço de processos.
+
+        Args:
+            db: Sessão assíncrona do banco de dados
+            progress_buffer: Buffer write-behind para progresso; se None, cada atualização
+                de progresso é gravada e confirmada imediatamente
+            breakers: Circuit breakers do dispatcher; se informado, os processos de sistemas
+                com circuito aberto não são reivindicados
+        """
+        self.db = db
+        self.notification_service = get_notification_service()
+        self.progress_buffer = progress_buffer
+        self.breakers = breakers
+
+    async def create_process_entry(self, id_request: int, id_system_process: int,
+                                   id_system_requester: int, id_person: str, tp_document: str) -> Process:
+        """Cria uma nova entrada de processo para um sistema.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+            id_system_requester: ID do sistema solicitante
+            id_person: ID da pessoa
+            tp_document: Tipo de documento
+
+        Returns:
+            Process: Entrada de processo criada
+        """
+        process = Process(
+            id_request=id_request,
+            id_system_process=id_system_process,
+            id_system_requester=id_system_requester,
+            id_person=id_person,
+            tp_document=tp_document,
+            dt_system_verify=datetime.now(),
+            st_system_verify=0,  # Pendente
+            st_system_request=0   # Pendente
+        )
+
+        await lock_rollups_async(self.db, [id_request])
+        self.db.add(process)
+        await self.db.flush()
+        await refresh_rollups_async(self.db, [id_request])
+        if await commit_or_flush_async(self.db):
+            await self.db.refresh(process)
+
+        event_logger.info("process.created", id_request=id_request, id_system_process=id_system_process)
+
+        return process
+
+    async def get_process(self, id_request: int, id_system_process: int) -> Optional[Process]:
+        """Obtém um processo pelo ID da solicitação e ID do sistema.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+
+        Returns:
+            Optional[Process]: O processo, se encontrado, ou None
+        """
+        result = await self.db.execute(
+            select(Process).where(
+                and_(
+                    Process.id_request == id_request,
+                    Process.id_system_process == id_system_process
+                )
+            )
+        )
+        return result.scalars().first()
+
+    @read_only
+    async def get_processes_for_request(self, id_request: int) -> List[Union[Process, ProcessArchive]]:
+        """Obtém todos os processos para uma solicitação, recorrendo a tb_process_archive.
+
+        Args:
+            id_request: ID da solicitação
+
+        Returns:
+            List[Union[Process, ProcessArchive]]: Lista de processos para a solicitação
+        """
+        result = await self.db.execute(select(Process).where(Process.id_request == id_request))
+        processes = list(result.scalars())
+        if not processes:
+            result = await self.db.execute(select_archived_processes([id_request]))
+            return list(result.scalars())
+        return processes
+
+    @read_only
+    async def get_processes_for_requests(self, request_ids: List[int]) -> Dict[int, List[Union[Process, ProcessArchive]]]:
+        """Obtém os processos de várias solicitações em uma única consulta por lote de IDs.
+
+        As solicitações sem processos em tb_process são buscadas em tb_process_archive.
+
+        Args:
+            request_ids: IDs das solicitações
+
+        Returns:
+            Dict[int, List[Union[Process, ProcessArchive]]]: Processos agrupados por id_request
+        """
+        processes: Dict[int, List[Union[Process, ProcessArchive]]] = {id_request: [] for id_request in request_ids}
+        for query in (select_processes_for_requests, select_archived_processes):
+            missing = [id_request for id_request, found in processes.items() if not found]
+            for start in range(0, len(missing), IN_CLAUSE_CHUNK_SIZE):
+                chunk = missing[start:start + IN_CLAUSE_CHUNK_SIZE]
+                result = await self.db.execute(query(chunk))
+                for process in result.scalars():
+                    processes[process.id_request].append(process)
+        return processes
+
+    @read_only
+    async def get_pending_processes_page(self, after: Tuple[int, int] = (0, 0),
+                                         limit: int = PENDING_PAGE_SIZE) -> Tuple[List[Process], Optional[Tuple[int, int]]]:
+        """Obtém uma página de processos pendentes a partir de um cursor (keyset pela chave primária).
+
+        Args:
+            after: Última chave (id_request, id_system_process) já processada; (0, 0) para o início
+            limit: Quantidade máxima de processos na página
+
+        Returns:
+            Tuple[List[Process], Optional[Tuple[int, int]]]: Processos da página e o cursor
+            da próxima página, ou None se esta for a última
+        """
+        result = await self.db.execute(select_pending_processes_page(after, limit))
+        processes = list(result.scalars())
+        next_cursor = None
+        if len(processes) == limit:
+            next_cursor = (processes[-1].id_request, processes[-1].id_system_process)
+        return processes, next_cursor
+
+    async def iter_pending_processes(self, after: Tuple[int, int] = (0, 0),
+                                     chunk_size: int = PENDING_PAGE_SIZE) -> AsyncIterator[List[Process]]:
+        """Percorre os processos pendentes em blocos paginados por keyset, com memória constante.
+
+        Args:
+            after: Cursor inicial (id_request, id_system_process)
+            chunk_size: Quantidade de processos por bloco
+
+        Yields:
+            List[Process]: Bloco de processos pendentes, em ordem de chave primária
+        """
+        cursor: Optional[Tuple[int, int]] = after
+        while cursor is not None:
+            chunk, cursor = await self.get_pending_processes_page(cursor, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            for process in chunk:
+                if process in self.db:
+                    self.db.expunge(process)
+
+    async def claim_due_processes(self, worker_id: str, stage: str, batch_size: int = CLAIM_BATCH_SIZE,
+                                  lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                                  due_before: Optional[datetime] = None,
+                                  exclude_systems: Iterable[int] = ()) -> List[Process]:
+        """Reivindica atomicamente um lote de processos devidos para um worker.
+
+        Args:
+            worker_id: Identificador do worker (ver default_worker_id)
+            stage: Etapa de trabalho ("verify" ou "process")
+            batch_size: Quantidade máxima de processos reivindicados
+            lease_seconds: Duração do lease, em segundos
+            due_before: Último envio a partir do qual o processo ainda não está devido; se None,
+                usa o instante atual menos VERIFY_RETRY_INTERVAL ou PROCESS_RETRY_INTERVAL
+            exclude_systems: IDs de sistemas de processamento a ignorar, além dos de circuito
+                aberto em self.breakers
+
+        Returns:
+            List[Process]: Processos reivindicados pelo worker
+        """
+        exclude_systems = parked_systems(self.breakers, exclude_systems)
+        now = datetime.now()
+        if due_before is None:
+            retry_interval = float(os.getenv(RETRY_INTERVAL_ENV.get(stage, ""), "600"))
+            due_before = now - timedelta(seconds=retry_interval)
+        expires_at = now + timedelta(seconds=lease_seconds)
+        batch_size = min(batch_size, KEY_CLAUSE_CHUNK_SIZE)
+
+        keys: List[Tuple[int, int]] = []
+        claimed: List[Process] = []
+        try:
+            for _ in range(CLAIM_ATTEMPTS):
+                result = await self.db.execute(
+                    select_claim_candidates(stage, due_before, now, batch_size, exclude_systems)
+                )
+                keys = [tuple(row) for row in result]
+                if not keys:
+                    break
+
+                statement = build_claim_update(keys, worker_id, stage, due_before, now, expires_at)
+                if self.db.get_bind().dialect.update_returning:
+                    result = await self.db.execute(
+                        statement.returning(Process), execution_options={"synchronize_session": False}
+                    )
+                else:
+                    await self.db.execute(statement, execution_options={"synchronize_session": False})
+                    result = await self.db.execute(select_leased_processes(keys, worker_id))
+                claimed = list(result.scalars())
+                if claimed:
+                    break
+                await commit_or_flush_async(self.db)
+            await commit_or_flush_async(self.db)
+        except Exception:
+            await rollback_or_defer_async(self.db)
+            raise
+
+        if claimed:
+            event_logger.info("process.claimed", worker_id=worker_id, stage=stage, claimed=len(claimed))
+        return claimed
+
+    async def renew_leases(self, worker_id: str, keys: List[Tuple[int, int]],
+                           lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Prorroga os leases ainda válidos de um worker.
+
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) dos processos
+            lease_seconds: Nova duração do lease a partir de agora, em segundos
+
+        Returns:
+            int: Quantidade de leases prorrogados
+        """
+        now = datetime.now()
+        return await self._update_leases(
+            keys,
+            and_(Process.id_lease_owner == worker_id, Process.dt_lease_expires > now),
+            {"dt_lease_expires": now + timedelta(seconds=lease_seconds)}
+        )
+
+    async def release_leases(self, worker_id: str, keys: List[Tuple[int, int]]) -> int:
+        """Libera os leases de um worker, devolvendo os processos à fila.
+
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) dos processos
+
+        Returns:
+            int: Quantidade de leases liberados
+        """
+        return await self._update_leases(
+            keys,
+            Process.id_lease_owner == worker_id,
+            {"id_lease_owner": None, "dt_lease_expires": None}
+        )
+
+    async def _update_leases(self, keys: List[Tuple[int, int]], owner_condition, values: Dict[str, Any]) -> int:
+        updated = 0
+        for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+            chunk = keys[start:start + KEY_CLAUSE_CHUNK_SIZE]
+            result = await self.db.execute(
+                build_lease_update(chunk, owner_condition, values),
+                execution_options={"synchronize_session": False}
+            )
+            updated += result.rowcount
+        await commit_or_flush_async(self.db)
+        return updated
+
+    async def claim_scheduled_processes(self, worker_id: str, keys: List[Tuple[int, int]],
+                                        lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[Process]:
+        """Reivindica, pela chave, processos agendados cujo dt_next_attempt já venceu.
+
+        Chaves de sistemas com circuito aberto em self.breakers não são reivindicadas.
+
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) vencidas
+            lease_seconds: Duração do lease, em segundos
+
+        Returns:
+            List[Process]: Processos reivindicados pelo worker
+        """
+        parked = parked_systems(self.breakers)
+        if parked:
+            keys = [key for key in keys if key[1] not in parked]
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        claimed: List[Process] = []
+        try:
+            for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+                chunk = keys[start:start + KEY_CLAUSE_CHUNK_SIZE]
+                statement = build_scheduled_claim_update(chunk, worker_id, now, expires_at)
+                if self.db.get_bind().dialect.update_returning:
+                    result = await self.db.execute(
+                        statement.returning(Process), execution_options={"synchronize_session": False}
+                    )
+                else:
+                    await self.db.execute(statement, execution_options={"synchronize_session": False})
+                    result = await self.db.execute(select_leased_processes(chunk, worker_id))
+                claimed.extend(result.scalars())
+            await commit_or_flush_async(self.db)
+        except Exception:
+            await rollback_or_defer_async(self.db)
+            raise
+        return claimed
+
+    async def record_attempts(self, keys: List[Tuple[int, int]], stage: str,
+                              system_registry: Optional[SystemRegistry] = None,
+                              rng: Optional[random.Random] = None) -> List[Tuple[Tuple[int, int], Optional[datetime]]]:
+        """Registra uma tentativa de cada processo e agenda a próxima com backoff e jitter.
+
+        Args:
+            keys: Chaves (id_request, id_system_process) dos processos tentados
+            stage: Etapa ("verify" ou "process")
+            system_registry: Registro de sistemas; se None, os limites são lidos de tb_dom_system
+            rng: Gerador aleatório do jitter
+
+        Returns:
+            List[Tuple[Tuple[int, int], Optional[datetime]]]: Chave e próxima tentativa de cada
+            processo, para RetryScheduler.schedule
+        """
+        if not keys:
+            return []
+        system_ids = {id_system_process for _, id_system_process in keys}
+        if system_registry is not None:
+            max_attempts = {
+                id_system: system.max_retry_attempts
+                for id_system in system_ids
+                if (system := system_registry.get_by_id(id_system)) is not None
+            }
+        else:
+            result = await self.db.execute(select_max_retry_attempts(system_ids))
+            max_attempts = {
+                id_system: value if value is not None else DEFAULT_MAX_RETRY_ATTEMPTS
+                for id_system, value in result
+            }
+
+        now = datetime.now()
+        rows: List[Dict[str, Any]] = []
+        try:
+            for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+                current = await self.db.execute(select_attempt_counts(keys[start:start + KEY_CLAUSE_CHUNK_SIZE]))
+                rows.extend(build_attempt_rows(current, stage, max_attempts, now, rng))
+            if rows:
+                await self.db.execute(update(Process), rows)
+            await commit_or_flush_async(self.db)
+        except Exception:
+            await rollback_or_defer_async(self.db)
+            raise
+        return [((row["id_request"], row["id_system_process"]), row["dt_next_attempt"]) for row in rows]
+
+    async def update_verification_status(self, id_request: int, id_system_process: int,
+                                         st_system_verify: int,
+                                         ds_reason_verify_refuse: Optional[str] = None) -> StatusUpdateResult:
+        """Atualiza o status de verificação para um processo com um UPDATE compare-and-set.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+            st_system_verify: Status de verificação
+            ds_reason_verify_refuse: Motivo de recusa (se recusado)
+
+        Returns:
+            StatusUpdateResult: Resultado da atualização; avaliado como True somente se aplicada
+        """
+        values: Dict[str, Any] = {
+            "st_system_verify": st_system_verify,
+            "dt_system_verify_response": datetime.now()
+        }
+        if ds_reason_verify_refuse:
+            values["ds_reason_verify_refuse"] = ds_reason_verify_refuse
+
+        result = await self._compare_and_set(
+            id_request, id_system_process, Process.st_system_verify,
+            VERIFY_TRANSITIONS.get(st_system_verify, ()), values
+        )
+
+        if result:
+            event_logger.info("process.verify_updated", id_request=id_request, id_system_process=id_system_process,
+                              st_system_verify=st_system_verify)
+
+        return result
+
+    async def update_processing_status(self, id_request: int, id_system_process: int,
+                                       st_system_request: int) -> StatusUpdateResult:
+        """Atualiza o status de processamento para um processo com um UPDATE compare-and-set.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+            st_system_request: Status de processamento
+
+        Returns:
+            StatusUpdateResult: Resultado da atualização; avaliado como True somente se aplicada
+        """
+        values: Dict[str, Any] = {
+            "st_system_request": st_system_request,
+            "dt_system_conclusion": datetime.now()
+        }
+
+        result = await self._compare_and_set(
+            id_request, id_system_process, Process.st_system_request,
+            REQUEST_TRANSITIONS.get(st_system_request, ()), values
+        )
+
+        if result:
+            event_logger.info("process.request_updated", id_request=id_request, id_system_process=id_system_process,
+                              st_system_request=st_system_request)
+
+        return result
+
+    async def _compare_and_set(self, id_request: int, id_system_process: int, status_column,
+                               allowed_from: Tuple[int, ...], values: Dict[str, Any]) -> StatusUpdateResult:
+        """Versão assíncrona de ProcessService._compare_and_set."""
+        if allowed_from:
+            update_values = values
+            if values[status_column.key] in SCHEDULE_RESET_STATUSES[status_column.key]:
+                update_values = {**values, "qt_attempts": 0, "dt_next_attempt": None}
+            await lock_rollups_async(self.db, [id_request])
+            statement = build_status_update(id_request, id_system_process, status_column, allowed_from, update_values)
+            result = await self.db.execute(statement, execution_options={"synchronize_session": False})
+            if result.rowcount:
+                await refresh_rollups_async(self.db, [id_request])
+                await self.db.execute(build_outbox_insert(
+                    id_request, id_system_process, OUTBOX_EVENTS[status_column.key], values
+                ))
+                queue_progress_event(self.db, id_request, id_system_process, OUTBOX_EVENTS[status_column.key], values)
+                await commit_or_flush_async(self.db)
+                return StatusUpdateResult(UpdateOutcome.UPDATED, values)
+            await commit_or_flush_async(self.db)
+
+        process_exists = (await self.db.execute(select_process_exists(id_request, id_system_process))).scalar()
+        if not process_exists:
+            event_logger.error("process.not_found", id_request=id_request, id_system_process=id_system_process)
+            return StatusUpdateResult(UpdateOutcome.NOT_FOUND)
+
+        event_logger.warning("process.transition_rejected", id_request=id_request, id_system_process=id_system_process,
+                             column=status_column.key, value=values[status_column.key])
+        return StatusUpdateResult(UpdateOutcome.REJECTED)
+
+    async def update_process_progress(self, id_request: int, id_system_process: int,
+                                      progress_percentage: float, progress_message: Optional[str] = None) -> bool:
+        """Atualiza o progresso para um processo.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+            progress_percentage: Porcentagem de conclusão (0-100)
+            progress_message: Mensagem de progresso
+
+        Returns:
+            bool: True se atualizado (ou aceito pelo buffer write-behind), False caso contrário
+        """
+        buffer = self.progress_buffer
+        if buffer is None or not buffer.is_known((id_request, id_system_process)):
+            process_exists = (await self.db.execute(select_process_exists(id_request, id_system_process))).scalar()
+            if not process_exists:
+                event_logger.error("process.not_found", id_request=id_request, id_system_process=id_system_process)
+                return False
+
+        if buffer is not None:
+            buffer.add(id_request, id_system_process, progress_percentage, progress_message)
+            return True
+
+        progress = ProcessProgress(
+            id_request=id_request,
+            id_system_process=id_system_process,
+            dt_progress_update=datetime.now(),
+            progress_percentage=progress_percentage,
+            progress_message=progress_message
+        )
+
+        self.db.add(progress)
+        queue_progress_event(self.db, id_request, id_system_process, "progress", {
+            "dt_progress_update": progress.dt_progress_update,
+            "progress_percentage": progress_percentage,
+            "progress_message": progress_message
+        })
+        await commit_or_flush_async(self.db)
+
+        event_logger.info("process.progress_updated", id_request=id_request, id_system_process=id_system_process,
+                          progress_percentage=progress_percentage)
+
+        return True
+
+    @read_only
+    async def get_latest_progress(self, id_request: int,
+                                  id_system_process: int) -> Optional[Union[ProcessProgress, ProcessProgressArchive]]:
+        """Obtém o último progresso para um processo, recorrendo ao progresso final arquivado.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+
+        Returns:
+            Optional[Union[ProcessProgress, ProcessProgressArchive]]: O último progresso, se existir
+        """
+        result = await self.db.execute(
+            select(ProcessProgress).where(
+                and_(
+                    ProcessProgress.id_request == id_request,
+                    ProcessProgress.id_system_process == id_system_process
+                )
+            ).order_by(ProcessProgress.dt_progress_update.desc()).limit(1)
+        )
+        progress = result.scalars().first()
+        if progress is None:
+            result = await self.db.execute(
+                select(ProcessProgressArchive).where(
+                    and_(
+                        ProcessProgressArchive.id_request == id_request,
+                        ProcessProgressArchive.id_system_process == id_system_process
+                    )
+                ).limit(1)
+            )
+            return result.scalars().first()
+        return progress
+
+    @read_only
+    async def get_latest_progress_bulk(self, request_ids: List[int]) -> Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]]:
+        """Obtém o último progresso de cada processo de várias solicitações.
+
+        As solicitações sem progresso em tb_process_progress são buscadas em
+        tb_process_progress_archive.
+
+        Args:
+            request_ids: IDs das solicitações
+
+        Returns:
+            Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]]: Último progresso por
+            (id_request, id_system_process)
+        """
+        latest: Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]] = {}
+        missing = list(dict.fromkeys(request_ids))
+        for query in (select_latest_progress, select_archived_progress):
+            for start in range(0, len(missing), IN_CLAUSE_CHUNK_SIZE):
+                chunk = missing[start:start + IN_CLAUSE_CHUNK_SIZE]
+                result = await self.db.execute(query(chunk))
+                for progress in result.scalars():
+                    latest[(progress.id_request, progress.id_system_process)] = progress
+            found = {id_request for id_request, _ in latest}
+            missing = [id_request for id_request in missing if id_request not in found]
+        return latest
+
+    # Conversão pura, sem acesso ao banco: compartilhada com o serviço síncrono
+    get_status_text = ProcessService.get_status_text
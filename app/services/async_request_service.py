@@ -0,0 +1,311 @@
+"""
+Serviço assíncrono para gerenciamento de requisições de anonimização.
+
+Contraparte assíncrona de RequestService, baseada em AsyncSession, para que os
+endpoints do FastAPI não bloqueiem o event loop nem ocupem uma thread do
+threadpool a cada chamada ao banco. A superfície de métodos é a mesma do serviço
+síncrono, que continua disponível para scripts como init_test_db.py; as
+instruções SQL são montadas pelas mesmas funções de request_service.
+
+Classe:
+    AsyncRequestService: Gerencia operações relacionadas às requisições de anonimização.
+"""
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import read_only
+from app.models.models import Request, Process, RequestArchive, RequestStatus
+from app.models.schemas import RequestCreate
+from app.services.request_service import (
+    BULK_BATCH_SIZE,
+    PENDING_PAGE_SIZE,
+    REQUEST_DEDUPLICATION,
+    build_process_values,
+    build_request_values,
+    resolve_duplicates,
+    resolve_systems_from_registry,
+    select_archived_request,
+    select_existing_request,
+    select_existing_requests,
+    select_pending_requests_page,
+    select_processing_system_ids,
+    select_requester_ids,
+)
+from app.services.system_registry import SystemRegistry
+from app.services.unit_of_work import commit_or_flush_async, in_unit_of_work, rollback_or_defer_async
+from app.services.status_rollup_service import REQUEST_PENDING, build_new_rollup_values
+from app.services.structured_logging import get_event_logger
+from datetime import datetime
+from typing import Optional, List, AsyncIterator, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
+
+
+class AsyncRequestService:
+    """Serviço assíncrono para gerenciamento de requisições de anonimização."""
+
+    def __init__(self, db: AsyncSession, system_registry: Optional[SystemRegistry] = None,
+                 deduplicate: bool = REQUEST_DEDUPLICATION):
+        """Inicializa o serviço de requisições.
+
+        Args:
+            db: Sessão assíncrona do banco de dados
+            system_registry: Registro em memória de tb_dom_system; se None, os sistemas
+                são consultados no banco a cada chamada
+            deduplicate: Se True, submissões sem chave de idempotência da mesma pessoa e
+                sistema solicitante reaproveitam a requisição pendente existente
+        """
+        self.db = db
+        self.system_registry = system_registry
+        self.deduplicate = deduplicate
+
+    async def create_request(self, request_data: RequestCreate) -> Request:
+        """Cria uma nova requisição de anonimização, sem deduplicação (ver RequestService.create_request).
+
+        Args:
+            request_data: Dados da requisição a ser criada
+
+        Returns:
+            Request: A requisição criada
+        """
+        new_request = await self._add_request(request_data)
+        if await commit_or_flush_async(self.db):
+            await self.db.refresh(new_request)
+        return new_request
+
+    async def _add_request(self, request_data: RequestCreate) -> Request:
+        new_request = Request(**build_request_values(request_data, datetime.now()))
+        self.db.add(new_request)
+        await self.db.flush()
+        self.db.add(RequestStatus(**build_new_rollup_values(new_request.id_request, 0)))
+        return new_request
+
+    async def find_existing_request(self, request_data: RequestCreate) -> Optional[Union[Request, RequestArchive]]:
+        """Busca a requisição já existente para uma submissão (ver select_existing_request).
+
+        Com chave de idempotência, recorre a tb_request_archive se a requisição não
+        estiver em tb_request (ver select_archived_request).
+
+        Args:
+            request_data: Dados da requisição
+
+        Returns:
+            Optional[Union[Request, RequestArchive]]: A requisição existente (ativa ou arquivada), ou None
+        """
+        if not request_data.idempotency_key and not self.deduplicate:
+            return None
+        existing = (await self.db.execute(select_existing_request(request_data))).scalars().first()
+        if existing is None and request_data.idempotency_key:
+            existing = (await self.db.execute(select_archived_request(request_data))).scalars().first()
+        return existing
+
+    async def create_or_get_request(self, request_data: RequestCreate) -> Tuple[Union[Request, RequestArchive], bool]:
+        """Cria uma requisição, a menos que a submissão seja duplicata de uma existente.
+
+        O chamador só deve criar os processos da requisição quando ela tiver sido criada agora.
+
+        Args:
+            request_data: Dados da requisição
+
+        Returns:
+            Tuple[Union[Request, RequestArchive], bool]: A requisição (ativa ou arquivada) e
+            True se ela foi criada agora
+        """
+        existing = await self.find_existing_request(request_data)
+        if existing is not None:
+            event_logger.info("request.duplicate_resolved", nm_system=request_data.nm_system, id_request=existing.id_request)
+            return existing, False
+
+        try:
+            new_request = await self._add_request(request_data)
+        except IntegrityError:
+            # Outra submissão com a mesma chave de idempotência venceu a corrida
+            if in_unit_of_work(self.db) or not request_data.idempotency_key:
+                raise
+            await self.db.rollback()
+            existing = await self.find_existing_request(request_data)
+            if existing is None:
+                raise
+            return existing, False
+
+        if await commit_or_flush_async(self.db):
+            await self.db.refresh(new_request)
+        return new_request, True
+
+    @read_only
+    async def get_request_by_id(self, request_id: int) -> Optional[Union[Request, RequestArchive]]:
+        """Obtém uma requisição pelo ID, recorrendo a tb_request_archive se não estiver em tb_request.
+
+        Args:
+            request_id: ID da requisição a ser obtida
+
+        Returns:
+            Optional[Union[Request, RequestArchive]]: A requisição (ativa ou arquivada), se encontrada, ou None
+        """
+        request = await self.db.get(Request, request_id)
+        if request is None:
+            return await self.db.get(RequestArchive, request_id)
+        return request
+
+    async def update_request(self, request: Request) -> Request:
+        """Atualiza uma requisição existente.
+
+        Args:
+            request: Objeto Request com os dados atualizados
+
+        Returns:
+            Request: A requisição atualizada
+        """
+        if await commit_or_flush_async(self.db):
+            await self.db.refresh(request)
+        return request
+
+    @read_only
+    async def get_pending_requests(self) -> List[Request]:
+        """Obtém requisições pendentes.
+
+        Returns:
+            List[Request]: Lista de requisições pendentes
+        """
+        result = await self.db.execute(
+            select(Request).where(Request.st_request == REQUEST_PENDING).order_by(Request.id_request)
+        )
+        return list(result.scalars())
+
+    @read_only
+    async def get_pending_requests_page(self, after_id: int = 0,
+                                        limit: int = PENDING_PAGE_SIZE) -> Tuple[List[Request], Optional[int]]:
+        """Obtém uma página de requisições pendentes a partir de um cursor (keyset por id_request).
+
+        Args:
+            after_id: Último id_request já processado (cursor); 0 para começar do início
+            limit: Quantidade máxima de requisições na página
+
+        Returns:
+            Tuple[List[Request], Optional[int]]: Requisições da página e o cursor da próxima
+            página, ou None se esta for a última
+        """
+        result = await self.db.execute(select_pending_requests_page(after_id, limit))
+        requests = list(result.scalars())
+        next_cursor = requests[-1].id_request if len(requests) == limit else None
+        return requests, next_cursor
+
+    async def iter_pending_requests(self, after_id: int = 0,
+                                    chunk_size: int = PENDING_PAGE_SIZE) -> AsyncIterator[List[Request]]:
+        """Percorre as requisições pendentes em blocos paginados por keyset, com memória constante.
+
+        Args:
+            after_id: Cursor inicial (último id_request já processado)
+            chunk_size: Quantidade de requisições por bloco
+
+        Yields:
+            List[Request]: Bloco de requisições pendentes, em ordem de id_request
+        """
+        cursor: Optional[int] = after_id
+        while cursor is not None:
+            chunk, cursor = await self.get_pending_requests_page(cursor, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            for request in chunk:
+                if request in self.db:
+                    self.db.expunge(request)
+
+    async def create_requests_bulk(self, requests_data: List[RequestCreate],
+                                   batch_size: int = BULK_BATCH_SIZE) -> List[int]:
+        """Cria um lote de requisições e o produto cartesiano de processos em uma única transação.
+
+        Args:
+            requests_data: Lista de requisições a serem criadas
+            batch_size: Quantidade de requisições por instrução de INSERT
+
+        Returns:
+            List[int]: IDs das requisições, na mesma ordem de requests_data
+
+        Raises:
+            ValueError: Se algum nm_system não estiver cadastrado em tb_dom_system
+        """
+        return (await self.create_or_get_requests_bulk(requests_data, batch_size))[0]
+
+    async def create_or_get_requests_bulk(self, requests_data: List[RequestCreate],
+                                          batch_size: int = BULK_BATCH_SIZE) -> Tuple[List[int], int]:
+        """Cria as requisições novas de um lote e resolve as duplicatas para as existentes.
+
+        Args:
+            requests_data: Lista de requisições a serem criadas
+            batch_size: Quantidade de requisições por instrução de INSERT
+
+        Returns:
+            Tuple[List[int], int]: IDs das requisições, na mesma ordem de requests_data, e
+            quantidade de requisições criadas
+
+        Raises:
+            ValueError: Se algum nm_system não estiver cadastrado em tb_dom_system
+        """
+        if not requests_data:
+            return [], 0
+
+        system_names = {item.nm_system for item in requests_data}
+        if self.system_registry is not None:
+            requester_ids, processing_system_ids = resolve_systems_from_registry(self.system_registry, system_names)
+        else:
+            requester_ids = dict((await self.db.execute(select_requester_ids(system_names))).all())
+            processing_system_ids = (await self.db.execute(select_processing_system_ids())).scalars().all()
+        unknown_systems = system_names - requester_ids.keys()
+        if unknown_systems:
+            raise ValueError(f"Sistemas não encontrados: {', '.join(sorted(unknown_systems))}")
+
+        now = datetime.now()
+        request_ids: List[int] = []
+        created = 0
+        insert_requests = insert(Request).returning(Request.id_request, sort_by_parameter_order=True)
+
+        try:
+            for start in range(0, len(requests_data), batch_size):
+                chunk = requests_data[start:start + batch_size]
+                existing_rows = []
+                for statement in select_existing_requests(chunk, self.deduplicate):
+                    existing_rows.extend(await self.db.execute(statement))
+                existing_ids, representatives = resolve_duplicates(chunk, existing_rows, self.deduplicate)
+                new_indexes = [
+                    index for index, id_request in enumerate(existing_ids)
+                    if id_request is None and representatives[index] == index
+                ]
+                new_items = [chunk[index] for index in new_indexes]
+                if not new_items:
+                    request_ids.extend(existing_ids)
+                    continue
+
+                result = await self.db.execute(
+                    insert_requests,
+                    [build_request_values(item, now) for item in new_items]
+                )
+                chunk_ids = result.scalars().all()
+                inserted = dict(zip(new_indexes, chunk_ids))
+                request_ids.extend(
+                    id_request if id_request is not None else inserted[representatives[index]]
+                    for index, id_request in enumerate(existing_ids)
+                )
+                created += len(chunk_ids)
+
+                process_rows = build_process_values(
+                    chunk_ids, new_items, requester_ids, processing_system_ids, now
+                )
+                if process_rows:
+                    await self.db.execute(insert(Process), process_rows)
+                await self.db.execute(
+                    insert(RequestStatus),
+                    [build_new_rollup_values(id_request, len(processing_system_ids)) for id_request in chunk_ids]
+                )
+
+            await commit_or_flush_async(self.db)
+        except Exception:
+            await rollback_or_defer_async(self.db)
+            raise
+
+        if created < len(requests_data):
+            event_logger.info("request.bulk_duplicates_resolved", duplicates=len(requests_data) - created)
+        return request_ids, created
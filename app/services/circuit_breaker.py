@@ -0,0 +1,316 @@
+"""
+Circuit breaker e limite de concorrência adaptativo por sistema de processamento.
+
+Cada sistema (DomSystem.id_dom_system) tem um breaker com três estados:
+
+    closed: chamadas liberadas; taxa de erro e p95 de latência avaliados em uma
+        janela das últimas chamadas. Ao exceder um dos limites, abre o circuito.
+    open: chamadas recusadas sem tocar a rede; os processos do sistema ficam
+        estacionados (ver CircuitBreakerRegistry.open_systems). Após open_seconds,
+        passa a half-open.
+    half-open: poucas chamadas de sonda são liberadas; se todas tiverem sucesso o
+        circuito fecha, e à primeira falha (ou sonda acima do limite de p95) volta a abrir.
+
+O limite de concorrência de cada sistema segue AIMD: cresce de forma aditiva a cada
+chamada bem-sucedida dentro da latência alvo e é multiplicado por decrease_factor
+a cada falha ou chamada lenta.
+
+Classes:
+    BreakerState: Estados do circuito.
+    BreakerConfig: Limites e parâmetros dos breakers.
+    CircuitBreaker: Breaker e limite adaptativo de um sistema.
+    CircuitBreakerRegistry: Breakers de todos os sistemas, com métricas de transição.
+
+As transições e o estado atual de cada sistema também são exportados em GET /metrics
+(request_manager_circuit_breaker_transitions_total e request_manager_circuit_breaker_state).
+
+Funções:
+    create_breaker_registry_from_env: Cria o registro com a configuração das variáveis de ambiente.
+"""
+
+from app.services.instrumentation import metrics
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, List, Dict, Any, Callable, Deque, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    """Estados do circuito de um sistema."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+# Valor de cada estado no gauge request_manager_circuit_breaker_state
+STATE_METRIC_VALUES: Dict[BreakerState, int] = {
+    BreakerState.CLOSED: 0,
+    BreakerState.HALF_OPEN: 1,
+    BreakerState.OPEN: 2
+}
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    """Limites e parâmetros dos breakers.
+
+    Attributes:
+        window_size: Chamadas consideradas na taxa de erro e no p95
+        min_calls: Chamadas mínimas na janela antes de avaliar os limites
+        error_rate_threshold: Taxa de erro (0-1) que abre o circuito
+        latency_p95_threshold: p95 de latência (segundos) que abre o circuito; None desabilita
+        open_seconds: Tempo em open antes de liberar sondas
+        half_open_calls: Sondas bem-sucedidas necessárias para fechar o circuito
+        min_limit: Menor limite de concorrência
+        max_limit: Maior limite de concorrência
+        latency_target: Latência (segundos) acima da qual a chamada reduz o limite; None usa
+            latency_p95_threshold
+        decrease_factor: Fator multiplicativo aplicado ao limite em falhas e chamadas lentas
+    """
+
+    window_size: int = 50
+    min_calls: int = 20
+    error_rate_threshold: float = 0.5
+    latency_p95_threshold: Optional[float] = None
+    open_seconds: float = 30.0
+    half_open_calls: int = 3
+    min_limit: int = 1
+    max_limit: int = 10
+    latency_target: Optional[float] = None
+    decrease_factor: float = 0.5
+
+
+class CircuitBreaker:
+    """Circuit breaker e limite de concorrência AIMD de um sistema."""
+
+    def __init__(self, id_system: int, config: BreakerConfig,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_transition: Optional[Callable[[int, BreakerState, BreakerState], None]] = None):
+        """Inicializa o breaker fechado, com o limite de concorrência no máximo.
+
+        Args:
+            id_system: ID do sistema (DomSystem.id_dom_system)
+            config: Limites e parâmetros
+            clock: Relógio monotônico, em segundos
+            on_transition: Chamado a cada mudança de estado com (id_system, anterior, novo)
+        """
+        self.id_system = id_system
+        self.config = config
+        self.clock = clock
+        self.on_transition = on_transition
+
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=config.window_size)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._limit = float(config.max_limit)
+
+        self.rejected = 0
+
+    @property
+    def state(self) -> BreakerState:
+        """Estado atual, passando de open a half-open quando open_seconds expira."""
+        with self._lock:
+            self._expire_open()
+            return self._state
+
+    @property
+    def limit(self) -> int:
+        """Limite de concorrência atual."""
+        return int(self._limit)
+
+    def _transition(self, new_state: BreakerState) -> None:
+        previous = self._state
+        self._state = new_state
+        if new_state == BreakerState.OPEN:
+            self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if new_state == BreakerState.CLOSED:
+            self._window.clear()
+        logger.warning(f"Circuito do sistema {self.id_system}: {previous.value} -> {new_state.value}")
+        if self.on_transition is not None:
+            self.on_transition(self.id_system, previous, new_state)
+
+    def _expire_open(self) -> None:
+        if self._state == BreakerState.OPEN and self.clock() - self._opened_at >= self.config.open_seconds:
+            self._transition(BreakerState.HALF_OPEN)
+
+    def allow_request(self) -> bool:
+        """Indica se uma chamada pode ser feita agora; em half-open, reserva uma sonda.
+
+        Returns:
+            bool: True se a chamada está liberada
+        """
+        with self._lock:
+            self._expire_open()
+            if self._state == BreakerState.CLOSED:
+                return True
+            if self._state == BreakerState.HALF_OPEN and self._probes_in_flight < self.config.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Registra o resultado de uma chamada liberada.
+
+        Args:
+            ok: True se o sistema respondeu sem erro
+            latency: Duração da chamada, em segundos
+        """
+        config = self.config
+        target = config.latency_target if config.latency_target is not None else config.latency_p95_threshold
+        slow = target is not None and latency > target
+
+        with self._lock:
+            if ok and not slow:
+                self._limit = min(float(config.max_limit), self._limit + 1.0 / max(self._limit, 1.0))
+            else:
+                self._limit = max(float(config.min_limit), self._limit * config.decrease_factor)
+
+            self._window.append((ok, latency))
+
+            if self._state == BreakerState.HALF_OPEN:
+                too_slow = config.latency_p95_threshold is not None and latency > config.latency_p95_threshold
+                if not ok or too_slow:
+                    self._transition(BreakerState.OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= config.half_open_calls:
+                    self._transition(BreakerState.CLOSED)
+                return
+
+            if self._state == BreakerState.CLOSED and len(self._window) >= config.min_calls:
+                if self._error_rate() >= config.error_rate_threshold:
+                    self._transition(BreakerState.OPEN)
+                elif config.latency_p95_threshold is not None and self._latency_p95() > config.latency_p95_threshold:
+                    self._transition(BreakerState.OPEN)
+
+    def _error_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(1 for ok, _ in self._window if not ok) / len(self._window)
+
+    def _latency_p95(self) -> float:
+        if not self._window:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._window)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna o estado e as métricas do breaker.
+
+        Returns:
+            Dict[str, Any]: Estado, limite, taxa de erro, p95, chamadas na janela e recusas
+        """
+        with self._lock:
+            self._expire_open()
+            return {
+                "state": self._state.value,
+                "limit": int(self._limit),
+                "error_rate": round(self._error_rate(), 4),
+                "latency_p95": round(self._latency_p95(), 4),
+                "window_calls": len(self._window),
+                "rejected": self.rejected
+            }
+
+
+class CircuitBreakerRegistry:
+    """Breakers por sistema, criados sob demanda, com contadores de transição."""
+
+    def __init__(self, config: Optional[BreakerConfig] = None, clock: Callable[[], float] = time.monotonic):
+        """Inicializa o registro vazio.
+
+        Args:
+            config: Limites e parâmetros aplicados a todos os breakers
+            clock: Relógio monotônico, em segundos
+        """
+        self.config = config or BreakerConfig()
+        self.clock = clock
+        self._breakers: Dict[int, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.transitions: Dict[str, int] = {}
+
+    def get(self, id_system: int) -> CircuitBreaker:
+        """Obtém o breaker de um sistema, criando-o fechado na primeira chamada.
+
+        Args:
+            id_system: ID do sistema
+
+        Returns:
+            CircuitBreaker: Breaker do sistema
+        """
+        breaker = self._breakers.get(id_system)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(id_system)
+                if breaker is None:
+                    breaker = CircuitBreaker(id_system, self.config, self.clock, self._count_transition)
+                    self._breakers[id_system] = breaker
+                    metrics.breaker_state.set((id_system,), STATE_METRIC_VALUES[BreakerState.CLOSED])
+        return breaker
+
+    def _count_transition(self, id_system: int, previous: BreakerState, new_state: BreakerState) -> None:
+        key = f"{previous.value}->{new_state.value}"
+        with self._lock:
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+        metrics.breaker_transitions.inc((id_system, previous.value, new_state.value))
+        metrics.breaker_state.set((id_system,), STATE_METRIC_VALUES[new_state])
+
+    def open_systems(self) -> List[int]:
+        """Lista os sistemas com circuito aberto, cujos processos devem ficar estacionados.
+
+        Sistemas em half-open não são listados: suas sondas decidem se o circuito fecha.
+
+        Returns:
+            List[int]: IDs dos sistemas com circuito aberto
+        """
+        return [id_system for id_system, breaker in list(self._breakers.items())
+                if breaker.state == BreakerState.OPEN]
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna as métricas de todos os breakers e os contadores de transição.
+
+        Returns:
+            Dict[str, Any]: Métricas por sistema ("systems") e transições por tipo ("transitions")
+        """
+        with self._lock:
+            transitions = dict(self.transitions)
+        return {
+            "systems": {id_system: breaker.snapshot() for id_system, breaker in list(self._breakers.items())},
+            "transitions": transitions
+        }
+
+
+def create_breaker_registry_from_env(max_limit: int) -> Optional[CircuitBreakerRegistry]:
+    """Cria o registro de breakers se OUTBOUND_CIRCUIT_BREAKER estiver habilitado.
+
+    Args:
+        max_limit: Maior limite de concorrência por sistema
+
+    Returns:
+        Optional[CircuitBreakerRegistry]: O registro, ou None se desabilitado
+    """
+    if os.getenv("OUTBOUND_CIRCUIT_BREAKER", "True").lower() not in ("1", "true", "yes"):
+        return None
+
+    latency_p95 = os.getenv("BREAKER_LATENCY_P95")
+    return CircuitBreakerRegistry(BreakerConfig(
+        window_size=int(os.getenv("BREAKER_WINDOW", "50")),
+        min_calls=int(os.getenv("BREAKER_MIN_CALLS", "20")),
+        error_rate_threshold=float(os.getenv("BREAKER_ERROR_RATE", "0.5")),
+        latency_p95_threshold=float(latency_p95) if latency_p95 else None,
+        open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+        half_open_calls=int(os.getenv("BREAKER_HALF_OPEN_CALLS", "3")),
+        max_limit=max_limit
+    ))
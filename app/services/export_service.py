@@ -0,0 +1,357 @@
+"""
+Exportação em streaming das solicitações com os processos e o histórico de progresso.
+
+Percorre tb_request, tb_process e tb_process_progress em uma única consulta ordenada
+(LEFT OUTER JOIN, uma linha por entrada de progresso) com cursor no servidor
+(stream_results / yield_per), achata ct_payload em colunas payload.* e grava NDJSON
+ou CSV, opcionalmente comprimido em gzip, em blocos de bytes. Nenhuma etapa acumula
+as linhas: a memória fica constante mesmo em exportações de dezenas de milhões de
+linhas.
+
+As solicitações arquivadas (app.services.archive_service) entram na mesma instrução,
+com UNION ALL das tabelas quentes e frias. O arquivamento move cada lote em uma
+transação, então uma única instrução (um só snapshot: MVCC no PostgreSQL e no SQLite
+em WAL, READ_COMMITTED_SNAPSHOT no SQL Server) enxerga cada solicitação em exatamente
+uma das tabelas. Com duas passagens, uma solicitação arquivada entre elas sairia
+duplicada (ou, conforme o isolamento, omitida).
+
+Classes:
+    ExportService: Exporta as solicitações de um período em NDJSON ou CSV.
+
+Funções:
+    select_request_export: Monta a consulta ordenada de solicitações, processos e progresso.
+    select_full_export: Monta a consulta ordenada das tabelas quentes e frias em uma só instrução.
+    flatten_payload: Achata ct_payload em colunas payload.*.
+    build_export_record: Converte uma linha da consulta em um registro da exportação.
+    iter_ndjson: Serializa os registros em NDJSON, em blocos de bytes.
+    iter_csv: Serializa os registros em CSV, em blocos de bytes.
+    iter_gzip: Comprime um fluxo de blocos de bytes em gzip.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, literal, select, union_all, Select
+from sqlalchemy.engine import Result
+from app.db.routing import read_only
+from app.models.models import (
+    Process,
+    ProcessArchive,
+    ProcessProgress,
+    ProcessProgressArchive,
+    Request,
+    RequestArchive
+)
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Linhas buscadas por ida ao banco (yield_per) e serializadas por bloco de bytes; blocos
+# maiores só aumentam o pico de memória (bench_export --chunk-size)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Colunas fixas de cada registro, na ordem do CSV
+EXPORT_COLUMNS = [
+    "id_request", "dt_register", "nm_system", "st_request", "archived",
+    "id_system_process", "id_system_requester", "st_system_verify", "dt_system_verify",
+    "dt_system_verify_response", "ds_reason_verify_refuse", "st_system_request",
+    "dt_system_request", "dt_system_conclusion", "st_system_process",
+    "id_process_progress", "dt_progress_update", "progress_percentage", "progress_message"
+]
+
+# Chaves de ct_payload exportadas como colunas no CSV (o NDJSON leva todas)
+EXPORT_PAYLOAD_FIELDS = ("id_person", "tp_document")
+
+PAYLOAD_PREFIX = "payload"
+
+_PROCESS_COLUMNS = [
+    "id_system_process", "id_system_requester", "st_system_verify", "dt_system_verify",
+    "dt_system_verify_response", "ds_reason_verify_refuse", "st_system_request",
+    "dt_system_request", "dt_system_conclusion", "st_system_process"
+]
+_PROGRESS_COLUMNS = ["id_process_progress", "dt_progress_update", "progress_percentage", "progress_message"]
+
+
+def _select_export_rows(dt_start: Optional[datetime], dt_end: Optional[datetime], archived: bool) -> Select:
+    """Consulta sem ordenação das linhas de exportação das tabelas quentes ou frias."""
+    if archived:
+        request, process, progress = RequestArchive, ProcessArchive, ProcessProgressArchive
+    else:
+        request, process, progress = Request, Process, ProcessProgress
+
+    conditions = []
+    if dt_start is not None:
+        conditions.append(request.dt_register >= dt_start)
+    if dt_end is not None:
+        conditions.append(request.dt_register < dt_end)
+
+    return (
+        select(
+            request.id_request,
+            request.dt_register,
+            request.nm_system,
+            request.st_request,
+            request.ct_payload,
+            literal(archived).label("archived"),
+            *(getattr(process, name) for name in _PROCESS_COLUMNS),
+            *(getattr(progress, name) for name in _PROGRESS_COLUMNS)
+        )
+        .outerjoin(process, process.id_request == request.id_request)
+        .outerjoin(
+            progress,
+            and_(
+                progress.id_request == process.id_request,
+                progress.id_system_process == process.id_system_process
+            )
+        )
+        .where(*conditions)
+    )
+
+
+def _order_export(statement: Select) -> Select:
+    columns = statement.selected_columns
+    return statement.order_by(
+        columns.id_request, columns.id_system_process, columns.dt_progress_update, columns.id_process_progress
+    )
+
+
+def select_request_export(dt_start: Optional[datetime] = None, dt_end: Optional[datetime] = None,
+                          archived: bool = False) -> Select:
+    """Monta a consulta ordenada de solicitações, processos e histórico de progresso de um período.
+
+    Uma linha por entrada de progresso; processos sem progresso e solicitações sem
+    processos aparecem uma vez, com as colunas ausentes nulas. A ordenação
+    (id_request, id_system_process, dt_progress_update) agrupa cada solicitação e
+    cada processo em linhas consecutivas.
+
+    Args:
+        dt_start: Início do período de dt_register (inclusivo); se None, sem limite
+        dt_end: Fim do período de dt_register (exclusivo); se None, sem limite
+        archived: Se True, consulta as tabelas de arquivo em vez das tabelas quentes
+
+    Returns:
+        Select: Consulta das colunas de EXPORT_COLUMNS e de ct_payload
+    """
+    return _order_export(_select_export_rows(dt_start, dt_end, archived))
+
+
+def select_full_export(dt_start: Optional[datetime] = None, dt_end: Optional[datetime] = None) -> Select:
+    """Monta a consulta das tabelas quentes e frias de um período em uma única instrução.
+
+    UNION ALL de select_request_export nas tabelas quentes e nas de arquivo, com a mesma
+    ordenação: solicitações ativas e arquivadas saem intercaladas por id_request. Cada
+    ramo percorre a chave primária das próprias tabelas, então o banco pode intercalar
+    os dois fluxos já ordenados.
+
+    Args:
+        dt_start: Início do período de dt_register (inclusivo); se None, sem limite
+        dt_end: Fim do período de dt_register (exclusivo); se None, sem limite
+
+    Returns:
+        Select: Consulta das colunas de EXPORT_COLUMNS e de ct_payload
+    """
+    # O SQLite não aceita ORDER BY por nome de coluna direto no UNION ALL
+    rows = union_all(
+        _select_export_rows(dt_start, dt_end, False),
+        _select_export_rows(dt_start, dt_end, True)
+    ).subquery()
+    return _order_export(select(rows))
+
+
+def flatten_payload(payload: Any, prefix: str = PAYLOAD_PREFIX) -> Dict[str, Any]:
+    """Achata ct_payload em colunas, com as chaves aninhadas unidas por ponto.
+
+    Args:
+        payload: Conteúdo de ct_payload (dicionário, lista ou valor simples)
+        prefix: Prefixo das colunas
+
+    Returns:
+        Dict[str, Any]: Colunas "payload.chave[.subchave]"; listas são serializadas em JSON
+    """
+    if isinstance(payload, dict):
+        flat: Dict[str, Any] = {}
+        for key, value in payload.items():
+            flat.update(flatten_payload(value, f"{prefix}.{key}"))
+        return flat
+    if isinstance(payload, list):
+        return {prefix: json.dumps(payload, ensure_ascii=False, default=str)}
+    return {prefix: payload}
+
+
+def build_export_record(row: Any) -> Dict[str, Any]:
+    """Converte uma linha de select_request_export ou select_full_export em um registro da exportação.
+
+    Args:
+        row: Linha da consulta
+
+    Returns:
+        Dict[str, Any]: Colunas de EXPORT_COLUMNS seguidas das colunas payload.*
+    """
+    mapping = row._mapping
+    record = {column: mapping[column] for column in EXPORT_COLUMNS}
+    # Alguns drivers devolvem a constante de "archived" como inteiro
+    record["archived"] = bool(record["archived"])
+    payload = mapping["ct_payload"]
+    if payload is not None:
+        record.update(flatten_payload(payload))
+    return record
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Serializa os registros em NDJSON (um objeto JSON por linha), em blocos de bytes.
+
+    Args:
+        records: Registros da exportação
+        chunk_size: Registros por bloco
+
+    Yields:
+        bytes: Bloco de linhas codificadas em UTF-8
+    """
+    lines: List[str] = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+        if len(lines) >= chunk_size:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def iter_csv(records: Iterable[Dict[str, Any]], payload_fields: Sequence[str] = EXPORT_PAYLOAD_FIELDS,
+             chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Serializa os registros em CSV, com cabeçalho, em blocos de bytes.
+
+    As colunas são fixas (EXPORT_COLUMNS e as chaves de payload_fields), de modo que o
+    cabeçalho é gravado antes da primeira linha; outras chaves de ct_payload são ignoradas.
+
+    Args:
+        records: Registros da exportação
+        payload_fields: Chaves de ct_payload exportadas (aninhadas unidas por ponto)
+        chunk_size: Registros por bloco
+
+    Yields:
+        bytes: Bloco de linhas codificadas em UTF-8
+    """
+    fieldnames = EXPORT_COLUMNS + [f"{PAYLOAD_PREFIX}.{field}" for field in payload_fields]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for record in records:
+        writer.writerow(record)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Comprime um fluxo de blocos de bytes em gzip, sem acumular a saída.
+
+    Args:
+        chunks: Blocos de bytes
+        level: Nível de compressão (1 a 9)
+
+    Yields:
+        bytes: Blocos do arquivo gzip
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class ExportService:
+    """Exporta as solicitações de um período, com processos e progresso, em streaming."""
+
+    def __init__(self, db: Session, chunk_size: int = EXPORT_CHUNK_SIZE):
+        """Inicializa o serviço.
+
+        Args:
+            db: Sessão do banco de dados; deve permanecer aberta durante a exportação
+            chunk_size: Linhas buscadas por ida ao banco e serializadas por bloco
+        """
+        self.db = db
+        self.chunk_size = chunk_size
+
+    @read_only
+    def _execute(self, statement: Select) -> Result:
+        # A consulta é executada aqui (na réplica, se configurada); as linhas são lidas depois, sob demanda
+        return self.db.execute(
+            statement, execution_options={"stream_results": True, "yield_per": self.chunk_size}
+        )
+
+    def iter_records(self, dt_start: Optional[datetime] = None, dt_end: Optional[datetime] = None,
+                     include_archived: bool = True) -> Iterator[Dict[str, Any]]:
+        """Percorre os registros da exportação de um período, sem acumulá-los.
+
+        Args:
+            dt_start: Início do período de dt_register (inclusivo); se None, sem limite
+            dt_end: Fim do período de dt_register (exclusivo); se None, sem limite
+            include_archived: Se True, exporta também as solicitações arquivadas, na mesma
+                instrução (select_full_export) e intercaladas com as ativas por id_request
+
+        Yields:
+            Dict[str, Any]: Registro achatado (uma entrada de progresso por registro)
+        """
+        if include_archived:
+            statement = select_full_export(dt_start, dt_end)
+        else:
+            statement = select_request_export(dt_start, dt_end)
+        result = self._execute(statement)
+        try:
+            for row in result:
+                yield build_export_record(row)
+        finally:
+            result.close()
+
+    def export(self, dt_start: Optional[datetime] = None, dt_end: Optional[datetime] = None,
+               export_format: str = "ndjson", compress: bool = False, include_archived: bool = True,
+               payload_fields: Sequence[str] = EXPORT_PAYLOAD_FIELDS) -> Iterator[bytes]:
+        """Monta o fluxo do arquivo de exportação de um período em blocos de bytes.
+
+        O formato é validado na chamada; a consulta só é executada ao consumir o fluxo.
+
+        Args:
+            dt_start: Início do período de dt_register (inclusivo); se None, sem limite
+            dt_end: Fim do período de dt_register (exclusivo); se None, sem limite
+            export_format: "ndjson" ou "csv"
+            compress: Se True, comprime a saída em gzip
+            include_archived: Se True, exporta também as solicitações arquivadas
+            payload_fields: Chaves de ct_payload exportadas como colunas no CSV
+
+        Returns:
+            Iterator[bytes]: Blocos do arquivo
+
+        Raises:
+            ValueError: Se o formato não for suportado
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {export_format}")
+
+        records = self.iter_records(dt_start, dt_end, include_archived)
+        if export_format == "csv":
+            chunks = iter_csv(records, payload_fields, self.chunk_size)
+        else:
+            chunks = iter_ndjson(records, self.chunk_size)
+        if compress:
+            chunks = iter_gzip(chunks)
+        return chunks
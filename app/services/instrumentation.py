@@ -0,0 +1,492 @@
+"""
+Instrumentação dos caminhos críticos: latência por método, SQL por chamada e métricas Prometheus.
+
+Separa o tempo de uma chamada em SQL, ORM e serialização:
+
+    serviços: os métodos públicos de RequestService e ProcessService (decorador
+        instrumented_service) registram um histograma de latência e, para cada
+        chamada, a quantidade e o tempo das instruções SQL que executaram.
+    SQL: eventos before/after_cursor_execute do engine (install_sql_instrumentation)
+        atribuem cada instrução às chamadas e à requisição HTTP em andamento, via
+        ContextVar; o tempo do serviço menos o tempo de SQL é o custo do ORM.
+    HTTP: InstrumentationMiddleware registra a latência de cada rota e quanto dela
+        foi serviço e SQL; o restante é roteamento, validação e serialização.
+
+As métricas são expostas em formato texto do Prometheus por render_metrics (rota
+GET /metrics em app.api.metrics_router), sem dependências adicionais.
+
+Modo de depuração do orçamento de consultas: com QUERY_BUDGET > 0, cada requisição
+HTTP (ou bloco query_budget) que tentar executar mais instruções que o orçamento
+falha com QueryBudgetExceeded, listando as instruções já executadas, de modo que
+regressões N+1 aparecem como erro, e não como lentidão.
+
+Classes:
+    Histogram: Histograma com buckets fixos e rótulos.
+    Counter: Contador com rótulos.
+    Gauge: Valor instantâneo com rótulos.
+    MetricsRegistry: Conjunto de métricas com exposição no formato Prometheus.
+    CallStats: Instruções SQL e tempos acumulados de uma chamada ou requisição.
+    QueryBudgetExceeded: Erro de orçamento de consultas excedido.
+    InstrumentationMiddleware: Middleware ASGI que mede as requisições HTTP.
+
+Funções:
+    instrumented_service: Decorador de classe que instrumenta os métodos públicos de um serviço.
+    install_sql_instrumentation: Registra os eventos de contagem de SQL em um engine.
+    query_budget: Context manager que limita as instruções SQL de um bloco.
+    render_metrics: Renderiza as métricas no formato texto do Prometheus.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import event
+from typing import Optional, List, Dict, Any, Callable, Iterator, Sequence, Tuple
+import bisect
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "True").lower() in ("1", "true", "yes")
+
+# Orçamento de instruções SQL por requisição HTTP no modo de depuração; 0 desabilita
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "0"))
+
+METRIC_PREFIX = "request_manager"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Instruções guardadas por chamada para a mensagem de orçamento excedido
+MAX_RECORDED_STATEMENTS = 50
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Histograma com buckets fixos por combinação de rótulos."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        """Inicializa o histograma vazio.
+
+        Args:
+            name: Nome da métrica
+            documentation: Texto de ajuda (HELP)
+            label_names: Nomes dos rótulos
+            buckets: Limites superiores dos buckets, em ordem crescente
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Any, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[Any, ...], value: float) -> None:
+        """Registra uma observação.
+
+        Args:
+            labels: Valores dos rótulos, na ordem de label_names
+            value: Valor observado
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Contagem por bucket (+Inf no último), soma e total
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {values[-1]:g}")
+        return lines
+
+
+class Counter:
+    """Contador por combinação de rótulos."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """Inicializa o contador zerado.
+
+        Args:
+            name: Nome da métrica (terminado em _total)
+            documentation: Texto de ajuda (HELP)
+            label_names: Nomes dos rótulos
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[Any, ...] = (), amount: float = 1.0) -> None:
+        """Incrementa o contador.
+
+        Args:
+            labels: Valores dos rótulos, na ordem de label_names
+            amount: Incremento
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[Any, ...] = ()) -> float:
+        """Valor atual do contador para os rótulos informados."""
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Valor instantâneo por combinação de rótulos."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """Inicializa o gauge sem valores.
+
+        Args:
+            name: Nome da métrica
+            documentation: Texto de ajuda (HELP)
+            label_names: Nomes dos rótulos
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, labels: Tuple[Any, ...] = (), value: float = 0.0) -> None:
+        """Define o valor atual.
+
+        Args:
+            labels: Valores dos rótulos, na ordem de label_names
+            value: Novo valor
+        """
+        with self._lock:
+            self._values[labels] = value
+
+    def value(self, labels: Tuple[Any, ...] = ()) -> float:
+        """Valor atual do gauge para os rótulos informados."""
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métricas dos serviços, do SQL e das requisições HTTP."""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        """Cria as métricas com o prefixo informado.
+
+        Args:
+            prefix: Prefixo dos nomes das métricas
+        """
+        method_labels = ("service", "method")
+        route_labels = ("method", "route")
+        self.service_seconds = Histogram(
+            f"{prefix}_service_call_seconds", "Latência das chamadas de serviço.", method_labels, LATENCY_BUCKETS)
+        self.service_sql_statements = Histogram(
+            f"{prefix}_service_call_sql_statements", "Instruções SQL por chamada de serviço.",
+            method_labels, STATEMENT_BUCKETS)
+        self.service_sql_seconds = Histogram(
+            f"{prefix}_service_call_sql_seconds", "Tempo de SQL por chamada de serviço.", method_labels, LATENCY_BUCKETS)
+        self.service_errors = Counter(
+            f"{prefix}_service_call_errors_total", "Chamadas de serviço que levantaram exceção.", method_labels)
+        self.http_seconds = Histogram(
+            f"{prefix}_http_request_seconds", "Latência das requisições HTTP.", route_labels + ("status",), LATENCY_BUCKETS)
+        self.http_service_seconds = Histogram(
+            f"{prefix}_http_request_service_seconds", "Tempo em serviços por requisição HTTP.",
+            route_labels, LATENCY_BUCKETS)
+        self.http_sql_seconds = Histogram(
+            f"{prefix}_http_request_sql_seconds", "Tempo de SQL por requisição HTTP.", route_labels, LATENCY_BUCKETS)
+        self.http_sql_statements = Histogram(
+            f"{prefix}_http_request_sql_statements", "Instruções SQL por requisição HTTP.", route_labels, STATEMENT_BUCKETS)
+        self.sql_statements = Counter(f"{prefix}_sql_statements_total", "Instruções SQL executadas.")
+        self.sql_seconds = Counter(f"{prefix}_sql_seconds_total", "Tempo total de SQL, em segundos.")
+        self.budget_exceeded = Counter(
+            f"{prefix}_query_budget_exceeded_total", "Blocos que excederam o orçamento de consultas.", ("scope",))
+        self.log_events_discarded = Counter(
+            f"{prefix}_log_events_discarded_total", "Eventos de log descartados (fila cheia ou amostragem).",
+            ("reason",))
+        self.progress_updates_dropped = Counter(
+            f"{prefix}_progress_updates_dropped_total",
+            "Atualizações de progresso descartadas pelo limite do buffer write-behind.")
+        self.breaker_transitions = Counter(
+            f"{prefix}_circuit_breaker_transitions_total", "Mudanças de estado dos circuit breakers.",
+            ("system", "from_state", "to_state"))
+        self.breaker_state = Gauge(
+            f"{prefix}_circuit_breaker_state", "Estado do circuito por sistema (0=closed, 1=half_open, 2=open).",
+            ("system",))
+
+    def metrics(self) -> List[Any]:
+        """Métricas registradas, na ordem de exposição."""
+        return [value for value in vars(self).values() if isinstance(value, (Histogram, Counter, Gauge))]
+
+    def render(self) -> str:
+        """Renderiza todas as métricas no formato texto do Prometheus (versão 0.0.4).
+
+        Returns:
+            str: Exposição das métricas
+        """
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@dataclass
+class CallStats:
+    """Instruções SQL e tempos acumulados de uma chamada de serviço, requisição ou bloco.
+
+    Attributes:
+        kind: "service", "request" ou "budget"
+        label: Identificação da chamada, usada nas mensagens
+        budget: Máximo de instruções SQL permitido; None sem limite
+        sql_statements: Instruções executadas
+        sql_seconds: Tempo das instruções, em segundos
+        service_seconds: Tempo em chamadas de serviço de nível mais externo, em segundos
+        statements: Primeiras instruções executadas (apenas com orçamento)
+    """
+
+    kind: str
+    label: str = ""
+    budget: Optional[int] = None
+    sql_statements: int = 0
+    sql_seconds: float = 0.0
+    service_seconds: float = 0.0
+    statements: Optional[List[str]] = None
+
+
+_active_stats: ContextVar[Tuple[CallStats, ...]] = ContextVar("request_manager_call_stats", default=())
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Um bloco tentou executar mais instruções SQL que o orçamento permite."""
+
+    def __init__(self, stats: CallStats, statement: str):
+        executed = "\n".join(f"  {index + 1}. {text}" for index, text in enumerate(stats.statements or []))
+        super().__init__(
+            f"Orçamento de {stats.budget} consultas excedido em {stats.label}; próxima instrução: "
+            f"{statement[:200]}\nInstruções executadas:\n{executed}"
+        )
+        self.stats = stats
+
+
+@contextmanager
+def _push(stats: CallStats) -> Iterator[CallStats]:
+    token = _active_stats.set(_active_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+@contextmanager
+def query_budget(limit: int, label: str = "bloco") -> Iterator[CallStats]:
+    """Limita as instruções SQL executadas dentro do bloco.
+
+    A instrução que excederia o limite não é executada: QueryBudgetExceeded é
+    levantada com a lista das instruções anteriores.
+
+    Args:
+        limit: Máximo de instruções SQL
+        label: Identificação do bloco nas mensagens e na métrica
+
+    Yields:
+        CallStats: Contagens do bloco, atualizadas durante a execução
+    """
+    with _push(CallStats("budget", label, budget=limit, statements=[])) as stats:
+        yield stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    for stats in _active_stats.get():
+        if stats.budget is not None and stats.sql_statements >= stats.budget:
+            metrics.budget_exceeded.inc((stats.label,))
+            logger.error(f"Orçamento de {stats.budget} consultas excedido em {stats.label}")
+            raise QueryBudgetExceeded(stats, statement)
+    conn.info.setdefault("request_manager_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("request_manager_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    metrics.sql_statements.inc()
+    metrics.sql_seconds.inc(amount=elapsed)
+    for stats in _active_stats.get():
+        stats.sql_statements += 1
+        stats.sql_seconds += elapsed
+        if stats.statements is not None and len(stats.statements) < MAX_RECORDED_STATEMENTS:
+            stats.statements.append(" ".join(statement.split())[:200])
+
+
+def _handle_error(context) -> None:
+    # Instrução que falhou: descarta o início registrado em before_cursor_execute
+    connection = context.connection
+    if connection is not None:
+        started = connection.info.get("request_manager_started")
+        if started:
+            started.pop()
+
+
+def install_sql_instrumentation(engine) -> None:
+    """Registra os eventos de contagem de SQL em um engine (síncrono ou AsyncEngine).
+
+    Args:
+        engine: Engine do SQLAlchemy
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _instrument(service: str, method: str, func: Callable) -> Callable:
+    labels = (service, method)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not INSTRUMENTATION_ENABLED:
+            return func(*args, **kwargs)
+        outer = _active_stats.get()
+        nested = any(stats.kind == "service" for stats in outer)
+        started = time.perf_counter()
+        try:
+            with _push(CallStats("service", f"{service}.{method}")) as stats:
+                return func(*args, **kwargs)
+        except Exception:
+            metrics.service_errors.inc(labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.service_seconds.observe(labels, elapsed)
+            metrics.service_sql_statements.observe(labels, stats.sql_statements)
+            metrics.service_sql_seconds.observe(labels, stats.sql_seconds)
+            if not nested:
+                for parent in outer:
+                    parent.service_seconds += elapsed
+
+    return wrapper
+
+
+def instrumented_service(service: str) -> Callable[[type], type]:
+    """Decorador de classe que instrumenta os métodos públicos de um serviço.
+
+    Métodos privados, estáticos, de classe e geradores não são instrumentados.
+
+    Args:
+        service: Nome do serviço no rótulo "service" das métricas
+
+    Returns:
+        Callable[[type], type]: Decorador
+    """
+    def decorator(cls: type) -> type:
+        for name, member in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.isfunction(member) or inspect.isgeneratorfunction(member):
+                continue
+            setattr(cls, name, _instrument(service, name, member))
+        return cls
+    return decorator
+
+
+def render_metrics() -> str:
+    """Renderiza as métricas no formato texto do Prometheus.
+
+    Returns:
+        str: Exposição das métricas
+    """
+    return metrics.render()
+
+
+class InstrumentationMiddleware:
+    """Middleware ASGI que mede latência, tempo de serviço e SQL de cada requisição HTTP.
+
+    Com query_budget (ou QUERY_BUDGET > 0), a requisição que exceder o orçamento falha
+    com QueryBudgetExceeded.
+    """
+
+    def __init__(self, app, query_budget: Optional[int] = None):
+        """Envolve a aplicação ASGI.
+
+        Args:
+            app: Aplicação ASGI
+            query_budget: Máximo de instruções SQL por requisição; se None, usa QUERY_BUDGET
+        """
+        self.app = app
+        budget = QUERY_BUDGET if query_budget is None else query_budget
+        self.query_budget = budget if budget > 0 else None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not INSTRUMENTATION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        stats = CallStats(
+            "request", f"{scope['method']} {scope['path']}", budget=self.query_budget,
+            statements=[] if self.query_budget is not None else None
+        )
+        started = time.perf_counter()
+        try:
+            # Endpoints síncronos rodam no threadpool com uma cópia do contexto, que
+            # referencia o mesmo CallStats
+            with _push(stats):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None) or "desconhecida"
+            labels = (scope["method"], route)
+            metrics.http_seconds.observe(labels + (status["code"],), elapsed)
+            metrics.http_service_seconds.observe(labels, stats.service_seconds)
+            metrics.http_sql_seconds.observe(labels, stats.sql_seconds)
+            metrics.http_sql_statements.observe(labels, stats.sql_statements)
@@ -0,0 +1,363 @@
+"""
+Coordenação de jobs periódicos entre workers e nós, baseada no banco de dados.
+
+Com vários workers do uvicorn em vários hosts, cada worker inicia sua própria cópia
+dos jobs de fundo (monitoramento, retentativas, varredura de timeouts, relay da
+outbox). Este módulo garante que cada job rode uma vez por cluster usando locks em
+tb_job_lock:
+
+    lock com lease: um UPDATE condicional concede o lock a um worker quando ele está
+        livre, expirado ou já é dele; uma thread de heartbeat prorroga os leases
+        enquanto o worker estiver vivo. Um worker que morre perde o lock quando o
+        lease expira, e outro assume.
+    execução por intervalo: com `interval`, o mesmo UPDATE exige que a última
+        execução (dt_last_run) seja anterior a agora - interval, de modo que o job
+        roda uma vez por intervalo no cluster, em qualquer worker.
+    shards: jobs grandes usam um lock por shard (ex.: "timeout_sweep:<id_system>");
+        cada worker percorre os shards a partir de uma posição própria e executa os
+        que conseguir reivindicar, distribuindo o trabalho entre os workers vivos.
+
+Classes:
+    JobCoordinator: Adquire, prorroga e libera locks de jobs de um worker.
+
+Funções:
+    build_job_acquire_update: Monta o UPDATE que concede o lock de um job a um worker.
+    build_job_renew_update: Monta o UPDATE que prorroga os locks ainda válidos de um worker.
+    build_job_release_update: Monta o UPDATE que libera o lock de um job.
+    shard_job_name: Nome do lock de um shard de um job.
+"""
+
+from sqlalchemy import and_, or_, update, Update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app.models.models import JobLock
+from app.services.process_service import default_worker_id
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Iterable, TypeVar
+import functools
+import logging
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Duração padrão do lease de um job, em segundos
+DEFAULT_JOB_LEASE_SECONDS = 60.0
+
+
+def shard_job_name(job: str, shard: Any) -> str:
+    """Nome do lock de um shard de um job.
+
+    Args:
+        job: Nome do job
+        shard: Identificador do shard (ex.: id_system_process)
+
+    Returns:
+        str: Nome do lock, no formato job:shard
+    """
+    return f"{job}:{shard}"
+
+
+def build_job_acquire_update(nm_job: str, owner: str, now: datetime, expires_at: datetime,
+                             last_run_before: Optional[datetime] = None) -> Update:
+    """Monta o UPDATE que concede o lock de um job a um worker.
+
+    O lock é concedido se estiver livre, expirado ou já pertencer ao worker. Com
+    last_run_before, exige também que a última execução seja anterior a esse
+    instante e registra a execução atual em dt_last_run.
+
+    Args:
+        nm_job: Nome do job
+        owner: Identificador do worker
+        now: Instante de referência para leases expirados
+        expires_at: Expiração do lease concedido
+        last_run_before: Última execução a partir da qual o job ainda não está devido
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    conditions = [
+        JobLock.nm_job == nm_job,
+        or_(JobLock.id_owner.is_(None), JobLock.id_owner == owner, JobLock.dt_lease_expires <= now)
+    ]
+    values: Dict[str, Any] = {"id_owner": owner, "dt_lease_expires": expires_at, "dt_heartbeat": now}
+    if last_run_before is not None:
+        conditions.append(or_(JobLock.dt_last_run.is_(None), JobLock.dt_last_run <= last_run_before))
+        values["dt_last_run"] = now
+    return update(JobLock).where(and_(*conditions)).values(**values)
+
+
+def build_job_renew_update(names: List[str], owner: str, now: datetime, expires_at: datetime) -> Update:
+    """Monta o UPDATE que prorroga os locks ainda válidos de um worker.
+
+    Args:
+        names: Nomes dos jobs
+        owner: Identificador do worker
+        now: Instante de referência; leases já expirados não são prorrogados
+        expires_at: Nova expiração
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(JobLock).where(
+        and_(JobLock.nm_job.in_(names), JobLock.id_owner == owner, JobLock.dt_lease_expires > now)
+    ).values(dt_lease_expires=expires_at, dt_heartbeat=now)
+
+
+def build_job_release_update(nm_job: str, owner: str) -> Update:
+    """Monta o UPDATE que libera o lock de um job, preservando dt_last_run.
+
+    Args:
+        nm_job: Nome do job
+        owner: Identificador do worker que detém o lock
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(JobLock).where(
+        and_(JobLock.nm_job == nm_job, JobLock.id_owner == owner)
+    ).values(id_owner=None, dt_lease_expires=None)
+
+
+class JobCoordinator:
+    """Locks de jobs de um worker em tb_job_lock, com heartbeat em thread."""
+
+    def __init__(self, session_factory: sessionmaker, worker_id: Optional[str] = None,
+                 lease_seconds: float = DEFAULT_JOB_LEASE_SECONDS):
+        """Inicializa o coordenador sem locks.
+
+        Args:
+            session_factory: Fábrica de sessões; cada operação usa uma sessão curta
+            worker_id: Identificador do worker; se None, usa default_worker_id()
+            lease_seconds: Duração do lease; o heartbeat prorroga a cada terço dela
+        """
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+
+        self._held: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.acquired = 0
+        self.contended = 0
+        self.lost = 0
+
+    @property
+    def held(self) -> List[str]:
+        """Jobs cujo lock o worker detém."""
+        with self._lock:
+            return list(self._held)
+
+    def try_acquire(self, nm_job: str, interval: Optional[float] = None) -> bool:
+        """Tenta adquirir (ou renovar) o lock de um job.
+
+        Args:
+            nm_job: Nome do job
+            interval: Se informado, só adquire quando a última execução no cluster tiver
+                ocorrido há pelo menos `interval` segundos, registrando esta execução
+
+        Returns:
+            bool: True se o worker detém o lock
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        last_run_before = now - timedelta(seconds=interval) if interval is not None else None
+
+        db = self.session_factory()
+        try:
+            acquired = db.execute(
+                build_job_acquire_update(nm_job, self.worker_id, now, expires_at, last_run_before),
+                execution_options={"synchronize_session": False}
+            ).rowcount == 1
+            if not acquired and db.get(JobLock, nm_job) is None:
+                # Primeira execução do job: a linha é criada já com o lock
+                db.add(JobLock(
+                    nm_job=nm_job, id_owner=self.worker_id, dt_lease_expires=expires_at,
+                    dt_heartbeat=now, dt_last_run=now if interval is not None else None
+                ))
+                try:
+                    db.commit()
+                    acquired = True
+                except IntegrityError:
+                    # Outro worker criou a linha primeiro
+                    db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            if acquired:
+                if nm_job not in self._held:
+                    self.acquired += 1
+                self._held[nm_job] = None
+            else:
+                self.contended += 1
+                self._held.pop(nm_job, None)
+        return acquired
+
+    def release(self, nm_job: str) -> None:
+        """Libera o lock de um job, se o worker o detiver.
+
+        Args:
+            nm_job: Nome do job
+        """
+        with self._lock:
+            if self._held.pop(nm_job, False) is False:
+                return
+        db = self.session_factory()
+        try:
+            db.execute(build_job_release_update(nm_job, self.worker_id), execution_options={"synchronize_session": False})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao liberar o lock do job {nm_job}: {str(e)}")
+        finally:
+            db.close()
+
+    def heartbeat(self) -> int:
+        """Prorroga os leases dos locks detidos; locks já perdidos deixam de ser considerados.
+
+        Returns:
+            int: Quantidade de locks prorrogados
+        """
+        names = self.held
+        if not names:
+            return 0
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            renewed = db.execute(
+                build_job_renew_update(names, self.worker_id, now, now + timedelta(seconds=self.lease_seconds)),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if renewed < len(names):
+            # Lease expirado antes do heartbeat: outro worker pode ter assumido
+            self.lost += len(names) - renewed
+            logger.warning(f"Worker {self.worker_id} perdeu {len(names) - renewed} de {len(names)} locks de jobs")
+            with self._lock:
+                self._held.clear()
+            # Revalida os que ainda são deste worker
+            for name in names:
+                self.try_acquire(name)
+        return renewed
+
+    def run_once(self, nm_job: str, func: Callable[[], T], interval: Optional[float] = None) -> Optional[T]:
+        """Executa func se o worker adquirir o lock do job, liberando-o ao final.
+
+        Args:
+            nm_job: Nome do job
+            func: Função do job
+            interval: Intervalo mínimo entre execuções no cluster, em segundos
+
+        Returns:
+            Optional[T]: Retorno de func, ou None se outro worker detém o lock ou o job não está devido
+        """
+        if not self.try_acquire(nm_job, interval):
+            return None
+        try:
+            return func()
+        finally:
+            self.release(nm_job)
+
+    def run_sharded(self, job: str, shards: Iterable[Any], func: Callable[[Any], T],
+                    interval: Optional[float] = None) -> Dict[Any, T]:
+        """Executa func para os shards que o worker conseguir reivindicar.
+
+        Cada worker começa por uma posição derivada do seu identificador, de modo que
+        workers concorrentes tendem a reivindicar shards diferentes em vez de disputar
+        os mesmos.
+
+        Args:
+            job: Nome do job
+            shards: Identificadores dos shards (ex.: IDs de sistemas de processamento)
+            func: Função chamada com cada shard reivindicado
+            interval: Intervalo mínimo entre execuções de cada shard no cluster, em segundos
+
+        Returns:
+            Dict[Any, T]: Retorno de func por shard executado neste worker
+        """
+        shards = list(shards)
+        if not shards:
+            return {}
+        offset = zlib.crc32(self.worker_id.encode()) % len(shards)
+        results: Dict[Any, T] = {}
+        for shard in shards[offset:] + shards[:offset]:
+            nm_job = shard_job_name(job, shard)
+            if self.try_acquire(nm_job, interval):
+                try:
+                    results[shard] = func(shard)
+                finally:
+                    self.release(nm_job)
+        return results
+
+    def singleton(self, nm_job: str, interval: Optional[float] = None) -> Callable[[Callable[..., T]], Callable[..., Optional[T]]]:
+        """Decorador que restringe uma função de job (ex.: do APScheduler) a um worker por vez.
+
+        Exemplo:
+            scheduler.add_job(coordinator.singleton("monitor", 60)(check_systems), "interval", seconds=60)
+
+        Args:
+            nm_job: Nome do job
+            interval: Intervalo mínimo entre execuções no cluster, em segundos
+
+        Returns:
+            Callable: Decorador
+        """
+        def decorator(func: Callable[..., T]) -> Callable[..., Optional[T]]:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> Optional[T]:
+                return self.run_once(nm_job, lambda: func(*args, **kwargs), interval)
+            return wrapper
+        return decorator
+
+    def start(self) -> None:
+        """Inicia a thread de heartbeat."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="job-heartbeat", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Interrompe o heartbeat e libera os locks detidos."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for nm_job in self.held:
+            self.release(nm_job)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"Erro no heartbeat dos locks de jobs: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do coordenador.
+
+        Returns:
+            Dict[str, int]: Locks adquiridos, tentativas sem sucesso, locks perdidos e detidos
+        """
+        return {
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "lost": self.lost,
+            "held": len(self.held)
+        }
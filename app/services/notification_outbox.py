@@ -0,0 +1,385 @@
+"""
+Outbox transacional de notificações de status e worker de entrega (relay).
+
+As mudanças de status de verificação e de processamento gravam uma linha em
+tb_notification_outbox na mesma transação do UPDATE em tb_process: a notificação
+nunca se perde quando o processo cai entre o commit e a chamada HTTP, e a latência
+do callback sai do tempo de resposta da API. O relay lê a fila em lotes, entrega
+as notificações com o OutboundDispatcher agrupadas por sistema de destino e em
+ordem de id_outbox para cada (id_request, id_system_process), e marca as linhas
+entregues em lote.
+
+A ordem por processo é garantida para um único relay ativo por banco; com um
+JobCoordinator, várias instâncias podem ser iniciadas e só a que detém o lock
+"notification_relay" entrega, as demais assumem se ela parar. Uma
+notificação que esgota as tentativas é marcada como falha definitiva e deixa de
+bloquear as seguintes do mesmo processo.
+
+Um destino fora do ar não bloqueia os demais: a notificação que falha recebe
+dt_next_attempt (backoff exponencial a partir de retry_interval) e sai do início da
+fila junto com as seguintes do mesmo processo; na mesma passada, as notificações
+restantes do destino que falhou não são tentadas e também são reagendadas, sem
+consumir tentativas. Cada destino é atendido em ondas do tamanho do limite de
+concorrência do dispatcher, para que a falha interrompa o destino logo na primeira onda.
+Com circuit breakers no dispatcher, as notificações de destinos com circuito aberto
+nem são lidas; as recusadas pelo breaker durante a passada são reagendadas como as
+não tentadas.
+
+Classes:
+    RelayReport: Resultado de uma passada do relay.
+    OutboxRelay: Entrega as notificações pendentes da outbox.
+
+Funções:
+    build_outbox_insert: Monta o INSERT de uma notificação na outbox.
+    build_outbox_rows: Monta as linhas do INSERT em lote das notificações de vários processos.
+    select_pending_outbox: Monta a consulta de um lote de notificações pendentes.
+"""
+
+from sqlalchemy import insert, select, update, Insert, Select
+from sqlalchemy.orm import aliased, sessionmaker
+from app.models.models import NotificationOutbox, Process
+from app.services.outbound_dispatcher import OutboundDispatcher
+from app.services.retry_scheduler import compute_backoff_seconds
+from app.services.system_registry import SystemRegistry
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple, TYPE_CHECKING
+import asyncio
+import logging
+
+if TYPE_CHECKING:
+    # job_coordinator importa process_service, que importa este módulo
+    from app.services.job_coordinator import JobCoordinator
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PENDING = 0
+OUTBOX_DELIVERED = 1
+OUTBOX_FAILED = 2
+
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 10
+
+# Atraso da primeira retentativa de uma notificação e atraso máximo, em segundos
+OUTBOX_RETRY_INTERVAL = 30.0
+OUTBOX_RETRY_MAX_DELAY = 3600.0
+
+# Endereço do sistema de destino usado na entrega (ver ADDRESS_ATTRIBUTES)
+OUTBOX_ADDRESS_KIND = "status"
+
+# Nome do lock do relay em tb_job_lock
+OUTBOX_RELAY_JOB = "notification_relay"
+
+
+def build_outbox_insert(id_request: int, id_system_process: int, tp_event: str,
+                        values: Dict[str, Any]) -> Insert:
+    """Monta o INSERT de uma notificação na outbox.
+
+    O sistema de destino é o solicitante do processo, lido por subconsulta no próprio
+    INSERT. Datas em values são gravadas no payload em formato ISO.
+
+    Args:
+        id_request: ID da solicitação
+        id_system_process: ID do sistema de processamento
+        tp_event: Tipo do evento ('verify' ou 'request')
+        values: Colunas gravadas na mudança de status
+
+    Returns:
+        Insert: Instrução INSERT pronta para execução
+    """
+    requester = select(Process.id_system_requester).where(
+        Process.id_request == id_request,
+        Process.id_system_process == id_system_process
+    ).scalar_subquery()
+    return insert(NotificationOutbox).values(
+        **_outbox_row(id_request, id_system_process, requester, tp_event, values, datetime.now())
+    )
+
+
+def build_outbox_rows(processes: Iterable[Tuple[int, int, int]], tp_event: str,
+                      values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Monta as linhas do INSERT em lote (executemany) das notificações de vários processos.
+
+    Usado quando a mesma mudança de status é aplicada a um lote de processos
+    (ex.: varredura de timeouts).
+
+    Args:
+        processes: Linhas (id_request, id_system_process, id_system_requester) alteradas
+        tp_event: Tipo do evento ('verify' ou 'request')
+        values: Colunas gravadas na mudança de status, iguais para todos os processos
+
+    Returns:
+        List[Dict[str, Any]]: Linhas para insert(NotificationOutbox)
+    """
+    now = datetime.now()
+    return [
+        _outbox_row(id_request, id_system_process, id_system_requester, tp_event, values, now)
+        for id_request, id_system_process, id_system_requester in processes
+    ]
+
+
+def _outbox_row(id_request: int, id_system_process: int, id_system_target: Any, tp_event: str,
+                values: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "id_request": id_request,
+        "id_system_process": id_system_process,
+        "event": tp_event
+    }
+    for key, value in values.items():
+        payload[key] = value.isoformat() if isinstance(value, datetime) else value
+    return {
+        "id_request": id_request,
+        "id_system_process": id_system_process,
+        "id_system_target": id_system_target,
+        "tp_event": tp_event,
+        "ct_payload": payload,
+        "st_delivery": OUTBOX_PENDING,
+        "qt_attempts": 0,
+        "dt_created": now
+    }
+
+
+def select_pending_outbox(limit: int, now: datetime, exclude_targets: Iterable[int] = ()) -> Select:
+    """Monta a consulta de um lote de notificações pendentes, em ordem de criação.
+
+    Ficam de fora as notificações de processos cuja notificação pendente mais antiga
+    (ou a própria) ainda aguarda dt_next_attempt, preservando a ordem por processo.
+
+    Args:
+        limit: Quantidade máxima de notificações
+        now: Instante de referência para dt_next_attempt
+        exclude_targets: IDs de sistemas de destino a ignorar (circuito aberto)
+
+    Returns:
+        Select: Consulta pronta para execução (via ix_notification_outbox_pending e
+        ix_notification_outbox_process)
+    """
+    earlier = aliased(NotificationOutbox)
+    waiting = select(earlier.id_outbox).where(
+        earlier.id_request == NotificationOutbox.id_request,
+        earlier.id_system_process == NotificationOutbox.id_system_process,
+        earlier.st_delivery == OUTBOX_PENDING,
+        earlier.id_outbox <= NotificationOutbox.id_outbox,
+        earlier.dt_next_attempt > now
+    ).exists()
+    conditions = [NotificationOutbox.st_delivery == OUTBOX_PENDING, ~waiting]
+    exclude_targets = list(exclude_targets)
+    if exclude_targets:
+        conditions.append(NotificationOutbox.id_system_target.not_in(exclude_targets))
+    return select(
+        NotificationOutbox.id_outbox,
+        NotificationOutbox.id_request,
+        NotificationOutbox.id_system_process,
+        NotificationOutbox.id_system_target,
+        NotificationOutbox.ct_payload,
+        NotificationOutbox.qt_attempts
+    ).where(*conditions).order_by(NotificationOutbox.id_outbox).limit(limit)
+
+
+@dataclass
+class RelayReport:
+    """Resultado de uma passada do relay.
+
+    Attributes:
+        read: Notificações lidas da outbox
+        delivered: Notificações entregues
+        failed: Notificações com falha nesta passada (continuam pendentes até esgotar as tentativas)
+        exhausted: Notificações marcadas como falha definitiva
+        skipped: Notificações não tentadas porque o destino falhou ou está com o circuito
+            aberto (reagendadas)
+        deferred: Notificações adiadas porque uma anterior do mesmo processo falhou ou não foi tentada
+    """
+
+    read: int = 0
+    delivered: int = 0
+    failed: int = 0
+    exhausted: int = 0
+    skipped: int = 0
+    deferred: int = 0
+
+
+class OutboxRelay:
+    """Entrega as notificações pendentes de tb_notification_outbox."""
+
+    def __init__(self, session_factory: sessionmaker, dispatcher: OutboundDispatcher,
+                 system_registry: SystemRegistry, batch_size: int = OUTBOX_BATCH_SIZE,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS, retry_interval: float = OUTBOX_RETRY_INTERVAL,
+                 retry_max_delay: float = OUTBOX_RETRY_MAX_DELAY):
+        """Inicializa o relay.
+
+        Args:
+            session_factory: Fábrica de sessões usada na leitura e na marcação da outbox
+            dispatcher: Dispatcher usado nas chamadas aos sistemas de destino
+            system_registry: Registro de sistemas, para resolver os destinos
+            batch_size: Notificações lidas por passada
+            max_attempts: Tentativas antes de marcar a notificação como falha definitiva
+            retry_interval: Atraso da primeira retentativa, em segundos (dobra a cada tentativa)
+            retry_max_delay: Atraso máximo entre tentativas, em segundos
+        """
+        self.session_factory = session_factory
+        self.dispatcher = dispatcher
+        self.system_registry = system_registry
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_interval = retry_interval
+        self.retry_max_delay = retry_max_delay
+
+    def _load_pending(self) -> List[Any]:
+        breakers = self.dispatcher.breakers
+        open_targets = breakers.open_systems() if breakers is not None else []
+        db = self.session_factory()
+        try:
+            return list(db.execute(select_pending_outbox(self.batch_size, datetime.now(), open_targets)).all())
+        finally:
+            db.close()
+
+    def _next_attempt(self, attempts: int, now: datetime) -> datetime:
+        delay = compute_backoff_seconds(max(attempts, 1), self.retry_interval, 2.0, self.retry_max_delay)
+        return now + timedelta(seconds=delay)
+
+    def _mark(self, delivered: List[int], failures: List[Dict[str, Any]],
+              rescheduled: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            now = datetime.now()
+            for start in range(0, len(delivered), 1000):
+                db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id_outbox.in_(delivered[start:start + 1000]))
+                    .values(st_delivery=OUTBOX_DELIVERED, dt_delivered=now, qt_attempts=NotificationOutbox.qt_attempts + 1)
+                )
+            # UPDATE em lote pela chave primária (executemany)
+            if failures:
+                db.execute(update(NotificationOutbox), failures)
+            if rescheduled:
+                db.execute(update(NotificationOutbox), rescheduled)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _deliver_process(self, rows: List[Any], failed_targets: Set[Optional[int]]) -> Tuple[
+            List[int], List[Tuple[Any, str]], List[Any], int]:
+        # Entrega em ordem; a primeira falha adia as notificações seguintes do mesmo processo.
+        # Retorna (entregues, falhas, não tentadas, adiadas)
+        delivered: List[int] = []
+        for index, row in enumerate(rows):
+            remaining = len(rows) - index - 1
+            if row.id_system_target in failed_targets:
+                return delivered, [], [row], remaining
+            system = self.system_registry.get_by_id(row.id_system_target) if row.id_system_target is not None else None
+            if system is None:
+                return delivered, [(row, f"Sistema de destino não encontrado: {row.id_system_target}")], [], remaining
+            result = await self.dispatcher.send(system, OUTBOX_ADDRESS_KIND, row.ct_payload)
+            if result.short_circuited:
+                # Circuito aberto: reagenda sem consumir tentativas e poupa o restante do destino
+                failed_targets.add(row.id_system_target)
+                return delivered, [], [row], remaining
+            if not result.ok:
+                failed_targets.add(row.id_system_target)
+                return delivered, [(row, result.error or f"HTTP {result.status_code}")], [], remaining
+            delivered.append(row.id_outbox)
+        return delivered, [], [], 0
+
+    async def _deliver_target(self, processes: List[List[Any]], failed_targets: Set[Optional[int]]) -> List[
+            Tuple[List[int], List[Tuple[Any, str]], List[Any], int]]:
+        # Ondas do tamanho do limite do dispatcher: uma falha do destino poupa as ondas seguintes
+        wave = max(self.dispatcher.max_concurrency_per_system, 1)
+        outcomes = []
+        for start in range(0, len(processes), wave):
+            outcomes.extend(await asyncio.gather(*(
+                self._deliver_process(process_rows, failed_targets)
+                for process_rows in processes[start:start + wave]
+            )))
+        return outcomes
+
+    async def relay_once(self) -> RelayReport:
+        """Lê um lote da outbox, entrega as notificações e marca o resultado.
+
+        Destinos diferentes são atendidos concorrentemente, cada um em ondas de processos
+        (limitadas pelo dispatcher por sistema de destino); as notificações de um mesmo
+        processo, em sequência. Notificações com falha ou não tentadas são reagendadas.
+
+        Returns:
+            RelayReport: Contagens da passada
+        """
+        rows = await asyncio.to_thread(self._load_pending)
+        report = RelayReport(read=len(rows))
+        if not rows:
+            return report
+
+        by_target: Dict[Optional[int], Dict[Tuple[int, int], List[Any]]] = {}
+        for row in rows:
+            by_target.setdefault(row.id_system_target, {}).setdefault(
+                (row.id_request, row.id_system_process), []
+            ).append(row)
+
+        failed_targets: Set[Optional[int]] = set()
+        target_outcomes = await asyncio.gather(*(
+            self._deliver_target(list(processes.values()), failed_targets)
+            for processes in by_target.values()
+        ))
+
+        now = datetime.now()
+        delivered: List[int] = []
+        failures: List[Dict[str, Any]] = []
+        rescheduled: List[Dict[str, Any]] = []
+        for process_delivered, process_failures, not_attempted, deferred in (
+                outcome for outcomes in target_outcomes for outcome in outcomes):
+            delivered.extend(process_delivered)
+            report.deferred += deferred
+            for row, error in process_failures:
+                attempts = row.qt_attempts + 1
+                exhausted = attempts >= self.max_attempts
+                report.exhausted += int(exhausted)
+                failures.append({
+                    "id_outbox": row.id_outbox,
+                    "qt_attempts": attempts,
+                    "ds_last_error": error[:500],
+                    "st_delivery": OUTBOX_FAILED if exhausted else OUTBOX_PENDING,
+                    "dt_next_attempt": None if exhausted else self._next_attempt(attempts, now)
+                })
+            for row in not_attempted:
+                rescheduled.append({"id_outbox": row.id_outbox, "dt_next_attempt": self._next_attempt(row.qt_attempts, now)})
+
+        await asyncio.to_thread(self._mark, delivered, failures, rescheduled)
+        report.delivered = len(delivered)
+        report.failed = len(failures)
+        report.skipped = len(rescheduled)
+        logger.info(
+            f"Outbox: {report.delivered} entregues, {report.failed} falhas "
+            f"({report.exhausted} esgotadas), {report.skipped} reagendadas, {report.deferred} adiadas"
+        )
+        return report
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 1.0,
+                  coordinator: Optional["JobCoordinator"] = None) -> None:
+        """Executa passadas até stop_event ser sinalizado.
+
+        Um lote cheio com alguma entrega dispara a próxima passada imediatamente; caso
+        contrário (lote curto, falhas ou nenhuma entrega) o relay aguarda o intervalo.
+
+        Args:
+            stop_event: Evento que encerra o laço
+            interval: Espera entre passadas quando a outbox está vazia, com falhas ou sem entregas, em segundos
+            coordinator: Coordenador de jobs; se informado, só entrega enquanto detiver o
+                lock OUTBOX_RELAY_JOB, renovado a cada passada
+        """
+        try:
+            while not stop_event.is_set():
+                report = RelayReport()
+                try:
+                    if coordinator is None or await asyncio.to_thread(coordinator.try_acquire, OUTBOX_RELAY_JOB):
+                        report = await self.relay_once()
+                except Exception as e:
+                    logger.error(f"Erro na passada do relay da outbox: {str(e)}")
+                if report.read < self.batch_size or report.failed or not report.delivered:
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if coordinator is not None:
+                await asyncio.to_thread(coordinator.release, OUTBOX_RELAY_JOB)
@@ -0,0 +1,270 @@
+"""
+Envio concorrente de chamadas aos sistemas de processamento.
+
+Mantém um cliente HTTP assíncrono de longa duração por sistema de destino
+(conexões keep-alive em pool e HTTP/2 quando o pacote h2 está instalado) e envia
+as chamadas de fan-out de uma solicitação em paralelo, limitadas por um semáforo
+por sistema e com timeout por chamada. Uma solicitação distribuída para N
+sistemas passa a esperar a chamada mais lenta, e não a soma das N latências.
+
+Com um CircuitBreakerRegistry, as chamadas a um sistema com circuito aberto são
+recusadas sem tocar a rede (short_circuited) e o limite de concorrência de cada
+sistema passa a ser adaptativo (AIMD), até max_concurrency_per_system.
+
+Os clientes, semáforos e condições pertencem ao event loop em que foram criados:
+use um dispatcher por loop e chame aclose() no encerramento.
+
+Classes:
+    DispatchResult: Resultado de uma chamada a um sistema de processamento.
+    OutboundDispatcher: Envia chamadas concorrentes com clientes em pool por sistema.
+
+Funções:
+    create_outbound_dispatcher_from_env: Cria o dispatcher com a configuração das variáveis de ambiente.
+"""
+
+from app.services.circuit_breaker import CircuitBreakerRegistry, create_breaker_registry_from_env
+from app.services.system_registry import SystemInfo
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+import asyncio
+import httpx
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Tipo de chamada -> atributo de SystemInfo com o endereço
+ADDRESS_ATTRIBUTES: Dict[str, str] = {
+    "verify": "api_verify_address",
+    "request": "api_request_address",
+    "status": "api_status_address"
+}
+
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_CONCURRENCY_PER_SYSTEM = 10
+
+
+@dataclass
+class DispatchResult:
+    """Resultado de uma chamada a um sistema de processamento.
+
+    Attributes:
+        id_system_process: ID do sistema de destino
+        nm_system: Nome do sistema de destino
+        ok: True se o sistema respondeu com status 2xx
+        status_code: Status HTTP da resposta, se houve resposta
+        elapsed_seconds: Duração da chamada, incluindo a espera pelo limite de concorrência
+        error: Descrição do erro, se a chamada falhou
+        body: Corpo JSON da resposta, se houver
+        short_circuited: True se a chamada foi recusada pelo circuit breaker, sem tocar a rede
+    """
+
+    id_system_process: int
+    nm_system: str
+    ok: bool
+    status_code: Optional[int] = None
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    body: Any = None
+    short_circuited: bool = False
+
+
+class OutboundDispatcher:
+    """Envia chamadas aos sistemas de processamento com um cliente HTTP em pool por sistema."""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 max_concurrency_per_system: int = DEFAULT_MAX_CONCURRENCY_PER_SYSTEM,
+                 http2: Optional[bool] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
+        """Inicializa o dispatcher sem abrir conexões.
+
+        Args:
+            timeout: Timeout de cada chamada, em segundos
+            max_concurrency_per_system: Chamadas simultâneas por sistema (e tamanho do pool)
+            http2: Habilita HTTP/2; se None, habilita quando o pacote h2 estiver instalado
+            transport: Transporte httpx alternativo, repassado aos clientes
+            breakers: Circuit breakers por sistema; se None, o limite de concorrência é fixo
+        """
+        self.timeout = timeout
+        self.max_concurrency_per_system = max_concurrency_per_system
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.transport = transport
+        self.breakers = breakers
+
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+        self._conditions: Dict[int, asyncio.Condition] = {}
+        self._in_flight: Dict[int, int] = {}
+
+        self.sent = 0
+        self.failed = 0
+        self.short_circuited = 0
+        self.clients_created = 0
+
+    def _client_for(self, system: SystemInfo) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        client = self._clients.get(system.id_dom_system)
+        if client is None:
+            limit = self.max_concurrency_per_system
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+                http2=self.http2,
+                transport=self.transport
+            )
+            self._clients[system.id_dom_system] = client
+            self._semaphores[system.id_dom_system] = asyncio.Semaphore(limit)
+            self._conditions[system.id_dom_system] = asyncio.Condition()
+            self._in_flight[system.id_dom_system] = 0
+            self.clients_created += 1
+        return client, self._semaphores[system.id_dom_system]
+
+    async def send(self, system: SystemInfo, kind: str, payload: Dict[str, Any]) -> DispatchResult:
+        """Envia uma chamada POST ao endereço do tipo informado de um sistema.
+
+        Erros de rede, timeouts e respostas fora de 2xx são devolvidos no resultado,
+        nunca levantados. Com circuit breakers, erros de rede, timeouts e respostas 5xx
+        contam como falha do sistema.
+
+        Args:
+            system: Sistema de destino
+            kind: Tipo da chamada ("verify", "request" ou "status")
+            payload: Corpo JSON da chamada
+
+        Returns:
+            DispatchResult: Resultado da chamada
+        """
+        address = getattr(system, ADDRESS_ATTRIBUTES[kind])
+        if not address:
+            self.failed += 1
+            return DispatchResult(system.id_dom_system, system.nm_system, False,
+                                  error=f"Sistema sem endereço de {kind}")
+
+        breaker = self.breakers.get(system.id_dom_system) if self.breakers is not None else None
+        if breaker is not None and not breaker.allow_request():
+            self.short_circuited += 1
+            return DispatchResult(system.id_dom_system, system.nm_system, False,
+                                  error="Circuito aberto", short_circuited=True)
+
+        client, semaphore = self._client_for(system)
+        started = time.perf_counter()
+        try:
+            if breaker is None:
+                async with semaphore:
+                    response = await client.post(address, json=payload)
+            else:
+                response = await self._post_adaptive(system.id_dom_system, breaker, client, address, payload)
+        except httpx.HTTPError as e:
+            self.failed += 1
+            logger.error(f"Erro na chamada de {kind} ao sistema {system.nm_system}: {e!r}")
+            return DispatchResult(system.id_dom_system, system.nm_system, False,
+                                  elapsed_seconds=time.perf_counter() - started, error=repr(e))
+
+        elapsed = time.perf_counter() - started
+        ok = response.is_success
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+            logger.warning(f"Sistema {system.nm_system} respondeu {response.status_code} à chamada de {kind}")
+
+        try:
+            body = response.json() if response.content else None
+        except ValueError:
+            body = None
+        return DispatchResult(system.id_dom_system, system.nm_system, ok, response.status_code,
+                              elapsed, None if ok else response.text[:500], body)
+
+    async def _post_adaptive(self, id_system: int, breaker, client: httpx.AsyncClient,
+                             address: str, payload: Dict[str, Any]) -> httpx.Response:
+        # Limite AIMD do breaker, sem ultrapassar o tamanho do pool do cliente. A latência
+        # registrada no breaker exclui a espera pelo limite.
+        condition = self._conditions[id_system]
+        async with condition:
+            await condition.wait_for(
+                lambda: self._in_flight[id_system] < min(breaker.limit, self.max_concurrency_per_system)
+            )
+            self._in_flight[id_system] += 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(address, json=payload)
+            breaker.record(response.status_code < 500, time.perf_counter() - started)
+            return response
+        except (httpx.HTTPError, asyncio.CancelledError):
+            # Cancelamento conta como falha para não reter uma sonda de half-open
+            breaker.record(False, time.perf_counter() - started)
+            raise
+        finally:
+            async with condition:
+                self._in_flight[id_system] -= 1
+                condition.notify_all()
+
+    async def dispatch(self, kind: str, calls: Iterable[Tuple[SystemInfo, Dict[str, Any]]]) -> List[DispatchResult]:
+        """Envia um conjunto de chamadas concorrentemente, respeitando o limite de cada sistema.
+
+        Args:
+            kind: Tipo das chamadas ("verify", "request" ou "status")
+            calls: Pares (sistema de destino, corpo JSON)
+
+        Returns:
+            List[DispatchResult]: Resultados na mesma ordem das chamadas
+        """
+        return list(await asyncio.gather(*(self.send(system, kind, payload) for system, payload in calls)))
+
+    async def fan_out(self, kind: str, systems: Iterable[SystemInfo], payload: Dict[str, Any]) -> List[DispatchResult]:
+        """Envia o mesmo corpo a vários sistemas concorrentemente.
+
+        Args:
+            kind: Tipo das chamadas ("verify", "request" ou "status")
+            systems: Sistemas de destino
+            payload: Corpo JSON enviado a todos os sistemas
+
+        Returns:
+            List[DispatchResult]: Resultados na ordem dos sistemas
+        """
+        return await self.dispatch(kind, ((system, payload) for system in systems))
+
+    async def aclose(self) -> None:
+        """Fecha os clientes HTTP e suas conexões."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._semaphores.clear()
+        self._conditions.clear()
+        self._in_flight.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do dispatcher.
+
+        Returns:
+            Dict[str, int]: Chamadas bem-sucedidas, falhas, recusas do circuit breaker e clientes criados
+        """
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "short_circuited": self.short_circuited,
+            "clients": len(self._clients),
+            "clients_created": self.clients_created
+        }
+
+
+def create_outbound_dispatcher_from_env() -> OutboundDispatcher:
+    """Cria o dispatcher com OUTBOUND_TIMEOUT, OUTBOUND_MAX_CONCURRENCY_PER_SYSTEM e os breakers.
+
+    Returns:
+        OutboundDispatcher: Dispatcher sem conexões abertas
+    """
+    max_concurrency = int(os.getenv(
+        "OUTBOUND_MAX_CONCURRENCY_PER_SYSTEM", str(DEFAULT_MAX_CONCURRENCY_PER_SYSTEM)
+    ))
+    return OutboundDispatcher(
+        timeout=float(os.getenv("OUTBOUND_TIMEOUT", str(DEFAULT_TIMEOUT_SECONDS))),
+        max_concurrency_per_system=max_concurrency,
+        breakers=create_breaker_registry_from_env(max_concurrency)
+    )
@@ -5,6 +5,9 @@ Este mu00f3dulo contu00e9m a classe ProcessService que u00e9 responsu00e1vel por
 operau00e7u00f5es relacionadas aos processos de anonimizau00e7u00e3o de cada sistema.
 Implementa operau00e7u00f5es CRUD e consulta para processos, permitindo a criação,
 atualizau00e7u00e3o e monitoramento do status de processos nos diferentes sistemas.
+Cada método que altera dados confirma a própria transação, exceto dentro de
+unit_of_work (app.services.unit_of_work), em que apenas faz flush e o chamador
+confirma uma única vez.
 
 Classe:
     ProcessService: Gerencia operau00e7u00f5es relacionadas aos processos de anonimizau00e7u00e3o.
@@ -13,31 +16,526 @@ Funu00e7u00f5es:
     create_process: Cria um novo processo para um sistema e requisiu00e7u00e3o.
     get_process: Obtu00e9m um processo pela chave composta (id_request, id_system_process).
     update_process_status: Atualiza o status de um processo.
+    select_process_exists: Monta a consulta de existência de um processo.
+    select_processes_for_requests: Monta a consulta dos processos de um lote de requisições.
+    select_latest_progress: Monta a consulta do último progresso de cada processo.
+    select_pending_processes_page: Monta a consulta de uma página de processos pendentes.
+    build_status_update: Monta o UPDATE condicional (compare-and-set) de status de um processo.
+    select_claim_candidates: Monta a consulta dos processos devidos livres de lease.
+    build_claim_update: Monta o UPDATE que concede o lease de um lote de processos a um worker.
+    select_leased_processes: Monta a consulta dos processos de um lote com lease de um worker.
+    build_lease_update: Monta o UPDATE de leases (prorrogação ou liberação) de um worker.
+    parked_systems: Reúne os sistemas ignorados na reivindicação (explícitos e de circuito aberto).
+    build_scheduled_claim_update: Monta o UPDATE que concede o lease de processos agendados vencidos.
+    select_max_retry_attempts: Monta a consulta do limite de tentativas de sistemas de processamento.
+    select_attempt_counts: Monta a consulta da quantidade de tentativas de um lote de processos.
+    build_attempt_rows: Monta as linhas do UPDATE em lote que registra tentativas e agenda as próximas.
+    default_worker_id: Gera o identificador padrão do worker (host:pid).
+    get_notification_service: Retorna o NotificationService compartilhado pelos serviços.
     get_processes_by_request: Obtu00e9m todos os processos associados a uma requisiu00e7u00e3o.
+    get_processes_for_requests: Obtém os processos de várias requisições em uma consulta.
+    get_latest_progress_bulk: Obtém o último progresso de cada processo de várias requisições.
+    iter_pending_processes: Percorre os processos pendentes em blocos, com memória constante.
+    claim_due_processes: Reivindica um lote de processos devidos para um worker.
+    claim_scheduled_processes: Reivindica processos agendados vencidos, pela chave.
+    record_attempts: Registra tentativas e agenda as próximas com backoff.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.models.models import Process, ProcessProgress
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, select, update, exists, Select
+from app.db.routing import read_only
+from app.models.models import DomSystem, Process, ProcessArchive, ProcessProgress, ProcessProgressArchive, Request
 from app.core.notifications import NotificationService
-from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple
+from app.services.archive_service import select_archived_processes, select_archived_progress
+from app.services.circuit_breaker import CircuitBreakerRegistry
+from app.services.instrumentation import instrumented_service
+from app.services.progress_buffer import ProgressWriteBuffer
+from app.services.progress_events import queue_progress_event
+from app.services.notification_outbox import build_outbox_insert
+from app.services.retry_scheduler import compute_next_attempt, retryable_status_condition, stage_status_condition
+from app.services.system_registry import SystemRegistry
+from app.services.unit_of_work import commit_or_flush, in_unit_of_work, rollback_or_defer
+from app.services.status_rollup_service import REQUEST_PENDING, StatusRollupService, open_process_condition
+from app.services.structured_logging import get_event_logger
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Set, Tuple, Union
 import logging
+import os
+import random
+import socket
 
 logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
 
+# Tamanho máximo da lista de IDs em cada cláusula IN (SQL Server aceita até 2100 parâmetros)
+IN_CLAUSE_CHUNK_SIZE = 1000
 
+# Tamanho padrão das páginas da varredura de processos pendentes
+PENDING_PAGE_SIZE = 1000
+
+# Transições permitidas: novo status -> status atuais a partir dos quais ele pode ser aplicado.
+# st_system_verify: 0=pending, 1=approved, 2=rejected, 3=error, 4=timeout
+VERIFY_TRANSITIONS: Dict[int, Tuple[int, ...]] = {
+    1: (0, 3),
+    2: (0, 3),
+    3: (0,),
+    4: (0, 3)
+}
+# st_system_request: 0=pending, 1=completed, 2=partial, 3=error, 4=timeout, 5=canceled
+REQUEST_TRANSITIONS: Dict[int, Tuple[int, ...]] = {
+    1: (0, 2, 3),
+    2: (0, 2),
+    3: (0, 2),
+    4: (0, 2, 3),
+    5: (0, 2, 3)
+}
+
+# Status que encerram a etapa e zeram o agendamento de retentativas
+SCHEDULE_RESET_STATUSES: Dict[str, Tuple[int, ...]] = {
+    "st_system_verify": (1, 2, 4),
+    "st_system_request": (1, 4, 5)
+}
+
+# Etapa -> coluna com a data do último envio
+STAGE_SENT_AT: Dict[str, str] = {
+    "verify": "dt_system_verify",
+    "process": "dt_system_request"
+}
+
+# Coluna de status -> tipo do evento gravado na outbox de notificações
+OUTBOX_EVENTS: Dict[str, str] = {
+    "st_system_verify": "verify",
+    "st_system_request": "request"
+}
+
+# Cada chave composta usa dois parâmetros nas cláusulas por chave
+KEY_CLAUSE_CHUNK_SIZE = IN_CLAUSE_CHUNK_SIZE // 2
+
+# Etapas dos workers de retentativa e a variável com o intervalo entre tentativas (segundos)
+RETRY_INTERVAL_ENV: Dict[str, str] = {
+    "verify": "VERIFY_RETRY_INTERVAL",
+    "process": "PROCESS_RETRY_INTERVAL"
+}
+
+# Tamanho padrão do lote e duração padrão do lease (segundos) na reivindicação de trabalho
+CLAIM_BATCH_SIZE = 100
+DEFAULT_LEASE_SECONDS = 300
+
+# Limite de tentativas de sistemas sem max_retry_attempts
+DEFAULT_MAX_RETRY_ATTEMPTS = int(os.getenv("MAX_RETRY_ATTEMPTS", "5"))
+
+# Leituras de candidatos por reivindicação quando outro worker ganha o lote inteiro
+CLAIM_ATTEMPTS = 3
+
+
+class UpdateOutcome(str, Enum):
+    """Resultado de uma atualização de status compare-and-set."""
+    
+    UPDATED = "updated"
+    NOT_FOUND = "not_found"
+    REJECTED = "rejected"
+
+
+@dataclass(frozen=True)
+class StatusUpdateResult:
+    """Resultado de update_verification_status / update_processing_status.
+    
+    Avaliado como True somente quando a atualização foi aplicada, mantendo a
+    compatibilidade com chamadores que tratavam o retorno como bool.
+    
+    Attributes:
+        outcome: Resultado da atualização
+        values: Colunas gravadas (novo estado), vazio se não aplicada
+    """
+    
+    outcome: UpdateOutcome
+    values: Dict[str, Any] = field(default_factory=dict)
+    
+    def __bool__(self) -> bool:
+        return self.outcome is UpdateOutcome.UPDATED
+
+
+def select_process_exists(id_request: int, id_system_process: int) -> Select:
+    """Monta a consulta de existência de um processo pela chave primária.
+    
+    Args:
+        id_request: ID da solicitação
+        id_system_process: ID do sistema de processamento
+        
+    Returns:
+        Select: Consulta que retorna um único booleano
+    """
+    return select(
+        exists().where(
+            and_(
+                Process.id_request == id_request,
+                Process.id_system_process == id_system_process
+            )
+        )
+    )
+
+
+def select_processes_for_requests(request_ids: List[int]) -> Select:
+    """Monta a consulta dos processos de um lote de solicitações, ordenados pela chave primária.
+    
+    Args:
+        request_ids: IDs das solicitações (no máximo IN_CLAUSE_CHUNK_SIZE)
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    return select(Process).where(Process.id_request.in_(request_ids)).order_by(
+        Process.id_request, Process.id_system_process
+    )
+
+
+def select_latest_progress(request_ids: List[int]) -> Select:
+    """Monta a consulta do último progresso de cada processo de um lote de solicitações.
+    
+    Usa ROW_NUMBER() particionado por (id_request, id_system_process), apoiado pelo
+    índice composto ix_process_progress_latest.
+    
+    Args:
+        request_ids: IDs das solicitações (no máximo IN_CLAUSE_CHUNK_SIZE)
+        
+    Returns:
+        Select: Consulta de entidades ProcessProgress
+    """
+    ranked = select(
+        ProcessProgress,
+        func.row_number().over(
+            partition_by=(ProcessProgress.id_request, ProcessProgress.id_system_process),
+            order_by=(
+                ProcessProgress.dt_progress_update.desc(),
+                ProcessProgress.id_process_progress.desc()
+            )
+        ).label("nu_rank")
+    ).where(ProcessProgress.id_request.in_(request_ids)).subquery()
+    progress_alias = aliased(ProcessProgress, ranked)
+    return select(progress_alias).where(ranked.c.nu_rank == 1)
+
+
+def select_pending_processes_page(after: Tuple[int, int], limit: int) -> Select:
+    """Monta a consulta de uma página de processos pendentes, em ordem de chave primária.
+    
+    Considera pendentes os processos em aberto (open_process_condition) de solicitações
+    pendentes (tb_request.st_request = 0, via ix_request_pending).
+    
+    Args:
+        after: Última chave (id_request, id_system_process) já lida (cursor)
+        limit: Quantidade máxima de processos
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    after_request, after_system = after
+    return select(Process).join(Request, Request.id_request == Process.id_request).where(
+        and_(
+            Request.st_request == REQUEST_PENDING,
+            open_process_condition(),
+            or_(
+                Process.id_request > after_request,
+                and_(Process.id_request == after_request, Process.id_system_process > after_system)
+            )
+        )
+    ).order_by(Process.id_request, Process.id_system_process).limit(limit)
+
+
+def build_status_update(id_request: int, id_system_process: int, status_column,
+                        allowed_from: Tuple[int, ...], values: Dict[str, Any]):
+    """Monta o UPDATE condicional de status de um processo.
+    
+    Um status NULL é tratado como 0 (pendente), que é o valor padrão da coluna.
+    
+    Args:
+        id_request: ID da solicitação
+        id_system_process: ID do sistema de processamento
+        status_column: Coluna de status verificada (Process.st_system_verify ou st_system_request)
+        allowed_from: Status atuais a partir dos quais a transição é permitida
+        values: Colunas a serem gravadas
+        
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    status_condition = status_column.in_(allowed_from)
+    if 0 in allowed_from:
+        status_condition = or_(status_condition, status_column.is_(None))
+    return update(Process).where(
+        and_(
+            Process.id_request == id_request,
+            Process.id_system_process == id_system_process,
+            status_condition
+        )
+    ).values(**values)
+
+
+def _process_keys_condition(keys: Iterable[Tuple[int, int]]):
+    return or_(*(
+        and_(Process.id_request == id_request, Process.id_system_process == id_system_process)
+        for id_request, id_system_process in keys
+    ))
+
+
+def _claimable_condition(stage: str, due_before: datetime, now: datetime):
+    status_condition = stage_status_condition(stage)
+    sent_at = Process.dt_system_verify if stage == "verify" else Process.dt_system_request
+    
+    # Agendado: dt_next_attempt vencido. Sem agendamento e sem tentativas: intervalo fixo
+    # desde o último envio. Sem agendamento após tentativas: tentativas esgotadas.
+    schedule_condition = or_(
+        Process.dt_next_attempt <= now,
+        and_(
+            Process.dt_next_attempt.is_(None),
+            or_(Process.qt_attempts.is_(None), Process.qt_attempts == 0),
+            or_(sent_at.is_(None), sent_at <= due_before)
+        )
+    )
+    return and_(
+        status_condition,
+        schedule_condition,
+        or_(Process.dt_lease_expires.is_(None), Process.dt_lease_expires <= now)
+    )
+
+
+def select_claim_candidates(stage: str, due_before: datetime, now: datetime, limit: int,
+                            exclude_systems: Iterable[int] = ()) -> Select:
+    """Monta a consulta das chaves dos processos devidos e sem lease ativo.
+    
+    Etapa "verify": st_system_verify pendente ou com erro e dt_system_verify anterior a due_before.
+    Etapa "process": verificação aprovada, st_system_request pendente ou com erro e
+    dt_system_request nulo ou anterior a due_before.
+    Processos com dt_next_attempt usam o agendamento em vez de due_before; processos
+    com as tentativas esgotadas não são devidos.
+    
+    As linhas são bloqueadas com SKIP LOCKED (no SQL Server, UPDLOCK/READPAST), de modo
+    que workers concorrentes recebem lotes disjuntos sem esperar uns pelos outros.
+    
+    Args:
+        stage: Etapa de trabalho ("verify" ou "process")
+        due_before: Último envio a partir do qual o processo ainda não está devido
+        now: Instante de referência para leases expirados
+        limit: Quantidade máxima de processos
+        exclude_systems: IDs de sistemas de processamento a ignorar
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    conditions = [_claimable_condition(stage, due_before, now)]
+    exclude_systems = list(exclude_systems)
+    if exclude_systems:
+        conditions.append(Process.id_system_process.not_in(exclude_systems))
+    return select(Process.id_request, Process.id_system_process).where(
+        and_(*conditions)
+    ).order_by(Process.id_request, Process.id_system_process).limit(limit).with_for_update(
+        skip_locked=True
+    ).with_hint(Process, "WITH (UPDLOCK, ROWLOCK, READPAST)", "mssql")
+
+
+def build_claim_update(keys: List[Tuple[int, int]], worker_id: str, stage: str,
+                       due_before: datetime, now: datetime, expires_at: datetime):
+    """Monta o UPDATE que concede o lease de um lote de processos a um worker.
+    
+    As condições de elegibilidade são repetidas no UPDATE (compare-and-set): se outro
+    worker reivindicou a linha ou o status mudou depois da consulta de candidatos,
+    a linha simplesmente não é afetada.
+    
+    Args:
+        keys: Chaves (id_request, id_system_process) dos candidatos
+        worker_id: Identificador do worker
+        stage: Etapa de trabalho ("verify" ou "process")
+        due_before: Último envio a partir do qual o processo ainda não está devido
+        now: Instante de referência para leases expirados
+        expires_at: Expiração do lease concedido
+        
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(Process).where(
+        and_(_process_keys_condition(keys), _claimable_condition(stage, due_before, now))
+    ).values(id_lease_owner=worker_id, dt_lease_expires=expires_at)
+
+
+def select_leased_processes(keys: List[Tuple[int, int]], worker_id: str) -> Select:
+    """Monta a consulta dos processos de um lote cujo lease pertence a um worker.
+    
+    Usada quando o banco não suporta UPDATE com RETURNING/OUTPUT.
+    
+    Args:
+        keys: Chaves (id_request, id_system_process) dos processos
+        worker_id: Identificador do worker
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    return select(Process).where(
+        and_(_process_keys_condition(keys), Process.id_lease_owner == worker_id)
+    ).execution_options(populate_existing=True)
+
+
+def build_lease_update(keys: List[Tuple[int, int]], owner_condition, values: Dict[str, Any]):
+    """Monta o UPDATE dos leases de um lote de processos.
+    
+    Args:
+        keys: Chaves (id_request, id_system_process) dos processos
+        owner_condition: Condição sobre id_lease_owner/dt_lease_expires que o lease deve atender
+        values: Colunas a serem gravadas
+        
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(Process).where(and_(_process_keys_condition(keys), owner_condition)).values(**values)
+
+
+def parked_systems(breakers: Optional[CircuitBreakerRegistry], exclude_systems: Iterable[int] = ()) -> Set[int]:
+    """Reúne os sistemas de processamento cujos processos não devem ser reivindicados.
+    
+    Args:
+        breakers: Circuit breakers do dispatcher; os sistemas com circuito aberto ficam estacionados
+        exclude_systems: IDs de sistemas ignorados explicitamente
+        
+    Returns:
+        Set[int]: IDs dos sistemas a ignorar
+    """
+    parked = set(exclude_systems)
+    if breakers is not None:
+        parked.update(breakers.open_systems())
+    return parked
+
+
+def build_scheduled_claim_update(keys: List[Tuple[int, int]], worker_id: str,
+                                 now: datetime, expires_at: datetime):
+    """Monta o UPDATE que concede o lease de processos agendados cujo dt_next_attempt venceu.
+    
+    Como em claim_due_processes, a etapa precisa estar pendente ou com erro: um status
+    que não zera o agendamento (ex.: processamento parcial) não é reivindicado de novo.
+    
+    Args:
+        keys: Chaves (id_request, id_system_process) dos processos
+        worker_id: Identificador do worker
+        now: Instante de referência do vencimento e dos leases expirados
+        expires_at: Expiração do lease concedido
+        
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(Process).where(
+        and_(
+            _process_keys_condition(keys),
+            retryable_status_condition(),
+            Process.dt_next_attempt <= now,
+            or_(Process.dt_lease_expires.is_(None), Process.dt_lease_expires <= now)
+        )
+    ).values(id_lease_owner=worker_id, dt_lease_expires=expires_at)
+
+
+def select_max_retry_attempts(system_ids: Iterable[int]) -> Select:
+    """Monta a consulta do limite de tentativas de um conjunto de sistemas de processamento.
+    
+    Args:
+        system_ids: IDs dos sistemas
+        
+    Returns:
+        Select: Consulta de (id_dom_system, max_retry_attempts)
+    """
+    return select(DomSystem.id_dom_system, DomSystem.max_retry_attempts).where(
+        DomSystem.id_dom_system.in_(list(system_ids))
+    )
+
+
+def select_attempt_counts(keys: List[Tuple[int, int]]) -> Select:
+    """Monta a consulta da quantidade de tentativas de um lote de processos.
+    
+    Args:
+        keys: Chaves (id_request, id_system_process) dos processos
+        
+    Returns:
+        Select: Consulta de (id_request, id_system_process, qt_attempts)
+    """
+    return select(Process.id_request, Process.id_system_process, Process.qt_attempts).where(
+        _process_keys_condition(keys)
+    )
+
+
+def build_attempt_rows(current: Iterable[Tuple[int, int, Optional[int]]], stage: str,
+                       max_attempts: Dict[int, int], now: datetime,
+                       rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+    """Monta as linhas do UPDATE em lote que registra uma tentativa de cada processo.
+    
+    Incrementa qt_attempts, grava a data de envio da etapa, agenda dt_next_attempt com
+    backoff (ou None, se as tentativas se esgotaram) e libera o lease.
+    
+    Args:
+        current: Linhas (id_request, id_system_process, qt_attempts) de select_attempt_counts
+        stage: Etapa ("verify" ou "process")
+        max_attempts: Limite de tentativas por ID de sistema de processamento
+        now: Instante da tentativa
+        rng: Gerador aleatório do jitter
+        
+    Returns:
+        List[Dict[str, Any]]: Linhas por chave primária para UPDATE executemany
+    """
+    sent_at = STAGE_SENT_AT[stage]
+    rows = []
+    for id_request, id_system_process, qt_attempts in current:
+        attempts = (qt_attempts or 0) + 1
+        limit = max_attempts.get(id_system_process, DEFAULT_MAX_RETRY_ATTEMPTS)
+        rows.append({
+            "id_request": id_request,
+            "id_system_process": id_system_process,
+            "qt_attempts": attempts,
+            "dt_next_attempt": compute_next_attempt(stage, attempts, limit, now, rng),
+            sent_at: now,
+            "id_lease_owner": None,
+            "dt_lease_expires": None
+        })
+    return rows
+
+
+_notification_service: Optional[NotificationService] = None
+
+
+def get_notification_service() -> NotificationService:
+    """Retorna o NotificationService compartilhado, criando-o na primeira chamada.
+    
+    Returns:
+        NotificationService: Instância compartilhada por todos os serviços de processo
+    """
+    global _notification_service
+    if _notification_service is None:
+        _notification_service = NotificationService()
+    return _notification_service
+
+
+def default_worker_id() -> str:
+    """Gera o identificador padrão do worker a partir do host e do PID.
+    
+    Returns:
+        str: Identificador no formato host:pid
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@instrumented_service("process_service")
 class ProcessService:
     """Serviu00e7o para gerenciamento de processos de anonimizau00e7u00e3o."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, progress_buffer: Optional[ProgressWriteBuffer] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
         """Inicializa o serviu00e7o de processos.
         
         Args:
             db: Sessu00e3o do banco de dados
+            progress_buffer: Buffer write-behind para progresso; se None, cada atualização
+                de progresso é gravada e confirmada imediatamente
+            breakers: Circuit breakers do dispatcher; se informado, os processos de sistemas
+                com circuito aberto não são reivindicados
         """
         self.db = db
-        self.notification_service = NotificationService()
+        self.notification_service = get_notification_service()
+        self.progress_buffer = progress_buffer
+        self.breakers = breakers
     
     def create_process_entry(self, id_request: int, id_system_process: int, 
                              id_system_requester: int, id_person: str, tp_document: str) -> Process:
@@ -65,11 +563,15 @@ class ProcessService:
             st_system_request=0   # Pendente
         )
         
+        rollups = StatusRollupService(self.db)
+        rollups.lock([id_request])
         self.db.add(process)
-        self.db.commit()
-        self.db.refresh(process)
+        self.db.flush()
+        rollups.refresh([id_request])
+        if commit_or_flush(self.db):
+            self.db.refresh(process)
         
-        logger.info(f"Entrada de processo criada para solicitau00e7u00e3o {id_request} e sistema {id_system_process}")
+        event_logger.info("process.created", id_request=id_request, id_system_process=id_system_process)
         
         return process
     
@@ -90,21 +592,306 @@ class ProcessService:
             )
         ).first()
     
-    def get_processes_for_request(self, id_request: int) -> List[Process]:
+    @read_only
+    def get_processes_for_request(self, id_request: int) -> List[Union[Process, ProcessArchive]]:
         """Obtu00e9m todos os processos para uma solicitau00e7u00e3o.
         
+        Se a solicitação não tiver processos em tb_process, busca os processos
+        arquivados em tb_process_archive.
+        
         Args:
             id_request: ID da solicitau00e7u00e3o
             
         Returns:
-            List[Process]: Lista de processos para a solicitau00e7u00e3o
+            List[Union[Process, ProcessArchive]]: Lista de processos para a solicitau00e7u00e3o
+        """
+        processes = self.db.query(Process).filter(Process.id_request == id_request).all()
+        if not processes:
+            return list(self.db.execute(select_archived_processes([id_request])).scalars())
+        return processes
+    
+    @read_only
+    def get_processes_for_requests(self, request_ids: List[int]) -> Dict[int, List[Union[Process, ProcessArchive]]]:
+        """Obtém os processos de várias solicitações em uma única consulta por lote de IDs.
+        
+        As solicitações sem processos em tb_process são buscadas em tb_process_archive.
+        
+        Args:
+            request_ids: IDs das solicitações
+            
+        Returns:
+            Dict[int, List[Union[Process, ProcessArchive]]]: Processos agrupados por id_request
+        """
+        processes: Dict[int, List[Union[Process, ProcessArchive]]] = {id_request: [] for id_request in request_ids}
+        for query in (select_processes_for_requests, select_archived_processes):
+            missing = [id_request for id_request, found in processes.items() if not found]
+            for start in range(0, len(missing), IN_CLAUSE_CHUNK_SIZE):
+                chunk = missing[start:start + IN_CLAUSE_CHUNK_SIZE]
+                for process in self.db.execute(query(chunk)).scalars():
+                    processes[process.id_request].append(process)
+        return processes
+    
+    @read_only
+    def get_pending_processes_page(self, after: Tuple[int, int] = (0, 0),
+                                   limit: int = PENDING_PAGE_SIZE) -> Tuple[List[Process], Optional[Tuple[int, int]]]:
+        """Obtém uma página de processos pendentes a partir de um cursor (keyset pela chave primária).
+        
+        Args:
+            after: Última chave (id_request, id_system_process) já processada; (0, 0) para o início
+            limit: Quantidade máxima de processos na página
+            
+        Returns:
+            Tuple[List[Process], Optional[Tuple[int, int]]]: Processos da página e o cursor
+            da próxima página, ou None se esta for a última
+        """
+        processes = list(self.db.execute(select_pending_processes_page(after, limit)).scalars())
+        next_cursor = None
+        if len(processes) == limit:
+            next_cursor = (processes[-1].id_request, processes[-1].id_system_process)
+        return processes, next_cursor
+    
+    def iter_pending_processes(self, after: Tuple[int, int] = (0, 0),
+                               chunk_size: int = PENDING_PAGE_SIZE) -> Iterator[List[Process]]:
+        """Percorre os processos pendentes em blocos paginados por keyset, com memória constante.
+        
+        Cada bloco é removido da sessão depois que o consumidor o processa. Para retomar
+        após uma interrupção, passe a chave do último processo processado.
+        
+        Args:
+            after: Cursor inicial (id_request, id_system_process)
+            chunk_size: Quantidade de processos por bloco
+            
+        Yields:
+            List[Process]: Bloco de processos pendentes, em ordem de chave primária
+        """
+        cursor: Optional[Tuple[int, int]] = after
+        while cursor is not None:
+            chunk, cursor = self.get_pending_processes_page(cursor, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            for process in chunk:
+                if process in self.db:
+                    self.db.expunge(process)
+    
+    def claim_due_processes(self, worker_id: str, stage: str, batch_size: int = CLAIM_BATCH_SIZE,
+                            lease_seconds: float = DEFAULT_LEASE_SECONDS, due_before: Optional[datetime] = None,
+                            exclude_systems: Iterable[int] = ()) -> List[Process]:
+        """Reivindica atomicamente um lote de processos devidos para um worker.
+        
+        Os candidatos são lidos com SKIP LOCKED e recebem id_lease_owner e dt_lease_expires
+        em um UPDATE condicional; quando o banco suporta, o UPDATE devolve as linhas
+        reivindicadas (OUTPUT/RETURNING). Um processo nunca é entregue a dois workers
+        enquanto o lease estiver válido; se o worker parar, o processo volta a ficar
+        disponível quando o lease expirar.
+        
+        Args:
+            worker_id: Identificador do worker (ver default_worker_id)
+            stage: Etapa de trabalho ("verify" ou "process")
+            batch_size: Quantidade máxima de processos reivindicados
+            lease_seconds: Duração do lease, em segundos
+            due_before: Último envio a partir do qual o processo ainda não está devido; se None,
+                usa o instante atual menos VERIFY_RETRY_INTERVAL ou PROCESS_RETRY_INTERVAL
+            exclude_systems: IDs de sistemas de processamento a ignorar, além dos de circuito
+                aberto em self.breakers
+            
+        Returns:
+            List[Process]: Processos reivindicados pelo worker
+        """
+        exclude_systems = parked_systems(self.breakers, exclude_systems)
+        now = datetime.now()
+        if due_before is None:
+            retry_interval = float(os.getenv(RETRY_INTERVAL_ENV.get(stage, ""), "600"))
+            due_before = now - timedelta(seconds=retry_interval)
+        expires_at = now + timedelta(seconds=lease_seconds)
+        batch_size = min(batch_size, KEY_CLAUSE_CHUNK_SIZE)
+        
+        keys: List[Tuple[int, int]] = []
+        claimed: List[Process] = []
+        try:
+            # Sem SKIP LOCKED (ex.: SQLite), outro worker pode ganhar todos os candidatos;
+            # nesse caso uma nova leitura busca os próximos em vez de devolver um lote vazio
+            for _ in range(CLAIM_ATTEMPTS):
+                keys = [tuple(row) for row in self.db.execute(
+                    select_claim_candidates(stage, due_before, now, batch_size, exclude_systems)
+                )]
+                if not keys:
+                    break
+                
+                statement = build_claim_update(keys, worker_id, stage, due_before, now, expires_at)
+                if self.db.get_bind().dialect.update_returning:
+                    claimed = list(self.db.execute(
+                        statement.returning(Process), execution_options={"synchronize_session": False}
+                    ).scalars())
+                else:
+                    self.db.execute(statement, execution_options={"synchronize_session": False})
+                    claimed = list(self.db.execute(select_leased_processes(keys, worker_id)).scalars())
+                if claimed:
+                    break
+                commit_or_flush(self.db)
+            self._commit_claimed(claimed)
+        except Exception:
+            rollback_or_defer(self.db)
+            raise
+        
+        if claimed:
+            event_logger.info("process.claimed", worker_id=worker_id, stage=stage, claimed=len(claimed))
+        return claimed
+    
+    def renew_leases(self, worker_id: str, keys: List[Tuple[int, int]],
+                     lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Prorroga os leases ainda válidos de um worker.
+        
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) dos processos
+            lease_seconds: Nova duração do lease a partir de agora, em segundos
+            
+        Returns:
+            int: Quantidade de leases prorrogados
+        """
+        now = datetime.now()
+        return self._update_leases(
+            keys,
+            and_(Process.id_lease_owner == worker_id, Process.dt_lease_expires > now),
+            {"dt_lease_expires": now + timedelta(seconds=lease_seconds)}
+        )
+    
+    def release_leases(self, worker_id: str, keys: List[Tuple[int, int]]) -> int:
+        """Libera os leases de um worker, devolvendo os processos à fila.
+        
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) dos processos
+            
+        Returns:
+            int: Quantidade de leases liberados
+        """
+        return self._update_leases(
+            keys,
+            Process.id_lease_owner == worker_id,
+            {"id_lease_owner": None, "dt_lease_expires": None}
+        )
+    
+    def _update_leases(self, keys: List[Tuple[int, int]], owner_condition, values: Dict[str, Any]) -> int:
+        updated = 0
+        for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+            chunk = keys[start:start + KEY_CLAUSE_CHUNK_SIZE]
+            updated += self.db.execute(
+                build_lease_update(chunk, owner_condition, values),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+        commit_or_flush(self.db)
+        return updated
+    
+    def claim_scheduled_processes(self, worker_id: str, keys: List[Tuple[int, int]],
+                                  lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[Process]:
+        """Reivindica, pela chave, processos agendados cujo dt_next_attempt já venceu.
+        
+        Usado com o RetryScheduler: o heap informa quais chaves venceram e este método
+        lê exatamente essas linhas, com a mesma semântica de lease de claim_due_processes.
+        Chaves de sistemas com circuito aberto em self.breakers não são reivindicadas.
+        
+        Args:
+            worker_id: Identificador do worker
+            keys: Chaves (id_request, id_system_process) vencidas
+            lease_seconds: Duração do lease, em segundos
+            
+        Returns:
+            List[Process]: Processos reivindicados pelo worker
         """
-        return self.db.query(Process).filter(Process.id_request == id_request).all()
+        parked = parked_systems(self.breakers)
+        if parked:
+            keys = [key for key in keys if key[1] not in parked]
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=lease_seconds)
+        claimed: List[Process] = []
+        try:
+            for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+                chunk = keys[start:start + KEY_CLAUSE_CHUNK_SIZE]
+                statement = build_scheduled_claim_update(chunk, worker_id, now, expires_at)
+                if self.db.get_bind().dialect.update_returning:
+                    claimed.extend(self.db.execute(
+                        statement.returning(Process), execution_options={"synchronize_session": False}
+                    ).scalars())
+                else:
+                    self.db.execute(statement, execution_options={"synchronize_session": False})
+                    claimed.extend(self.db.execute(select_leased_processes(chunk, worker_id)).scalars())
+            self._commit_claimed(claimed)
+        except Exception:
+            rollback_or_defer(self.db)
+            raise
+        return claimed
+    
+    def _commit_claimed(self, claimed: List[Process]) -> None:
+        # O commit expira as instâncias da sessão e cada acesso posterior relê sua linha;
+        # os processos reivindicados ficam fora da sessão durante o commit e voltam carregados
+        if in_unit_of_work(self.db):
+            self.db.flush()
+            return
+        for process in claimed:
+            self.db.expunge(process)
+        self.db.commit()
+        self.db.add_all(claimed)
+    
+    def record_attempts(self, keys: List[Tuple[int, int]], stage: str,
+                        system_registry: Optional[SystemRegistry] = None,
+                        rng: Optional[random.Random] = None) -> List[Tuple[Tuple[int, int], Optional[datetime]]]:
+        """Registra uma tentativa de cada processo e agenda a próxima com backoff e jitter.
+        
+        O limite de tentativas é o max_retry_attempts do sistema de processamento; ao
+        atingi-lo, dt_next_attempt fica nulo e o processo deixa de ser devido (o timeout
+        da etapa é aplicado pela varredura de timeouts). O lease é liberado no mesmo UPDATE.
+        As tentativas atuais são lidas em uma consulta por bloco de chaves, sem depender
+        do estado (possivelmente expirado) das instâncias reivindicadas.
+        
+        Args:
+            keys: Chaves (id_request, id_system_process) dos processos tentados
+            stage: Etapa ("verify" ou "process")
+            system_registry: Registro de sistemas; se None, os limites são lidos de tb_dom_system
+            rng: Gerador aleatório do jitter
+            
+        Returns:
+            List[Tuple[Tuple[int, int], Optional[datetime]]]: Chave e próxima tentativa de cada
+            processo, para RetryScheduler.schedule
+        """
+        if not keys:
+            return []
+        system_ids = {id_system_process for _, id_system_process in keys}
+        if system_registry is not None:
+            max_attempts = {
+                id_system: system.max_retry_attempts
+                for id_system in system_ids
+                if (system := system_registry.get_by_id(id_system)) is not None
+            }
+        else:
+            max_attempts = {
+                id_system: value if value is not None else DEFAULT_MAX_RETRY_ATTEMPTS
+                for id_system, value in self.db.execute(select_max_retry_attempts(system_ids))
+            }
+        
+        now = datetime.now()
+        rows: List[Dict[str, Any]] = []
+        try:
+            for start in range(0, len(keys), KEY_CLAUSE_CHUNK_SIZE):
+                current = self.db.execute(select_attempt_counts(keys[start:start + KEY_CLAUSE_CHUNK_SIZE]))
+                rows.extend(build_attempt_rows(current, stage, max_attempts, now, rng))
+            if rows:
+                # UPDATE em lote pela chave primária (executemany)
+                self.db.execute(update(Process), rows)
+            commit_or_flush(self.db)
+        except Exception:
+            rollback_or_defer(self.db)
+            raise
+        return [((row["id_request"], row["id_system_process"]), row["dt_next_attempt"]) for row in rows]
     
     def update_verification_status(self, id_request: int, id_system_process: int, 
-                                  st_system_verify: int, ds_reason_verify_refuse: Optional[str] = None) -> bool:
+                                  st_system_verify: int, ds_reason_verify_refuse: Optional[str] = None) -> StatusUpdateResult:
         """Atualiza o status de verificau00e7u00e3o para um processo.
         
+        A atualização é um único UPDATE condicional (compare-and-set) que só é aplicado se o
+        status atual permitir a transição, conforme VERIFY_TRANSITIONS.
+        
         Args:
             id_request: ID da solicitau00e7u00e3o
             id_system_process: ID do sistema de processamento
@@ -112,54 +899,95 @@ class ProcessService:
             ds_reason_verify_refuse: Motivo de recusa (se recusado)
             
         Returns:
-            bool: True se atualizado, False caso contru00e1rio
+            StatusUpdateResult: Resultado da atualização; avaliado como True somente se aplicada
         """
-        # Obter processo
-        process = self.get_process(id_request, id_system_process)
-        if not process:
-            logger.error(f"Processo nu00e3o encontrado: {id_request}, {id_system_process}")
-            return False
-        
-        # Atualizar status de verificau00e7u00e3o
-        process.st_system_verify = st_system_verify
-        process.dt_system_verify_response = datetime.now()
-        
+        values: Dict[str, Any] = {
+            "st_system_verify": st_system_verify,
+            "dt_system_verify_response": datetime.now()
+        }
         if ds_reason_verify_refuse:
-            process.ds_reason_verify_refuse = ds_reason_verify_refuse
+            values["ds_reason_verify_refuse"] = ds_reason_verify_refuse
         
-        self.db.commit()
+        result = self._compare_and_set(
+            id_request, id_system_process, Process.st_system_verify,
+            VERIFY_TRANSITIONS.get(st_system_verify, ()), values
+        )
         
-        logger.info(f"Status de verificau00e7u00e3o atualizado para solicitau00e7u00e3o {id_request} e sistema {id_system_process}: {st_system_verify}")
+        if result:
+            event_logger.info("process.verify_updated", id_request=id_request, id_system_process=id_system_process,
+                              st_system_verify=st_system_verify)
         
-        return True
+        return result
     
     def update_processing_status(self, id_request: int, id_system_process: int, 
-                               st_system_request: int) -> bool:
+                               st_system_request: int) -> StatusUpdateResult:
         """Atualiza o status de processamento para um processo.
         
+        A atualização é um único UPDATE condicional (compare-and-set) que só é aplicado se o
+        status atual permitir a transição, conforme REQUEST_TRANSITIONS.
+        
         Args:
             id_request: ID da solicitau00e7u00e3o
             id_system_process: ID do sistema de processamento
             st_system_request: Status de processamento
             
         Returns:
-            bool: True se atualizado, False caso contru00e1rio
+            StatusUpdateResult: Resultado da atualização; avaliado como True somente se aplicada
         """
-        # Obter processo
-        process = self.get_process(id_request, id_system_process)
-        if not process:
-            logger.error(f"Processo nu00e3o encontrado: {id_request}, {id_system_process}")
-            return False
+        values: Dict[str, Any] = {
+            "st_system_request": st_system_request,
+            "dt_system_conclusion": datetime.now()
+        }
         
-        # Atualizar status de processamento
-        process.st_system_request = st_system_request
-        process.dt_system_conclusion = datetime.now()
+        result = self._compare_and_set(
+            id_request, id_system_process, Process.st_system_request,
+            REQUEST_TRANSITIONS.get(st_system_request, ()), values
+        )
         
-        self.db.commit()
+        if result:
+            event_logger.info("process.request_updated", id_request=id_request, id_system_process=id_system_process,
+                              st_system_request=st_system_request)
         
-        logger.info(f"Status de processamento atualizado para solicitau00e7u00e3o {id_request} e sistema {id_system_process}: {st_system_request}")
+        return result
+    
+    def _compare_and_set(self, id_request: int, id_system_process: int, status_column,
+                         allowed_from: Tuple[int, ...], values: Dict[str, Any]) -> StatusUpdateResult:
+        """Aplica um UPDATE condicionado ao status atual e interpreta o rowcount.
         
-        return True
+        Quando nenhuma linha é afetada, uma consulta de existência pela chave primária
+        distingue processo inexistente de transição rejeitada. O novo estado é
+        devolvido a partir dos valores gravados, sem reler a linha. Uma transição
+        aplicada grava a notificação em tb_notification_outbox, entregue pelo OutboxRelay.
+        """
+        if allowed_from:
+            update_values = values
+            if values[status_column.key] in SCHEDULE_RESET_STATUSES[status_column.key]:
+                update_values = {**values, "qt_attempts": 0, "dt_next_attempt": None}
+            # O rollup é travado antes do processo: escritas na mesma solicitação ficam em série
+            rollups = StatusRollupService(self.db)
+            rollups.lock([id_request])
+            statement = build_status_update(id_request, id_system_process, status_column, allowed_from, update_values)
+            rowcount = self.db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+            if rowcount:
+                # Rollup da solicitação e notificação (outbox) gravados na mesma transação
+                rollups.refresh([id_request])
+                self.db.execute(build_outbox_insert(
+                    id_request, id_system_process, OUTBOX_EVENTS[status_column.key], values
+                ))
+                # Publicado aos assinantes (progress_events) somente após o commit
+                queue_progress_event(self.db, id_request, id_system_process, OUTBOX_EVENTS[status_column.key], values)
+                commit_or_flush(self.db)
+                return StatusUpdateResult(UpdateOutcome.UPDATED, values)
+            commit_or_flush(self.db)
+        
+        process_exists = self.db.execute(select_process_exists(id_request, id_system_process)).scalar()
+        if not process_exists:
+            event_logger.error("process.not_found", id_request=id_request, id_system_process=id_system_process)
+            return StatusUpdateResult(UpdateOutcome.NOT_FOUND)
+        
+        event_logger.warning("process.transition_rejected", id_request=id_request, id_system_process=id_system_process,
+                             column=status_column.key, value=values[status_column.key])
+        return StatusUpdateResult(UpdateOutcome.REJECTED)
     
     def update_process_progress(self, id_request: int, id_system_process: int, 
                              progress_percentage: float, progress_message: Optional[str] = None) -> bool:
@@ -172,13 +1000,20 @@ class ProcessService:
             progress_message: Mensagem de progresso
             
         Returns:
-            bool: True se atualizado, False caso contru00e1rio
+            bool: True se atualizado (ou aceito pelo buffer write-behind), False caso contru00e1rio
         """
-        # Verificar se o processo existe
-        process = self.get_process(id_request, id_system_process)
-        if not process:
-            logger.error(f"Processo nu00e3o encontrado: {id_request}, {id_system_process}")
-            return False
+        # Verificar se o processo existe (processos já vistos pelo buffer dispensam a consulta)
+        buffer = self.progress_buffer
+        if buffer is None or not buffer.is_known((id_request, id_system_process)):
+            process = self.get_process(id_request, id_system_process)
+            if not process:
+                event_logger.error("process.not_found", id_request=id_request, id_system_process=id_system_process)
+                return False
+        
+        # No modo write-behind, o progresso é coalescido e gravado em lote pelo buffer
+        if buffer is not None:
+            buffer.add(id_request, id_system_process, progress_percentage, progress_message)
+            return True
         
         # Criar entrada de progresso
         progress = ProcessProgress(
@@ -190,28 +1025,73 @@ class ProcessService:
         )
         
         self.db.add(progress)
-        self.db.commit()
+        queue_progress_event(self.db, id_request, id_system_process, "progress", {
+            "dt_progress_update": progress.dt_progress_update,
+            "progress_percentage": progress_percentage,
+            "progress_message": progress_message
+        })
+        commit_or_flush(self.db)
         
-        logger.info(f"Progresso atualizado para solicitau00e7u00e3o {id_request} e sistema {id_system_process}: {progress_percentage}%")
+        event_logger.info("process.progress_updated", id_request=id_request, id_system_process=id_system_process,
+                          progress_percentage=progress_percentage)
         
         return True
     
-    def get_latest_progress(self, id_request: int, id_system_process: int) -> Optional[ProcessProgress]:
+    @read_only
+    def get_latest_progress(self, id_request: int,
+                            id_system_process: int) -> Optional[Union[ProcessProgress, ProcessProgressArchive]]:
         """Obtu00e9m o u00faltimo progresso para um processo.
         
+        Sem progresso em tb_process_progress, busca o progresso final arquivado.
+        
         Args:
             id_request: ID da solicitau00e7u00e3o
             id_system_process: ID do sistema de processamento
             
         Returns:
-            Optional[ProcessProgress]: O u00faltimo progresso, se existir
+            Optional[Union[ProcessProgress, ProcessProgressArchive]]: O u00faltimo progresso, se existir
         """
-        return self.db.query(ProcessProgress).filter(
+        progress = self.db.query(ProcessProgress).filter(
             and_(
                 ProcessProgress.id_request == id_request,
                 ProcessProgress.id_system_process == id_system_process
             )
         ).order_by(ProcessProgress.dt_progress_update.desc()).first()
+        if progress is None:
+            return self.db.query(ProcessProgressArchive).filter(
+                and_(
+                    ProcessProgressArchive.id_request == id_request,
+                    ProcessProgressArchive.id_system_process == id_system_process
+                )
+            ).first()
+        return progress
+    
+    @read_only
+    def get_latest_progress_bulk(self, request_ids: List[int]) -> Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]]:
+        """Obtém o último progresso de cada processo de várias solicitações.
+        
+        Usa uma única consulta com ROW_NUMBER() particionado por (id_request, id_system_process)
+        por lote de IDs, apoiada pelo índice composto ix_process_progress_latest, em vez de
+        uma consulta ORDER BY ... DESC por processo. As solicitações sem progresso em
+        tb_process_progress são buscadas em tb_process_progress_archive.
+        
+        Args:
+            request_ids: IDs das solicitações
+            
+        Returns:
+            Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]]: Último progresso por
+            (id_request, id_system_process); processos sem progresso registrado não aparecem no dicionário
+        """
+        latest: Dict[Tuple[int, int], Union[ProcessProgress, ProcessProgressArchive]] = {}
+        missing = list(dict.fromkeys(request_ids))
+        for query in (select_latest_progress, select_archived_progress):
+            for start in range(0, len(missing), IN_CLAUSE_CHUNK_SIZE):
+                chunk = missing[start:start + IN_CLAUSE_CHUNK_SIZE]
+                for progress in self.db.execute(query(chunk)).scalars():
+                    latest[(progress.id_request, progress.id_system_process)] = progress
+            found = {id_request for id_request, _ in latest}
+            missing = [id_request for id_request in missing if id_request not in found]
+        return latest
     
     def get_status_text(self, status_code: int, status_type: str = "verify") -> str:
         """Converte cu00f3digo de status em representau00e7u00e3o textual.
@@ -0,0 +1,348 @@
+"""
+Buffer write-behind para atualizações de progresso de processos.
+
+Os sistemas de processamento reportam progresso a cada poucos segundos para cada
+job, e a maior parte desses registros são percentuais intermediários que ninguém
+consulta. Este módulo mantém em memória apenas o progresso mais recente de cada
+(id_request, id_system_process) e grava em tb_process_progress em lotes, quando o
+buffer atinge um tamanho máximo, a cada intervalo de tempo e no encerramento.
+
+Regras de durabilidade (configuráveis):
+    - Progressos de 0% e 100% nunca são descartados pela coalescência.
+    - Uma mudança de progress_message preserva o registro anterior.
+
+Falhas de gravação: os registros voltam ao buffer (coalescidos com os que chegaram
+durante o flush) e os próximos flushes esperam um backoff exponencial, inclusive os
+disparados por tamanho. O buffer é limitado a max_buffered registros: acima disso,
+os registros não terminais (abaixo de 100%) mais antigos são descartados e contados.
+
+Classe:
+    ProgressWriteBuffer: Coalesce e persiste atualizações de progresso em lote.
+
+Funções:
+    create_progress_buffer_from_env: Cria o buffer se habilitado nas variáveis de ambiente.
+"""
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from app.models.models import ProcessProgress
+from app.services.instrumentation import metrics
+from app.services.progress_events import queue_progress_event
+from app.services.structured_logging import get_event_logger
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
+
+ProcessKey = Tuple[int, int]
+
+# Limite de chaves de processo já validadas mantidas em memória
+MAX_KNOWN_PROCESSES = 100000
+
+
+@dataclass
+class _PendingProgress:
+    """Atualização de progresso aguardando gravação."""
+
+    id_request: int
+    id_system_process: int
+    dt_progress_update: datetime
+    progress_percentage: float
+    progress_message: Optional[str]
+
+    def as_row(self) -> Dict[str, object]:
+        return {
+            "id_request": self.id_request,
+            "id_system_process": self.id_system_process,
+            "dt_progress_update": self.dt_progress_update,
+            "progress_percentage": self.progress_percentage,
+            "progress_message": self.progress_message
+        }
+
+
+class ProgressWriteBuffer:
+    """Coalesce atualizações de progresso em memória e as persiste em lote."""
+
+    def __init__(self, session_factory: sessionmaker, max_pending: int = 500,
+                 flush_interval: float = 5.0, keep_boundaries: bool = True,
+                 keep_message_changes: bool = True, max_buffered: int = 10000,
+                 max_backoff: float = 60.0):
+        """Inicializa o buffer.
+
+        Args:
+            session_factory: Fábrica de sessões usada nas gravações em lote
+            max_pending: Quantidade de registros pendentes que dispara um flush
+            flush_interval: Intervalo em segundos entre flushes periódicos; também é o
+                primeiro backoff após uma falha de gravação
+            keep_boundaries: Preserva sempre os progressos de 0% e 100%
+            keep_message_changes: Preserva o registro anterior quando a mensagem muda
+            max_buffered: Registros mantidos em memória; acima disso, os não terminais
+                mais antigos são descartados
+            max_backoff: Maior espera entre flushes após falhas consecutivas, em segundos
+        """
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.keep_boundaries = keep_boundaries
+        self.keep_message_changes = keep_message_changes
+        self.max_buffered = max(max_buffered, max_pending)
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Último registro por processo, do atualizado há mais tempo ao mais recente
+        self._latest: "OrderedDict[ProcessKey, _PendingProgress]" = OrderedDict()
+        self._durable: List[_PendingProgress] = []
+        self._known: set = set()
+        self._stop_event = threading.Event()
+        self._flush_requested = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._consecutive_errors = 0
+        self._retry_at = 0.0
+
+        self.received = 0
+        self.coalesced = 0
+        self.persisted = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def start(self) -> None:
+        """Inicia a thread de flush periódico."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="progress-write-behind", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Interrompe a thread periódica e grava tudo o que estiver pendente."""
+        self._stop_event.set()
+        self._flush_requested.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            # Após uma falha, espera o backoff em vez do intervalo
+            self._flush_requested.wait(max(self.flush_interval, self._retry_at - time.monotonic()))
+            self._flush_requested.clear()
+            if not self._stop_event.is_set() and time.monotonic() >= self._retry_at:
+                self.flush()
+
+    def is_known(self, key: ProcessKey) -> bool:
+        """Indica se o processo já foi validado em uma atualização anterior.
+
+        Args:
+            key: Chave (id_request, id_system_process)
+
+        Returns:
+            bool: True se o processo já passou pelo buffer
+        """
+        return key in self._known
+
+    def add(self, id_request: int, id_system_process: int, progress_percentage: float,
+            progress_message: Optional[str] = None) -> None:
+        """Registra uma atualização de progresso, coalescendo com a anterior do mesmo processo.
+
+        Args:
+            id_request: ID da solicitação
+            id_system_process: ID do sistema de processamento
+            progress_percentage: Porcentagem de conclusão (0-100)
+            progress_message: Mensagem de progresso
+        """
+        key = (id_request, id_system_process)
+        entry = _PendingProgress(id_request, id_system_process, datetime.now(),
+                                 progress_percentage, progress_message)
+
+        with self._lock:
+            self.received += 1
+            previous = self._latest.get(key)
+            if previous is not None:
+                if self._must_keep(previous, entry):
+                    self._durable.append(previous)
+                else:
+                    self.coalesced += 1
+            self._latest[key] = entry
+            self._latest.move_to_end(key)
+
+            if progress_percentage >= 100:
+                self._known.discard(key)
+            else:
+                if len(self._known) >= MAX_KNOWN_PROCESSES:
+                    self._known.clear()
+                self._known.add(key)
+
+            buffered = len(self._latest) + len(self._durable)
+            dropped = self._trim() if buffered > self.max_buffered else 0
+            # Durante o backoff, o tamanho não dispara flushes: o buffer cresce até max_buffered
+            should_flush = buffered >= self.max_pending and time.monotonic() >= self._retry_at
+
+        if dropped:
+            self._report_dropped(dropped)
+        # Com a thread ativa, o flush por tamanho também sai do caminho da requisição
+        if should_flush:
+            if self._thread is not None:
+                self._flush_requested.set()
+            else:
+                self.flush()
+
+    def _must_keep(self, previous: _PendingProgress, current: _PendingProgress) -> bool:
+        if self.keep_boundaries and previous.progress_percentage in (0, 100):
+            return True
+        if self.keep_message_changes and previous.progress_message != current.progress_message:
+            return True
+        return False
+
+    def _trim(self) -> int:
+        # Executado com self._lock: descarta os registros não terminais mais antigos, primeiro
+        # os preservados (_durable, em ordem de chegada) e depois os mais recentes por processo
+        excess = len(self._durable) + len(self._latest) - self.max_buffered
+        if excess <= 0:
+            return 0
+        dropped = 0
+        kept = []
+        for entry in self._durable:
+            if dropped < excess and entry.progress_percentage < 100:
+                dropped += 1
+            else:
+                kept.append(entry)
+        self._durable = kept
+        if dropped < excess:
+            # _latest já está em ordem de atualização: os mais antigos saem pela frente
+            oldest = []
+            for key, entry in self._latest.items():
+                if dropped + len(oldest) >= excess:
+                    break
+                if entry.progress_percentage < 100:
+                    oldest.append(key)
+            for key in oldest:
+                del self._latest[key]
+            dropped += len(oldest)
+        self.dropped += dropped
+        return dropped
+
+    def _report_dropped(self, dropped: int) -> None:
+        metrics.progress_updates_dropped.inc(amount=dropped)
+        event_logger.warning("progress.dropped", dropped=dropped, max_buffered=self.max_buffered)
+
+    def _restore(self, durable: List[_PendingProgress], latest: Dict[ProcessKey, _PendingProgress]) -> int:
+        # Executado com self._lock: devolve ao buffer um lote que não foi gravado, à frente
+        # dos registros que chegaram durante o flush
+        restored = list(durable)
+        older: "OrderedDict[ProcessKey, _PendingProgress]" = OrderedDict()
+        for key, entry in latest.items():
+            newer = self._latest.get(key)
+            if newer is None:
+                older[key] = entry
+            elif self._must_keep(entry, newer):
+                restored.append(entry)
+            else:
+                self.coalesced += 1
+        older.update(self._latest)
+        self._latest = older
+        self._durable[:0] = restored
+        return self._trim()
+
+    def flush(self) -> int:
+        """Grava todos os registros pendentes em um único INSERT em lote.
+
+        Em caso de erro, os registros voltam para o buffer (respeitando max_buffered) e os
+        próximos flushes automáticos esperam um backoff exponencial, a partir de
+        flush_interval e limitado a max_backoff.
+
+        Returns:
+            int: Quantidade de registros gravados
+        """
+        with self._flush_lock:
+            with self._lock:
+                durable, latest = self._durable, self._latest
+                pending = durable + list(latest.values())
+                self._durable = []
+                self._latest = OrderedDict()
+
+            if not pending:
+                return 0
+
+            db = self.session_factory()
+            try:
+                db.execute(insert(ProcessProgress), [entry.as_row() for entry in pending])
+                # Os assinantes recebem o progresso coalescido, tal como gravado, após o commit
+                for entry in pending:
+                    row = entry.as_row()
+                    queue_progress_event(db, row.pop("id_request"), row.pop("id_system_process"), "progress", row)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    dropped = self._restore(durable, latest)
+                    self.flush_errors += 1
+                    self._consecutive_errors += 1
+                    backoff = min(self.max_backoff, self.flush_interval * 2 ** (self._consecutive_errors - 1))
+                    self._retry_at = time.monotonic() + backoff
+                event_logger.error("progress.flush_failed", pending=len(pending), retry_in=backoff, error=str(e))
+                if dropped:
+                    self._report_dropped(dropped)
+                return 0
+            finally:
+                db.close()
+
+            with self._lock:
+                self.persisted += len(pending)
+                self.flushes += 1
+                self._consecutive_errors = 0
+                self._retry_at = 0.0
+
+        event_logger.debug("progress.flushed", pending=len(pending))
+        return len(pending)
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do buffer.
+
+        Returns:
+            Dict[str, int]: Atualizações recebidas, coalescidas, persistidas, descartadas, pendentes e flushes
+        """
+        with self._lock:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "persisted": self.persisted,
+                "dropped": self.dropped,
+                "pending": len(self._latest) + len(self._durable),
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors
+            }
+
+
+def create_progress_buffer_from_env(session_factory: sessionmaker) -> Optional[ProgressWriteBuffer]:
+    """Cria e inicia o buffer write-behind se PROGRESS_WRITE_BEHIND estiver habilitado.
+
+    Args:
+        session_factory: Fábrica de sessões usada nas gravações em lote
+
+    Returns:
+        Optional[ProgressWriteBuffer]: O buffer iniciado, ou None se o modo estiver desabilitado
+    """
+    if os.getenv("PROGRESS_WRITE_BEHIND", "False").lower() not in ("1", "true", "yes"):
+        return None
+
+    buffer = ProgressWriteBuffer(
+        session_factory,
+        max_pending=int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", "500")),
+        flush_interval=float(os.getenv("PROGRESS_FLUSH_INTERVAL", "5")),
+        keep_boundaries=os.getenv("PROGRESS_KEEP_BOUNDARIES", "True").lower() in ("1", "true", "yes"),
+        keep_message_changes=os.getenv("PROGRESS_KEEP_MESSAGE_CHANGES", "True").lower() in ("1", "true", "yes"),
+        max_buffered=int(os.getenv("PROGRESS_MAX_BUFFERED", "10000")),
+        max_backoff=float(os.getenv("PROGRESS_FLUSH_MAX_BACKOFF", "60"))
+    )
+    buffer.start()
+    return buffer
@@ -0,0 +1,301 @@
+"""
+Publicação em processo (pub/sub) das mudanças de progresso e de status dos processos.
+
+Os serviços registram na sessão um ProgressEvent para cada progresso gravado e cada
+transição de status aplicada (queue_progress_event); os eventos são publicados no
+ProgressEventBus somente depois do commit da transação (evento after_commit da
+Session) e descartados no rollback, de modo que nenhum assinante recebe uma mudança
+que não foi confirmada. Dentro de unit_of_work, a publicação acontece no commit do
+bloco mais externo.
+
+Cada assinatura (por id_request) tem uma fila limitada consumida no event loop do
+worker. Um assinante lento cuja fila enche é desconectado (slow-consumer dropping)
+em vez de atrasar a publicação ou acumular memória; o cliente reconecta e recebe um
+novo snapshot. Sem assinantes para a solicitação, nenhum evento é criado. Assinantes
+ociosos não geram consultas ao banco.
+
+O barramento é local ao processo: cada worker entrega os eventos das transações
+confirmadas por ele mesmo.
+
+Classes:
+    ProgressEvent: Mudança de progresso ou de status de um processo.
+    Subscription: Assinatura de uma solicitação, com fila limitada.
+    ProgressEventBus: Barramento pub/sub em memória, indexado por id_request.
+    SubscriptionLimitExceeded: Erro levantado quando o worker atinge o limite de assinaturas.
+
+Funções:
+    get_event_bus: Retorna o barramento compartilhado pelo worker.
+    queue_progress_event: Registra um evento na sessão para publicação após o commit.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.services.structured_logging import get_event_logger
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Set
+import asyncio
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
+
+# Eventos pendentes de publicação em Session.info
+PENDING_EVENTS = "pending_progress_events"
+
+# Eventos enfileirados por assinante antes de desconectá-lo por lentidão
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("PROGRESS_SUBSCRIBER_QUEUE_SIZE", "100"))
+
+# Assinaturas simultâneas por worker
+MAX_SUBSCRIBERS = int(os.getenv("PROGRESS_MAX_SUBSCRIBERS", "10000"))
+
+
+@dataclass
+class ProgressEvent:
+    """Mudança de progresso ou de status de um processo.
+
+    Attributes:
+        id_request: ID da solicitação
+        id_system_process: ID do sistema de processamento
+        tp_event: "progress", "verify" ou "request"
+        data: Valores gravados (progresso ou colunas de status)
+        dt_event: Instante do evento
+    """
+
+    id_request: int
+    id_system_process: int
+    tp_event: str
+    data: Dict[str, Any]
+    dt_event: datetime = field(default_factory=datetime.now)
+
+    def to_sse(self) -> str:
+        """Serializa o evento no formato Server-Sent Events.
+
+        Returns:
+            str: Bloco "event: ...\\ndata: ...\\n\\n"
+        """
+        payload = {
+            "id_request": self.id_request,
+            "id_system_process": self.id_system_process,
+            "dt_event": self.dt_event,
+            **self.data
+        }
+        return f"event: {self.tp_event}\ndata: {json.dumps(payload, default=_json_default)}\n\n"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class SubscriptionLimitExceeded(RuntimeError):
+    """Erro levantado quando o worker atinge MAX_SUBSCRIBERS assinaturas."""
+
+
+class Subscription:
+    """Assinatura dos eventos de uma solicitação, consumida no event loop que a criou."""
+
+    def __init__(self, bus: "ProgressEventBus", id_request: int, loop: asyncio.AbstractEventLoop,
+                 max_queue: int = SUBSCRIBER_QUEUE_SIZE):
+        """Inicializa a assinatura.
+
+        Args:
+            bus: Barramento da assinatura
+            id_request: ID da solicitação assinada
+            loop: Event loop em que a fila é consumida
+            max_queue: Eventos enfileirados antes de desconectar o assinante
+        """
+        self.bus = bus
+        self.id_request = id_request
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[ProgressEvent]]" = asyncio.Queue(max_queue)
+        self.dropped = False
+        self.closed = False
+
+    def _deliver(self, progress_event: ProgressEvent) -> None:
+        # Executado no event loop da assinatura (call_soon_threadsafe)
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(progress_event)
+        except asyncio.QueueFull:
+            # Assinante lento: descarta a fila e sinaliza a desconexão com None
+            self.dropped = True
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            self.bus._remove(self)
+            with self.bus._lock:
+                self.bus.dropped += 1
+            event_logger.warning("progress_events.subscriber_dropped", id_request=self.id_request)
+
+    async def get(self) -> Optional[ProgressEvent]:
+        """Aguarda o próximo evento.
+
+        Returns:
+            Optional[ProgressEvent]: O evento, ou None se o assinante foi desconectado por lentidão
+        """
+        return await self.queue.get()
+
+    def close(self) -> None:
+        """Cancela a assinatura."""
+        self.closed = True
+        self.bus._remove(self)
+
+
+class ProgressEventBus:
+    """Barramento pub/sub em memória das mudanças dos processos, indexado por id_request.
+
+    publish pode ser chamado de qualquer thread (serviços síncronos no threadpool ou
+    assíncronos no event loop); cada evento é entregue no event loop do assinante.
+    """
+
+    def __init__(self, max_subscribers: int = MAX_SUBSCRIBERS, max_queue: int = SUBSCRIBER_QUEUE_SIZE):
+        """Inicializa o barramento.
+
+        Args:
+            max_subscribers: Assinaturas simultâneas aceitas
+            max_queue: Tamanho da fila de cada assinatura
+        """
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._count = 0
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, id_request: int) -> Subscription:
+        """Assina os eventos de uma solicitação. Deve ser chamado no event loop do consumidor.
+
+        Args:
+            id_request: ID da solicitação
+
+        Returns:
+            Subscription: Assinatura; encerre com close()
+
+        Raises:
+            SubscriptionLimitExceeded: Se o worker já tiver max_subscribers assinaturas
+        """
+        subscription = Subscription(self, id_request, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise SubscriptionLimitExceeded(f"Limite de {self.max_subscribers} assinaturas atingido")
+            self._subscriptions.setdefault(id_request, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def _remove(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.id_request)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            self._count -= 1
+            if not subscriptions:
+                del self._subscriptions[subscription.id_request]
+
+    def has_subscribers(self, id_request: int) -> bool:
+        """Indica se há assinantes para a solicitação (leitura sem lock, usada como filtro rápido).
+
+        Args:
+            id_request: ID da solicitação
+
+        Returns:
+            bool: True se houver ao menos uma assinatura
+        """
+        return id_request in self._subscriptions
+
+    def publish(self, events: List[ProgressEvent]) -> int:
+        """Entrega os eventos aos assinantes de cada solicitação, sem bloquear.
+
+        Args:
+            events: Eventos já confirmados no banco
+
+        Returns:
+            int: Quantidade de entregas agendadas
+        """
+        scheduled = 0
+        for progress_event in events:
+            with self._lock:
+                subscriptions = list(self._subscriptions.get(progress_event.id_request, ()))
+            for subscription in subscriptions:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._deliver, progress_event)
+                    scheduled += 1
+                except RuntimeError:
+                    # Event loop encerrado: a assinatura não será mais consumida
+                    self._remove(subscription)
+        with self._lock:
+            self.published += len(events)
+            self.delivered += scheduled
+        return scheduled
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do barramento.
+
+        Returns:
+            Dict[str, int]: Assinaturas ativas, eventos publicados, entregas e assinantes desconectados
+        """
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped
+            }
+
+
+_event_bus = ProgressEventBus()
+
+
+def get_event_bus() -> ProgressEventBus:
+    """Retorna o barramento de eventos compartilhado pelo worker.
+
+    Returns:
+        ProgressEventBus: Barramento do processo
+    """
+    return _event_bus
+
+
+def queue_progress_event(db, id_request: int, id_system_process: int, tp_event: str,
+                         data: Dict[str, Any]) -> None:
+    """Registra um evento na sessão para publicação após o commit da transação.
+
+    Sem assinantes para a solicitação, nada é registrado.
+
+    Args:
+        db: Sessão do banco de dados (síncrona ou assíncrona)
+        id_request: ID da solicitação
+        id_system_process: ID do sistema de processamento
+        tp_event: "progress", "verify" ou "request"
+        data: Valores gravados
+    """
+    if not _event_bus.has_subscribers(id_request):
+        return
+    db.info.setdefault(PENDING_EVENTS, []).append(
+        ProgressEvent(id_request, id_system_process, tp_event, dict(data))
+    )
+
+
+def _publish_after_commit(session: Session) -> None:
+    events = session.info.pop(PENDING_EVENTS, None)
+    if events:
+        _event_bus.publish(events)
+
+
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS, None)
+
+
+# Em nível de classe: vale para todas as sessões, inclusive RoutingSession e a sessão
+# síncrona de AsyncSession
+event.listen(Session, "after_commit", _publish_after_commit)
+event.listen(Session, "after_rollback", _discard_after_rollback)
@@ -5,6 +5,9 @@ Este mu00f3dulo contu00e9m a classe RequestService que u00e9 responsu00e1vel por
 operau00e7u00f5es relacionadas u00e0s requisiu00e7u00f5es de anonimizau00e7u00e3o no sistema.
 Implementa operau00e7u00f5es CRUD e consua para requisiu00e7u00f5es, incluindo a criação
 de novas requisições e consulta de requisições existentes.
+Cada método que altera dados confirma a própria transação, exceto dentro de
+unit_of_work (app.services.unit_of_work), em que apenas faz flush e o chamador
+confirma uma única vez.
 
 Classe:
     RequestService: Gerencia operau00e7u00f5es relacionadas u00e0s requisiu00e7u00f5es de anonimizau00e7u00e3o.
@@ -14,59 +17,503 @@ Funu00e7u00f5es:
     get_request_by_id: Obtu00e9m uma requisiu00e7u00e3o pelo ID.
     update_request: Atualiza uma requisiu00e7u00e3o existente.
     get_pending_requests: Obtu00e9m requisiu00e7u00f5es pendentes.
+    get_pending_requests_page: Obtém uma página de requisições pendentes a partir de um cursor.
+    iter_pending_requests: Percorre as requisições pendentes em blocos, com memória constante.
+    create_requests_bulk: Cria um lote de requisições e seus processos em uma única transação.
+    create_or_get_request: Cria uma requisição ou devolve a existente, se a submissão for duplicata.
+    create_or_get_requests_bulk: Cria as requisições novas de um lote e resolve as duplicatas.
+    backfill_person_columns: Preenche id_person e tp_document das requisições antigas a partir de ct_payload.
+    select_requester_ids: Monta a consulta dos IDs dos sistemas solicitantes por nome.
+    select_processing_system_ids: Monta a consulta dos IDs dos sistemas de processamento.
+    resolve_systems_from_registry: Resolve os sistemas de um lote pelo registro em memória.
+    select_pending_requests_page: Monta a consulta de uma página de requisições pendentes.
+    build_request_values: Monta os valores de tb_request para uma requisição.
+    build_process_values: Monta os valores de tb_process do fan-out de um lote de requisições.
+    dedup_key: Identifica uma submissão para a deduplicação.
+    in_flight_condition: Monta a condição das requisições ainda em andamento, elegíveis à deduplicação.
+    select_existing_request: Monta a busca da requisição existente para uma submissão.
+    select_archived_request: Monta a busca da requisição arquivada com a chave de idempotência de uma submissão.
+    select_existing_requests: Monta as buscas das requisições existentes para um lote.
+    resolve_duplicates: Associa as submissões de um lote às requisições existentes ou repetidas.
+    select_person_backfill_page: Monta a consulta de uma página de requisições sem id_person.
+    build_person_backfill_rows: Monta as linhas do UPDATE que preenche id_person e tp_document.
 """
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.models import Request
+from sqlalchemy import and_, case, insert, literal, select, update, Select
+from app.db.routing import read_only
+from app.models.models import Request, DomSystem, Process, RequestArchive, RequestStatus
 from app.models.schemas import RequestCreate
+from app.services.instrumentation import instrumented_service
+from app.services.system_registry import SystemRegistry
+from app.services.unit_of_work import commit_or_flush, in_unit_of_work, rollback_or_defer
+from app.services.status_rollup_service import (
+    REQUEST_PENDING, ROLLUP_BLOCKED, ROLLUP_COMPLETED, build_new_rollup_values
+)
+from app.services.structured_logging import get_event_logger
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Sequence, Tuple, Union
+import logging
+import os
 
+logger = logging.getLogger(__name__)
+event_logger = get_event_logger(__name__)
 
+# Quantidade de requisições inseridas por instrução multi-row na ingestão em lote
+BULK_BATCH_SIZE = 1000
+
+# Tamanho padrão das páginas da varredura de requisições pendentes
+PENDING_PAGE_SIZE = 1000
+
+# Reaproveita a solicitação pendente da mesma pessoa e sistema solicitante em vez de criar outra
+REQUEST_DEDUPLICATION = os.getenv("REQUEST_DEDUPLICATION", "True").lower() in ("1", "true", "yes")
+
+# Tamanho máximo da lista de valores na cláusula IN das buscas de duplicatas (SQL Server aceita até 2100 parâmetros)
+DEDUP_LOOKUP_CHUNK_SIZE = 1000
+
+# Identifica uma submissão: ("key", nm_system, chave) ou ("person", nm_system, id_person, tp_document)
+DedupKey = Tuple[str, ...]
+
+
+def select_requester_ids(system_names: Iterable[str]) -> Select:
+    """Monta a consulta (nm_system, id_dom_system) dos sistemas solicitantes informados.
+    
+    Args:
+        system_names: Nomes dos sistemas solicitantes
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    return select(DomSystem.nm_system, DomSystem.id_dom_system).where(DomSystem.nm_system.in_(system_names))
+
+
+def select_processing_system_ids() -> Select:
+    """Monta a consulta dos IDs dos sistemas de processamento, em ordem de ID.
+    
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    return select(DomSystem.id_dom_system).where(DomSystem.system_type == "process").order_by(DomSystem.id_dom_system)
+
+
+def resolve_systems_from_registry(registry: SystemRegistry,
+                                  system_names: Iterable[str]) -> Tuple[Dict[str, int], List[int]]:
+    """Resolve os sistemas solicitantes e de processamento a partir do registro em memória.
+    
+    Args:
+        registry: Registro em memória de tb_dom_system
+        system_names: Nomes dos sistemas solicitantes
+        
+    Returns:
+        Tuple[Dict[str, int], List[int]]: ID por nm_system dos solicitantes encontrados
+        e IDs dos sistemas de processamento
+    """
+    snapshot = registry.snapshot()
+    requester_ids = {
+        name: snapshot.by_name[name].id_dom_system
+        for name in system_names if name in snapshot.by_name
+    }
+    processing_system_ids = [system.id_dom_system for system in snapshot.by_type.get("process", ())]
+    return requester_ids, processing_system_ids
+
+
+def select_pending_requests_page(after_id: int, limit: int) -> Select:
+    """Monta a consulta de uma página de requisições pendentes, apoiada em ix_request_pending.
+    
+    Args:
+        after_id: Último id_request já lido (cursor)
+        limit: Quantidade máxima de requisições
+        
+    Returns:
+        Select: Consulta pronta para execução
+    """
+    return select(Request).where(
+        and_(Request.st_request == REQUEST_PENDING, Request.id_request > after_id)
+    ).order_by(Request.id_request).limit(limit)
+
+
+def build_request_values(request_data: RequestCreate, dt_register: datetime) -> Dict[str, Any]:
+    """Monta os valores de tb_request para uma requisição.
+    
+    Args:
+        request_data: Dados da requisição
+        dt_register: Data de registro
+        
+    Returns:
+        Dict[str, Any]: Valores das colunas de tb_request
+    """
+    return {
+        "nm_system": request_data.nm_system,
+        "ct_payload": {
+            "id_person": request_data.id_person,
+            "tp_document": request_data.tp_document
+        },
+        "id_person": request_data.id_person,
+        "tp_document": request_data.tp_document,
+        "cd_idempotency_key": request_data.idempotency_key,
+        "dt_register": dt_register
+    }
+
+
+def dedup_key(request_data: RequestCreate) -> DedupKey:
+    """Identifica uma submissão para a deduplicação.
+    
+    Com chave de idempotência, apenas a chave é considerada; sem ela, a pessoa
+    (id_person, tp_document) do mesmo sistema solicitante.
+    
+    Args:
+        request_data: Dados da requisição
+        
+    Returns:
+        DedupKey: Identificação da submissão
+    """
+    if request_data.idempotency_key:
+        return ("key", request_data.nm_system, request_data.idempotency_key)
+    return ("person", request_data.nm_system, request_data.id_person, request_data.tp_document)
+
+
+def in_flight_condition():
+    """Monta a condição das requisições ainda em andamento, elegíveis à deduplicação por pessoa.
+    
+    Além de st_request pendente, exclui as requisições cujo rollup está bloqueado
+    (algum processo recusado, em timeout ou cancelado) ou concluído: elas não avançam
+    mais, e uma nova submissão da mesma pessoa deve criar outra requisição.
+    
+    Returns:
+        ColumnElement: Condição sobre Request
+    """
+    settled = select(RequestStatus.id_request).where(
+        RequestStatus.id_request == Request.id_request,
+        RequestStatus.st_request_overall.in_((ROLLUP_BLOCKED, ROLLUP_COMPLETED))
+    ).exists()
+    return and_(Request.st_request == REQUEST_PENDING, ~settled)
+
+
+def select_existing_request(request_data: RequestCreate) -> Select:
+    """Monta a busca da requisição já existente para uma submissão, em um único índice.
+    
+    Com chave de idempotência, busca por (nm_system, cd_idempotency_key) em
+    ux_request_idempotency; sem ela, a requisição em andamento (in_flight_condition) da
+    mesma pessoa e sistema solicitante em ix_request_person.
+    
+    Args:
+        request_data: Dados da requisição
+        
+    Returns:
+        Select: Consulta de no máximo uma requisição
+    """
+    if request_data.idempotency_key:
+        condition = and_(
+            Request.nm_system == request_data.nm_system,
+            Request.cd_idempotency_key == request_data.idempotency_key
+        )
+    else:
+        condition = and_(
+            Request.nm_system == request_data.nm_system,
+            Request.id_person == request_data.id_person,
+            Request.tp_document == request_data.tp_document,
+            in_flight_condition()
+        )
+    return select(Request).where(condition).order_by(Request.id_request).limit(1)
+
+
+def select_archived_request(request_data: RequestCreate) -> Select:
+    """Monta a busca da requisição arquivada com a chave de idempotência de uma submissão.
+    
+    A chave continua válida depois que a requisição sai de tb_request: a busca usa
+    ux_request_archive_idempotency. Sem chave não há busca no arquivo, já que só
+    requisições em andamento são reaproveitadas na deduplicação por pessoa.
+    
+    Args:
+        request_data: Dados da requisição, com idempotency_key
+        
+    Returns:
+        Select: Consulta de no máximo uma requisição arquivada
+    """
+    return select(RequestArchive).where(
+        RequestArchive.nm_system == request_data.nm_system,
+        RequestArchive.cd_idempotency_key == request_data.idempotency_key
+    ).limit(1)
+
+
+def select_existing_requests(requests_data: Sequence[RequestCreate], deduplicate: bool) -> List[Select]:
+    """Monta as buscas das requisições já existentes para um lote de submissões.
+    
+    As submissões são agrupadas por sistema solicitante (e tipo de documento), com uma
+    cláusula IN por grupo e bloco de DEDUP_LOOKUP_CHUNK_SIZE valores, de modo que cada
+    consulta percorre um intervalo de ux_request_idempotency ou ix_request_person. As
+    chaves de idempotência também são buscadas em ux_request_archive_idempotency, depois
+    das requisições ativas.
+    
+    Args:
+        requests_data: Dados das requisições
+        deduplicate: Se False, apenas as submissões com chave de idempotência são buscadas
+        
+    Returns:
+        List[Select]: Consultas de (id_request, nm_system, id_person, tp_document, cd_idempotency_key, in_flight)
+    """
+    by_key: Dict[str, set] = {}
+    by_person: Dict[Tuple[str, str], set] = {}
+    for item in requests_data:
+        if item.idempotency_key:
+            by_key.setdefault(item.nm_system, set()).add(item.idempotency_key)
+        elif deduplicate:
+            by_person.setdefault((item.nm_system, item.tp_document), set()).add(item.id_person)
+    
+    # in_flight: 1 se a requisição for elegível à deduplicação por pessoa (in_flight_condition)
+    columns = (Request.id_request, Request.nm_system, Request.id_person, Request.tp_document,
+               Request.cd_idempotency_key, case((in_flight_condition(), 1), else_=0).label("in_flight"))
+    statements = []
+    for nm_system, keys in by_key.items():
+        keys = sorted(keys)
+        for start in range(0, len(keys), DEDUP_LOOKUP_CHUNK_SIZE):
+            statements.append(select(*columns).where(
+                Request.nm_system == nm_system,
+                Request.cd_idempotency_key.in_(keys[start:start + DEDUP_LOOKUP_CHUNK_SIZE])
+            ))
+    # Requisições arquivadas nunca estão em andamento
+    archived_columns = (RequestArchive.id_request, RequestArchive.nm_system, RequestArchive.id_person,
+                        RequestArchive.tp_document, RequestArchive.cd_idempotency_key, literal(0).label("in_flight"))
+    for nm_system, keys in by_key.items():
+        keys = sorted(keys)
+        for start in range(0, len(keys), DEDUP_LOOKUP_CHUNK_SIZE):
+            statements.append(select(*archived_columns).where(
+                RequestArchive.nm_system == nm_system,
+                RequestArchive.cd_idempotency_key.in_(keys[start:start + DEDUP_LOOKUP_CHUNK_SIZE])
+            ))
+    for (nm_system, tp_document), people in by_person.items():
+        people = sorted(people)
+        for start in range(0, len(people), DEDUP_LOOKUP_CHUNK_SIZE):
+            statements.append(select(*columns).where(
+                Request.nm_system == nm_system,
+                Request.id_person.in_(people[start:start + DEDUP_LOOKUP_CHUNK_SIZE]),
+                Request.tp_document == tp_document,
+                in_flight_condition()
+            ).order_by(Request.id_request))
+    return statements
+
+
+def resolve_duplicates(requests_data: Sequence[RequestCreate], existing_rows: Iterable[Any],
+                       deduplicate: bool) -> Tuple[List[Optional[int]], List[int]]:
+    """Associa cada submissão de um lote à requisição existente ou à primeira submissão igual do lote.
+    
+    Args:
+        requests_data: Dados das requisições
+        existing_rows: Linhas devolvidas pelas consultas de select_existing_requests
+        deduplicate: Se False, submissões sem chave de idempotência nunca são duplicatas
+        
+    Returns:
+        Tuple[List[Optional[int]], List[int]]: id_request existente de cada submissão (None
+        para as novas e suas repetições no lote) e, para cada submissão, o índice da
+        submissão nova que a representa (ela própria, se nova)
+    """
+    existing: Dict[DedupKey, int] = {}
+    for row in existing_rows:
+        if row.cd_idempotency_key is not None:
+            existing.setdefault(("key", row.nm_system, row.cd_idempotency_key), row.id_request)
+        if row.in_flight:
+            existing.setdefault(("person", row.nm_system, row.id_person, row.tp_document), row.id_request)
+    
+    existing_ids: List[Optional[int]] = []
+    representatives: List[int] = []
+    first_seen: Dict[DedupKey, int] = {}
+    for index, item in enumerate(requests_data):
+        key = dedup_key(item)
+        if key[0] == "person" and not deduplicate:
+            existing_ids.append(None)
+            representatives.append(index)
+            continue
+        existing_ids.append(existing.get(key))
+        representatives.append(first_seen.setdefault(key, index))
+    return existing_ids, representatives
+
+
+def select_person_backfill_page(after_id: int, limit: int) -> Select:
+    """Monta a consulta de uma página de requisições sem id_person preenchido (anteriores à coluna).
+    
+    Args:
+        after_id: Último id_request já lido (cursor)
+        limit: Quantidade máxima de requisições
+        
+    Returns:
+        Select: Consulta de (id_request, ct_payload)
+    """
+    return select(Request.id_request, Request.ct_payload).where(
+        Request.id_request > after_id, Request.id_person.is_(None)
+    ).order_by(Request.id_request).limit(limit)
+
+
+def build_person_backfill_rows(rows: Iterable[Tuple[int, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """Monta as linhas do UPDATE em lote que copia id_person e tp_document de ct_payload para as colunas.
+    
+    Args:
+        rows: Pares (id_request, ct_payload)
+        
+    Returns:
+        List[Dict[str, Any]]: Linhas para UPDATE em lote pela chave primária
+    """
+    return [
+        {
+            "id_request": id_request,
+            "id_person": (payload or {}).get("id_person"),
+            "tp_document": (payload or {}).get("tp_document")
+        }
+        for id_request, payload in rows
+    ]
+
+
+def build_process_values(request_ids: Sequence[int], requests_data: Sequence[RequestCreate],
+                         requester_ids: Dict[str, int], processing_system_ids: Sequence[int],
+                         dt_system_verify: datetime) -> List[Dict[str, Any]]:
+    """Monta os valores de tb_process para o produto cartesiano requisições x sistemas de processamento.
+    
+    Args:
+        request_ids: IDs gerados para as requisições, na mesma ordem de requests_data
+        requests_data: Dados das requisições
+        requester_ids: ID do sistema solicitante por nm_system
+        processing_system_ids: IDs dos sistemas de processamento
+        dt_system_verify: Data de início da verificação
+        
+    Returns:
+        List[Dict[str, Any]]: Valores das colunas de tb_process
+    """
+    return [
+        {
+            "id_request": id_request,
+            "id_system_process": id_system_process,
+            "id_system_requester": requester_ids[item.nm_system],
+            "id_person": item.id_person,
+            "tp_document": item.tp_document,
+            "dt_system_verify": dt_system_verify,
+            "st_system_verify": 0,  # Pendente
+            "st_system_request": 0  # Pendente
+        }
+        for id_request, item in zip(request_ids, requests_data)
+        for id_system_process in processing_system_ids
+    ]
+
+
+@instrumented_service("request_service")
 class RequestService:
     """Serviu00e7o para gerenciamento de requisiu00e7u00f5es de anonimizau00e7u00e3o."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, system_registry: Optional[SystemRegistry] = None,
+                 deduplicate: bool = REQUEST_DEDUPLICATION):
         """Inicializa o serviu00e7o de requisiu00e7u00f5es.
         
         Args:
             db: Sessu00e3o do banco de dados
+            system_registry: Registro em memória de tb_dom_system; se None, os sistemas
+                são consultados no banco a cada chamada
+            deduplicate: Se True, submissões sem chave de idempotência da mesma pessoa e
+                sistema solicitante reaproveitam a requisição pendente existente
         """
         self.db = db
+        self.system_registry = system_registry
+        self.deduplicate = deduplicate
     
     def create_request(self, request_data: RequestCreate) -> Request:
         """Cria uma nova requisiu00e7u00e3o de anonimizau00e7u00e3o.
         
+        Não faz deduplicação: o chamador cria em seguida os processos da requisição
+        (create_process_entry), o que falharia para uma requisição já existente. Para
+        reaproveitar submissões duplicadas, use create_or_get_request.
+        
         Args:
             request_data: Dados da requisiu00e7u00e3o a ser criada
             
         Returns:
             Request: A requisiu00e7u00e3o criada
         """
-        # Criar a solicitau00e7u00e3o no banco de dados
-        new_request = Request(
-            nm_system=request_data.nm_system,
-            ct_payload={
-                "id_person": request_data.id_person,
-                "tp_document": request_data.tp_document
-            },
-            dt_register=datetime.now()
-        )
+        new_request = self._add_request(request_data)
+        if commit_or_flush(self.db):
+            self.db.refresh(new_request)
+        return new_request
+    
+    def _add_request(self, request_data: RequestCreate) -> Request:
+        # Criar a solicitau00e7u00e3o no banco de dados, com o rollup de status (sem processos)
+        new_request = Request(**build_request_values(request_data, datetime.now()))
         self.db.add(new_request)
-        self.db.commit()
-        self.db.refresh(new_request)
+        self.db.flush()
+        self.db.add(RequestStatus(**build_new_rollup_values(new_request.id_request, 0)))
         return new_request
     
-    def get_request_by_id(self, request_id: int) -> Optional[Request]:
+    def find_existing_request(self, request_data: RequestCreate) -> Optional[Union[Request, RequestArchive]]:
+        """Busca a requisição já existente para uma submissão (ver select_existing_request).
+        
+        Com chave de idempotência, recorre a tb_request_archive se a requisição não
+        estiver em tb_request (ver select_archived_request).
+        
+        Args:
+            request_data: Dados da requisição
+            
+        Returns:
+            Optional[Union[Request, RequestArchive]]: A requisição existente (ativa ou arquivada), ou None
+        """
+        if not request_data.idempotency_key and not self.deduplicate:
+            return None
+        existing = self.db.execute(select_existing_request(request_data)).scalars().first()
+        if existing is None and request_data.idempotency_key:
+            existing = self.db.execute(select_archived_request(request_data)).scalars().first()
+        return existing
+    
+    def create_or_get_request(self, request_data: RequestCreate) -> Tuple[Union[Request, RequestArchive], bool]:
+        """Cria uma requisição, a menos que a submissão seja duplicata de uma existente.
+        
+        É duplicata a submissão com a mesma chave de idempotência do mesmo sistema
+        solicitante, mesmo que a requisição já tenha sido arquivada, ou, sem chave, a da
+        mesma pessoa com requisição ainda em andamento (ver select_existing_request e
+        select_archived_request). A verificação é uma busca em índice; submissões
+        simultâneas com a mesma chave de idempotência são resolvidas pelo índice único
+        ux_request_idempotency. O chamador só deve criar os processos da requisição
+        quando ela tiver sido criada agora.
+        
+        Args:
+            request_data: Dados da requisição
+            
+        Returns:
+            Tuple[Union[Request, RequestArchive], bool]: A requisição (ativa ou arquivada) e
+            True se ela foi criada agora
+        """
+        existing = self.find_existing_request(request_data)
+        if existing is not None:
+            event_logger.info("request.duplicate_resolved", nm_system=request_data.nm_system, id_request=existing.id_request)
+            return existing, False
+        
+        try:
+            new_request = self._add_request(request_data)
+        except IntegrityError:
+            # Outra submissão com a mesma chave de idempotência venceu a corrida
+            if in_unit_of_work(self.db) or not request_data.idempotency_key:
+                raise
+            self.db.rollback()
+            existing = self.find_existing_request(request_data)
+            if existing is None:
+                raise
+            return existing, False
+        
+        if commit_or_flush(self.db):
+            self.db.refresh(new_request)
+        return new_request, True
+    
+    @read_only
+    def get_request_by_id(self, request_id: int) -> Optional[Union[Request, RequestArchive]]:
         """Obtu00e9m uma requisiu00e7u00e3o pelo ID.
         
+        Se a requisição não estiver em tb_request, é buscada em tb_request_archive
+        (app.services.archive_service).
+        
         Args:
             request_id: ID da requisiu00e7u00e3o a ser obtida
             
         Returns:
-            Optional[Request]: A requisiu00e7u00e3o, se encontrada, ou None
+            Optional[Union[Request, RequestArchive]]: A requisiu00e7u00e3o (ativa ou arquivada), se encontrada, ou None
         """
-        return self.db.query(Request).filter(Request.id_request == request_id).first()
+        request = self.db.query(Request).filter(Request.id_request == request_id).first()
+        if request is None:
+            return self.db.get(RequestArchive, request_id)
+        return request
     
     def update_request(self, request: Request) -> Request:
         """Atualiza uma requisiu00e7u00e3o existente.
@@ -77,14 +524,193 @@ class RequestService:
         Returns:
             Request: A requisiu00e7u00e3o atualizada
         """
-        self.db.commit()
-        self.db.refresh(request)
+        if commit_or_flush(self.db):
+            self.db.refresh(request)
         return request
     
+    @read_only
     def get_pending_requests(self) -> List[Request]:
         """Obtu00e9m requisiu00e7u00f5es pendentes.
         
+        Carrega todo o backlog em memória; para volumes grandes use iter_pending_requests.
+        
         Returns:
             List[Request]: Lista de requisiu00e7u00f5es pendentes
         """
-        return self.db.query(Request).filter(Request.st_request == 0).all()
\ No newline at end of file
+        return self.db.query(Request).filter(Request.st_request == REQUEST_PENDING).order_by(Request.id_request).all()
+    
+    @read_only
+    def get_pending_requests_page(self, after_id: int = 0,
+                                  limit: int = PENDING_PAGE_SIZE) -> Tuple[List[Request], Optional[int]]:
+        """Obtém uma página de requisições pendentes a partir de um cursor (keyset por id_request).
+        
+        Args:
+            after_id: Último id_request já processado (cursor); 0 para começar do início
+            limit: Quantidade máxima de requisições na página
+            
+        Returns:
+            Tuple[List[Request], Optional[int]]: Requisições da página e o cursor da próxima
+            página, ou None se esta for a última
+        """
+        requests = list(self.db.execute(select_pending_requests_page(after_id, limit)).scalars())
+        next_cursor = requests[-1].id_request if len(requests) == limit else None
+        return requests, next_cursor
+    
+    def iter_pending_requests(self, after_id: int = 0,
+                              chunk_size: int = PENDING_PAGE_SIZE) -> Iterator[List[Request]]:
+        """Percorre as requisições pendentes em blocos paginados por keyset, com memória constante.
+        
+        Cada bloco é removido da sessão depois que o consumidor o processa, então
+        alterações em seus objetos devem ser confirmadas antes de pedir o próximo bloco.
+        Para retomar após uma interrupção, passe o id_request do último item processado.
+        
+        Args:
+            after_id: Cursor inicial (último id_request já processado)
+            chunk_size: Quantidade de requisições por bloco
+            
+        Yields:
+            List[Request]: Bloco de requisições pendentes, em ordem de id_request
+        """
+        cursor: Optional[int] = after_id
+        while cursor is not None:
+            chunk, cursor = self.get_pending_requests_page(cursor, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            for request in chunk:
+                if request in self.db:
+                    self.db.expunge(request)
+    
+    def create_requests_bulk(self, requests_data: List[RequestCreate],
+                             batch_size: int = BULK_BATCH_SIZE) -> List[int]:
+        """Cria um lote de requisições e o produto cartesiano de processos em uma única transação.
+        
+        Submissões duplicadas recebem o id_request existente, sem novos processos (ver
+        create_or_get_requests_bulk).
+        
+        Args:
+            requests_data: Lista de requisições a serem criadas
+            batch_size: Quantidade de requisições por instrução de INSERT
+            
+        Returns:
+            List[int]: IDs das requisições, na mesma ordem de requests_data
+            
+        Raises:
+            ValueError: Se algum nm_system não estiver cadastrado em tb_dom_system
+        """
+        return self.create_or_get_requests_bulk(requests_data, batch_size)[0]
+    
+    def create_or_get_requests_bulk(self, requests_data: List[RequestCreate],
+                                    batch_size: int = BULK_BATCH_SIZE) -> Tuple[List[int], int]:
+        """Cria as requisições novas de um lote e resolve as duplicatas para as existentes.
+        
+        Antes de cada instrução de INSERT, as submissões do bloco são buscadas nos índices
+        ux_request_idempotency, ux_request_archive_idempotency e ix_request_person (uma
+        consulta por sistema solicitante e tipo de documento); as duplicatas, inclusive as
+        repetidas no próprio lote, recebem o id_request existente e não geram processos. Os registros de tb_request novos são
+        inseridos em instruções multi-row com RETURNING dos IDs gerados (na ordem dos
+        parâmetros), e os registros de tb_process e tb_request_status de cada lote são
+        inseridos com executemany. O commit é feito uma única vez ao final; qualquer falha
+        desfaz o lote inteiro.
+        
+        Args:
+            requests_data: Lista de requisições a serem criadas
+            batch_size: Quantidade de requisições por instrução de INSERT
+            
+        Returns:
+            Tuple[List[int], int]: IDs das requisições, na mesma ordem de requests_data, e
+            quantidade de requisições criadas
+            
+        Raises:
+            ValueError: Se algum nm_system não estiver cadastrado em tb_dom_system
+        """
+        if not requests_data:
+            return [], 0
+        
+        # Resolver os sistemas solicitantes e de processamento pelo registro em memória
+        # ou, sem registro, com uma consulta cada
+        system_names = {item.nm_system for item in requests_data}
+        if self.system_registry is not None:
+            requester_ids, processing_system_ids = resolve_systems_from_registry(self.system_registry, system_names)
+        else:
+            requester_ids = dict(self.db.execute(select_requester_ids(system_names)).all())
+            processing_system_ids = self.db.execute(select_processing_system_ids()).scalars().all()
+        unknown_systems = system_names - requester_ids.keys()
+        if unknown_systems:
+            raise ValueError(f"Sistemas não encontrados: {', '.join(sorted(unknown_systems))}")
+        
+        now = datetime.now()
+        request_ids: List[int] = []
+        created = 0
+        insert_requests = insert(Request).returning(Request.id_request, sort_by_parameter_order=True)
+        
+        try:
+            for start in range(0, len(requests_data), batch_size):
+                chunk = requests_data[start:start + batch_size]
+                existing_rows = [
+                    row for statement in select_existing_requests(chunk, self.deduplicate)
+                    for row in self.db.execute(statement)
+                ]
+                existing_ids, representatives = resolve_duplicates(chunk, existing_rows, self.deduplicate)
+                new_indexes = [
+                    index for index, id_request in enumerate(existing_ids)
+                    if id_request is None and representatives[index] == index
+                ]
+                new_items = [chunk[index] for index in new_indexes]
+                if not new_items:
+                    request_ids.extend(existing_ids)
+                    continue
+                
+                chunk_ids = self.db.execute(
+                    insert_requests,
+                    [build_request_values(item, now) for item in new_items]
+                ).scalars().all()
+                inserted = dict(zip(new_indexes, chunk_ids))
+                request_ids.extend(
+                    id_request if id_request is not None else inserted[representatives[index]]
+                    for index, id_request in enumerate(existing_ids)
+                )
+                created += len(chunk_ids)
+                
+                process_rows = build_process_values(
+                    chunk_ids, new_items, requester_ids, processing_system_ids, now
+                )
+                if process_rows:
+                    self.db.execute(insert(Process), process_rows)
+                self.db.execute(
+                    insert(RequestStatus),
+                    [build_new_rollup_values(id_request, len(processing_system_ids)) for id_request in chunk_ids]
+                )
+            
+            commit_or_flush(self.db)
+        except Exception:
+            rollback_or_defer(self.db)
+            raise
+        
+        if created < len(requests_data):
+            event_logger.info("request.bulk_duplicates_resolved", duplicates=len(requests_data) - created)
+        return request_ids, created
+    
+    def backfill_person_columns(self, batch_size: int = PENDING_PAGE_SIZE) -> int:
+        """Preenche id_person e tp_document das requisições anteriores às colunas, a partir de ct_payload.
+        
+        Percorre as requisições sem id_person por keyset, com um UPDATE em lote e um commit
+        por página, e pode ser interrompido e executado novamente.
+        
+        Args:
+            batch_size: Requisições por página
+            
+        Returns:
+            int: Quantidade de requisições atualizadas
+        """
+        updated = 0
+        cursor = 0
+        while True:
+            rows = self.db.execute(select_person_backfill_page(cursor, batch_size)).all()
+            if not rows:
+                break
+            self.db.execute(update(Request), build_person_backfill_rows(rows))
+            commit_or_flush(self.db)
+            updated += len(rows)
+            cursor = rows[-1][0]
+        return updated
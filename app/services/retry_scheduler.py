@@ -0,0 +1,391 @@
+"""
+Agendamento persistente das retentativas de verificação e de processamento.
+
+Cada processo guarda em tb_process a quantidade de tentativas (qt_attempts) e o
+instante da próxima tentativa (dt_next_attempt, indexado), calculado com backoff
+exponencial (RETRY_BACKOFF_FACTOR) com jitter e limitado por
+DomSystem.max_retry_attempts. O agendador mantém em memória um min-heap com os
+próximos vencimentos, recarregado a partir do índice, e só acorda quando o mais
+próximo vence: a carga de fundo passa a ser proporcional ao que está de fato
+devido, e não a uma varredura de todos os pendentes a cada intervalo. Vencimentos
+próximos são despachados juntos (dispatch_window), de modo que o custo de cada
+reivindicação é dividido pelo lote. O índice só é relido quando o horizonte em
+memória se esgota ou, para cobrir agendamentos de outros nós, a cada reload_interval.
+Com um CircuitBreakerRegistry, as chaves vencidas de sistemas com circuito aberto não
+são despachadas: voltam ao heap para depois de open_seconds (estacionadas).
+
+Classes:
+    RetryScheduler: Min-heap dos próximos vencimentos, com laço de despacho.
+
+Funções:
+    compute_backoff_seconds: Calcula o atraso da próxima tentativa com jitter.
+    compute_next_attempt: Calcula dt_next_attempt após uma tentativa, ou None se esgotadas.
+    stage_status_condition: Monta a condição de status de uma etapa pendente ou com erro.
+    retryable_status_condition: Monta a condição de status de processos com alguma etapa a retentar.
+    select_next_attempts: Monta a consulta dos próximos vencimentos, em ordem de dt_next_attempt.
+"""
+
+from sqlalchemy import and_, or_, select, Select
+from sqlalchemy.orm import sessionmaker
+from app.models.models import Process
+from app.services.circuit_breaker import CircuitBreakerRegistry
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Callable, Tuple
+import heapq
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+ProcessKey = Tuple[int, int]
+
+# Vencimentos carregados em memória a cada recarga
+SCHEDULER_HORIZON_SIZE = 1000
+
+# Intervalo mínimo entre recargas disparadas pelo fim do horizonte, em segundos
+MIN_RELOAD_INTERVAL = 1.0
+
+# Atraso máximo, em segundos, somado ao vencimento mais próximo para despachar junto
+# os que vencem logo depois dele
+SCHEDULER_DISPATCH_WINDOW = 1.0
+
+# Status de etapa que ainda serão retentados: 0=pendente, 3=erro
+RETRYABLE_STATUSES = (0, 3)
+
+
+def compute_backoff_seconds(attempts: int, base_interval: float, factor: float,
+                            max_delay: float, rng: Optional[random.Random] = None) -> float:
+    """Calcula o atraso da próxima tentativa: base * factor^(tentativas-1), com jitter.
+
+    Usa "equal jitter": metade do atraso é fixa e a outra metade aleatória, o que
+    espalha as retentativas de processos que falharam juntos sem encurtar demais o
+    intervalo.
+
+    Args:
+        attempts: Tentativas já realizadas (>= 1)
+        base_interval: Atraso da primeira retentativa, em segundos
+        factor: Fator multiplicativo por tentativa
+        max_delay: Atraso máximo, em segundos
+        rng: Gerador aleatório (para reprodutibilidade)
+
+    Returns:
+        float: Atraso em segundos
+    """
+    delay = min(max_delay, base_interval * factor ** max(attempts - 1, 0))
+    return delay / 2 + (rng or random).uniform(0, delay / 2)
+
+
+def compute_next_attempt(stage: str, attempts: int, max_attempts: int, now: datetime,
+                         rng: Optional[random.Random] = None) -> Optional[datetime]:
+    """Calcula dt_next_attempt após a tentativa de número `attempts`.
+
+    O intervalo base vem de VERIFY_RETRY_INTERVAL ou PROCESS_RETRY_INTERVAL, o fator de
+    RETRY_BACKOFF_FACTOR e o atraso máximo de RETRY_MAX_DELAY (segundos).
+
+    Args:
+        stage: Etapa ("verify" ou "process")
+        attempts: Tentativas já realizadas, incluindo a atual
+        max_attempts: Limite de tentativas do sistema (DomSystem.max_retry_attempts)
+        now: Instante da tentativa atual
+        rng: Gerador aleatório (para reprodutibilidade)
+
+    Returns:
+        Optional[datetime]: Próxima tentativa, ou None se as tentativas se esgotaram
+    """
+    if attempts >= max_attempts:
+        return None
+    interval_env = "VERIFY_RETRY_INTERVAL" if stage == "verify" else "PROCESS_RETRY_INTERVAL"
+    delay = compute_backoff_seconds(
+        attempts,
+        float(os.getenv(interval_env, "600")),
+        float(os.getenv("RETRY_BACKOFF_FACTOR", "2")),
+        float(os.getenv("RETRY_MAX_DELAY", "86400")),
+        rng
+    )
+    return now + timedelta(seconds=delay)
+
+
+def _nullable_status_in(status_column, statuses: Tuple[int, ...]):
+    # NULL equivale a 0 (pendente); evita coalesce para manter a busca pelo índice
+    condition = status_column.in_(statuses)
+    if 0 in statuses:
+        condition = or_(condition, status_column.is_(None))
+    return condition
+
+
+def stage_status_condition(stage: str):
+    """Monta a condição de status de uma etapa pendente ou com erro (0 ou 3).
+
+    A etapa "process" exige ainda a verificação aprovada.
+
+    Args:
+        stage: Etapa ("verify" ou "process")
+
+    Returns:
+        Condição SQL sobre st_system_verify/st_system_request
+    """
+    if stage == "verify":
+        return _nullable_status_in(Process.st_system_verify, RETRYABLE_STATUSES)
+    if stage == "process":
+        return and_(Process.st_system_verify == 1, _nullable_status_in(Process.st_system_request, RETRYABLE_STATUSES))
+    raise ValueError(f"Etapa de trabalho inválida: {stage}")
+
+
+def retryable_status_condition():
+    """Monta a condição de status dos processos com alguma etapa a retentar.
+
+    Um agendamento (dt_next_attempt) cujo processo já saiu dessas condições, por
+    exemplo com processamento parcial (2), não deve ser reivindicado nem carregado.
+
+    Returns:
+        Condição SQL sobre st_system_verify/st_system_request
+    """
+    return or_(stage_status_condition("verify"), stage_status_condition("process"))
+
+
+def select_next_attempts(limit: int, now: datetime) -> Select:
+    """Monta a consulta dos próximos vencimentos agendados (via ix_process_next_attempt).
+
+    Processos com lease ativo (em atendimento por outro worker) ou sem etapa a retentar
+    ficam de fora.
+
+    Args:
+        limit: Quantidade máxima de vencimentos
+        now: Instante de referência para leases expirados
+
+    Returns:
+        Select: Consulta de (dt_next_attempt, id_request, id_system_process)
+    """
+    return select(
+        Process.dt_next_attempt, Process.id_request, Process.id_system_process
+    ).where(
+        Process.dt_next_attempt.is_not(None),
+        retryable_status_condition(),
+        or_(Process.dt_lease_expires.is_(None), Process.dt_lease_expires <= now)
+    ).order_by(Process.dt_next_attempt).limit(limit)
+
+
+class RetryScheduler:
+    """Min-heap dos próximos vencimentos de tb_process, com laço de despacho em thread."""
+
+    def __init__(self, session_factory: sessionmaker, horizon_size: int = SCHEDULER_HORIZON_SIZE,
+                 reload_interval: float = 300.0, dispatch_window: float = SCHEDULER_DISPATCH_WINDOW,
+                 breakers: Optional[CircuitBreakerRegistry] = None):
+        """Inicializa o agendador com o heap vazio.
+
+        Args:
+            session_factory: Fábrica de sessões usada nas recargas
+            horizon_size: Vencimentos mais próximos carregados a cada recarga
+            reload_interval: Intervalo máximo entre recargas, em segundos; cobre
+                agendamentos feitos por outros processos
+            dispatch_window: Atraso máximo somado a um vencimento para agrupar no mesmo
+                despacho os que vencem logo depois, em segundos; 0 despacha cada vencimento
+                assim que ocorre
+            breakers: Circuit breakers do dispatcher; se informado, as chaves de sistemas com
+                circuito aberto são estacionadas em vez de despachadas
+        """
+        self.session_factory = session_factory
+        self.horizon_size = horizon_size
+        self.reload_interval = reload_interval
+        self.dispatch_window = dispatch_window
+        self.breakers = breakers
+
+        self._heap: List[Tuple[datetime, ProcessKey]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._horizon_end: Optional[datetime] = None
+        # Agendamentos feitos durante a leitura de uma recarga, somados ao heap recarregado
+        self._scheduled_during_reload: Optional[List[Tuple[datetime, ProcessKey]]] = None
+
+        self.reloads = 0
+        self.wakeups = 0
+        self.dispatches = 0
+        self.dispatched = 0
+        self.parked = 0
+
+    def reload(self) -> int:
+        """Recarrega o heap com os vencimentos mais próximos do índice.
+
+        Returns:
+            int: Vencimentos carregados
+        """
+        with self._lock:
+            self._scheduled_during_reload = []
+        db = self.session_factory()
+        try:
+            rows = db.execute(select_next_attempts(self.horizon_size, datetime.now())).all()
+        finally:
+            db.close()
+
+        heap = [(row.dt_next_attempt, (row.id_request, row.id_system_process)) for row in rows]
+        with self._lock:
+            # Com o horizonte cheio, vencimentos além do último carregado só entram na próxima recarga
+            self._horizon_end = rows[-1].dt_next_attempt if len(rows) == self.horizon_size else None
+            heap.extend(
+                item for item in self._scheduled_during_reload
+                if self._horizon_end is None or item[0] <= self._horizon_end
+            )
+            self._scheduled_during_reload = None
+            heapq.heapify(heap)
+            self._heap = heap
+            self.reloads += 1
+        self._wakeup.set()
+        return len(heap)
+
+    def schedule(self, key: ProcessKey, when: Optional[datetime]) -> None:
+        """Registra um agendamento feito neste processo, acordando o laço se ele for o mais próximo.
+
+        Args:
+            key: Chave (id_request, id_system_process)
+            when: Próxima tentativa; None é ignorado (tentativas esgotadas)
+        """
+        if when is None:
+            return
+        with self._lock:
+            if self._horizon_end is not None and when > self._horizon_end:
+                return
+            earliest = self._heap[0][0] if self._heap else None
+            heapq.heappush(self._heap, (when, key))
+            if self._scheduled_during_reload is not None:
+                self._scheduled_during_reload.append((when, key))
+        if earliest is None or when < earliest:
+            self._wakeup.set()
+
+    def seconds_until_due(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Tempo até o vencimento mais próximo.
+
+        Args:
+            now: Instante de referência; se None, o instante atual
+
+        Returns:
+            Optional[float]: Segundos até o próximo vencimento (0 se já vencido), ou None se vazio
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            earliest = self._heap[0][0]
+        return max(0.0, (earliest - (now or datetime.now())).total_seconds())
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[ProcessKey]:
+        """Remove e retorna as chaves vencidas, sem duplicatas.
+
+        Args:
+            now: Instante de referência; se None, o instante atual
+
+        Returns:
+            List[ProcessKey]: Processos devidos, em ordem de vencimento
+        """
+        now = now or datetime.now()
+        due: Dict[ProcessKey, None] = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due[heapq.heappop(self._heap)[1]] = None
+        return list(due)
+
+    def park_open_systems(self, due: List[ProcessKey], now: Optional[datetime] = None) -> List[ProcessKey]:
+        """Devolve ao heap, para depois de open_seconds, as chaves de sistemas com circuito aberto.
+
+        Args:
+            due: Chaves vencidas
+            now: Instante de referência; se None, o instante atual
+
+        Returns:
+            List[ProcessKey]: Chaves que podem ser despachadas
+        """
+        if self.breakers is None or not due:
+            return due
+        open_systems = set(self.breakers.open_systems())
+        if not open_systems:
+            return due
+        retry_at = (now or datetime.now()) + timedelta(seconds=self.breakers.config.open_seconds)
+        ready = []
+        for key in due:
+            if key[1] in open_systems:
+                self.schedule(key, retry_at)
+                self.parked += 1
+            else:
+                ready.append(key)
+        return ready
+
+    def start(self, handler: Callable[[List[ProcessKey]], None]) -> None:
+        """Inicia a thread de despacho.
+
+        O handler recebe as chaves vencidas e deve reivindicá-las (ver
+        ProcessService.claim_scheduled_processes), já que outro nó pode tê-las processado.
+
+        Args:
+            handler: Função chamada com cada lote de chaves vencidas
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(handler,), name="retry-scheduler", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Interrompe a thread de despacho."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, handler: Callable[[List[ProcessKey]], None]) -> None:
+        last_reload: Optional[datetime] = None
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            now = datetime.now()
+            with self._lock:
+                # Horizonte consumido: há vencimentos além do último carregado
+                exhausted = not self._heap and self._horizon_end is not None
+            since_reload = (now - last_reload).total_seconds() if last_reload is not None else None
+            if (since_reload is None or since_reload >= self.reload_interval
+                    or (exhausted and since_reload >= MIN_RELOAD_INTERVAL)):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Erro ao recarregar o agendador de retentativas: {str(e)}")
+                last_reload = now
+
+            # O despacho espera dispatch_window após o vencimento mais próximo e leva,
+            # em um só lote, todos os que venceram até então
+            wait = self.seconds_until_due(now - timedelta(seconds=self.dispatch_window))
+            due = self.park_open_systems(self.pop_due(now), now) if wait == 0 else []
+            if due:
+                self.dispatches += 1
+                self.dispatched += len(due)
+                try:
+                    handler(due)
+                except Exception as e:
+                    logger.error(f"Erro ao despachar {len(due)} retentativas: {str(e)}")
+                continue
+
+            with self._lock:
+                exhausted = not self._heap and self._horizon_end is not None
+            reload_every = MIN_RELOAD_INTERVAL if exhausted else self.reload_interval
+            until_reload = reload_every - (datetime.now() - last_reload).total_seconds()
+            wait = until_reload if wait is None else min(wait, until_reload)
+            self._wakeup.wait(max(wait, 0.0))
+            self.wakeups += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do agendador.
+
+        Returns:
+            Dict[str, int]: Recargas, despertares, lotes e chaves despachados, chaves estacionadas
+            e vencimentos em memória
+        """
+        with self._lock:
+            pending = len(self._heap)
+        return {
+            "reloads": self.reloads,
+            "wakeups": self.wakeups,
+            "dispatches": self.dispatches,
+            "dispatched": self.dispatched,
+            "parked": self.parked,
+            "pending": pending
+        }
@@ -0,0 +1,520 @@
+"""
+Serviço para o resumo (rollup) de status de cada solicitação.
+
+Mantém em tb_request_status, para cada solicitação, a contagem de processos em cada
+st_system_verify / st_system_request e um status geral derivado. O rollup é
+atualizado na mesma transação das escritas em tb_process, de modo que a consulta do
+status geral e a listagem de solicitações concluídas ou bloqueadas são leituras
+indexadas, sem agregar tb_process. A reconciliação reconstrói o rollup a partir de
+tb_process e reporta divergências.
+
+Escritas concorrentes em processos de uma mesma solicitação são serializadas pela
+linha de tb_request_status: cada escrita trava essa linha (build_rollup_lock) antes
+de alterar tb_process, de modo que o recálculo sempre agrega os processos já
+confirmados pelas outras transações. Sem isso, no SQL Server com READ COMMITTED
+com bloqueio, dois recálculos da mesma solicitação podem entrar em deadlock; com
+RCSI (snapshot por instrução), o último a confirmar pode gravar contagens que não
+veem a escrita do outro.
+
+Status geral (st_request_overall):
+    0 = Pendente: nenhum processo saiu da verificação pendente (ou não há processos)
+    1 = Concluído: todos os processos com st_system_request = 1
+    2 = Em andamento: demais casos
+    3 = Bloqueado: algum processo recusado, em timeout ou cancelado
+
+Classes:
+    StatusRollupService: Atualiza, consulta e reconcilia o rollup de status.
+    ReconciliationReport: Resultado de uma reconciliação.
+
+Funções:
+    overall_status_case: Monta a expressão CASE do status geral a partir das contagens.
+    build_rollup_lock: Monta o UPDATE que trava o rollup de um lote de solicitações.
+    build_rollup_refresh: Monta o UPDATE que recalcula o rollup de um lote de solicitações.
+    build_empty_rollup_reset: Monta o UPDATE que zera o rollup das solicitações sem processos.
+    open_process_condition: Monta a condição dos processos que ainda não chegaram a um status terminal.
+    build_request_pending_refresh: Monta o UPDATE que sincroniza tb_request.st_request com tb_process.
+    build_new_rollup_values: Monta o rollup inicial de uma solicitação recém-criada.
+    select_existing_rollups: Monta a consulta dos rollups existentes de um lote.
+    lock_rollups_async: Versão para AsyncSession de StatusRollupService.lock.
+    refresh_rollups_async: Versão para AsyncSession de StatusRollupService.refresh.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, insert, select, update, Select, Update
+from app.db.routing import read_only
+from app.models.models import Process, Request, RequestStatus, RequestStatusArchive
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Mapping, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PENDING = 0
+ROLLUP_COMPLETED = 1
+ROLLUP_IN_PROGRESS = 2
+ROLLUP_BLOCKED = 3
+
+# st_request de tb_request: pendente até todos os processos chegarem a um status terminal, seja
+# na etapa de processamento (st_system_request) ou já na verificação (recusa ou timeout)
+REQUEST_PENDING = 0
+REQUEST_FINISHED = 1
+TERMINAL_REQUEST_STATUSES = (1, 4, 5)
+TERMINAL_VERIFY_STATUSES = (2, 4)
+
+ROLLUP_STATUS_TEXT = {
+    ROLLUP_PENDING: "Pendente",
+    ROLLUP_COMPLETED: "Concluído",
+    ROLLUP_IN_PROGRESS: "Em andamento",
+    ROLLUP_BLOCKED: "Bloqueado"
+}
+
+# Coluna de contagem para cada código de st_system_verify / st_system_request
+VERIFY_COUNT_COLUMNS = {
+    0: "qt_verify_pending",
+    1: "qt_verify_approved",
+    2: "qt_verify_rejected",
+    3: "qt_verify_error",
+    4: "qt_verify_timeout"
+}
+REQUEST_COUNT_COLUMNS = {
+    0: "qt_request_pending",
+    1: "qt_request_completed",
+    2: "qt_request_partial",
+    3: "qt_request_error",
+    4: "qt_request_timeout",
+    5: "qt_request_canceled"
+}
+COUNT_COLUMNS = ["qt_process"] + list(VERIFY_COUNT_COLUMNS.values()) + list(REQUEST_COUNT_COLUMNS.values())
+
+# Chunk da reconciliação e das listas de IDs em cláusulas IN
+RECONCILE_BATCH_SIZE = 1000
+
+
+def overall_status_case(counts: Mapping[str, Any]):
+    """Monta a expressão CASE do status geral a partir das contagens.
+
+    As contagens podem ser colunas da subconsulta agrupada (atualização do rollup) ou
+    agregações (reconciliação), de modo que a regra é definida em um só lugar.
+
+    Args:
+        counts: Expressão SQL de cada coluna de COUNT_COLUMNS
+
+    Returns:
+        Case: Expressão com o código do status geral
+    """
+    total = counts["qt_process"]
+    blocked = (
+        counts["qt_verify_rejected"] + counts["qt_verify_timeout"]
+        + counts["qt_request_timeout"] + counts["qt_request_canceled"]
+    )
+    return case(
+        (total == 0, ROLLUP_PENDING),
+        (counts["qt_request_completed"] == total, ROLLUP_COMPLETED),
+        (blocked > 0, ROLLUP_BLOCKED),
+        (counts["qt_verify_pending"] == total, ROLLUP_PENDING),
+        else_=ROLLUP_IN_PROGRESS
+    )
+
+
+def _aggregated_counts() -> Dict[str, Any]:
+    """Agregações das contagens para uma consulta agrupada por id_request."""
+    verify_status = func.coalesce(Process.st_system_verify, 0)
+    request_status = func.coalesce(Process.st_system_request, 0)
+    counts = {"qt_process": func.count()}
+    for code, column in VERIFY_COUNT_COLUMNS.items():
+        counts[column] = func.sum(case((verify_status == code, 1), else_=0))
+    for code, column in REQUEST_COUNT_COLUMNS.items():
+        counts[column] = func.sum(case((request_status == code, 1), else_=0))
+    return counts
+
+
+def build_rollup_lock(request_ids: List[int]) -> Update:
+    """Monta o UPDATE que trava a linha de tb_request_status de um lote de solicitações.
+
+    Grava apenas dt_update; o objetivo é o bloqueio exclusivo da linha até o fim da
+    transação, que serializa as escritas nos processos da mesma solicitação mesmo
+    com RCSI (escritores sempre esperam uns pelos outros).
+
+    Args:
+        request_ids: IDs das solicitações (no máximo RECONCILE_BATCH_SIZE)
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    return update(RequestStatus).where(RequestStatus.id_request.in_(request_ids)).values(dt_update=datetime.now())
+
+
+def build_rollup_refresh(request_ids: List[int]) -> Update:
+    """Monta o UPDATE que recalcula o rollup de um lote de solicitações a partir de tb_process.
+
+    Todas as contagens saem de uma única subconsulta agrupada por id_request (uma
+    passada pelos processos do lote, via prefixo da chave primária de tb_process),
+    junta a tb_request_status com UPDATE ... FROM; o status geral é derivado das
+    colunas dessa subconsulta. Solicitações sem processos não entram na junção (ver
+    build_empty_rollup_reset).
+
+    Args:
+        request_ids: IDs das solicitações (no máximo RECONCILE_BATCH_SIZE)
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    grouped = select(
+        Process.id_request,
+        *(expression.label(column) for column, expression in _aggregated_counts().items())
+    ).where(Process.id_request.in_(request_ids)).group_by(Process.id_request).subquery()
+    counts = {column: grouped.c[column] for column in COUNT_COLUMNS}
+    return update(RequestStatus).where(RequestStatus.id_request == grouped.c.id_request).values(
+        **counts,
+        st_request_overall=overall_status_case(counts),
+        dt_update=datetime.now()
+    )
+
+
+def build_empty_rollup_reset(request_ids: List[int]) -> Update:
+    """Monta o UPDATE que zera o rollup das solicitações do lote que não têm processos.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo RECONCILE_BATCH_SIZE)
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    has_processes = select(Process.id_request).where(Process.id_request == RequestStatus.id_request).exists()
+    return update(RequestStatus).where(
+        and_(RequestStatus.id_request.in_(request_ids), ~has_processes)
+    ).values(
+        **{column: 0 for column in COUNT_COLUMNS},
+        st_request_overall=ROLLUP_PENDING,
+        dt_update=datetime.now()
+    )
+
+
+def open_process_condition():
+    """Monta a condição dos processos que ainda não chegaram a um status terminal.
+
+    Um processo está encerrado com st_system_request terminal (TERMINAL_REQUEST_STATUSES)
+    ou, se nunca chegou ao processamento, com st_system_verify terminal
+    (TERMINAL_VERIFY_STATUSES: recusado ou em timeout).
+
+    Returns:
+        ColumnElement: Condição sobre Process
+    """
+    return and_(
+        func.coalesce(Process.st_system_request, 0).not_in(TERMINAL_REQUEST_STATUSES),
+        func.coalesce(Process.st_system_verify, 0).not_in(TERMINAL_VERIFY_STATUSES)
+    )
+
+
+def build_request_pending_refresh(request_ids: List[int]) -> Update:
+    """Monta o UPDATE que sincroniza tb_request.st_request com os processos das solicitações.
+
+    Uma solicitação é finalizada quando tem processos e nenhum deles está em aberto
+    (open_process_condition), inclusive os encerrados já na verificação. A busca de
+    processos em aberto percorre a chave primária de tb_process da própria solicitação.
+
+    Args:
+        request_ids: IDs das solicitações (no máximo RECONCILE_BATCH_SIZE)
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    has_processes = select(RequestStatus.id_request).where(
+        and_(RequestStatus.id_request == Request.id_request, RequestStatus.qt_process > 0)
+    ).exists()
+    has_open_process = select(Process.id_request).where(
+        and_(Process.id_request == Request.id_request, open_process_condition())
+    ).exists()
+    return update(Request).where(Request.id_request.in_(request_ids)).values(
+        st_request=case((and_(has_processes, ~has_open_process), REQUEST_FINISHED), else_=REQUEST_PENDING)
+    )
+
+
+def build_new_rollup_values(id_request: int, process_count: int) -> Dict[str, Any]:
+    """Monta o rollup inicial de uma solicitação criada com todos os processos pendentes.
+
+    Args:
+        id_request: ID da solicitação
+        process_count: Quantidade de processos criados
+
+    Returns:
+        Dict[str, Any]: Valores das colunas de tb_request_status
+    """
+    values = {column: 0 for column in COUNT_COLUMNS}
+    values.update(
+        id_request=id_request,
+        qt_process=process_count,
+        qt_verify_pending=process_count,
+        qt_request_pending=process_count,
+        st_request_overall=ROLLUP_PENDING,
+        dt_update=datetime.now()
+    )
+    return values
+
+
+def select_existing_rollups(request_ids: List[int]) -> Select:
+    """Monta a consulta dos IDs de um lote que já possuem rollup.
+
+    Args:
+        request_ids: IDs das solicitações
+
+    Returns:
+        Select: Consulta de id_request
+    """
+    return select(RequestStatus.id_request).where(RequestStatus.id_request.in_(request_ids))
+
+
+async def lock_rollups_async(db: AsyncSession, request_ids: List[int]) -> None:
+    """Trava o rollup das solicitações informadas em uma AsyncSession, sem commit.
+
+    Args:
+        db: Sessão assíncrona do banco de dados
+        request_ids: IDs das solicitações
+    """
+    unique_ids = sorted(set(request_ids))
+    for start in range(0, len(unique_ids), RECONCILE_BATCH_SIZE):
+        await db.execute(build_rollup_lock(unique_ids[start:start + RECONCILE_BATCH_SIZE]),
+                         execution_options={"synchronize_session": False})
+
+
+async def refresh_rollups_async(db: AsyncSession, request_ids: List[int]) -> None:
+    """Recalcula o rollup das solicitações informadas em uma AsyncSession, sem commit.
+
+    Args:
+        db: Sessão assíncrona do banco de dados
+        request_ids: IDs das solicitações
+    """
+    unique_ids = list(dict.fromkeys(request_ids))
+    for start in range(0, len(unique_ids), RECONCILE_BATCH_SIZE):
+        chunk = unique_ids[start:start + RECONCILE_BATCH_SIZE]
+        result = await db.execute(build_rollup_refresh(chunk), execution_options={"synchronize_session": False})
+        if result.rowcount != len(chunk):
+            existing = set((await db.execute(select_existing_rollups(chunk))).scalars())
+            missing = [id_request for id_request in chunk if id_request not in existing]
+            if missing:
+                await db.execute(insert(RequestStatus), [build_new_rollup_values(id_request, 0) for id_request in missing])
+                await db.execute(build_rollup_refresh(missing), execution_options={"synchronize_session": False})
+            await db.execute(build_empty_rollup_reset(chunk), execution_options={"synchronize_session": False})
+
+        await db.execute(build_request_pending_refresh(chunk), execution_options={"synchronize_session": False})
+
+
+@dataclass
+class ReconciliationReport:
+    """Resultado de uma reconciliação do rollup com tb_process.
+
+    Attributes:
+        checked: Solicitações verificadas
+        missing: Solicitações sem linha em tb_request_status
+        drifted: Solicitações cujo rollup divergia de tb_process (inclui as sem rollup)
+        fixed: Solicitações corrigidas
+        drifted_ids: Amostra dos IDs divergentes (até 100)
+    """
+
+    checked: int = 0
+    missing: int = 0
+    drifted: int = 0
+    fixed: int = 0
+    drifted_ids: List[int] = field(default_factory=list)
+
+
+class StatusRollupService:
+    """Serviço para o rollup de status por solicitação."""
+
+    def __init__(self, db: Session):
+        """Inicializa o serviço de rollup.
+
+        Args:
+            db: Sessão do banco de dados
+        """
+        self.db = db
+
+    def lock(self, request_ids: List[int]) -> None:
+        """Trava a linha de rollup das solicitações informadas até o fim da transação.
+
+        Deve ser chamado antes de alterar tb_process, na mesma transação do refresh
+        posterior. As linhas são travadas em ordem de ID, evitando deadlock entre lotes.
+
+        Args:
+            request_ids: IDs das solicitações
+        """
+        unique_ids = sorted(set(request_ids))
+        for start in range(0, len(unique_ids), RECONCILE_BATCH_SIZE):
+            self.db.execute(build_rollup_lock(unique_ids[start:start + RECONCILE_BATCH_SIZE]),
+                            execution_options={"synchronize_session": False})
+
+    def refresh(self, request_ids: List[int]) -> None:
+        """Recalcula o rollup das solicitações informadas, criando as linhas ausentes.
+
+        Também sincroniza tb_request.st_request (pendente/finalizada). Não faz commit:
+        deve ser chamado dentro da transação que alterou tb_process, depois de lock.
+
+        Args:
+            request_ids: IDs das solicitações
+        """
+        unique_ids = list(dict.fromkeys(request_ids))
+        for start in range(0, len(unique_ids), RECONCILE_BATCH_SIZE):
+            chunk = unique_ids[start:start + RECONCILE_BATCH_SIZE]
+            rowcount = self.db.execute(
+                build_rollup_refresh(chunk), execution_options={"synchronize_session": False}
+            ).rowcount
+            if rowcount != len(chunk):
+                # Solicitações anteriores ao rollup (ou criadas sem ele): criar e recalcular
+                existing = set(self.db.execute(select_existing_rollups(chunk)).scalars())
+                missing = [id_request for id_request in chunk if id_request not in existing]
+                if missing:
+                    self.db.execute(insert(RequestStatus), [build_new_rollup_values(id_request, 0) for id_request in missing])
+                    self.db.execute(build_rollup_refresh(missing), execution_options={"synchronize_session": False})
+                # Solicitações sem processos ficam fora da junção do UPDATE
+                self.db.execute(build_empty_rollup_reset(chunk), execution_options={"synchronize_session": False})
+
+            self.db.execute(build_request_pending_refresh(chunk), execution_options={"synchronize_session": False})
+
+    @read_only
+    def get_rollup(self, id_request: int) -> Optional[Union[RequestStatus, RequestStatusArchive]]:
+        """Obtém o rollup de uma solicitação, recorrendo a tb_request_status_archive.
+
+        Args:
+            id_request: ID da solicitação
+
+        Returns:
+            Optional[Union[RequestStatus, RequestStatusArchive]]: O rollup (ativo ou arquivado), se existir
+        """
+        rollup = self.db.get(RequestStatus, id_request)
+        if rollup is None:
+            return self.db.get(RequestStatusArchive, id_request)
+        return rollup
+
+    @read_only
+    def get_request_ids_by_status(self, st_request_overall: int, after_id: int = 0,
+                                  limit: int = 1000) -> List[int]:
+        """Lista as solicitações em um status geral, em ordem de ID, a partir de um cursor.
+
+        Usa o índice ix_request_status_overall (st_request_overall, id_request).
+
+        Args:
+            st_request_overall: Status geral (ROLLUP_*)
+            after_id: Último id_request já lido (cursor)
+            limit: Quantidade máxima de IDs retornados
+
+        Returns:
+            List[int]: IDs das solicitações
+        """
+        return list(self.db.execute(
+            select(RequestStatus.id_request)
+            .where(
+                and_(
+                    RequestStatus.st_request_overall == st_request_overall,
+                    RequestStatus.id_request > after_id
+                )
+            )
+            .order_by(RequestStatus.id_request)
+            .limit(limit)
+        ).scalars())
+
+    def get_status_text(self, st_request_overall: int) -> str:
+        """Converte o código do status geral em representação textual.
+
+        Args:
+            st_request_overall: Código do status geral
+
+        Returns:
+            str: Representação textual do status
+        """
+        return ROLLUP_STATUS_TEXT.get(st_request_overall, f"Desconhecido ({st_request_overall})")
+
+    def reconcile(self, batch_size: int = RECONCILE_BATCH_SIZE, fix: bool = True) -> ReconciliationReport:
+        """Reconstrói o rollup a partir de tb_process e reporta divergências.
+
+Escritas concorrentes em processos de uma mesma solicitação são serializadas pela
+linha de tb_request_status: cada escrita trava essa linha (build_rollup_lock) antes
+de alterar tb_process, de modo que o recálculo sempre agrega os processos já
+confirmados pelas outras transações. Sem isso, no SQL Server com READ COMMITTED
+com bloqueio, dois recálculos da mesma solicitação podem entrar em deadlock; com
+RCSI (snapshot por instrução), o último a confirmar pode gravar contagens que não
+veem a escrita do outro.
+
+        Percorre tb_request em lotes ordenados por ID, compara o rollup gravado (e o
+        st_request da solicitação) com a agregação de tb_process e, se fix=True, corrige as divergências (um commit por lote).
+        Deve receber uma sessão dedicada: os objetos carregados são descartados a cada lote.
+
+        Args:
+            batch_size: Quantidade de solicitações por lote
+            fix: Corrige as divergências encontradas
+
+        Returns:
+            ReconciliationReport: Resultado da reconciliação
+        """
+        report = ReconciliationReport()
+        aggregated = _aggregated_counts()
+        expected_columns = [expression.label(column) for column, expression in aggregated.items()]
+        expected_columns.append(overall_status_case(aggregated).label("st_request_overall"))
+        expected_columns.append(func.sum(case((open_process_condition(), 1), else_=0)).label("qt_open"))
+        compared_columns = COUNT_COLUMNS + ["st_request_overall"]
+
+        after_id = 0
+        while True:
+            request_states = dict(self.db.execute(
+                select(Request.id_request, Request.st_request)
+                .where(Request.id_request > after_id)
+                .order_by(Request.id_request)
+                .limit(batch_size)
+            ).all())
+            if not request_states:
+                break
+            request_ids = list(request_states)
+            after_id = request_ids[-1]
+
+            expected = {
+                row.id_request: row for row in self.db.execute(
+                    select(Process.id_request, *expected_columns)
+                    .where(Process.id_request.in_(request_ids))
+                    .group_by(Process.id_request)
+                )
+            }
+            stored = {
+                rollup.id_request: rollup for rollup in self.db.execute(
+                    select(RequestStatus).where(RequestStatus.id_request.in_(request_ids))
+                ).scalars()
+            }
+
+            drifted = []
+            for id_request in request_ids:
+                report.checked += 1
+                rollup = stored.get(id_request)
+                if rollup is None:
+                    report.missing += 1
+                    drifted.append(id_request)
+                    continue
+                row = expected.get(id_request)
+                if row is None:
+                    values = build_new_rollup_values(id_request, 0)
+                    actual = {column: values[column] for column in compared_columns}
+                else:
+                    actual = {column: int(getattr(row, column) or 0) for column in compared_columns}
+                finished = row is not None and actual["qt_process"] > 0 and not row.qt_open
+                expected_state = REQUEST_FINISHED if finished else REQUEST_PENDING
+                if (any(getattr(rollup, column) != actual[column] for column in compared_columns)
+                        or request_states[id_request] != expected_state):
+                    drifted.append(id_request)
+
+            report.drifted += len(drifted)
+            room = 100 - len(report.drifted_ids)
+            if room > 0:
+                report.drifted_ids.extend(drifted[:room])
+
+            if fix and drifted:
+                self.refresh(drifted)
+                self.db.commit()
+                report.fixed += len(drifted)
+            # Descarta os objetos carregados neste lote para manter a memória constante
+            self.db.expunge_all()
+
+        if report.drifted:
+            logger.warning(f"Reconciliação do rollup: {report.drifted} de {report.checked} solicitações divergentes ({report.missing} sem rollup)")
+        else:
+            logger.info(f"Reconciliação do rollup: {report.checked} solicitações sem divergência")
+
+        return report
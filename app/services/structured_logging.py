@@ -0,0 +1,371 @@
+"""
+Logging estruturado e não bloqueante para os caminhos críticos dos serviços.
+
+Os serviços registram eventos nomeados com os identificadores como campos
+(event_logger.info("process.progress_updated", id_request=..., ...)) em vez de
+mensagens f-string. O evento é descartado antes de qualquer formatação quando o
+nível está desabilitado ou quando a amostragem o exclui, e nada é formatado na
+thread da requisição:
+
+    fila: configure_logging substitui os handlers da raiz por um QueueHandler ligado
+        a uma fila limitada (LOG_QUEUE_SIZE); uma thread de fundo (QueueListener)
+        formata os registros e faz a E/S dos handlers. Com a fila cheia, o registro é
+        descartado e contado, em vez de bloquear o serviço.
+    amostragem: LOG_SAMPLE_RATES define, por nome de evento, a fração registrada
+        (por exemplo, "process.progress_updated=0.01" mantém 1% dos progressos).
+    contagem: eventos descartados (fila cheia ou amostragem) são expostos em
+        request_manager_log_events_discarded_total, em GET /metrics.
+    saída: JSON por linha (LOG_FORMAT=json) ou texto "evento chave=valor"
+        (LOG_FORMAT=text); com LOG_BACKEND=loguru, os registros são entregues ao
+        loguru pela mesma thread de fundo.
+
+Registros de módulos que ainda usam logging.getLogger diretamente passam pela mesma
+fila. configure_logging deve ser chamado uma vez na inicialização da aplicação;
+sem ele, os eventos seguem a configuração padrão do logging.
+
+Classes:
+    EventLogger: Logger de eventos estruturados, com filtragem por nível e amostragem.
+    StructuredFormatter: Formatador JSON (ou chave=valor) dos eventos.
+    DroppingQueueHandler: QueueHandler que descarta e conta registros com a fila cheia.
+    LoguruHandler: Handler que entrega os registros ao loguru.
+    LogPipeline: Fila, handler e thread de fundo configurados por configure_logging.
+
+Funções:
+    get_event_logger: Retorna o EventLogger de um módulo.
+    configure_logging: Instala o pipeline de logging não bloqueante na raiz.
+    parse_sample_rates: Interpreta a configuração de amostragem por evento.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, List, Dict, Any
+from app.services.instrumentation import metrics
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+
+try:
+    from loguru import logger as loguru_logger
+    LOGURU_AVAILABLE = True
+except ImportError:
+    loguru_logger = None
+    LOGURU_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Registros aguardando a thread de fundo antes de passar a descartar
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# "json" ou "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# "logging" (handler de stream padrão) ou "loguru"
+LOG_BACKEND = os.getenv("LOG_BACKEND", "logging").lower()
+
+# Formato de texto do loguru, com os campos do evento (extra) ao final
+LOGURU_TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message} {extra}"
+
+# Atributos de LogRecord com o nome e os campos do evento
+EVENT_ATTRIBUTE = "event"
+FIELDS_ATTRIBUTE = "event_fields"
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Interpreta a configuração de amostragem por evento.
+
+    Args:
+        value: Pares "evento=fração" separados por vírgula (fração entre 0 e 1)
+
+    Returns:
+        Dict[str, float]: Fração registrada de cada evento
+
+    Raises:
+        ValueError: Se um par for inválido ou a fração estiver fora de [0, 1]
+    """
+    rates: Dict[str, float] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, rate = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"Amostragem inválida: {item!r}")
+        rates[name.strip()] = float(rate)
+        if not 0.0 <= rates[name.strip()] <= 1.0:
+            raise ValueError(f"Fração de amostragem fora de [0, 1]: {item!r}")
+    return rates
+
+
+# Fração registrada por evento; eventos ausentes são sempre registrados
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "process.progress_updated=0.1"))
+
+
+class EventLogger:
+    """Logger de eventos estruturados sobre um logger do módulo logging.
+
+    Os campos são guardados no LogRecord sem formatação; a mensagem é montada pelo
+    formatador, na thread de fundo do pipeline.
+    """
+
+    def __init__(self, name: str, sample_rates: Optional[Dict[str, float]] = None):
+        """Inicializa o logger de eventos.
+
+        Args:
+            name: Nome do logger (normalmente __name__)
+            sample_rates: Fração registrada por evento (padrão: LOG_SAMPLE_RATES)
+        """
+        self.logger = logging.getLogger(name)
+        self.sample_rates = LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+
+    def log(self, level: int, event: str, exc_info: Any = None, **fields: Any) -> None:
+        """Registra um evento, se o nível estiver habilitado e a amostragem o incluir.
+
+        Args:
+            level: Nível do logging
+            event: Nome do evento (por exemplo, "process.progress_updated")
+            exc_info: Exceção a anexar ao registro, como em logging.Logger.log
+            **fields: Campos do evento
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        rate = self.sample_rates.get(event)
+        if rate is not None and rate < 1.0 and random.random() >= rate:
+            metrics.log_events_discarded.inc(("sampled",))
+            return
+        self.logger.log(level, event, exc_info=exc_info, stacklevel=3,
+                        extra={EVENT_ATTRIBUTE: event, FIELDS_ATTRIBUTE: fields})
+
+    def debug(self, event: str, **fields: Any) -> None:
+        """Registra um evento no nível DEBUG."""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        """Registra um evento no nível INFO."""
+        if self.logger.isEnabledFor(logging.INFO):
+            self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        """Registra um evento no nível WARNING."""
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, exc_info: Any = None, **fields: Any) -> None:
+        """Registra um evento no nível ERROR."""
+        self.log(logging.ERROR, event, exc_info=exc_info, **fields)
+
+
+def get_event_logger(name: str) -> EventLogger:
+    """Retorna o EventLogger de um módulo.
+
+    Args:
+        name: Nome do logger (normalmente __name__)
+
+    Returns:
+        EventLogger: Logger de eventos estruturados
+    """
+    return EventLogger(name)
+
+
+def _event_name(record: logging.LogRecord) -> str:
+    return getattr(record, EVENT_ATTRIBUTE, None) or record.getMessage()
+
+
+def _event_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return getattr(record, FIELDS_ATTRIBUTE, None) or {}
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formata eventos como JSON por linha ou como texto "evento chave=valor".
+
+    Registros comuns (logger.info("mensagem")) usam a mensagem como nome do evento.
+    """
+
+    def __init__(self, log_format: str = LOG_FORMAT):
+        """Inicializa o formatador.
+
+        Args:
+            log_format: "json" ou "text"
+        """
+        super().__init__()
+        self.log_format = log_format
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = _event_fields(record)
+        if self.log_format == "text":
+            pairs = " ".join(f"{key}={value}" for key, value in fields.items())
+            line = (f"{self.formatTime(record)} {record.levelname} {record.name} {_event_name(record)}"
+                    f"{' ' + pairs if pairs else ''}")
+            if record.exc_info:
+                line += "\n" + self.formatException(record.exc_info)
+            return line
+
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": _event_name(record),
+            **fields
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia, o registro é descartado e contado."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        """Inicializa o handler.
+
+        Args:
+            log_queue: Fila limitada consumida pela thread de fundo
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # A formatação fica com a thread de fundo; o registro segue como foi criado
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            metrics.log_events_discarded.inc(("queue_full",))
+
+
+class _DrainingQueueListener(QueueListener):
+    """QueueListener cujo encerramento espera espaço na fila limitada para o sentinela."""
+
+    def enqueue_sentinel(self) -> None:
+        # put_nowait falharia com a fila cheia; a thread de fundo libera espaço ao gravar
+        self.queue.put(self._sentinel)
+
+
+class LoguruHandler(logging.Handler):
+    """Handler que entrega os registros ao loguru, com os campos do evento em extra."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = loguru_logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # A origem exibida pelo loguru é a do registro original, não a deste handler
+        origin = {"name": record.name, "function": record.funcName, "line": record.lineno}
+        loguru_logger.bind(logger=record.name, **_event_fields(record)).patch(
+            lambda loguru_record: loguru_record.update(origin)
+        ).opt(exception=record.exc_info).log(level, _event_name(record))
+
+
+@dataclass
+class LogPipeline:
+    """Fila, handler de entrada e thread de fundo instalados por configure_logging.
+
+    Attributes:
+        queue: Fila limitada entre os serviços e a thread de fundo
+        handler: Handler instalado na raiz
+        listener: Thread de fundo que executa os handlers de saída
+        handlers: Handlers de saída
+    """
+
+    queue: "queue.Queue[logging.LogRecord]"
+    handler: DroppingQueueHandler
+    listener: QueueListener
+    handlers: List[logging.Handler] = field(default_factory=list)
+    running: bool = True
+
+    def stop(self) -> None:
+        """Remove o handler da raiz, grava os registros pendentes e encerra a thread de fundo."""
+        if not self.running:
+            return
+        self.running = False
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna o estado da fila.
+
+        Returns:
+            Dict[str, int]: Registros na fila, capacidade e registros descartados por fila cheia
+        """
+        return {"queued": self.queue.qsize(), "capacity": self.queue.maxsize, "dropped": self.handler.dropped}
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def configure_logging(level: str = LOG_LEVEL, queue_size: int = LOG_QUEUE_SIZE, log_format: str = LOG_FORMAT,
+                      backend: str = LOG_BACKEND, handlers: Optional[List[logging.Handler]] = None) -> LogPipeline:
+    """Instala o pipeline de logging não bloqueante na raiz, substituindo os handlers existentes.
+
+    Chamadas repetidas encerram o pipeline anterior antes de instalar o novo.
+
+    Args:
+        level: Nível da raiz
+        queue_size: Capacidade da fila
+        log_format: "json" ou "text"
+        backend: "logging" ou "loguru"
+        handlers: Handlers de saída; por padrão, stderr no formato log_format (ou o loguru)
+
+    Returns:
+        LogPipeline: Pipeline instalado
+
+    Raises:
+        ValueError: Se backend for "loguru" e o pacote não estiver instalado
+    """
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+
+    if handlers is None:
+        if backend == "loguru":
+            if not LOGURU_AVAILABLE:
+                raise ValueError("LOG_BACKEND=loguru requer o pacote loguru")
+            loguru_logger.remove()
+            if log_format == "json":
+                loguru_logger.add(sys.stderr, level=level, serialize=True)
+            else:
+                loguru_logger.add(sys.stderr, level=level, format=LOGURU_TEXT_FORMAT)
+            handlers = [LoguruHandler()]
+        else:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(StructuredFormatter(log_format))
+            handlers = [stream_handler]
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    listener = _DrainingQueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    listener.start()
+
+    _pipeline = LogPipeline(log_queue, queue_handler, listener, list(handlers))
+    logger.debug(f"Pipeline de logging instalado (fila de {queue_size}, formato {log_format}, backend {backend})")
+    return _pipeline
+
+
+def _stop_pipeline() -> None:
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+# Esvazia a fila na saída do processo
+atexit.register(_stop_pipeline)
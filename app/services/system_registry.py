@@ -0,0 +1,252 @@
+"""
+Registro em memória dos sistemas cadastrados em tb_dom_system.
+
+A tabela tb_dom_system tem poucas linhas que quase nunca mudam, mas é consultada
+várias vezes por requisição: para resolver nm_system do solicitante, para listar os
+sistemas de processamento no fan-out e para ler timeouts e limites de tentativas.
+Este módulo carrega a tabela inteira uma vez em estruturas imutáveis indexadas por
+nome, por ID e por tipo, recarrega após um TTL e pode ser invalidado explicitamente
+quando um administrador altera um sistema.
+
+Classes:
+    SystemInfo: Cópia imutável de um registro de DomSystem.
+    SystemSnapshot: Conjunto imutável de índices de sistemas carregados.
+    SystemRegistry: Cache com TTL, invalidação explícita e contadores de acerto.
+
+Funções:
+    get_system_registry: Retorna o registro compartilhado pela aplicação.
+"""
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+from app.models.models import DomSystem
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Dict, Mapping, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SystemInfo:
+    """Cópia imutável de um registro de DomSystem, segura para uso entre sessões e threads."""
+
+    id_dom_system: int
+    nm_system: str
+    system_type: str
+    api_verify_address: Optional[str]
+    api_request_address: Optional[str]
+    api_status_address: Optional[str]
+    verification_timeout_days: int
+    processing_timeout_days: int
+    max_retry_attempts: int
+
+    @classmethod
+    def from_model(cls, system: DomSystem) -> "SystemInfo":
+        """Cria a cópia a partir de uma instância ORM, aplicando os padrões das colunas.
+
+        Args:
+            system: Registro de tb_dom_system
+
+        Returns:
+            SystemInfo: Cópia imutável do registro
+        """
+        return cls(
+            id_dom_system=system.id_dom_system,
+            nm_system=system.nm_system,
+            system_type=system.system_type,
+            api_verify_address=system.api_verify_address,
+            api_request_address=system.api_request_address,
+            api_status_address=system.api_status_address,
+            verification_timeout_days=system.verification_timeout_days if system.verification_timeout_days is not None else 7,
+            processing_timeout_days=system.processing_timeout_days if system.processing_timeout_days is not None else 30,
+            max_retry_attempts=system.max_retry_attempts if system.max_retry_attempts is not None else 5
+        )
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """Índices imutáveis dos sistemas carregados em um instante."""
+
+    by_id: Mapping[int, SystemInfo]
+    by_name: Mapping[str, SystemInfo]
+    by_type: Mapping[str, Tuple[SystemInfo, ...]]
+    loaded_at: float
+
+    @classmethod
+    def build(cls, systems) -> "SystemSnapshot":
+        """Monta os índices a partir de uma sequência de SystemInfo.
+
+        Args:
+            systems: Sistemas carregados, em ordem de ID
+
+        Returns:
+            SystemSnapshot: Índices por ID, por nome e por tipo
+        """
+        by_type: Dict[str, list] = {}
+        for system in systems:
+            by_type.setdefault(system.system_type, []).append(system)
+        return cls(
+            by_id=MappingProxyType({system.id_dom_system: system for system in systems}),
+            by_name=MappingProxyType({system.nm_system: system for system in systems}),
+            by_type=MappingProxyType({key: tuple(value) for key, value in by_type.items()}),
+            loaded_at=time.monotonic()
+        )
+
+
+class SystemRegistry:
+    """Cache em memória de tb_dom_system com TTL e invalidação explícita."""
+
+    def __init__(self, session_factory: sessionmaker, ttl_seconds: float = 300.0):
+        """Inicializa o registro sem carregar os sistemas.
+
+        Args:
+            session_factory: Fábrica de sessões usada nas recargas
+            ttl_seconds: Tempo de vida do snapshot carregado, em segundos
+        """
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> SystemSnapshot:
+        """Retorna o snapshot atual, recarregando-o se expirado ou invalidado.
+
+        Returns:
+            SystemSnapshot: Índices imutáveis dos sistemas
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            # Outra thread pode ter recarregado enquanto esta aguardava o lock
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl_seconds:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            snapshot = self._load()
+            self._snapshot = snapshot
+            return snapshot
+
+    def _load(self) -> SystemSnapshot:
+        db = self.session_factory()
+        try:
+            systems = [
+                SystemInfo.from_model(system)
+                for system in db.execute(select(DomSystem).order_by(DomSystem.id_dom_system)).scalars()
+            ]
+        finally:
+            db.close()
+        self.reloads += 1
+        logger.info(f"Registro de sistemas carregado: {len(systems)} sistemas")
+        return SystemSnapshot.build(systems)
+
+    def get_by_name(self, nm_system: str) -> Optional[SystemInfo]:
+        """Obtém um sistema pelo nome.
+
+        Args:
+            nm_system: Nome do sistema
+
+        Returns:
+            Optional[SystemInfo]: O sistema, se cadastrado, ou None
+        """
+        return self.snapshot().by_name.get(nm_system)
+
+    def get_by_id(self, id_dom_system: int) -> Optional[SystemInfo]:
+        """Obtém um sistema pelo ID.
+
+        Args:
+            id_dom_system: ID do sistema
+
+        Returns:
+            Optional[SystemInfo]: O sistema, se cadastrado, ou None
+        """
+        return self.snapshot().by_id.get(id_dom_system)
+
+    def get_by_type(self, system_type: str) -> Tuple[SystemInfo, ...]:
+        """Obtém os sistemas de um tipo, em ordem de ID.
+
+        Args:
+            system_type: Tipo do sistema ('process' ou 'requester')
+
+        Returns:
+            Tuple[SystemInfo, ...]: Sistemas do tipo informado
+        """
+        return self.snapshot().by_type.get(system_type, ())
+
+    def get_processing_systems(self) -> Tuple[SystemInfo, ...]:
+        """Obtém os sistemas de processamento (system_type='process').
+
+        Returns:
+            Tuple[SystemInfo, ...]: Sistemas de processamento, em ordem de ID
+        """
+        return self.get_by_type("process")
+
+    def invalidate(self) -> None:
+        """Descarta o snapshot atual; a próxima consulta recarrega tb_dom_system."""
+        with self._lock:
+            self._snapshot = None
+            self.invalidations += 1
+        logger.info("Registro de sistemas invalidado")
+
+    def install_invalidation_hooks(self) -> None:
+        """Invalida o registro sempre que um DomSystem é inserido, alterado ou removido via ORM.
+
+        Alterações feitas por outros processos ou diretamente no banco só são vistas após o TTL.
+        """
+        for event_name in ("after_insert", "after_update", "after_delete"):
+            event.listen(DomSystem, event_name, lambda mapper, connection, target: self.invalidate())
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna os contadores do registro.
+
+        Returns:
+            Dict[str, int]: Acertos, falhas, recargas, invalidações e sistemas carregados
+        """
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "invalidations": self.invalidations,
+            "systems": len(snapshot.by_id) if snapshot is not None else 0
+        }
+
+
+_system_registry: Optional[SystemRegistry] = None
+_system_registry_lock = threading.Lock()
+
+
+def get_system_registry() -> SystemRegistry:
+    """Retorna o registro compartilhado pela aplicação, criando-o na primeira chamada.
+
+    O TTL é lido de SYSTEM_REGISTRY_TTL (segundos) e os ganchos de invalidação via ORM
+    são instalados na criação.
+
+    Returns:
+        SystemRegistry: Registro compartilhado
+    """
+    global _system_registry
+    if _system_registry is None:
+        with _system_registry_lock:
+            if _system_registry is None:
+                from app.db.database import engine
+                registry = SystemRegistry(
+                    sessionmaker(autocommit=False, autoflush=False, bind=engine),
+                    ttl_seconds=float(os.getenv("SYSTEM_REGISTRY_TTL", "300"))
+                )
+                registry.install_invalidation_hooks()
+                _system_registry = registry
+    return _system_registry
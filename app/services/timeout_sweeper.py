@@ -0,0 +1,333 @@
+"""
+Varredura de timeouts de verificação e de processamento.
+
+Marca como timeout (st_system_verify = 4 / st_system_request = 4) os processos cuja
+verificação ou processamento excedeu o prazo do sistema de processamento
+(DomSystem.verification_timeout_days / processing_timeout_days), contados a partir de
+dt_system_verify / dt_system_request. Para cada sistema é aplicado um UPDATE em
+conjunto, em lotes limitados com um commit por lote, de modo que a varredura nunca
+mantém bloqueios longos em tb_process. Como nas demais transições de status, o
+rollup das solicitações afetadas (inclusive st_request, que finaliza as solicitações
+sem processos em aberto), as notificações em tb_notification_outbox e os eventos
+de progress_events de cada processo marcado são gravados na transação do lote.
+
+Com um JobCoordinator, cada sistema é um shard do job "timeout_sweep": vários
+workers podem varrer ao mesmo tempo, cada sistema é varrido por um único worker e,
+com `interval`, no máximo uma vez por intervalo no cluster.
+
+Classes:
+    SystemSweepResult: Contagens e duração da varredura de um sistema.
+    TimeoutSweepReport: Resultado de uma varredura completa.
+    TimeoutSweeper: Executa a varredura de timeouts por sistema.
+
+Funções:
+    select_timeout_batch: Monta a consulta de um lote de processos vencidos de um sistema.
+    build_timeout_update: Monta o UPDATE que marca como timeout um lote de processos.
+    select_timed_out_processes: Monta a consulta dos processos marcados por um lote (sem RETURNING).
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, insert, or_, select, update, Select, Update
+from app.models.models import DomSystem, NotificationOutbox, Process
+from app.services.job_coordinator import JobCoordinator
+from app.services.notification_outbox import build_outbox_rows
+from app.services.process_service import OUTBOX_EVENTS, REQUEST_TRANSITIONS, VERIFY_TRANSITIONS
+from app.services.progress_events import queue_progress_event
+from app.services.status_rollup_service import StatusRollupService
+from app.services.system_registry import SystemInfo, SystemRegistry
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Processos marcados por UPDATE (e por transação)
+TIMEOUT_SWEEP_BATCH_SIZE = 1000
+
+# Status de timeout de st_system_verify e st_system_request
+STATUS_TIMEOUT = 4
+
+# Nome do job (e prefixo dos locks por sistema) em tb_job_lock
+TIMEOUT_SWEEP_JOB = "timeout_sweep"
+
+
+def _timeout_condition(stage: str, id_system_process: int, cutoff: datetime):
+    if stage == "verify":
+        status_column, sent_at = Process.st_system_verify, Process.dt_system_verify
+        allowed_from = VERIFY_TRANSITIONS[STATUS_TIMEOUT]
+        conditions = []
+    elif stage == "process":
+        status_column, sent_at = Process.st_system_request, Process.dt_system_request
+        allowed_from = REQUEST_TRANSITIONS[STATUS_TIMEOUT]
+        # O processamento só é enviado após a aprovação; os processos ainda em verificação
+        # vencem na etapa "verify", e os recusados ou em timeout já estão encerrados
+        conditions = [Process.st_system_verify == 1]
+    else:
+        raise ValueError(f"Etapa de timeout inválida: {stage}")
+
+    # NULL equivale a 0 (pendente), como em build_status_update
+    conditions.append(or_(status_column.in_(allowed_from), status_column.is_(None)))
+    return and_(Process.id_system_process == id_system_process, sent_at < cutoff, *conditions)
+
+
+def _timeout_values(stage: str, now: datetime) -> Dict[str, Any]:
+    if stage == "verify":
+        return {"st_system_verify": STATUS_TIMEOUT, "dt_system_verify_response": now}
+    return {"st_system_request": STATUS_TIMEOUT, "dt_system_conclusion": now}
+
+
+def select_timeout_batch(stage: str, id_system_process: int, cutoff: datetime,
+                         after_id: int, limit: int) -> Select:
+    """Monta a consulta de um lote de processos vencidos de um sistema, em ordem de solicitação.
+
+    Args:
+        stage: Etapa ("verify" ou "process")
+        id_system_process: ID do sistema de processamento
+        cutoff: Envios anteriores a este instante estão vencidos
+        after_id: Último id_request já varrido (cursor)
+        limit: Quantidade máxima de processos
+
+    Returns:
+        Select: Consulta dos id_request vencidos
+    """
+    return select(Process.id_request).where(
+        and_(_timeout_condition(stage, id_system_process, cutoff), Process.id_request > after_id)
+    ).order_by(Process.id_request).limit(limit)
+
+
+def build_timeout_update(stage: str, id_system_process: int, request_ids: List[int],
+                         cutoff: datetime, now: datetime) -> Update:
+    """Monta o UPDATE que marca como timeout um lote de processos de um sistema.
+
+    As condições de vencimento são repetidas no UPDATE: um processo que respondeu
+    depois da consulta do lote não é marcado.
+
+    Args:
+        stage: Etapa ("verify" ou "process")
+        id_system_process: ID do sistema de processamento
+        request_ids: IDs das solicitações do lote
+        cutoff: Envios anteriores a este instante estão vencidos
+        now: Instante gravado como data de resposta/conclusão
+
+    Returns:
+        Update: Instrução UPDATE pronta para execução
+    """
+    # Timeout encerra a etapa: o agendamento de retentativas é descartado
+    values = {**_timeout_values(stage, now), "qt_attempts": 0, "dt_next_attempt": None}
+    return update(Process).where(
+        and_(_timeout_condition(stage, id_system_process, cutoff), Process.id_request.in_(request_ids))
+    ).values(**values)
+
+
+def select_timed_out_processes(stage: str, id_system_process: int, request_ids: List[int],
+                               now: datetime) -> Select:
+    """Monta a consulta dos processos marcados por build_timeout_update, para bancos sem UPDATE ... RETURNING.
+
+    Os processos marcados pelo lote são os que têm o status de timeout da etapa e a
+    data de resposta/conclusão igual a now, gravada pelo próprio UPDATE.
+
+    Args:
+        stage: Etapa ("verify" ou "process")
+        id_system_process: ID do sistema de processamento
+        request_ids: IDs das solicitações do lote
+        now: Instante gravado pelo UPDATE
+
+    Returns:
+        Select: Consulta de (id_request, id_system_process, id_system_requester)
+    """
+    values = _timeout_values(stage, now)
+    return select(Process.id_request, Process.id_system_process, Process.id_system_requester).where(
+        and_(
+            Process.id_system_process == id_system_process,
+            Process.id_request.in_(request_ids),
+            *(getattr(Process, column) == value for column, value in values.items())
+        )
+    )
+
+
+@dataclass
+class SystemSweepResult:
+    """Contagens e duração da varredura de um sistema de processamento.
+
+    Attributes:
+        id_system_process: ID do sistema de processamento
+        nm_system: Nome do sistema
+        verify_timeouts: Processos marcados com timeout de verificação
+        request_timeouts: Processos marcados com timeout de processamento
+        batches: Lotes (UPDATEs) executados
+        elapsed_seconds: Duração da varredura do sistema
+    """
+
+    id_system_process: int
+    nm_system: str
+    verify_timeouts: int = 0
+    request_timeouts: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+
+
+@dataclass
+class TimeoutSweepReport:
+    """Resultado de uma varredura de timeouts.
+
+    Attributes:
+        systems: Resultado por ID de sistema de processamento
+        elapsed_seconds: Duração total da varredura
+    """
+
+    systems: Dict[int, SystemSweepResult] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def verify_timeouts(self) -> int:
+        return sum(result.verify_timeouts for result in self.systems.values())
+
+    @property
+    def request_timeouts(self) -> int:
+        return sum(result.request_timeouts for result in self.systems.values())
+
+
+class TimeoutSweeper:
+    """Marca timeouts de verificação e de processamento com UPDATEs em conjunto por sistema."""
+
+    def __init__(self, db: Session, system_registry: Optional[SystemRegistry] = None,
+                 batch_size: int = TIMEOUT_SWEEP_BATCH_SIZE):
+        """Inicializa a varredura.
+
+        Args:
+            db: Sessão do banco de dados; cada lote é confirmado nela
+            system_registry: Registro de sistemas em memória; se None, os sistemas são
+                lidos de tb_dom_system a cada varredura
+            batch_size: Processos marcados por UPDATE
+        """
+        self.db = db
+        self.system_registry = system_registry
+        self.batch_size = batch_size
+
+    def _processing_systems(self) -> Tuple[SystemInfo, ...]:
+        if self.system_registry is not None:
+            return self.system_registry.get_processing_systems()
+        return tuple(
+            SystemInfo.from_model(system) for system in self.db.execute(
+                select(DomSystem).where(DomSystem.system_type == "process").order_by(DomSystem.id_dom_system)
+            ).scalars()
+        )
+
+    def sweep(self, now: Optional[datetime] = None, coordinator: Optional[JobCoordinator] = None,
+              interval: Optional[float] = None) -> TimeoutSweepReport:
+        """Varre todos os sistemas de processamento.
+
+        Args:
+            now: Instante de referência dos prazos; se None, o instante atual
+            coordinator: Coordenador de jobs; se informado, só são varridos os sistemas
+                cujo lock este worker conseguir adquirir
+            interval: Com coordinator, intervalo mínimo entre varreduras de cada sistema
+                no cluster, em segundos
+
+        Returns:
+            TimeoutSweepReport: Contagens por sistema e duração (apenas dos sistemas varridos)
+        """
+        now = now or datetime.now()
+        report = TimeoutSweepReport()
+        started = time.perf_counter()
+
+        systems = {system.id_dom_system: system for system in self._processing_systems()}
+        if coordinator is None:
+            for system in systems.values():
+                report.systems[system.id_dom_system] = self.sweep_system(system, now)
+        else:
+            report.systems.update(coordinator.run_sharded(
+                TIMEOUT_SWEEP_JOB, systems, lambda id_system: self.sweep_system(systems[id_system], now), interval
+            ))
+
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Varredura de timeouts concluída em {report.elapsed_seconds:.3f}s: "
+            f"{report.verify_timeouts} verificações e {report.request_timeouts} processamentos "
+            f"em {len(report.systems)} sistemas"
+        )
+        return report
+
+    def sweep_system(self, system: SystemInfo, now: datetime) -> SystemSweepResult:
+        """Varre os processos de um sistema, marcando os timeouts de verificação e de processamento.
+
+        Args:
+            system: Sistema de processamento
+            now: Instante de referência dos prazos
+
+        Returns:
+            SystemSweepResult: Contagens e duração da varredura do sistema
+        """
+        result = SystemSweepResult(system.id_dom_system, system.nm_system)
+        started = time.perf_counter()
+
+        result.verify_timeouts = self._sweep_stage(
+            "verify", system.id_dom_system, now - timedelta(days=system.verification_timeout_days), now, result
+        )
+        result.request_timeouts = self._sweep_stage(
+            "process", system.id_dom_system, now - timedelta(days=system.processing_timeout_days), now, result
+        )
+
+        result.elapsed_seconds = time.perf_counter() - started
+        if result.verify_timeouts or result.request_timeouts:
+            logger.info(
+                f"Sistema {system.nm_system}: {result.verify_timeouts} timeouts de verificação e "
+                f"{result.request_timeouts} de processamento em {result.batches} lotes ({result.elapsed_seconds:.3f}s)"
+            )
+        return result
+
+    def _sweep_stage(self, stage: str, id_system_process: int, cutoff: datetime, now: datetime,
+                     result: SystemSweepResult) -> int:
+        marked = 0
+        after_id = 0
+        while True:
+            try:
+                request_ids = list(self.db.execute(
+                    select_timeout_batch(stage, id_system_process, cutoff, after_id, self.batch_size)
+                ).scalars())
+                if not request_ids:
+                    self.db.commit()
+                    return marked
+
+                timed_out = self._mark_batch(stage, id_system_process, request_ids, cutoff, now)
+                marked += len(timed_out)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            result.batches += 1
+            after_id = request_ids[-1]
+            if len(request_ids) < self.batch_size:
+                return marked
+
+    def _mark_batch(self, stage: str, id_system_process: int, request_ids: List[int],
+                    cutoff: datetime, now: datetime) -> List[Tuple[int, int, int]]:
+        """Marca um lote e grava o rollup, as notificações e os eventos dos processos marcados."""
+        rollups = StatusRollupService(self.db)
+        # Como em ProcessService._compare_and_set, o rollup é travado antes dos processos
+        rollups.lock(request_ids)
+        statement = build_timeout_update(stage, id_system_process, request_ids, cutoff, now)
+        if self.db.get_bind().dialect.update_returning:
+            timed_out = [tuple(row) for row in self.db.execute(
+                statement.returning(Process.id_request, Process.id_system_process, Process.id_system_requester),
+                execution_options={"synchronize_session": False}
+            )]
+        else:
+            self.db.execute(statement, execution_options={"synchronize_session": False})
+            timed_out = [tuple(row) for row in self.db.execute(
+                select_timed_out_processes(stage, id_system_process, request_ids, now)
+            )]
+        if not timed_out:
+            return timed_out
+
+        values = _timeout_values(stage, now)
+        tp_event = OUTBOX_EVENTS[next(iter(values))]
+        rollups.refresh([id_request for id_request, _, _ in timed_out])
+        # Notificações em lote (executemany) e eventos publicados somente após o commit
+        self.db.execute(insert(NotificationOutbox), build_outbox_rows(timed_out, tp_event, values))
+        for id_request, id_system, _ in timed_out:
+            queue_progress_event(self.db, id_request, id_system, tp_event, values)
+        return timed_out
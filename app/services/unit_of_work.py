@@ -0,0 +1,183 @@
+"""
+Unidade de trabalho: várias chamadas de serviço confirmadas em um único commit.
+
+Por padrão, cada método que altera dados em RequestService e ProcessService (e nas
+contrapartes assíncronas) confirma a própria transação. Dentro de unit_of_work, os
+métodos apenas enviam as alterações ao banco (flush), sem commit nem refresh: as
+chaves geradas já estão nas instâncias após o flush (RETURNING/OUTPUT ou lastrowid),
+e o chamador confirma tudo uma única vez ao sair do bloco, ou desfaz tudo se o
+bloco levantar exceção. Uma operação da API que altera várias linhas passa a ser
+atômica, com um só commit e locks mantidos por menos tempo.
+
+O estado fica em Session.info, de modo que todos os serviços que compartilham a
+sessão respeitam a mesma unidade de trabalho. Blocos aninhados são absorvidos pelo
+mais externo.
+
+Uso:
+    with unit_of_work(db):
+        request = RequestService(db).create_request(data)
+        ProcessService(db).create_process_entry(request.id_request, ...)
+
+Funções:
+    unit_of_work: Context manager que agrupa as chamadas de serviço em um único commit.
+    unit_of_work_async: Contraparte de unit_of_work para AsyncSession.
+    in_unit_of_work: Indica se a sessão está dentro de uma unidade de trabalho.
+    commit_or_flush: Confirma a transação, ou apenas faz flush dentro de uma unidade de trabalho.
+    commit_or_flush_async: Contraparte de commit_or_flush para AsyncSession.
+    rollback_or_defer: Desfaz a transação, ou deixa o rollback para o fim da unidade de trabalho.
+    rollback_or_defer_async: Contraparte de rollback_or_defer para AsyncSession.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, Iterator
+
+# Chave de Session.info com a profundidade de unit_of_work
+UNIT_OF_WORK_DEPTH = "unit_of_work_depth"
+
+
+def in_unit_of_work(db) -> bool:
+    """Indica se a sessão (síncrona ou assíncrona) está dentro de uma unidade de trabalho.
+
+    Args:
+        db: Sessão do banco de dados
+
+    Returns:
+        bool: True se houver um bloco unit_of_work ativo na sessão
+    """
+    return db.info.get(UNIT_OF_WORK_DEPTH, 0) > 0
+
+
+def commit_or_flush(db: Session) -> bool:
+    """Confirma a transação, ou apenas faz flush dentro de uma unidade de trabalho.
+
+    Args:
+        db: Sessão do banco de dados
+
+    Returns:
+        bool: True se a transação foi confirmada
+    """
+    if in_unit_of_work(db):
+        db.flush()
+        return False
+    db.commit()
+    return True
+
+
+async def commit_or_flush_async(db: AsyncSession) -> bool:
+    """Contraparte de commit_or_flush para AsyncSession.
+
+    Args:
+        db: Sessão assíncrona do banco de dados
+
+    Returns:
+        bool: True se a transação foi confirmada
+    """
+    if in_unit_of_work(db):
+        await db.flush()
+        return False
+    await db.commit()
+    return True
+
+
+def rollback_or_defer(db: Session) -> None:
+    """Desfaz a transação, ou deixa o rollback para o fim da unidade de trabalho.
+
+    Dentro de unit_of_work, a exceção que motivou o rollback chega ao bloco, que desfaz
+    a transação inteira ao sair; desfazer aqui descartaria em silêncio as chamadas
+    anteriores caso o chamador trate a exceção e continue.
+
+    Args:
+        db: Sessão do banco de dados
+    """
+    if not in_unit_of_work(db):
+        db.rollback()
+
+
+async def rollback_or_defer_async(db: AsyncSession) -> None:
+    """Contraparte de rollback_or_defer para AsyncSession.
+
+    Args:
+        db: Sessão assíncrona do banco de dados
+    """
+    if not in_unit_of_work(db):
+        await db.rollback()
+
+
+def _enter(db) -> bool:
+    depth = db.info.get(UNIT_OF_WORK_DEPTH, 0)
+    db.info[UNIT_OF_WORK_DEPTH] = depth + 1
+    return depth == 0
+
+
+def _leave(db) -> None:
+    db.info[UNIT_OF_WORK_DEPTH] -= 1
+
+
+@contextmanager
+def unit_of_work(db: Session, expire_on_commit: bool = False) -> Iterator[Session]:
+    """Agrupa as chamadas de serviço do bloco em uma única transação.
+
+    O bloco mais externo faz commit ao terminar normalmente e rollback se o bloco
+    levantar exceção; blocos aninhados apenas participam da transação externa.
+
+    Args:
+        db: Sessão do banco de dados
+        expire_on_commit: Se False (padrão), as instâncias carregadas no bloco mantêm seus
+            valores após o commit, sem novas consultas ao acessá-las
+
+    Yields:
+        Session: A própria sessão
+    """
+    outermost = _enter(db)
+    try:
+        yield db
+    except BaseException:
+        _leave(db)
+        if outermost:
+            db.rollback()
+        raise
+    _leave(db)
+    if outermost:
+        previous, db.expire_on_commit = db.expire_on_commit, expire_on_commit
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.expire_on_commit = previous
+
+
+@asynccontextmanager
+async def unit_of_work_async(db: AsyncSession, expire_on_commit: bool = False) -> AsyncIterator[AsyncSession]:
+    """Contraparte de unit_of_work para AsyncSession.
+
+    Args:
+        db: Sessão assíncrona do banco de dados
+        expire_on_commit: Se False (padrão), as instâncias carregadas no bloco mantêm seus
+            valores após o commit
+
+    Yields:
+        AsyncSession: A própria sessão
+    """
+    outermost = _enter(db)
+    try:
+        yield db
+    except BaseException:
+        _leave(db)
+        if outermost:
+            await db.rollback()
+        raise
+    _leave(db)
+    if outermost:
+        sync_session = db.sync_session
+        previous, sync_session.expire_on_commit = sync_session.expire_on_commit, expire_on_commit
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            sync_session.expire_on_commit = previous
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Move as solicitações finalizadas para as tabelas de arquivo (frias).
+
+Arquiva as solicitações com todos os processos em um st_system_request terminal
+(1, 4 ou 5), sem alteração do rollup há --older-than-days dias e sem notificações
+pendentes, em lotes limitados com um commit por lote, compactando o histórico de
+progresso na última entrada de cada processo. As consultas de status continuam
+encontrando as solicitações arquivadas. Pode ser executado manualmente ou agendado
+como job periódico.
+
+Com --coordinate, o arquivamento é reivindicado por lock em tb_job_lock, de modo que
+só uma instância (em qualquer host) arquiva por vez. Com --interval, executa
+continuamente, arquivando no máximo uma vez por intervalo no cluster.
+"""
+
+from sqlalchemy.orm import sessionmaker
+from app.db.database import engine
+from app.services.archive_service import ArchiveService, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from app.services.job_coordinator import JobCoordinator
+import argparse
+import logging
+import signal
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="Dias sem alteração do rollup até o arquivamento")
+    parser.add_argument("--max-batches", type=int, default=None, help="Limite de lotes por execução")
+    parser.add_argument("--coordinate", action="store_true", help="Executa em uma única instância por vez")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Executa continuamente, arquivando no máximo uma vez por intervalo (s)")
+    args = parser.parse_args()
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    coordinator = JobCoordinator(session_factory) if args.coordinate or args.interval else None
+    stop_event = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop_event.set())
+
+    db = session_factory()
+    try:
+        if coordinator is not None:
+            coordinator.start()
+        service = ArchiveService(db, batch_size=args.batch_size, older_than_days=args.older_than_days)
+        while not stop_event.is_set():
+            report = service.archive(max_batches=args.max_batches, coordinator=coordinator, interval=args.interval)
+            logger.info(
+                f"solicitações={report.requests} processos={report.processes} "
+                f"progresso removido={report.progress_removed} arquivado={report.progress_archived} "
+                f"lotes={report.batches} duração={report.elapsed_seconds:.3f}s"
+            )
+            if args.interval is None:
+                break
+            # O lock do job impede execuções antes do intervalo; a espera só evita consultas inúteis
+            stop_event.wait(min(args.interval, 60.0))
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+Preenche id_person e tp_document de tb_request a partir de ct_payload.
+
+Necessário uma única vez após a criação das colunas, para que as solicitações
+anteriores também sejam encontradas pela deduplicação (índice ix_request_person).
+Percorre as solicitações sem id_person em páginas, com um commit por página, e pode
+ser interrompido e executado novamente.
+"""
+
+from app.db.database import get_db
+from app.services.request_service import RequestService, PENDING_PAGE_SIZE
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=PENDING_PAGE_SIZE)
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        updated = RequestService(db).backfill_person_columns(batch_size=args.batch_size)
+        logger.info(f"Solicitações atualizadas: {updated}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+Benchmark do arquivamento das solicitações finalizadas (app.services.archive_service).
+
+Gera a massa de dados e mede, antes e depois de arquivar todas as solicitações
+finalizadas:
+
+    tamanho das tabelas quentes: linhas de tb_request, tb_process e tb_process_progress.
+    consulta de status de solicitações ativas: get_request_by_id, rollup, processos e
+        último progresso, como em bench_service_layer.
+    varredura de pendentes: todas as páginas de ProcessService.iter_pending_processes.
+    varredura de timeouts: TimeoutSweeper.sweep (sem processos vencidos a marcar).
+
+Depois do arquivamento, mede também a consulta de status das solicitações
+arquivadas (pelas tabelas frias) e verifica que o rollup, os processos e o último
+progresso retornados são os mesmos de antes do arquivamento.
+
+Uso:
+    python -m benchmarks.bench_archival --requests 50000 --polls 1000
+"""
+
+from sqlalchemy import func, select
+from app.models.models import Process, ProcessProgress, Request
+from app.services.archive_service import ArchiveService
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.status_rollup_service import StatusRollupService
+from app.services.timeout_sweeper import TimeoutSweeper
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory
+from benchmarks.data_generator import generate_dataset
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+import argparse
+import logging
+import random
+import statistics
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def status_snapshot(db, id_request: int) -> Tuple:
+    """Consulta de status completa de uma solicitação, reduzida a valores comparáveis."""
+    request = RequestService(db).get_request_by_id(id_request)
+    rollup = StatusRollupService(db).get_rollup(id_request)
+    process_service = ProcessService(db)
+    processes = process_service.get_processes_for_request(id_request)
+    latest = process_service.get_latest_progress_bulk([id_request])
+    return (
+        request.nm_system if request else None,
+        rollup.st_request_overall if rollup else None,
+        tuple((process.id_system_process, process.st_system_verify, process.st_system_request) for process in processes),
+        tuple(sorted((key, progress.progress_percentage) for key, progress in latest.items()))
+    )
+
+
+def table_sizes(session_factory) -> Dict[str, int]:
+    db = session_factory()
+    try:
+        return {
+            model.__tablename__: db.execute(select(func.count()).select_from(model)).scalar()
+            for model in (Request, Process, ProcessProgress)
+        }
+    finally:
+        db.close()
+
+
+def measure(session_factory, active_ids: List[int]) -> Dict[str, float]:
+    """Mede a latência média (ms) da consulta de status e a duração (ms) das varreduras."""
+    latencies = []
+    for id_request in active_ids:
+        db = session_factory()
+        try:
+            with Timer() as timer:
+                status_snapshot(db, id_request)
+            latencies.append(timer.elapsed)
+        finally:
+            db.close()
+
+    db = session_factory()
+    try:
+        with Timer() as pending_timer:
+            pending = sum(1 for _ in ProcessService(db).iter_pending_processes())
+        # Prazos no passado distante: a varredura percorre os índices sem marcar nada
+        with Timer() as sweep_timer:
+            TimeoutSweeper(db).sweep(now=datetime(2000, 1, 1))
+    finally:
+        db.close()
+
+    return {
+        "status_query_ms": statistics.fmean(latencies) * 1000,
+        "pending_scan_ms": pending_timer.elapsed * 1000,
+        "pending_pages": pending,
+        "timeout_sweep_ms": sweep_timer.elapsed * 1000
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=50000, help="Solicitações da massa de dados")
+    parser.add_argument("--polls", type=int, default=1000, help="Consultas de status por medição")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    generate_dataset(session_factory, args.requests, seed=21)
+
+    db = session_factory()
+    try:
+        finished_ids = list(db.execute(select(Request.id_request).where(Request.st_request == 1)).scalars())
+        active_ids = list(db.execute(select(Request.id_request).where(Request.st_request == 0)).scalars())
+    finally:
+        db.close()
+    rng = random.Random(21)
+    active_sample = [rng.choice(active_ids) for _ in range(args.polls)]
+    archived_sample = [rng.choice(finished_ids) for _ in range(args.polls)]
+
+    before_sizes = table_sizes(session_factory)
+    before = measure(session_factory, active_sample)
+    db = session_factory()
+    try:
+        expected = {id_request: status_snapshot(db, id_request) for id_request in set(archived_sample)}
+    finally:
+        db.close()
+
+    db = session_factory()
+    try:
+        # Rollups recém-calculados pelo gerador: arquiva tudo que já está finalizado
+        report = ArchiveService(db, batch_size=args.batch_size, older_than_days=0).archive(
+            now=datetime.now() + timedelta(seconds=1)
+        )
+    finally:
+        db.close()
+
+    after_sizes = table_sizes(session_factory)
+    after = measure(session_factory, active_sample)
+
+    latencies = []
+    mismatches = 0
+    for id_request in archived_sample:
+        db = session_factory()
+        try:
+            with Timer() as timer:
+                snapshot = status_snapshot(db, id_request)
+            latencies.append(timer.elapsed)
+            mismatches += snapshot != expected[id_request]
+        finally:
+            db.close()
+
+    print(f"massa: {args.requests} solicitações, {len(finished_ids)} finalizadas")
+    print(
+        f"arquivamento: {report.requests} solicitações, {report.processes} processos, "
+        f"{report.progress_removed} entradas de progresso -> {report.progress_archived} "
+        f"em {report.batches} lotes ({report.elapsed_seconds:.2f}s)"
+    )
+    print(f"\n{'tabela quente':<24}{'antes':>12}{'depois':>12}")
+    for table, count in before_sizes.items():
+        print(f"{table:<24}{count:>12}{after_sizes[table]:>12}")
+    print(f"\n{'medida':<24}{'antes':>12}{'depois':>12}")
+    for key, value in before.items():
+        print(f"{key:<24}{value:>12.2f}{after[key]:>12.2f}")
+    print(f"\nstatus de arquivadas: {statistics.fmean(latencies) * 1000:.2f} ms em média, "
+          f"{mismatches} divergências em {len(archived_sample)} consultas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark de vazão sob carga concorrente: serviços síncronos versus assíncronos.
+
+Simula o caminho de consulta de status (get_request_by_id, get_processes_for_request
+e get_latest_progress_bulk) para muitas solicitações em paralelo. O caminho
+síncrono roda em um threadpool, como o FastAPI faz com endpoints `def`; o caminho
+assíncrono roda em um único event loop com AsyncSession.
+
+Uso:
+    python -m benchmarks.bench_async_services --requests 500 --calls 5000 --concurrency 50
+"""
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.models.schemas import RequestCreate
+from app.services.request_service import RequestService
+from app.services.process_service import ProcessService
+from app.services.async_request_service import AsyncRequestService
+from app.services.async_process_service import AsyncProcessService
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory, seed_systems
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import random
+
+DEFAULT_ASYNC_DATABASE_URL = DEFAULT_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def seed(session_factory, requests: int, systems: int):
+    """Cria as solicitações consultadas pelo benchmark e um progresso por processo."""
+    db = session_factory()
+    try:
+        seed_systems(db, systems)
+        request_ids = RequestService(db).create_requests_bulk([
+            RequestCreate(nm_system="lab_a", id_person=str(index), tp_document="CC")
+            for index in range(requests)
+        ])
+        process_service = ProcessService(db)
+        for processes in process_service.get_processes_for_requests(request_ids).values():
+            for process in processes:
+                process_service.update_process_progress(process.id_request, process.id_system_process, 50.0)
+        return request_ids
+    finally:
+        db.close()
+
+
+def run_sync(session_factory, targets, concurrency: int) -> float:
+    """Executa as consultas em um threadpool com uma sessão por chamada."""
+    def status_call(id_request: int) -> None:
+        db = session_factory()
+        try:
+            RequestService(db).get_request_by_id(id_request)
+            process_service = ProcessService(db)
+            process_service.get_processes_for_request(id_request)
+            process_service.get_latest_progress_bulk([id_request])
+        finally:
+            db.close()
+
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(status_call, targets))
+    return timer.elapsed
+
+
+async def run_async(database_url: str, targets, concurrency: int) -> float:
+    """Executa as consultas em um event loop com uma AsyncSession por chamada."""
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def status_call(id_request: int) -> None:
+        async with semaphore:
+            async with session_factory() as db:
+                await AsyncRequestService(db).get_request_by_id(id_request)
+                process_service = AsyncProcessService(db)
+                await process_service.get_processes_for_request(id_request)
+                await process_service.get_latest_progress_bulk([id_request])
+
+    try:
+        with Timer() as timer:
+            await asyncio.gather(*(status_call(id_request) for id_request in targets))
+        return timer.elapsed
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Solicitações cadastradas")
+    parser.add_argument("--systems", type=int, default=4, help="Sistemas de processamento")
+    parser.add_argument("--calls", type=int, default=5000, help="Consultas de status executadas")
+    parser.add_argument("--concurrency", type=int, default=40, help="Consultas simultâneas")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--async-database-url", default=DEFAULT_ASYNC_DATABASE_URL)
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    request_ids = seed(session_factory, args.requests, args.systems)
+    targets = [random.choice(request_ids) for _ in range(args.calls)]
+
+    sync_elapsed = run_sync(session_factory, targets, args.concurrency)
+    async_elapsed = asyncio.run(run_async(args.async_database_url, targets, args.concurrency))
+
+    print(f"{'serviço':<10}{'consultas':>10}{'segundos':>12}{'consultas/s':>14}")
+    print(f"{'síncrono':<10}{args.calls:>10}{sync_elapsed:>12.3f}{args.calls / sync_elapsed:>14.0f}")
+    print(f"{'assíncrono':<10}{args.calls:>10}{async_elapsed:>12.3f}{args.calls / async_elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
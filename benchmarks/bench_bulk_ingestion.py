@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Benchmark da ingestão de solicitações: laço atual versus create_requests_bulk.
+
+O caminho atual chama RequestService.create_request e, para cada sistema de
+processamento, ProcessService.create_process_entry (um commit por linha). O
+caminho em lote grava tb_request e tb_process em instruções multi-row dentro
+de uma única transação. O resultado é reportado em linhas por segundo.
+
+Uso:
+    python -m benchmarks.bench_bulk_ingestion --count 5000 --systems 4
+"""
+
+from app.models.schemas import RequestCreate
+from app.services.request_service import RequestService
+from app.services.process_service import ProcessService
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory, seed_systems
+import argparse
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def build_payloads(count: int):
+    """Gera as solicitações sintéticas usadas nas duas medições."""
+    return [
+        RequestCreate(nm_system="lab_a", id_person=str(100000 + index), tp_document="CC")
+        for index in range(count)
+    ]
+
+
+def run_loop(session_factory, payloads, systems: int) -> float:
+    """Mede o caminho atual, uma solicitação e um processo por vez."""
+    db = session_factory()
+    try:
+        requester, processors = seed_systems(db, systems)
+        request_service = RequestService(db)
+        process_service = ProcessService(db)
+        with Timer() as timer:
+            for item in payloads:
+                new_request = request_service.create_request(item)
+                for processor in processors:
+                    process_service.create_process_entry(
+                        new_request.id_request,
+                        processor.id_dom_system,
+                        requester.id_dom_system,
+                        item.id_person,
+                        item.tp_document
+                    )
+        return timer.elapsed
+    finally:
+        db.close()
+
+
+def run_bulk(session_factory, payloads, systems: int) -> float:
+    """Mede create_requests_bulk para o mesmo volume de solicitações."""
+    db = session_factory()
+    try:
+        seed_systems(db, systems)
+        with Timer() as timer:
+            RequestService(db).create_requests_bulk(payloads)
+        return timer.elapsed
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="Quantidade de solicitações")
+    parser.add_argument("--systems", type=int, default=4, help="Sistemas de processamento")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.count)
+    rows = args.count * (1 + args.systems)
+
+    loop_elapsed = run_loop(create_session_factory(args.database_url), payloads, args.systems)
+    bulk_elapsed = run_bulk(create_session_factory(args.database_url), payloads, args.systems)
+
+    print(f"{'caminho':<10}{'linhas':>10}{'segundos':>12}{'linhas/s':>14}")
+    print(f"{'laço':<10}{rows:>10}{loop_elapsed:>12.3f}{rows / loop_elapsed:>14.0f}")
+    print(f"{'lote':<10}{rows:>10}{bulk_elapsed:>12.3f}{rows / bulk_elapsed:>14.0f}")
+    print(f"speedup: {loop_elapsed / bulk_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
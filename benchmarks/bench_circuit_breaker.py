@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Benchmark do circuit breaker e do limite adaptativo contra um sistema simulado.
+
+Sobe um sistema de processamento local que pode ser instruído a falhar ou a ficar
+lento e envia --calls chamadas pelo OutboundDispatcher com breakers em cada fase:
+
+    saudável -> falhando (500) -> lento -> recuperado -> fechado
+
+Em "recuperado" o sistema volta ao normal com o circuito ainda aberto ou em
+half-open: parte das chamadas é recusada e as sondas fecham o circuito. "fechado"
+é enviada após open_seconds, já com o circuito fechado.
+
+Para cada fase reporta quantas chamadas chegaram de fato ao sistema, quantas foram
+recusadas com o circuito aberto, o estado do circuito e o limite de concorrência
+AIMD ao final, e confere que:
+
+    - em toda fase, chegadas + recusadas = chamadas enviadas;
+    - saudável e fechado: nenhuma recusa e todas as chamadas bem-sucedidas;
+    - falhando: o circuito abre e a maior parte das chamadas é recusada sem tocar a rede;
+    - lento: as sondas lentas (acima do p95 configurado) reabrem o circuito, que não fecha;
+    - recuperado: o circuito fecha e o limite de concorrência volta ao máximo em fechado.
+
+Uso:
+    python -m benchmarks.bench_circuit_breaker --calls 200 --open-seconds 0.5
+"""
+
+from app.services.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from app.services.outbound_dispatcher import OutboundDispatcher
+from app.services.system_registry import SystemInfo
+from benchmarks.bench_outbound_dispatch import start_stub
+from benchmarks.common import Timer
+from typing import List
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+async def run_phase(dispatcher: OutboundDispatcher, system: SystemInfo, server, calls: int, pause: float):
+    """Envia `calls` chamadas em ondas de 20 e retorna (chamadas no servidor, recusadas, ok)."""
+    before = server.requests
+    results = []
+    for start in range(0, calls, 20):
+        results += await dispatcher.dispatch(
+            "verify", ((system, {"call": index}) for index in range(start, min(calls, start + 20)))
+        )
+        await asyncio.sleep(pause)
+    short_circuited = sum(1 for result in results if result.short_circuited)
+    return server.requests - before, short_circuited, sum(1 for result in results if result.ok)
+
+
+async def run(args) -> List[str]:
+    server = start_stub(args.latency, 200)
+    server.requests = 0
+    original_post = server.RequestHandlerClass.do_POST
+
+    def counting_post(handler):
+        server.requests += 1
+        original_post(handler)
+
+    server.RequestHandlerClass.do_POST = counting_post
+    address = f"http://127.0.0.1:{server.server_address[1]}/verify"
+    system = SystemInfo(1, "system_0", "process", address, address, address, 7, 30, 5)
+
+    breakers = CircuitBreakerRegistry(BreakerConfig(
+        window_size=40, min_calls=20, error_rate_threshold=0.5,
+        latency_p95_threshold=args.latency * 10, open_seconds=args.open_seconds,
+        half_open_calls=3, max_limit=args.concurrency
+    ))
+    dispatcher = OutboundDispatcher(timeout=2.0, max_concurrency_per_system=args.concurrency, breakers=breakers)
+
+    # (nome, status HTTP, latência, espera antes da fase, pausa entre ondas)
+    phases = (
+        ("saudável", 200, args.latency, 0, args.open_seconds / 5),
+        ("falhando", 500, args.latency, 0, args.open_seconds / 5),
+        ("lento", 200, args.latency * 20, 0, args.open_seconds / 5),
+        ("recuperado", 200, args.latency, 0, args.open_seconds / 5),
+        ("fechado", 200, args.latency, args.open_seconds, 0),
+    )
+    summary = {}
+    try:
+        for name, status, latency, wait, pause in phases:
+            server.status, server.latency = status, latency
+            await asyncio.sleep(wait)
+            with Timer() as timer:
+                reached, short_circuited, ok = await run_phase(dispatcher, system, server, args.calls, pause)
+            snapshot = breakers.get(1).snapshot()
+            summary[name] = (reached, short_circuited, ok, snapshot["state"], snapshot["limit"])
+            print(f"{name:<11} chamadas={args.calls:<4} no_sistema={reached:<4} recusadas={short_circuited:<4} "
+                  f"ok={ok:<4} estado={snapshot['state']:<9} limite={snapshot['limit']:<3} {timer.elapsed:.2f}s")
+    finally:
+        await dispatcher.aclose()
+        server.shutdown()
+
+    transitions = breakers.stats()["transitions"]
+    print(f"transições: {transitions}")
+    return check(summary, transitions, args)
+
+
+def check(summary, transitions, args) -> List[str]:
+    """Confere as invariantes de cada fase e retorna as falhas encontradas."""
+    failures = []
+    for name, (reached, short_circuited, ok, _, _) in summary.items():
+        if reached + short_circuited != args.calls:
+            failures.append(f"{name}: {reached} chegadas + {short_circuited} recusas != {args.calls} chamadas")
+        if ok > reached:
+            failures.append(f"{name}: {ok} sucessos com {reached} chegadas")
+    for name in ("saudável", "fechado"):
+        reached, short_circuited, ok, state, limit = summary[name]
+        if short_circuited or ok != args.calls or state != "closed" or limit != args.concurrency:
+            failures.append(f"{name}: esperado circuito fechado, sem recusas e limite {args.concurrency}")
+    reached, short_circuited, ok, _, _ = summary["falhando"]
+    if ok or short_circuited <= reached:
+        failures.append("falhando: a maior parte das chamadas deveria ser recusada")
+    reached, short_circuited, _, state, _ = summary["lento"]
+    if state == "closed" or short_circuited <= reached or not transitions.get("half_open->open"):
+        failures.append("lento: as sondas lentas deveriam manter o circuito aberto")
+    if summary["recuperado"][3] != "closed" or not transitions.get("half_open->closed"):
+        failures.append("recuperado: as sondas deveriam fechar o circuito")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Chamadas por fase")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latência normal do sistema (s)")
+    parser.add_argument("--open-seconds", type=float, default=0.5, help="Tempo em open antes das sondas (s)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Limite máximo de concorrência")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run(args))
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Benchmark e verificação da deduplicação de solicitações (ix_request_person e ux_request_idempotency).
+
+Sobre uma massa de dados gerada por benchmarks.data_generator:
+
+    busca: "já existe solicitação pendente desta pessoa deste sistema?" pelo JSON de
+        ct_payload (varredura) e por select_existing_request (índice).
+    lote: reenvia um lote com uma fração de pessoas já pendentes e de repetições no
+        próprio lote; compara as linhas de tb_process criadas com e sem deduplicação.
+    idempotência: a mesma chave de idempotência devolve sempre o mesmo id_request.
+
+Uso:
+    python -m benchmarks.bench_deduplication --requests 50000 --batch 2000
+"""
+
+from sqlalchemy import and_, func, select
+from app.models.models import Process, Request
+from app.models.schemas import RequestCreate
+from app.services.request_service import RequestService, select_existing_request
+from app.services.status_rollup_service import REQUEST_PENDING
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory
+from benchmarks.data_generator import generate_dataset
+import argparse
+import logging
+import random
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def select_existing_by_payload(request_data: RequestCreate):
+    """Busca equivalente pelo JSON de ct_payload, como antes das colunas indexadas."""
+    return select(Request).where(and_(
+        Request.nm_system == request_data.nm_system,
+        Request.ct_payload["id_person"].as_string() == request_data.id_person,
+        Request.ct_payload["tp_document"].as_string() == request_data.tp_document,
+        Request.st_request == REQUEST_PENDING
+    )).order_by(Request.id_request).limit(1)
+
+
+def count_processes(session_factory) -> int:
+    db = session_factory()
+    try:
+        return db.execute(select(func.count()).select_from(Process)).scalar()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=50000, help="Solicitações da massa de dados")
+    parser.add_argument("--lookups", type=int, default=200, help="Buscas medidas")
+    parser.add_argument("--batch", type=int, default=2000, help="Tamanho do lote reenviado")
+    parser.add_argument("--duplicate-fraction", type=float, default=0.3)
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    generate_dataset(session_factory, args.requests, seed=11)
+    rng = random.Random(11)
+    failures = []
+
+    db = session_factory()
+    try:
+        pending = [
+            RequestCreate(nm_system=row.nm_system, id_person=row.id_person, tp_document=row.tp_document)
+            for row in db.execute(select(Request.nm_system, Request.id_person, Request.tp_document)
+                                  .where(Request.st_request == REQUEST_PENDING))
+        ]
+        samples = rng.sample(pending, min(args.lookups, len(pending)))
+        for name, builder in (("ct_payload (JSON)", select_existing_by_payload),
+                              ("ix_request_person", select_existing_request)):
+            with Timer() as timer:
+                found = sum(1 for item in samples if db.execute(builder(item)).first() is not None)
+            print(f"busca por {name:<20} {timer.elapsed / len(samples) * 1000:>8.3f} ms  encontradas={found}/{len(samples)}")
+    finally:
+        db.close()
+
+    fresh = [
+        RequestCreate(nm_system="lab_a", id_person=str(2 * 10 ** 10 + index), tp_document="CC")
+        for index in range(args.batch)
+    ]
+    duplicates = int(args.batch * args.duplicate_fraction)
+    batch = fresh[:args.batch - duplicates] + rng.sample(pending, duplicates // 2)
+    batch += rng.sample(batch, duplicates - duplicates // 2)
+    rng.shuffle(batch)
+
+    for deduplicate in (True, False):
+        before = count_processes(session_factory)
+        db = session_factory()
+        try:
+            with Timer() as timer:
+                ids, created = RequestService(db, deduplicate=deduplicate).create_or_get_requests_bulk(batch)
+        finally:
+            db.close()
+        print(f"lote deduplicate={deduplicate!s:<6} criadas={created:>6} processos={count_processes(session_factory) - before:>7}"
+              f"  {timer.elapsed:.2f}s")
+        if deduplicate and created != args.batch - duplicates:
+            failures.append(f"lote deduplicado criou {created} solicitações, esperado {args.batch - duplicates}")
+        if len(ids) != len(batch):
+            failures.append("quantidade de IDs diferente do lote")
+
+    db = session_factory()
+    try:
+        keyed = RequestCreate(nm_system="lab_b", id_person="1", tp_document="CC", idempotency_key="bench-key-1")
+        first, created_first = RequestService(db).create_or_get_request(keyed)
+        second, created_second = RequestService(db).create_or_get_request(keyed)
+        print(f"idempotência: {first.id_request} (criada={created_first}) -> {second.id_request} (criada={created_second})")
+        if first.id_request != second.id_request or created_second:
+            failures.append("chave de idempotência criou outra solicitação")
+    finally:
+        db.close()
+
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
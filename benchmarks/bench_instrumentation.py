@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Verificação da instrumentação dos serviços (app.services.instrumentation).
+
+Sobre uma massa de dados gerada por benchmarks.data_generator:
+
+    decomposição: executa a consulta de status de várias solicitações e mostra, por
+        método de serviço, chamadas, instruções SQL por chamada e a divisão do tempo
+        entre SQL e ORM/Python, a partir das próprias métricas.
+    orçamento: um laço N+1 (uma consulta por solicitação) dentro de query_budget deve
+        falhar com QueryBudgetExceeded, e a versão em lote deve caber no orçamento.
+    exposição: a saída de render_metrics deve conter os histogramas e contadores.
+
+Uso:
+    python -m benchmarks.bench_instrumentation --requests 2000 --iterations 200
+"""
+
+from app.services import instrumentation
+from app.services.instrumentation import QueryBudgetExceeded, install_sql_instrumentation, query_budget
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from benchmarks.common import DEFAULT_DATABASE_URL, create_session_factory
+from benchmarks.data_generator import generate_dataset
+import argparse
+import logging
+import random
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=2000, help="Solicitações da massa de dados")
+    parser.add_argument("--iterations", type=int, default=200, help="Consultas de status medidas")
+    parser.add_argument("--budget", type=int, default=5, help="Orçamento de consultas do cenário N+1")
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    generate_dataset(session_factory, args.requests, seed=7)
+    install_sql_instrumentation(session_factory.kw["bind"])
+    rng = random.Random(7)
+    failures = []
+
+    for _ in range(args.iterations):
+        id_request = rng.randint(1, args.requests)
+        db = session_factory()
+        try:
+            RequestService(db).get_request_by_id(id_request)
+            process_service = ProcessService(db)
+            process_service.get_processes_for_request(id_request)
+            process_service.get_latest_progress_bulk([id_request])
+        finally:
+            db.close()
+
+    metrics = instrumentation.metrics
+    print(f"{'método':<48}{'chamadas':>9}{'sql/chamada':>12}{'sql ms':>9}{'orm ms':>9}")
+    for labels, values in sorted(metrics.service_seconds._series.items()):
+        calls = values[-1]
+        statements = metrics.service_sql_statements._series[labels]
+        sql_seconds = metrics.service_sql_seconds._series[labels][-2]
+        print(f"{'.'.join(labels):<48}{calls:>9.0f}{statements[-2] / calls:>12.1f}"
+              f"{sql_seconds / calls * 1000:>9.3f}{(values[-2] - sql_seconds) / calls * 1000:>9.3f}")
+
+    ids = rng.sample(range(1, args.requests + 1), args.budget * 2)
+    db = session_factory()
+    try:
+        try:
+            with query_budget(args.budget, "n_mais_1"):
+                for id_request in ids:
+                    RequestService(db).get_request_by_id(id_request)
+            failures.append("orçamento não disparou no laço N+1")
+        except QueryBudgetExceeded as error:
+            print(f"\nN+1 com {len(ids)} consultas e orçamento {args.budget}: "
+                  f"{type(error).__name__} após {error.stats.sql_statements} instruções")
+        with query_budget(args.budget, "lote") as stats:
+            ProcessService(db).get_latest_progress_bulk(ids)
+        print(f"lote com {len(ids)} solicitações: {stats.sql_statements} instrução(ões)")
+    finally:
+        db.close()
+
+    exposition = instrumentation.render_metrics()
+    for name in ("request_manager_service_call_seconds_bucket", "request_manager_sql_statements_total",
+                 "request_manager_query_budget_exceeded_total{scope=\"n_mais_1\"} 1"):
+        if name not in exposition:
+            failures.append(f"métrica ausente: {name}")
+    print(f"exposição: {len(exposition.splitlines())} linhas")
+
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Verificação da coordenação de jobs (tb_job_lock) com vários processos locais.
+
+Inicia N processos contra o mesmo banco, cada um com seu JobCoordinator, simulando
+N workers do uvicorn em vários hosts, em três cenários:
+
+    intervalo: todos tentam o mesmo job a cada poucos milissegundos com `interval`;
+        o job deve rodar cerca de duração/intervalo vezes no cluster, nunca em
+        paralelo, em vez de N vezes isso.
+    failover: todos disputam um lock de liderança; o líder "cai" no meio da rodada
+        sem liberar o lock e outro worker deve assumir após o lease expirar.
+    shards: todos percorrem os mesmos shards com run_sharded; cada shard deve rodar
+        exatamente uma vez por rodada, com o trabalho distribuído entre os workers.
+
+Uso:
+    python -m benchmarks.bench_job_coordination --workers 4 --duration 3
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.services.job_coordinator import JobCoordinator
+from benchmarks.common import DEFAULT_DATABASE_URL, create_session_factory
+from collections import Counter
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def coordinator_for(database_url: str, worker: int, lease_seconds: float) -> JobCoordinator:
+    engine = create_engine(database_url, connect_args={"timeout": 30} if database_url.startswith("sqlite") else {})
+    return JobCoordinator(sessionmaker(autocommit=False, autoflush=False, bind=engine),
+                          worker_id=f"worker-{worker}", lease_seconds=lease_seconds)
+
+
+def interval_worker(database_url: str, worker: int, args, results) -> None:
+    """Tenta o job a cada poucos milissegundos e registra (worker, início, fim) das execuções."""
+    coordinator = coordinator_for(database_url, worker, args.lease)
+    runs = []
+
+    def job():
+        started = time.time()
+        time.sleep(args.interval / 4)
+        runs.append((worker, started, time.time()))
+
+    deadline = time.time() + args.duration
+    while time.time() < deadline:
+        coordinator.run_once("bench_interval", job, interval=args.interval)
+        time.sleep(args.interval / 20)
+    results.put(runs)
+
+
+def failover_worker(database_url: str, worker: int, args, crashed, results) -> None:
+    """Disputa a liderança; o primeiro líder após metade da rodada sai sem liberar o lock."""
+    coordinator = coordinator_for(database_url, worker, args.lease)
+    coordinator.start()
+    ticks = []
+    started = time.time()
+    deadline = started + args.duration + args.lease
+    while time.time() < deadline:
+        if coordinator.try_acquire("bench_leader"):
+            ticks.append((worker, time.time()))
+            if time.time() - started > args.duration / 2 and not crashed.is_set():
+                crashed.set()
+                results.put(ticks)
+                # Encerra sem liberar o lock nem parar o heartbeat, como um worker que cai
+                results.close()
+                results.join_thread()
+                os._exit(0)
+        time.sleep(0.02)
+    coordinator.close()
+    results.put(ticks)
+
+
+def shard_worker(database_url: str, worker: int, args, results) -> None:
+    """Percorre os shards repetidamente durante a rodada e registra os shards executados."""
+    coordinator = coordinator_for(database_url, worker, args.lease)
+    executed = []
+    deadline = time.time() + args.duration
+    while time.time() < deadline:
+        executed += coordinator.run_sharded(
+            "bench_shards", range(args.shards), lambda shard: time.sleep(0.005), interval=args.duration * 10
+        )
+        time.sleep(0.01)
+    results.put([(worker, shard) for shard in executed])
+
+
+def collect(target, database_url: str, args, *extra) -> list:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=target, args=(database_url, worker, args, *extra, results))
+        for worker in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [item for _ in processes for item in results.get()]
+    for process in processes:
+        process.join()
+    return collected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0, help="Duração de cada cenário (s)")
+    parser.add_argument("--interval", type=float, default=0.2, help="Intervalo do job periódico (s)")
+    parser.add_argument("--lease", type=float, default=0.6, help="Duração do lease (s)")
+    parser.add_argument("--shards", type=int, default=20)
+    args = parser.parse_args()
+
+    failures = []
+
+    create_session_factory(args.database_url)
+    runs = sorted(collect(interval_worker, args.database_url, args), key=lambda run: run[1])
+    overlaps = sum(1 for previous, current in zip(runs, runs[1:]) if current[1] < previous[2])
+    expected = args.duration / args.interval
+    per_worker = Counter(worker for worker, _, _ in runs)
+    print(f"intervalo  execuções={len(runs)} esperado≈{expected:.0f} sobreposições={overlaps} "
+          f"por_worker={dict(sorted(per_worker.items()))}")
+    if overlaps or len(runs) > expected + 1:
+        failures.append("intervalo")
+
+    create_session_factory(args.database_url)
+    ticks = sorted(collect(failover_worker, args.database_url, args, multiprocessing.Event()), key=lambda tick: tick[1])
+    leaders = [ticks[0][0]] if ticks else []
+    gap = 0.0
+    for previous, current in zip(ticks, ticks[1:]):
+        if current[0] != previous[0]:
+            leaders.append(current[0])
+            gap = max(gap, current[1] - previous[1])
+    print(f"failover   líderes={leaders} maior_intervalo_sem_líder={gap:.2f}s lease={args.lease}s")
+    if len(leaders) != 2 or gap > args.lease * 2:
+        failures.append("failover")
+
+    create_session_factory(args.database_url)
+    executed = collect(shard_worker, args.database_url, args)
+    per_shard = Counter(shard for _, shard in executed)
+    per_worker = Counter(worker for worker, _ in executed)
+    print(f"shards     executados={len(executed)} shards={args.shards} "
+          f"repetidos={sum(1 for count in per_shard.values() if count > 1)} por_worker={dict(sorted(per_worker.items()))}")
+    if len(executed) != args.shards or len(per_shard) != args.shards:
+        failures.append("shards")
+
+    if failures:
+        raise SystemExit(f"Coordenação falhou nos cenários: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
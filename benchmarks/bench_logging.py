@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Benchmark do logging estruturado e não bloqueante (app.services.structured_logging).
+
+Simula a E/S de log com um handler de saída lento (--sink-ms por registro) e mede o
+tempo por chamada na thread do serviço:
+
+    f-string síncrono: logger.info(f"...") com o handler lento na própria thread
+        (abordagem anterior), com INFO habilitado e desabilitado.
+    eventos: EventLogger com INFO desabilitado (nada é formatado) e com o pipeline
+        de configure_logging (fila limitada e thread de fundo), verificando que todos
+        os registros chegam ao handler após o encerramento.
+    amostragem: process.progress_updated com fração 0,1; os excluídos são contados.
+    fila cheia: rajada contra uma fila pequena; os registros excedentes são
+        descartados e contados sem bloquear o serviço.
+    serviço: latência de ProcessService.update_process_progress com o handler lento
+        síncrono e com o pipeline.
+    loguru: os campos do evento chegam ao loguru em extra (se instalado).
+
+Uso:
+    python -m benchmarks.bench_logging --events 20000 --sink-ms 0.2
+"""
+
+from sqlalchemy import select
+from app.models.models import Process
+from app.services import process_service
+from app.services.instrumentation import metrics
+from app.services.structured_logging import (
+    LOGURU_AVAILABLE, EventLogger, LoguruHandler, StructuredFormatter, configure_logging, loguru_logger
+)
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory
+from benchmarks.data_generator import generate_dataset
+from typing import Callable, List
+import argparse
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+EVENT = "process.progress_updated"
+
+
+class SlowHandler(logging.Handler):
+    """Handler que formata o registro e simula a E/S de saída com uma espera."""
+
+    def __init__(self, sink_seconds: float):
+        super().__init__()
+        self.sink_seconds = sink_seconds
+        self.setFormatter(StructuredFormatter("json"))
+        self.lines: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+        if self.sink_seconds:
+            time.sleep(self.sink_seconds)
+
+
+def use_handler(handler: logging.Handler, level: int) -> None:
+    """Configura a raiz com o handler informado, sem fila (chamadas síncronas)."""
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def per_call(function: Callable[[int], None], count: int) -> float:
+    """Retorna o tempo médio por chamada, em microssegundos."""
+    with Timer() as timer:
+        for index in range(count):
+            function(index)
+    return timer.elapsed / count * 1_000_000
+
+
+def discarded(reason: str) -> float:
+    return metrics.log_events_discarded.value((reason,))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=2000, help="Solicitações da massa de dados")
+    parser.add_argument("--events", type=int, default=20000, help="Eventos por cenário")
+    parser.add_argument("--updates", type=int, default=2000, help="Atualizações de progresso no cenário do serviço")
+    parser.add_argument("--sink-ms", type=float, default=0.2, help="Tempo de E/S simulado por registro")
+    args = parser.parse_args()
+
+    sink_seconds = args.sink_ms / 1000
+    plain = logging.getLogger("bench.plain")
+    events = EventLogger("bench.events", sample_rates={})
+    sampled = EventLogger("bench.sampled", sample_rates={EVENT: 0.1})
+    failures = []
+    results = []
+
+    def legacy(index: int) -> None:
+        plain.info(f"Progresso atualizado para solicitação {index} e sistema {index % 6}: {index % 100}%")
+
+    def structured(index: int) -> None:
+        events.info(EVENT, id_request=index, id_system_process=index % 6, progress_percentage=index % 100)
+
+    # f-string com o handler lento na thread do serviço
+    handler = SlowHandler(sink_seconds)
+    use_handler(handler, logging.INFO)
+    results.append(("f-string síncrono", per_call(legacy, args.events), len(handler.lines)))
+    use_handler(handler, logging.WARNING)
+    results.append(("f-string, INFO desabilitado", per_call(legacy, args.events), 0))
+    results.append(("eventos, INFO desabilitado", per_call(structured, args.events), 0))
+
+    # Pipeline com fila suficiente: nenhum registro perdido
+    handler = SlowHandler(sink_seconds)
+    pipeline = configure_logging("INFO", args.events, handlers=[handler])
+    elapsed = per_call(structured, args.events)
+    pipeline.stop()
+    results.append(("eventos, pipeline", elapsed, len(handler.lines)))
+    if len(handler.lines) != args.events or pipeline.handler.dropped:
+        failures.append(f"pipeline entregou {len(handler.lines)} de {args.events} registros")
+
+    # Amostragem de 10%
+    handler = SlowHandler(sink_seconds)
+    pipeline = configure_logging("INFO", args.events, handlers=[handler])
+    before = discarded("sampled")
+    elapsed = per_call(lambda index: sampled.info(EVENT, id_request=index), args.events)
+    pipeline.stop()
+    results.append(("eventos, amostragem 10%", elapsed, len(handler.lines)))
+    if len(handler.lines) + discarded("sampled") - before != args.events:
+        failures.append("eventos amostrados e descartados não somam o total")
+
+    # Fila pequena: descarte em vez de bloqueio
+    handler = SlowHandler(sink_seconds)
+    pipeline = configure_logging("INFO", 100, handlers=[handler])
+    before = discarded("queue_full")
+    elapsed = per_call(structured, args.events)
+    pipeline.stop()
+    dropped = pipeline.handler.dropped
+    results.append(("eventos, fila de 100", elapsed, len(handler.lines)))
+    if len(handler.lines) + dropped != args.events or discarded("queue_full") - before != dropped:
+        failures.append("registros descartados não conferem com o contador")
+
+    print(f"{'cenário':<30}{'µs/chamada':>12}{'gravados':>10}")
+    for label, microseconds, written in results:
+        print(f"{label:<30}{microseconds:>12.2f}{written:>10}")
+    print(f"descartados: {discarded('sampled'):.0f} por amostragem, {discarded('queue_full'):.0f} por fila cheia")
+
+    # Serviço: latência de update_process_progress
+    session_factory = create_session_factory(args.database_url)
+    generate_dataset(session_factory, args.requests, seed=25)
+    db = session_factory()
+    try:
+        keys = db.execute(select(Process.id_request, Process.id_system_process).limit(args.updates)).all()
+        service = process_service.ProcessService(db)
+
+        def update(index: int) -> None:
+            id_request, id_system_process = keys[index % len(keys)]
+            service.update_process_progress(id_request, id_system_process, float(index % 100), "Benchmark")
+
+        # Sem amostragem, para isolar o efeito da fila; depois com a amostragem padrão
+        default_rates = process_service.event_logger.sample_rates
+        process_service.event_logger.sample_rates = {}
+        use_handler(SlowHandler(sink_seconds), logging.INFO)
+        synchronous = per_call(update, args.updates)
+        pipeline = configure_logging("INFO", args.updates, handlers=[SlowHandler(sink_seconds)])
+        queued = per_call(update, args.updates)
+        process_service.event_logger.sample_rates = default_rates
+        queued_sampled = per_call(update, args.updates)
+        pipeline.stop()
+    finally:
+        db.close()
+    print(f"\nupdate_process_progress: {synchronous:.1f} µs com handler síncrono, {queued:.1f} µs com o pipeline, "
+          f"{queued_sampled:.1f} µs com o pipeline e a amostragem padrão ({default_rates})")
+
+    if LOGURU_AVAILABLE:
+        captured = []
+        loguru_logger.remove()
+        loguru_logger.add(lambda message: captured.append(message.record), level="INFO")
+        pipeline = configure_logging("INFO", 100, handlers=[LoguruHandler()])
+        events.info(EVENT, id_request=42, id_system_process=3)
+        pipeline.stop()
+        extra = captured[0]["extra"] if captured else {}
+        print(f"loguru: {len(captured)} registro(s), extra={extra}")
+        if extra.get("id_request") != 42:
+            failures.append("campos do evento ausentes no loguru")
+
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Benchmark do envio de fan-out aos sistemas de processamento.
+
+Sobe servidores HTTP locais que simulam sistemas de processamento (um lento, um
+que falha com 500, um que não responde dentro do timeout e os demais com a
+latência informada) e compara:
+
+    - sequencial: uma chamada por vez, com uma conexão nova por chamada;
+    - OutboundDispatcher: chamadas concorrentes com um cliente em pool por sistema.
+
+Além da duração, reporta quantas conexões TCP os servidores aceitaram e confere
+que as falhas e o timeout aparecem nos resultados sem interromper o fan-out.
+
+Uso:
+    python -m benchmarks.bench_outbound_dispatch --requests 50 --systems 6 --latency 0.05
+"""
+
+from app.services.outbound_dispatcher import OutboundDispatcher
+from app.services.system_registry import SystemInfo
+from benchmarks.common import Timer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+import argparse
+import asyncio
+import httpx
+import json
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+class StubSystemHandler(BaseHTTPRequestHandler):
+    """Sistema de processamento simulado: responde após `latency` segundos com `status`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        body = json.dumps({"accepted": self.server.status < 400}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class StubSystemServer(ThreadingHTTPServer):
+    """Servidor do sistema simulado; ignora conexões fechadas pelo cliente após timeout."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        pass
+
+
+def start_stub(latency: float, status: int) -> StubSystemServer:
+    """Sobe um servidor simulado em uma porta livre, em uma thread daemon."""
+    server = StubSystemServer(("127.0.0.1", 0), StubSystemHandler)
+    server.latency = latency
+    server.status = status
+    server.connections = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_systems(count: int, latency: float, timeout: float) -> Tuple[List[SystemInfo], List[StubSystemServer]]:
+    """Cria os sistemas simulados: lento, com falha, sem resposta no prazo e normais."""
+    profiles = [(latency * 4, 200), (latency, 500), (timeout * 2, 200)]
+    profiles += [(latency, 200)] * max(0, count - len(profiles))
+    servers, systems = [], []
+    for index, (system_latency, status) in enumerate(profiles[:count]):
+        server = start_stub(system_latency, status)
+        address = f"http://127.0.0.1:{server.server_address[1]}/verify"
+        servers.append(server)
+        systems.append(SystemInfo(index + 1, f"system_{index}", "process", address, address, address, 7, 30, 5))
+    return systems, servers
+
+
+async def run_sequential(systems, requests: int, timeout: float) -> List[bool]:
+    """Caminho anterior: uma chamada por vez, cada uma com sua própria conexão."""
+    results = []
+    for index in range(requests):
+        for system in systems:
+            try:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    response = await client.post(system.api_verify_address, json={"id_request": index})
+                results.append(response.is_success)
+            except httpx.HTTPError:
+                results.append(False)
+    return results
+
+
+async def run_dispatcher(systems, requests: int, timeout: float, concurrency: int) -> List[bool]:
+    """Fan-out de todas as solicitações com OutboundDispatcher."""
+    dispatcher = OutboundDispatcher(timeout=timeout, max_concurrency_per_system=concurrency)
+    try:
+        batches = await asyncio.gather(*(
+            dispatcher.fan_out("verify", systems, {"id_request": index}) for index in range(requests)
+        ))
+    finally:
+        await dispatcher.aclose()
+    return [result.ok for batch in batches for result in batch]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Solicitações distribuídas")
+    parser.add_argument("--systems", type=int, default=6, help="Sistemas de processamento simulados")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência dos sistemas normais (s)")
+    parser.add_argument("--timeout", type=float, default=0.5, help="Timeout por chamada (s)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Chamadas simultâneas por sistema")
+    args = parser.parse_args()
+
+    expected_ok = args.requests * (args.systems - 2)
+
+    for name, runner in (("sequencial", run_sequential), ("dispatcher", run_dispatcher)):
+        systems, servers = build_systems(args.systems, args.latency, args.timeout)
+        extra = (args.concurrency,) if runner is run_dispatcher else ()
+        with Timer() as timer:
+            results = asyncio.run(runner(systems, args.requests, args.timeout, *extra))
+        connections = sum(server.connections for server in servers)
+        for server in servers:
+            server.shutdown()
+        print(f"{name:<11} chamadas={len(results)} ok={sum(results)} (esperado {expected_ok}) "
+              f"conexões={connections} {timer.elapsed:.2f}s")
+        if sum(results) != expected_ok:
+            raise SystemExit(f"{name}: resultados inesperados")
+
+
+if __name__ == "__main__":
+    main()
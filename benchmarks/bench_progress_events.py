@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+Benchmark e verificação das assinaturas de progresso (app.services.progress_events).
+
+Com milhares de assinantes ociosos em um event loop, como no endpoint SSE
+GET /request/{id_request}/events, mede e verifica:
+
+    assinantes ociosos: memória por assinatura e instruções SQL durante a espera (zero).
+    entrega: latência entre a chamada de ProcessService.update_process_progress /
+        update_processing_status (executadas no threadpool, com commit) e a chegada do
+        evento ao assinante.
+    consistência: uma mudança dentro de unit_of_work desfeita por exceção não é publicada.
+    assinante lento: uma assinatura que não consome a fila é desconectada quando ela enche,
+        sem atrasar a publicação.
+    comparação: instruções SQL de uma consulta de status (polling) equivalente.
+
+Uso:
+    python -m benchmarks.bench_progress_events --subscribers 5000 --updates 200
+"""
+
+from sqlalchemy import event, select
+from app.models.models import Process
+from app.services.process_service import ProcessService
+from app.services.progress_events import SUBSCRIBER_QUEUE_SIZE, get_event_bus
+from app.services.unit_of_work import unit_of_work
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory
+from benchmarks.data_generator import generate_dataset
+from benchmarks.bench_service_layer import status_query_call
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import tracemalloc
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+async def run(args, session_factory) -> None:
+    engine = session_factory.kw["bind"]
+    statements = [0]
+    event.listen(engine, "after_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+
+    db = session_factory()
+    try:
+        keys = [tuple(key) for key in db.execute(
+            select(Process.id_request, Process.id_system_process)
+            .where(Process.st_system_verify == 1, Process.st_system_request == 0)
+            .order_by(Process.id_request, Process.id_system_process)
+        ).all()]
+    finally:
+        db.close()
+    request_ids = list(dict.fromkeys(id_request for id_request, _ in keys))
+    bus = get_event_bus()
+
+    # Assinantes ociosos distribuídos entre as solicitações
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    idle = [bus.subscribe(request_ids[index % len(request_ids)]) for index in range(args.subscribers)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    statements[0] = 0
+    await asyncio.sleep(args.idle_seconds)
+    idle_statements = statements[0]
+    for subscription in idle:
+        subscription.close()
+
+    # Entrega: cada atualização é confirmada no threadpool e aguardada pelo assinante
+    def update(key, index: int) -> float:
+        db = session_factory()
+        try:
+            service = ProcessService(db)
+            if index % 2:
+                service.update_process_progress(key[0], key[1], 50.0, "Benchmark")
+            else:
+                service.update_processing_status(key[0], key[1], 1)
+            return time.perf_counter()
+        finally:
+            db.close()
+
+    latencies = []
+    for index, key in enumerate(keys[:args.updates]):
+        subscription = bus.subscribe(key[0])
+        try:
+            committed = await asyncio.to_thread(update, key, index)
+            received = await asyncio.wait_for(subscription.get(), 5)
+            latencies.append(time.perf_counter() - committed)
+            assert received.id_system_process == key[1]
+        finally:
+            subscription.close()
+
+    # Consistência: mudança desfeita não é publicada
+    key = keys[args.updates]
+    subscription = bus.subscribe(key[0])
+
+    def rolled_back() -> None:
+        db = session_factory()
+        try:
+            with unit_of_work(db):
+                ProcessService(db).update_process_progress(key[0], key[1], 75.0, "Desfeito")
+                raise RuntimeError("falha simulada")
+        except RuntimeError:
+            pass
+        finally:
+            db.close()
+
+    await asyncio.to_thread(rolled_back)
+    await asyncio.sleep(0.1)
+    leaked = subscription.queue.qsize()
+    subscription.close()
+
+    # Assinante lento: nunca consome a fila
+    key = keys[args.updates + 1]
+    slow = bus.subscribe(key[0])
+
+    def flood() -> float:
+        db = session_factory()
+        try:
+            service = ProcessService(db)
+            with Timer() as timer:
+                for step in range(SUBSCRIBER_QUEUE_SIZE + 10):
+                    service.update_process_progress(key[0], key[1], float(step % 100), "Inundação")
+            return timer.elapsed
+        finally:
+            db.close()
+
+    flood_seconds = await asyncio.to_thread(flood)
+    await asyncio.sleep(0.1)
+    dropped_event = await slow.get()
+
+    # Polling equivalente
+    db = session_factory()
+    try:
+        statements[0] = 0
+        status_query_call(db, key[0])
+        poll_statements = statements[0]
+    finally:
+        db.close()
+
+    ordered = sorted(latencies)
+    print(f"assinantes ociosos: {args.subscribers}, {(after - before) / args.subscribers:.0f} bytes por assinatura, "
+          f"{idle_statements} instruções SQL em {args.idle_seconds:.0f}s")
+    print(f"entrega após o commit ({len(latencies)} atualizações): média {statistics.fmean(latencies) * 1000:.3f} ms, "
+          f"p95 {ordered[int(len(ordered) * 0.95) - 1] * 1000:.3f} ms")
+    print(f"mudança desfeita publicada: {'sim' if leaked else 'não'}")
+    print(f"assinante lento desconectado: {'sim' if dropped_event is None and slow.dropped else 'não'} "
+          f"({SUBSCRIBER_QUEUE_SIZE + 10} atualizações em {flood_seconds:.2f}s)")
+    print(f"polling: {poll_statements} instruções SQL por consulta de status")
+    print(f"barramento: {bus.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=5000, help="Solicitações da massa de dados")
+    parser.add_argument("--subscribers", type=int, default=5000, help="Assinantes ociosos")
+    parser.add_argument("--idle-seconds", type=float, default=2.0, help="Duração da espera dos ociosos")
+    parser.add_argument("--updates", type=int, default=200, help="Atualizações com entrega medida")
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    generate_dataset(session_factory, args.requests, seed=23)
+    asyncio.run(run(args, session_factory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Verificação do roteamento de leituras para a réplica (app.db.routing) com dois arquivos SQLite.
+
+Gera a massa de dados no "primário", copia o arquivo para a "réplica" (simulando a
+replicação) e, com RoutingSession, verifica:
+
+    consultas de status: os métodos @read_only executam todas as instruções na réplica.
+    escritas: criação e atualização de status vão ao primário.
+    read-your-writes: depois de uma escrita, a mesma sessão lê do primário e enxerga a
+        solicitação criada, enquanto uma sessão nova (na réplica, sem replicação) não.
+
+Uso:
+    python -m benchmarks.bench_read_replica --requests 5000 --polls 500
+"""
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+from app.db.routing import RoutingSession, create_role_engine
+from app.models.models import Process
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.status_rollup_service import StatusRollupService
+from benchmarks.common import Timer, create_session_factory
+from benchmarks.data_generator import generate_dataset
+from collections import Counter
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def replicate(primary_path: str, replica_path: str) -> None:
+    """Copia o banco primário para a réplica com a API de backup do SQLite."""
+    source, target = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Solicitações da massa de dados")
+    parser.add_argument("--polls", type=int, default=500, help="Consultas de status")
+    args = parser.parse_args()
+
+    directory = tempfile.gettempdir()
+    primary_path = os.path.join(directory, "request_manager_primary.db")
+    replica_path = os.path.join(directory, "request_manager_replica.db")
+    generate_dataset(create_session_factory(f"sqlite:///{primary_path}"), args.requests, seed=5)
+    replicate(primary_path, replica_path)
+
+    primary = create_role_engine(f"sqlite:///{primary_path}", "PRIMARY")
+    replica = create_role_engine(f"sqlite:///{replica_path}", "REPLICA")
+    statements = Counter()
+    for role, engine in (("primário", primary), ("réplica", replica)):
+        event.listen(engine, "after_cursor_execute",
+                     lambda *_, role=role: statements.update([role]))
+    session_factory = sessionmaker(class_=RoutingSession, autoflush=False, bind=primary,
+                                   primary=primary, replica=replica)
+    rng = random.Random(5)
+    failures = []
+
+    with Timer() as timer:
+        for _ in range(args.polls):
+            id_request = rng.randint(1, args.requests)
+            db = session_factory()
+            try:
+                RequestService(db).get_request_by_id(id_request)
+                StatusRollupService(db).get_rollup(id_request)
+                process_service = ProcessService(db)
+                process_service.get_processes_for_request(id_request)
+                process_service.get_latest_progress_bulk([id_request])
+            finally:
+                db.close()
+    print(f"consultas de status: {dict(statements)} em {timer.elapsed:.2f}s")
+    if statements["primário"]:
+        failures.append("consultas de status executadas no primário")
+
+    statements.clear()
+    db = session_factory()
+    try:
+        key = db.execute(select(Process.id_request, Process.id_system_process)
+                         .where(Process.st_system_verify == 0).limit(1)).first()
+        request_service = RequestService(db)
+        created = request_service.create_request(
+            RequestCreate(nm_system="lab_a", id_person="900000001", tp_document="CC")
+        )
+        if key is not None:
+            ProcessService(db).update_verification_status(key[0], key[1], 1)
+        found_same_session = request_service.get_request_by_id(created.id_request) is not None
+    finally:
+        db.close()
+    db = session_factory()
+    try:
+        found_new_session = RequestService(db).get_request_by_id(created.id_request) is not None
+    finally:
+        db.close()
+    print(f"escritas e leituras seguintes: {dict(statements)}")
+    print(f"read-your-writes: mesma sessão encontrou={found_same_session}, "
+          f"sessão nova (réplica sem replicação) encontrou={found_new_session}")
+    if not found_same_session:
+        failures.append("a sessão não leu a própria escrita")
+    if found_new_session:
+        failures.append("a sessão nova não leu da réplica")
+
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
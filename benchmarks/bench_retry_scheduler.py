@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Benchmark das retentativas agendadas (dt_next_attempt) contra a varredura periódica.
+
+Cria N processos pendentes de verificação, faz a primeira tentativa de todos (que
+"falha": o status continua pendente) e deixa as retentativas correrem até as
+tentativas se esgotarem, de dois modos:
+
+    varredura: claim_due_processes a cada --poll-interval, como os serviços de retry
+    agendador: RetryScheduler acorda só no próximo vencimento e reivindica as chaves
+        com claim_scheduled_processes; com dispatch_window igual a --poll-interval, o
+        atraso máximo de uma tentativa é o mesmo da varredura
+
+Reporta tentativas, consultas SQL executadas, duração e o atraso médio entre o
+vencimento agendado e a tentativa. Confere que cada processo recebe exatamente
+max_retry_attempts tentativas nos dois modos e que, com todos os vencimentos no
+horizonte em memória, o agendador relê o índice uma única vez.
+
+Uso:
+    python -m benchmarks.bench_retry_scheduler --requests 200 --systems 3 --base-interval 0.2
+"""
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from app.models.models import DomSystem, Process
+from app.services.process_service import ProcessService
+from app.services.retry_scheduler import SCHEDULER_HORIZON_SIZE, RetryScheduler
+from benchmarks.bench_work_claiming import seed_pending
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer
+from datetime import datetime
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def prepare(database_url: str, requests: int, systems: int, max_attempts: int):
+    """Recria a fila, define o limite de tentativas e faz a primeira tentativa de todos."""
+    seed_pending(database_url, requests, systems)
+    engine = create_engine(database_url, connect_args={"timeout": 30} if database_url.startswith("sqlite") else {})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = session_factory()
+    try:
+        db.execute(Process.__table__.update().values(qt_attempts=0))
+        db.execute(DomSystem.__table__.update().values(max_retry_attempts=max_attempts))
+        db.commit()
+        keys = [tuple(row) for row in db.execute(select(Process.id_request, Process.id_system_process))]
+        scheduled = dict(ProcessService(db).record_attempts(keys, "verify", rng=random.Random(0)))
+    finally:
+        db.close()
+    return engine, session_factory, scheduled
+
+
+def count_queries(engine):
+    counter = {"queries": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(*_):
+        counter["queries"] += 1
+
+    return counter
+
+
+def exhausted(session_factory, max_attempts: int) -> int:
+    db = session_factory()
+    try:
+        return db.execute(select(func.count()).select_from(Process).where(Process.qt_attempts == max_attempts)).scalar()
+    finally:
+        db.close()
+
+
+def attempt(service: ProcessService, keys, scheduled, delays):
+    """Registra a tentativa das chaves, medindo o atraso em relação ao vencimento agendado."""
+    now = datetime.now()
+    delays.extend((now - scheduled[key]).total_seconds() for key in keys)
+    attempted = service.record_attempts(keys, "verify")
+    scheduled.update(attempted)
+    return attempted
+
+
+def run_polling(session_factory, scheduled, expected: int, poll_interval: float):
+    delays, attempts = [], 0
+    db = session_factory()
+    service = ProcessService(db)
+    try:
+        while attempts < expected:
+            processes = service.claim_due_processes("bench", "verify", batch_size=10 ** 6,
+                                                    lease_seconds=3600, due_before=datetime.now())
+            keys = [(process.id_request, process.id_system_process) for process in processes]
+            attempts += len(attempt(service, keys, scheduled, delays))
+            time.sleep(poll_interval)
+    finally:
+        db.close()
+    return attempts, delays
+
+
+def run_scheduler(session_factory, scheduled, expected: int, dispatch_window: float):
+    delays, attempts = [], [0]
+    done = threading.Event()
+    db = session_factory()
+    service = ProcessService(db)
+    scheduler = RetryScheduler(session_factory, reload_interval=60, dispatch_window=dispatch_window)
+
+    def handler(keys):
+        processes = service.claim_scheduled_processes("bench", keys, lease_seconds=3600)
+        claimed = [(process.id_request, process.id_system_process) for process in processes]
+        for key, when in attempt(service, claimed, scheduled, delays):
+            attempts[0] += 1
+            scheduler.schedule(key, when)
+        if attempts[0] >= expected:
+            done.set()
+
+    scheduler.start(handler)
+    try:
+        done.wait()
+    finally:
+        scheduler.close()
+        db.close()
+    return attempts[0], delays, scheduler.stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--systems", type=int, default=3)
+    parser.add_argument("--max-attempts", type=int, default=4)
+    parser.add_argument("--base-interval", type=float, default=0.2, help="VERIFY_RETRY_INTERVAL (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Intervalo da varredura (s)")
+    args = parser.parse_args()
+    os.environ["VERIFY_RETRY_INTERVAL"] = str(args.base_interval)
+
+    expected = args.requests * args.systems * (args.max_attempts - 1)
+    for mode in ("varredura", "agendador"):
+        engine, session_factory, scheduled = prepare(args.database_url, args.requests, args.systems, args.max_attempts)
+        counter = count_queries(engine)
+        with Timer() as timer:
+            if mode == "varredura":
+                attempts, delays = run_polling(session_factory, scheduled, expected, args.poll_interval)
+                extra = ""
+            else:
+                attempts, delays, stats = run_scheduler(session_factory, scheduled, expected, args.poll_interval)
+                extra = (f" recargas={stats['reloads']} despertares={stats['wakeups']} "
+                         f"despachos={stats['dispatches']}")
+        total = args.requests * args.systems
+        if exhausted(session_factory, args.max_attempts) != total:
+            raise SystemExit(f"{mode}: nem todos os processos esgotaram as tentativas")
+        engine.dispose()
+        average_delay = sum(delays) / len(delays) if delays else 0.0
+        print(f"{mode:<10} retentativas={attempts:<6} consultas={counter['queries']:<6} "
+              f"atraso_medio={average_delay * 1000:.1f}ms {timer.elapsed:.2f}s{extra}")
+        if attempts != expected:
+            raise SystemExit(f"{mode}: {attempts} retentativas, esperado {expected}")
+        if mode == "agendador" and total <= SCHEDULER_HORIZON_SIZE and stats["reloads"] != 1:
+            raise SystemExit(f"agendador: {stats['reloads']} recargas com o horizonte completo em memória")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Microbenchmark da serialização das respostas da API (app.models.schemas).
+
+Compara, para listas de solicitações (RequestResponse, como em GET /request/pending)
+e de status (StatusResponse com a lista de SystemStatusResponse), os dois caminhos:
+
+    anterior: esquemas montados campo a campo a partir dos objetos ORM, convertidos
+        para dicionário por jsonable_encoder (como faz response_model) e depois para
+        texto por json.dumps.
+    v2: validação direta dos objetos ORM (from_attributes) pelos TypeAdapters em cache
+        e serialização em bytes com dump_json, sem dicionário intermediário.
+
+Antes de medir, verifica que os dois caminhos produzem o mesmo documento JSON.
+
+Uso:
+    python -m benchmarks.bench_serialization --items 1000 --rounds 50
+"""
+
+from fastapi.encoders import jsonable_encoder
+from app.models.models import Request
+from app.models.schemas import (
+    REQUEST_RESPONSE_LIST_ADAPTER, STATUS_RESPONSE_LIST_ADAPTER,
+    RequestResponse, StatusResponse, SystemStatusResponse
+)
+from benchmarks.common import Timer
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, List
+import argparse
+import json
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def build_requests(count: int) -> List[Request]:
+    """Monta objetos Request transitórios, como os retornados pela consulta de pendentes."""
+    start = datetime(2024, 1, 1)
+    return [
+        Request(
+            id_request=index + 1,
+            dt_register=start + timedelta(seconds=index),
+            nm_system="lab_a",
+            id_person=f"{index:011d}",
+            tp_document="CPF",
+            ct_payload={"id_person": f"{index:011d}", "tp_document": "CPF"}
+        )
+        for index in range(count)
+    ]
+
+
+def build_statuses(count: int, systems: int) -> List[SimpleNamespace]:
+    """Monta consultas de status com os IDs de sistema inteiros, como vêm do banco."""
+    start = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id_request=index + 1,
+            dt_register=start + timedelta(seconds=index),
+            current_status="PROCESSING",
+            systems_status=[
+                SimpleNamespace(
+                    id_system_process=system + 1,
+                    nm_system=f"system_{system}",
+                    st_system_verify=1,
+                    st_system_request=system % 2,
+                    progress_percentage=50.0 if system % 2 else None
+                )
+                for system in range(systems)
+            ]
+        )
+        for index in range(count)
+    ]
+
+
+def legacy_requests(requests: List[Request]) -> bytes:
+    items = [
+        RequestResponse(
+            id_request=request.id_request,
+            dt_register=request.dt_register,
+            nm_system=request.nm_system,
+            id_person=request.id_person,
+            tp_document=request.tp_document
+        )
+        for request in requests
+    ]
+    return json.dumps(jsonable_encoder(items)).encode("utf-8")
+
+
+def legacy_statuses(statuses: List[SimpleNamespace]) -> bytes:
+    items = [
+        StatusResponse(
+            id_request=status.id_request,
+            dt_register=status.dt_register,
+            current_status=status.current_status,
+            systems_status=[
+                SystemStatusResponse(
+                    id_system_process=str(system.id_system_process),
+                    nm_system=system.nm_system,
+                    st_system_verify=system.st_system_verify,
+                    st_system_request=system.st_system_request,
+                    progress_percentage=system.progress_percentage
+                )
+                for system in status.systems_status
+            ]
+        )
+        for status in statuses
+    ]
+    return json.dumps(jsonable_encoder(items)).encode("utf-8")
+
+
+def native_requests(requests: List[Request]) -> bytes:
+    items = REQUEST_RESPONSE_LIST_ADAPTER.validate_python(requests, from_attributes=True)
+    return REQUEST_RESPONSE_LIST_ADAPTER.dump_json(items)
+
+
+def native_statuses(statuses: List[SimpleNamespace]) -> bytes:
+    items = STATUS_RESPONSE_LIST_ADAPTER.validate_python(statuses, from_attributes=True)
+    return STATUS_RESPONSE_LIST_ADAPTER.dump_json(items)
+
+
+def measure(function: Callable[[Any], bytes], data: Any, rounds: int) -> float:
+    """Retorna o tempo médio, em segundos, de uma serialização completa."""
+    function(data)
+    with Timer() as timer:
+        for _ in range(rounds):
+            function(data)
+    return timer.elapsed / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000, help="Itens por resposta")
+    parser.add_argument("--systems", type=int, default=8, help="Sistemas por consulta de status")
+    parser.add_argument("--rounds", type=int, default=50, help="Repetições de cada medida")
+    args = parser.parse_args()
+
+    requests = build_requests(args.items)
+    statuses = build_statuses(args.items, args.systems)
+    cases = (
+        ("solicitações", requests, legacy_requests, native_requests),
+        ("status", statuses, legacy_statuses, native_statuses)
+    )
+
+    print(f"{'resposta':<14}{'caminho':<10}{'ms':>10}{'itens/s':>12}{'KB':>10}")
+    for label, data, legacy, native in cases:
+        if json.loads(legacy(data)) != json.loads(native(data)):
+            raise SystemExit(f"{label}: os caminhos produzem documentos diferentes")
+        size = len(native(data)) / 1024
+        timings = {"anterior": measure(legacy, data, args.rounds), "v2": measure(native, data, args.rounds)}
+        for path, seconds in timings.items():
+            print(f"{label:<14}{path:<10}{seconds * 1000:>10.2f}{args.items / seconds:>12.0f}{size:>10.1f}")
+        print(f"{label:<14}{'ganho':<10}{timings['anterior'] / timings['v2']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Suíte de benchmarks da camada de serviços, com resultados em JSON.
+
+Gera (ou reutiliza) uma massa de dados com benchmarks.data_generator e mede, com
+uma sessão por chamada como em uma requisição da API:
+
+    create_request: RequestService.create_request
+    status_query: get_request_by_id, rollup, processos e último progresso de uma solicitação
+    update_process_progress: ProcessService.update_process_progress
+    update_verification_status: verificação pendente -> aprovada
+    update_processing_status: processamento pendente -> concluído
+
+Para cada benchmark grava latência média, mínima, máxima, p50, p95, p99 e vazão em
+um arquivo JSON com os metadados da execução (commit, versões, banco e massa de
+dados). Com --baseline, compara com um resultado anterior e aponta as regressões
+acima de --threshold; com --fail-on-regression, termina com erro se houver alguma.
+
+Uso:
+    python -m benchmarks.bench_service_layer --requests 100000 --iterations 2000
+    python -m benchmarks.bench_service_layer --reuse --baseline benchmarks/results/anterior.json
+"""
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.models.models import Process, ProcessProgress, Request
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.status_rollup_service import StatusRollupService
+from benchmarks.common import DEFAULT_DATABASE_URL, create_session_factory
+from benchmarks.data_generator import generate_dataset
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlalchemy
+import statistics
+import subprocess
+import time
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+@dataclass
+class BenchmarkResult:
+    """Estatísticas de latência (em milissegundos) e vazão de um benchmark."""
+
+    name: str
+    iterations: int
+    total_seconds: float
+    ops_per_second: float
+    mean_ms: float
+    min_ms: float
+    max_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(name: str, session_factory: sessionmaker, targets: List[Any],
+            call: Callable[[Any, Any], None], warmup: int) -> BenchmarkResult:
+    """Executa call(db, alvo) para cada alvo, com uma sessão por chamada, e mede as latências.
+
+    Os primeiros `warmup` alvos aquecem caches e conexões e não entram nas estatísticas.
+    """
+    latencies: List[float] = []
+    for index, target in enumerate(targets):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            call(db, target)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        if index >= warmup:
+            latencies.append(elapsed)
+
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(latencies),
+        total_seconds=round(total, 4),
+        ops_per_second=round(len(latencies) / total, 1) if total else 0.0,
+        mean_ms=round(statistics.fmean(latencies) * 1000, 3),
+        min_ms=round(ordered[0] * 1000, 3),
+        max_ms=round(ordered[-1] * 1000, 3),
+        p50_ms=round(_percentile(ordered, 0.50) * 1000, 3),
+        p95_ms=round(_percentile(ordered, 0.95) * 1000, 3),
+        p99_ms=round(_percentile(ordered, 0.99) * 1000, 3)
+    )
+
+
+def create_request_call(db, index: int) -> None:
+    RequestService(db).create_request(
+        RequestCreate(nm_system="lab_a", id_person=str(9 * 10 ** 10 + index), tp_document="CC")
+    )
+
+
+def status_query_call(db, id_request: int) -> None:
+    RequestService(db).get_request_by_id(id_request)
+    StatusRollupService(db).get_rollup(id_request)
+    process_service = ProcessService(db)
+    process_service.get_processes_for_request(id_request)
+    process_service.get_latest_progress_bulk([id_request])
+
+
+def progress_call(db, key) -> None:
+    ProcessService(db).update_process_progress(key[0], key[1], random.uniform(1, 99), "Benchmark")
+
+
+def verification_call(db, key) -> None:
+    ProcessService(db).update_verification_status(key[0], key[1], 1)
+
+
+def processing_call(db, key) -> None:
+    ProcessService(db).update_processing_status(key[0], key[1], 1)
+
+
+def select_targets(session_factory: sessionmaker, count: int, rng: random.Random) -> Dict[str, List[Any]]:
+    """Escolhe os alvos de cada benchmark a partir da massa de dados."""
+    db = session_factory()
+    try:
+        max_id = db.execute(select(func.max(Request.id_request))).scalar() or 0
+        in_progress = db.execute(
+            select(Process.id_request, Process.id_system_process)
+            .where(Process.st_system_verify == 1, Process.st_system_request == 0)
+            .order_by(Process.id_request, Process.id_system_process)
+        ).all()
+        pending_verify = db.execute(
+            select(Process.id_request, Process.id_system_process)
+            .where(Process.st_system_verify == 0)
+            .order_by(Process.id_request.desc(), Process.id_system_process)
+        ).all()
+    finally:
+        db.close()
+
+    # As transições consomem os alvos: cada processo é atualizado uma única vez
+    rng.shuffle(in_progress)
+    rng.shuffle(pending_verify)
+    return {
+        "create_request": list(range(count)),
+        "status_query": [rng.randint(1, max_id) for _ in range(count)],
+        "update_process_progress": [tuple(rng.choice(in_progress)) for _ in range(count)],
+        "update_verification_status": [tuple(key) for key in pending_verify[:count]],
+        "update_processing_status": [tuple(key) for key in in_progress[:count]]
+    }
+
+
+def dataset_counts(session_factory: sessionmaker) -> Dict[str, int]:
+    db = session_factory()
+    try:
+        return {
+            "requests": db.execute(select(func.count()).select_from(Request)).scalar(),
+            "processes": db.execute(select(func.count()).select_from(Process)).scalar(),
+            "progress": db.execute(select(func.count()).select_from(ProcessProgress)).scalar()
+        }
+    finally:
+        db.close()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[BenchmarkResult], baseline_path: str, threshold: float) -> List[str]:
+    """Compara p50 e p95 com um resultado anterior e retorna as regressões acima do limite."""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {item["name"]: item for item in json.load(file)["benchmarks"]}
+
+    regressions = []
+    print(f"\ncomparação com {baseline_path} (limite {threshold:.0%})")
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = previous[metric], getattr(result, metric)
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSÃO"
+                regressions.append(f"{result.name}.{metric} {before:.3f} -> {after:.3f}ms ({change:+.0%})")
+            print(f"  {result.name:<28}{metric:<8}{before:>10.3f}{after:>10.3f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=20000, help="Solicitações da massa de dados")
+    parser.add_argument("--systems", type=int, default=6, help="Sistemas de processamento")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse", action="store_true", help="Reutiliza a massa de dados existente")
+    parser.add_argument("--iterations", type=int, default=1000, help="Chamadas medidas por benchmark")
+    parser.add_argument("--warmup", type=int, default=50, help="Chamadas de aquecimento por benchmark")
+    parser.add_argument("--output", default=None, help="Arquivo JSON de resultados")
+    parser.add_argument("--baseline", default=None, help="Resultado anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Piora relativa considerada regressão")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if args.reuse:
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(args.database_url))
+        generation = None
+    else:
+        session_factory = create_session_factory(args.database_url)
+        generation = asdict(generate_dataset(session_factory, args.requests, args.systems, args.seed))
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    count = args.iterations + args.warmup
+    targets = select_targets(session_factory, count, rng)
+    counts = dataset_counts(session_factory)
+
+    calls = (
+        ("create_request", create_request_call),
+        ("status_query", status_query_call),
+        ("update_process_progress", progress_call),
+        ("update_verification_status", verification_call),
+        ("update_processing_status", processing_call),
+    )
+    results = []
+    print(f"{'benchmark':<28}{'n':>6}{'ops/s':>10}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for name, call in calls:
+        if len(targets[name]) <= args.warmup:
+            print(f"{name:<28} sem alvos suficientes na massa de dados")
+            continue
+        result = measure(name, session_factory, targets[name], call, args.warmup)
+        results.append(result)
+        print(f"{name:<28}{result.iterations:>6}{result.ops_per_second:>10.1f}{result.mean_ms:>10.3f}"
+              f"{result.p50_ms:>10.3f}{result.p95_ms:>10.3f}{result.p99_ms:>10.3f}")
+
+    engine = session_factory.kw["bind"]
+    document = {
+        "suite": "service_layer",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+        "database": engine.dialect.name,
+        "database_url": engine.url.render_as_string(hide_password=True),
+        "parameters": {key: value for key, value in vars(args).items()
+                       if key not in ("database_url", "output", "baseline", "fail_on_regression")},
+        "dataset": {"generation": generation, "counts": counts},
+        "benchmarks": [asdict(result) for result in results]
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"service_layer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(document, file, indent=2, ensure_ascii=False)
+    print(f"\nresultados gravados em {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            raise SystemExit("Regressões: " + "; ".join(regressions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark e verificação da unidade de trabalho (app.services.unit_of_work).
+
+Executa a mesma operação composta — criar uma solicitação, criar um processo por
+sistema de processamento, aprovar a verificação de cada um e registrar um progresso
+— de dois modos:
+
+    auto-commit: comportamento padrão, um commit (e refresh) por chamada de serviço.
+    unit_of_work: todas as chamadas em um bloco unit_of_work, com um único commit.
+
+Mostra commits e instruções SQL por operação e a latência média de cada modo, e
+verifica que uma exceção dentro do bloco desfaz a operação inteira.
+
+Uso:
+    python -m benchmarks.bench_unit_of_work --operations 300 --systems 6
+"""
+
+from sqlalchemy import event, func, select
+from app.models.models import DomSystem, Request
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.unit_of_work import unit_of_work
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory, seed_systems
+from contextlib import nullcontext
+from typing import List, Tuple
+import argparse
+import logging
+
+logging.basicConfig(level=logging.CRITICAL)
+logger = logging.getLogger(__name__)
+
+
+def load_systems(db, requester_id: int, processor_ids: List[int]) -> Tuple[DomSystem, List[DomSystem]]:
+    return db.get(DomSystem, requester_id), [db.get(DomSystem, id_system) for id_system in processor_ids]
+
+
+def run_operation(db, requester, processors, index: int) -> None:
+    request = RequestService(db).create_request(
+        RequestCreate(nm_system=requester.nm_system, id_person=str(10 ** 9 + index), tp_document="CC")
+    )
+    process_service = ProcessService(db)
+    for system in processors:
+        process_service.create_process_entry(
+            request.id_request, system.id_dom_system, requester.id_dom_system, str(10 ** 9 + index), "CC"
+        )
+        process_service.update_verification_status(request.id_request, system.id_dom_system, 1)
+        process_service.update_process_progress(request.id_request, system.id_dom_system, 10.0, "Iniciado")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--operations", type=int, default=300)
+    parser.add_argument("--systems", type=int, default=6)
+    args = parser.parse_args()
+
+    session_factory = create_session_factory(args.database_url)
+    engine = session_factory.kw["bind"]
+    counts = {"commits": 0, "statements": 0}
+    event.listen(engine, "commit", lambda conn: counts.__setitem__("commits", counts["commits"] + 1))
+    event.listen(engine, "after_cursor_execute",
+                 lambda *_: counts.__setitem__("statements", counts["statements"] + 1))
+
+    db = session_factory()
+    try:
+        requester, processors = seed_systems(db, args.systems)
+        requester_id, processor_ids = requester.id_dom_system, [system.id_dom_system for system in processors]
+    finally:
+        db.close()
+
+    failures = []
+    print(f"{'modo':<14}{'commits/op':>12}{'sql/op':>9}{'ms/op':>9}")
+    for mode, scope in (("auto-commit", lambda db: nullcontext()), ("unit_of_work", unit_of_work)):
+        counts.update(commits=0, statements=0)
+        with Timer() as timer:
+            for index in range(args.operations):
+                db = session_factory()
+                try:
+                    requester, processors = load_systems(db, requester_id, processor_ids)
+                    with scope(db):
+                        run_operation(db, requester, processors, index)
+                finally:
+                    db.close()
+        print(f"{mode:<14}{counts['commits'] / args.operations:>12.1f}{counts['statements'] / args.operations:>9.1f}"
+              f"{timer.elapsed / args.operations * 1000:>9.2f}")
+        if mode == "unit_of_work" and counts["commits"] != args.operations:
+            failures.append(f"unit_of_work fez {counts['commits']} commits em {args.operations} operações")
+
+    db = session_factory()
+    try:
+        before = db.execute(select(func.count()).select_from(Request)).scalar()
+        requester, processors = load_systems(db, requester_id, processor_ids)
+        try:
+            with unit_of_work(db):
+                run_operation(db, requester, processors, args.operations)
+                raise RuntimeError("falha simulada")
+        except RuntimeError:
+            pass
+        after = db.execute(select(func.count()).select_from(Request)).scalar()
+    finally:
+        db.close()
+    print(f"atomicidade: solicitações antes={before} depois da falha={after}")
+    if after != before:
+        failures.append("a operação com falha não foi desfeita")
+
+    if failures:
+        raise SystemExit("Falhas: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
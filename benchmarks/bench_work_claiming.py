@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark da reivindicação de trabalho com leases por vários processos.
+
+Cria um volume de processos pendentes de verificação e dispara N processos
+worker que chamam ProcessService.claim_due_processes até esvaziar a fila.
+Ao final, confere que nenhum processo foi entregue a mais de um worker e
+reporta a vazão para cada quantidade de workers informada.
+
+Uso:
+    python -m benchmarks.bench_work_claiming --count 2000 --systems 4 --workers 1 2 4
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.schemas import RequestCreate
+from app.services.request_service import RequestService
+from app.services.process_service import ProcessService
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory, seed_systems
+from collections import Counter
+from datetime import datetime, timedelta
+import argparse
+import logging
+import multiprocessing
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def seed_pending(database_url: str, count: int, systems: int) -> int:
+    """Recria o banco com `count` solicitações pendentes de verificação em `systems` sistemas."""
+    session_factory = create_session_factory(database_url)
+    db = session_factory()
+    try:
+        seed_systems(db, systems)
+        RequestService(db).create_requests_bulk([
+            RequestCreate(nm_system="lab_a", id_person=str(100000 + index), tp_document="CC")
+            for index in range(count)
+        ])
+    finally:
+        db.close()
+    return count * systems
+
+
+def claim_until_empty(database_url: str, worker_id: str, batch_size: int, results) -> None:
+    """Reivindica lotes até a fila esvaziar e devolve as chaves recebidas."""
+    engine = create_engine(database_url, connect_args={"timeout": 30} if database_url.startswith("sqlite") else {})
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    # Tudo o que foi criado antes do início da medição está devido
+    due_before = datetime.now() + timedelta(days=1)
+    claimed = []
+    try:
+        service = ProcessService(db)
+        while True:
+            batch = service.claim_due_processes(
+                worker_id, "verify", batch_size=batch_size, lease_seconds=3600, due_before=due_before
+            )
+            if not batch:
+                break
+            claimed.extend((process.id_request, process.id_system_process) for process in batch)
+    finally:
+        db.close()
+        engine.dispose()
+    results.put(claimed)
+
+
+def run(database_url: str, workers: int, batch_size: int, count: int, systems: int):
+    """Mede uma rodada com `workers` processos concorrentes sobre uma fila recém-criada."""
+    total = seed_pending(database_url, count, systems)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=claim_until_empty, args=(database_url, f"bench:{index}", batch_size, results))
+        for index in range(workers)
+    ]
+    with Timer() as timer:
+        for process in processes:
+            process.start()
+        claims = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    counter = Counter(key for claimed in claims for key in claimed)
+    duplicated = sum(1 for occurrences in counter.values() if occurrences > 1)
+    return total, len(counter), duplicated, [len(claimed) for claimed in claims], timer.elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="Quantidade de solicitações")
+    parser.add_argument("--systems", type=int, default=4, help="Sistemas de processamento")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Quantidades de workers")
+    parser.add_argument("--batch-size", type=int, default=100, help="Processos por reivindicação")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    args = parser.parse_args()
+
+    failed = False
+    for workers in args.workers:
+        total, claimed, duplicated, per_worker, elapsed = run(
+            args.database_url, workers, args.batch_size, args.count, args.systems
+        )
+        print(f"workers={workers:<3} processos={total} reivindicados={claimed} duplicados={duplicated} "
+              f"por_worker={per_worker} {elapsed:.2f}s ({claimed / elapsed:,.0f} processos/s)")
+        failed = failed or duplicated > 0 or claimed != total
+
+    if failed:
+        raise SystemExit("Reivindicação inconsistente: processos duplicados ou não reivindicados")
+
+
+if __name__ == "__main__":
+    main()
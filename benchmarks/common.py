@@ -0,0 +1,66 @@
+"""
+Utilitários compartilhados pelos benchmarks do Request Manager.
+
+Os benchmarks rodam contra um banco SQLite temporário (ou contra a URL informada
+em --database-url), criando o schema a partir dos modelos SQLAlchemy e
+cadastrando os sistemas de teste necessários.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.db.database import Base
+from app.models.models import DomSystem
+from typing import List, Tuple
+import os
+import tempfile
+import time
+
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'request_manager_bench.db')}"
+
+
+def create_session_factory(database_url: str = DEFAULT_DATABASE_URL) -> sessionmaker:
+    """Cria um schema limpo e retorna uma fábrica de sessões para ele.
+
+    Args:
+        database_url: URL do banco usado no benchmark
+
+    Returns:
+        sessionmaker: Fábrica de sessões ligada ao banco recriado
+    """
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def seed_systems(db: Session, processing_systems: int) -> Tuple[DomSystem, List[DomSystem]]:
+    """Cadastra um sistema solicitante e N sistemas de processamento.
+
+    Args:
+        db: Sessão do banco de dados
+        processing_systems: Quantidade de sistemas de processamento
+
+    Returns:
+        Tuple[DomSystem, List[DomSystem]]: Sistema solicitante e sistemas de processamento
+    """
+    requester = DomSystem(nm_system="lab_a", system_type="requester")
+    processors = [
+        DomSystem(nm_system=f"system_{index}", system_type="process")
+        for index in range(processing_systems)
+    ]
+    db.add(requester)
+    db.add_all(processors)
+    db.commit()
+    return requester, processors
+
+
+class Timer:
+    """Context manager simples para medir o tempo decorrido em segundos."""
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+"""
+Gerador de massa de dados sintética para os benchmarks.
+
+Popula tb_dom_system, tb_request, tb_process, tb_process_progress e
+tb_request_status com distribuições realistas e reprodutíveis (semente fixa):
+
+    sistemas: três solicitantes com pesos diferentes e N sistemas de processamento;
+        cada solicitação gera um processo por sistema de processamento, como em
+        RequestService.create_request.
+    idade: dt_register distribuído nos últimos --days dias. Quanto mais antiga a
+        solicitação, maior a chance de a verificação e o processamento terem
+        respondido, de modo que as solicitações recentes concentram os pendentes.
+    status: verificação aprovada, recusada, com erro ou em timeout, e processamento
+        concluído, parcial, com erro, em timeout ou cancelado, nas proporções de
+        VERIFY_OUTCOMES e REQUEST_OUTCOMES.
+    progresso: de 1 a 5 registros crescentes para os processamentos iniciados.
+
+As linhas são gravadas com INSERTs em lote, um commit por lote, e o rollup de cada
+lote é calculado por StatusRollupService.refresh. Escala para milhões de
+solicitações com memória constante.
+
+Uso:
+    python -m benchmarks.data_generator --requests 1000000 --systems 6
+"""
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.models import DomSystem, Process, ProcessProgress, Request
+from app.services.status_rollup_service import StatusRollupService
+from benchmarks.common import DEFAULT_DATABASE_URL, Timer, create_session_factory
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+import argparse
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# Solicitantes e a fração das solicitações de cada um
+REQUESTERS: Tuple[Tuple[str, float], ...] = (("lab_a", 0.6), ("lab_b", 0.3), ("lab_c", 0.1))
+
+DOCUMENT_TYPES: Tuple[Tuple[str, float], ...] = (("CC", 0.7), ("CE", 0.1), ("PA", 0.1), ("TI", 0.1))
+
+# Resultado da verificação respondida (st_system_verify) e sua fração
+VERIFY_OUTCOMES: Tuple[Tuple[int, float], ...] = ((1, 0.85), (2, 0.08), (3, 0.04), (4, 0.03))
+
+# Resultado do processamento respondido (st_system_request) e sua fração
+REQUEST_OUTCOMES: Tuple[Tuple[int, float], ...] = ((1, 0.88), (2, 0.04), (3, 0.03), (4, 0.03), (5, 0.02))
+
+# Dias até a verificação / o processamento responderem com certeza
+VERIFY_RESPONSE_DAYS = 7
+REQUEST_RESPONSE_DAYS = 30
+
+GENERATOR_BATCH_SIZE = 5000
+
+
+@dataclass
+class DatasetSummary:
+    """Quantidade de linhas geradas por tabela."""
+
+    systems: int = 0
+    requests: int = 0
+    processes: int = 0
+    progress: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def _weighted(rng: random.Random, choices: Tuple[Tuple[Any, float], ...]) -> Any:
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def seed_dataset_systems(db: Session, processing_systems: int) -> Tuple[Dict[str, int], List[int]]:
+    """Cadastra os solicitantes de REQUESTERS e N sistemas de processamento, se ainda não existirem.
+
+    Args:
+        db: Sessão do banco de dados
+        processing_systems: Quantidade de sistemas de processamento
+
+    Returns:
+        Tuple[Dict[str, int], List[int]]: ID de cada solicitante por nome e IDs dos sistemas de processamento
+    """
+    existing = {system.nm_system: system for system in db.execute(select(DomSystem)).scalars()}
+    wanted = [(name, "requester") for name, _ in REQUESTERS]
+    wanted += [(f"system_{index}", "process") for index in range(processing_systems)]
+    for name, system_type in wanted:
+        if name not in existing:
+            existing[name] = DomSystem(
+                nm_system=name, system_type=system_type,
+                api_verify_address=f"http://localhost:8080/{name}/verify",
+                api_request_address=f"http://localhost:8080/{name}/request",
+                api_status_address=f"http://localhost:8080/{name}/status"
+            )
+            db.add(existing[name])
+    db.commit()
+    requester_ids = {name: existing[name].id_dom_system for name, _ in REQUESTERS}
+    processing_ids = [existing[f"system_{index}"].id_dom_system for index in range(processing_systems)]
+    return requester_ids, processing_ids
+
+
+def generate_request_rows(rng: random.Random, count: int, now: datetime, days: int) -> List[Dict[str, Any]]:
+    """Gera as linhas de tb_request de um lote.
+
+    Args:
+        rng: Gerador aleatório
+        count: Quantidade de solicitações
+        now: Instante de referência das idades
+        days: Idade máxima das solicitações, em dias
+
+    Returns:
+        List[Dict[str, Any]]: Linhas de tb_request, sem ID
+    """
+    rows = []
+    for _ in range(count):
+        id_person, tp_document = str(rng.randrange(10 ** 9, 10 ** 10)), _weighted(rng, DOCUMENT_TYPES)
+        rows.append({
+            "nm_system": _weighted(rng, REQUESTERS),
+            "ct_payload": {"id_person": id_person, "tp_document": tp_document},
+            "id_person": id_person,
+            "tp_document": tp_document,
+            "dt_register": now - timedelta(days=rng.uniform(0, days)),
+            "st_request": 0
+        })
+    return rows
+
+
+def generate_process_rows(rng: random.Random, id_request: int, request_row: Dict[str, Any],
+                          requester_ids: Dict[str, int], processing_ids: List[int],
+                          now: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Gera os processos e o progresso de uma solicitação, com status conforme a idade.
+
+    Args:
+        rng: Gerador aleatório
+        id_request: ID da solicitação
+        request_row: Linha de tb_request gerada por generate_request_rows
+        requester_ids: ID de cada solicitante por nome
+        processing_ids: IDs dos sistemas de processamento
+        now: Instante de referência das idades
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Linhas de tb_process e de tb_process_progress
+    """
+    dt_register = request_row["dt_register"]
+    age_days = (now - dt_register).total_seconds() / 86400
+    processes, progress = [], []
+    for id_system_process in processing_ids:
+        process = {
+            "id_request": id_request,
+            "id_system_process": id_system_process,
+            "id_system_requester": requester_ids[request_row["nm_system"]],
+            "id_person": request_row["ct_payload"]["id_person"],
+            "tp_document": request_row["ct_payload"]["tp_document"],
+            "dt_system_verify": dt_register,
+            "st_system_verify": 0,
+            "st_system_request": 0,
+            "qt_attempts": 0
+        }
+        processes.append(process)
+
+        if rng.random() >= min(1.0, age_days / VERIFY_RESPONSE_DAYS):
+            continue
+        verified_at = dt_register + timedelta(hours=rng.uniform(0, min(age_days, VERIFY_RESPONSE_DAYS) * 24))
+        process["st_system_verify"] = _weighted(rng, VERIFY_OUTCOMES)
+        process["dt_system_verify_response"] = verified_at
+        if process["st_system_verify"] == 2:
+            process["ds_reason_verify_refuse"] = "Pessoa não encontrada"
+        if process["st_system_verify"] != 1:
+            continue
+
+        process["dt_system_request"] = verified_at
+        elapsed_days = (now - verified_at).total_seconds() / 86400
+        responded = rng.random() < min(1.0, elapsed_days / REQUEST_RESPONSE_DAYS)
+        if responded:
+            process["st_system_request"] = _weighted(rng, REQUEST_OUTCOMES)
+            process["dt_system_conclusion"] = verified_at + timedelta(days=rng.uniform(0, elapsed_days))
+            process["st_system_process"] = 1
+        if process["st_system_request"] in (0, 1, 2) and (responded or rng.random() < 0.5):
+            final = 100.0 if process["st_system_request"] == 1 else rng.uniform(5, 95)
+            steps = rng.randint(1, 5)
+            for step in range(1, steps + 1):
+                progress.append({
+                    "id_request": id_request,
+                    "id_system_process": id_system_process,
+                    "dt_progress_update": verified_at + timedelta(minutes=step * rng.uniform(1, 120)),
+                    "progress_percentage": round(final * step / steps, 2),
+                    "progress_message": f"Etapa {step} de {steps}"
+                })
+    return processes, progress
+
+
+def generate_dataset(session_factory: sessionmaker, requests: int, processing_systems: int = 6,
+                     seed: int = 42, days: int = 180, batch_size: int = GENERATOR_BATCH_SIZE,
+                     now: Optional[datetime] = None) -> DatasetSummary:
+    """Gera a massa de dados em lotes, acrescentando às solicitações existentes.
+
+    Args:
+        session_factory: Fábrica de sessões do banco
+        requests: Quantidade de solicitações geradas
+        processing_systems: Quantidade de sistemas de processamento
+        seed: Semente do gerador aleatório
+        days: Idade máxima das solicitações, em dias
+        batch_size: Solicitações por lote (e por commit)
+        now: Instante de referência das idades; se None, o instante atual
+
+    Returns:
+        DatasetSummary: Quantidade de linhas geradas por tabela
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    summary = DatasetSummary()
+    db = session_factory()
+    try:
+        with Timer() as timer:
+            requester_ids, processing_ids = seed_dataset_systems(db, processing_systems)
+            summary.systems = len(requester_ids) + len(processing_ids)
+            insert_requests = insert(Request).returning(Request.id_request, sort_by_parameter_order=True)
+
+            for start in range(0, requests, batch_size):
+                count = min(batch_size, requests - start)
+                request_rows = generate_request_rows(rng, count, now, days)
+                request_ids = db.execute(insert_requests, request_rows).scalars().all()
+                process_rows, progress_rows = [], []
+                for id_request, request_row in zip(request_ids, request_rows):
+                    processes, progress = generate_process_rows(
+                        rng, id_request, request_row, requester_ids, processing_ids, now
+                    )
+                    process_rows += processes
+                    progress_rows += progress
+                db.execute(insert(Process), process_rows)
+                if progress_rows:
+                    db.execute(insert(ProcessProgress), progress_rows)
+                StatusRollupService(db).refresh(request_ids)
+                db.commit()
+
+                summary.requests += count
+                summary.processes += len(process_rows)
+                summary.progress += len(progress_rows)
+                if (start // batch_size) % 20 == 19:
+                    logger.info(f"{summary.requests} de {requests} solicitações geradas")
+        summary.elapsed_seconds = timer.elapsed
+    finally:
+        db.close()
+    return summary
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=100000, help="Solicitações geradas")
+    parser.add_argument("--systems", type=int, default=6, help="Sistemas de processamento")
+    parser.add_argument("--days", type=int, default=180, help="Idade máxima das solicitações (dias)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=GENERATOR_BATCH_SIZE)
+    parser.add_argument("--append", action="store_true", help="Acrescenta ao banco existente em vez de recriá-lo")
+    args = parser.parse_args()
+
+    if args.append:
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(args.database_url))
+    else:
+        session_factory = create_session_factory(args.database_url)
+    summary = generate_dataset(session_factory, args.requests, args.systems, args.seed, args.days, args.batch_size)
+    print(", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                    for key, value in asdict(summary).items()))
+
+
+if __name__ == "__main__":
+    main()
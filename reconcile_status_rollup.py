@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Reconcilia o rollup de status (tb_request_status) com tb_process.
+
+Reconstrói as contagens e o status geral de cada solicitação a partir de tb_process,
+reporta as divergências encontradas e, a menos que --dry-run seja informado, corrige-as.
+Pode ser executado manualmente ou agendado como job periódico.
+"""
+
+from app.db.database import get_db
+from app.services.status_rollup_service import StatusRollupService, RECONCILE_BATCH_SIZE
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Apenas reporta, sem corrigir")
+    args = parser.parse_args()
+
+    db = next(get_db())
+    try:
+        report = StatusRollupService(db).reconcile(batch_size=args.batch_size, fix=not args.dry_run)
+        logger.info(
+            f"Verificadas: {report.checked}, divergentes: {report.drifted} "
+            f"(sem rollup: {report.missing}), corrigidas: {report.fixed}"
+        )
+        if report.drifted_ids:
+            logger.info(f"Amostra de solicitações divergentes: {report.drifted_ids}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Entrega as notificações de status gravadas em tb_notification_outbox.
+
+Executa o OutboxRelay até ser interrompido (Ctrl+C / SIGTERM), ou uma única passada
+com --once. A ordem das notificações de cada processo exige um único relay ativo
+por banco: com --coordinate, várias instâncias podem ser iniciadas (ex.: uma por
+nó) e só a que detém o lock do relay em tb_job_lock entrega.
+"""
+
+from sqlalchemy.orm import sessionmaker
+from app.db.database import engine
+from app.services.job_coordinator import JobCoordinator
+from app.services.notification_outbox import OutboxRelay, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_INTERVAL
+from app.services.outbound_dispatcher import create_outbound_dispatcher_from_env
+from app.services.system_registry import get_system_registry
+import argparse
+import asyncio
+import logging
+import signal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(args) -> None:
+    dispatcher = create_outbound_dispatcher_from_env()
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    relay = OutboxRelay(
+        session_factory,
+        dispatcher,
+        get_system_registry(),
+        batch_size=args.batch_size,
+        max_attempts=args.max_attempts,
+        retry_interval=args.retry_interval
+    )
+    try:
+        if args.once:
+            report = await relay.relay_once()
+            logger.info(f"Passada concluída: {report}")
+            return
+
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+        coordinator = JobCoordinator(session_factory) if args.coordinate else None
+        if coordinator is not None:
+            coordinator.start()
+        try:
+            await relay.run(stop_event, interval=args.interval, coordinator=coordinator)
+        finally:
+            if coordinator is not None:
+                coordinator.close()
+    finally:
+        await dispatcher.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    parser.add_argument("--max-attempts", type=int, default=OUTBOX_MAX_ATTEMPTS)
+    parser.add_argument("--retry-interval", type=float, default=OUTBOX_RETRY_INTERVAL,
+                        help="Atraso da primeira retentativa de uma notificação (s)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Espera entre passadas (s)")
+    parser.add_argument("--once", action="store_true", help="Executa uma única passada")
+    parser.add_argument("--coordinate", action="store_true",
+                        help="Entrega somente enquanto detiver o lock do relay (várias instâncias)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
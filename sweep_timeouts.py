@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Marca como timeout as verificações e os processamentos que excederam o prazo.
+
+Aplica, para cada sistema de processamento, os prazos verification_timeout_days e
+processing_timeout_days de tb_dom_system, em lotes limitados com um commit por lote,
+e reporta as contagens e a duração por sistema. Pode ser executado manualmente ou
+agendado como job periódico.
+
+Com --coordinate, cada sistema é reivindicado por lock em tb_job_lock, e várias
+instâncias (em vários hosts) dividem os sistemas entre si sem varrer o mesmo
+sistema duas vezes. Com --interval, executa continuamente, varrendo cada sistema no
+máximo uma vez por intervalo no cluster.
+"""
+
+from sqlalchemy.orm import sessionmaker
+from app.db.database import engine
+from app.services.job_coordinator import JobCoordinator
+from app.services.timeout_sweeper import TimeoutSweeper, TIMEOUT_SWEEP_BATCH_SIZE
+import argparse
+import logging
+import signal
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=TIMEOUT_SWEEP_BATCH_SIZE)
+    parser.add_argument("--coordinate", action="store_true", help="Divide os sistemas entre as instâncias ativas")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Executa continuamente, varrendo cada sistema no máximo uma vez por intervalo (s)")
+    args = parser.parse_args()
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    coordinator = JobCoordinator(session_factory) if args.coordinate or args.interval else None
+    stop_event = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop_event.set())
+
+    db = session_factory()
+    try:
+        if coordinator is not None:
+            coordinator.start()
+        sweeper = TimeoutSweeper(db, batch_size=args.batch_size)
+        while not stop_event.is_set():
+            report = sweeper.sweep(coordinator=coordinator, interval=args.interval)
+            for result in report.systems.values():
+                logger.info(
+                    f"{result.nm_system}: verificação={result.verify_timeouts} processamento={result.request_timeouts} "
+                    f"lotes={result.batches} duração={result.elapsed_seconds:.3f}s"
+                )
+            if args.interval is None:
+                break
+            # Os locks por sistema impedem varreduras antes do intervalo; a espera só evita consultas inúteis
+            stop_event.wait(min(args.interval, 60.0))
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Fixtures compartilhadas pelos testes dos serviços.
+
+Cada teste recebe um banco SQLite próprio (em tmp_path), criado a partir dos modelos
+SQLAlchemy, com um sistema solicitante e três sistemas de processamento cadastrados.
+As conexões podem ser usadas por várias threads, para os testes de concorrência.
+"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.db.database import Base
+from app.models import models  # noqa: F401  (registra as tabelas em Base.metadata)
+from benchmarks.common import seed_systems
+from typing import Iterator
+import pytest
+
+PROCESSING_SYSTEMS = 3
+
+
+@pytest.fixture
+def session_factory(tmp_path) -> Iterator[sessionmaker]:
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory) -> Iterator[Session]:
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def systems(db):
+    """Sistema solicitante e sistemas de processamento cadastrados."""
+    return seed_systems(db, PROCESSING_SYSTEMS)
+
@@ -0,0 +1,144 @@
+"""Testes dos serviços assíncronos (AsyncRequestService e AsyncProcessService) em aiosqlite.
+
+Cada cenário também é executado com os serviços síncronos no mesmo banco, e os
+resultados das duas versões são comparados.
+"""
+
+from app.models.models import NotificationOutbox, Process, RequestStatus
+from app.models.schemas import RequestCreate
+from app.services.async_process_service import AsyncProcessService
+from app.services.async_request_service import AsyncRequestService
+from app.services.process_service import ProcessService, UpdateOutcome
+from app.services.request_service import RequestService
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+import pytest
+
+
+@pytest.fixture
+def async_session_factory(session_factory, systems) -> async_sessionmaker:
+    # Mesmo arquivo SQLite do session_factory, já com as tabelas e os sistemas cadastrados;
+    # sem pool, nenhuma conexão sobrevive ao event loop do teste
+    engine = create_async_engine(session_factory.kw["bind"].url.set(drivername="sqlite+aiosqlite"),
+                                 poolclass=NullPool)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def request_data(systems, id_person: str, idempotency_key: str = None) -> RequestCreate:
+    requester, _ = systems
+    return RequestCreate(nm_system=requester.nm_system, id_person=id_person, tp_document="CC",
+                         idempotency_key=idempotency_key)
+
+
+def process_states(db, id_request: int):
+    db.expire_all()
+    return [
+        (process.id_system_process, process.st_system_verify, process.st_system_request, process.id_lease_owner)
+        for process in db.execute(
+            select(Process).where(Process.id_request == id_request).order_by(Process.id_system_process)
+        ).scalars()
+    ]
+
+
+def rollup_counts(db, id_request: int):
+    db.expire_all()
+    rollup = db.get(RequestStatus, id_request)
+    return (rollup.qt_process, rollup.qt_verify_pending, rollup.qt_verify_approved,
+            rollup.qt_request_completed, rollup.st_request_overall)
+
+
+@pytest.mark.asyncio
+async def test_create_matches_sync(async_session_factory, db, systems):
+    async with async_session_factory() as async_db:
+        service = AsyncRequestService(async_db)
+        [async_id] = await service.create_requests_bulk([request_data(systems, "500001")])
+        [sync_id] = RequestService(db).create_requests_bulk([request_data(systems, "500002")])
+
+        assert process_states(db, async_id) == process_states(db, sync_id)
+        assert rollup_counts(db, async_id) == rollup_counts(db, sync_id)
+
+        # Chave de idempotência: a segunda submissão devolve a requisição existente
+        first, created = await service.create_or_get_request(request_data(systems, "500003", "key-1"))
+        again, created_again = await service.create_or_get_request(request_data(systems, "500003", "key-1"))
+        assert (created, created_again) == (True, False)
+        assert again.id_request == first.id_request
+
+
+@pytest.mark.asyncio
+async def test_status_compare_and_set_matches_sync(async_session_factory, db, systems):
+    _, processors = systems
+    id_system = processors[0].id_dom_system
+    async with async_session_factory() as async_db:
+        [async_id] = await AsyncRequestService(async_db).create_requests_bulk([request_data(systems, "500011")])
+        [sync_id] = RequestService(db).create_requests_bulk([request_data(systems, "500012")])
+        async_service = AsyncProcessService(async_db)
+        sync_service = ProcessService(db)
+
+        # Aplicada, repetida (rejeitada pelas transições permitidas) e em processo inexistente
+        async_outcomes = [
+            (await async_service.update_verification_status(async_id, id_system, 1)).outcome,
+            (await async_service.update_verification_status(async_id, id_system, 1)).outcome,
+            (await async_service.update_verification_status(async_id, 999, 1)).outcome
+        ]
+        sync_outcomes = [
+            sync_service.update_verification_status(sync_id, id_system, 1).outcome,
+            sync_service.update_verification_status(sync_id, id_system, 1).outcome,
+            sync_service.update_verification_status(sync_id, 999, 1).outcome
+        ]
+
+    assert async_outcomes == sync_outcomes == [UpdateOutcome.UPDATED, UpdateOutcome.REJECTED, UpdateOutcome.NOT_FOUND]
+    assert process_states(db, async_id) == process_states(db, sync_id)
+    assert rollup_counts(db, async_id) == rollup_counts(db, sync_id)
+    # Cada transição aplicada grava uma notificação na outbox
+    outbox = dict(db.execute(
+        select(NotificationOutbox.id_request, func.count()).group_by(NotificationOutbox.id_request)
+    ).all())
+    assert outbox.get(async_id) == outbox.get(sync_id) == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_matches_sync(async_session_factory, db, systems):
+    async with async_session_factory() as async_db:
+        [async_id] = await AsyncRequestService(async_db).create_requests_bulk([request_data(systems, "500021")])
+        service = AsyncProcessService(async_db)
+        sync_service = ProcessService(db)
+
+        claimed = await service.claim_due_processes("worker-a", "verify", due_before=datetime.now())
+        keys = sorted((process.id_request, process.id_system_process) for process in claimed)
+        assert {id_request for id_request, _ in keys} == {async_id}
+        assert {process.id_lease_owner for process in claimed} == {"worker-a"}
+        # O lease vale para as duas versões
+        assert await service.claim_due_processes("worker-b", "verify", due_before=datetime.now()) == []
+        assert sync_service.claim_due_processes("worker-b", "verify", due_before=datetime.now()) == []
+
+        # Liberados, os processos voltam à fila e a versão síncrona reivindica os mesmos
+        assert await service.release_leases("worker-a", keys) == len(keys)
+        reclaimed = sync_service.claim_due_processes("worker-b", "verify", due_before=datetime.now())
+        assert sorted((process.id_request, process.id_system_process) for process in reclaimed) == keys
+
+
+@pytest.mark.asyncio
+async def test_latest_progress_matches_sync(async_session_factory, db, systems):
+    _, processors = systems
+    id_system = processors[0].id_dom_system
+    async with async_session_factory() as async_db:
+        [async_id] = await AsyncRequestService(async_db).create_requests_bulk([request_data(systems, "500031")])
+        [sync_id] = RequestService(db).create_requests_bulk([request_data(systems, "500032")])
+        async_service = AsyncProcessService(async_db)
+        sync_service = ProcessService(db)
+
+        for percentage, message in ((30, "lendo"), (80, "gravando")):
+            assert await async_service.update_process_progress(async_id, id_system, percentage, message)
+            assert sync_service.update_process_progress(sync_id, id_system, percentage, message)
+
+        latest = await async_service.get_latest_progress(async_id, id_system)
+        expected = sync_service.get_latest_progress(sync_id, id_system)
+        assert (latest.progress_percentage, latest.progress_message) == (
+            expected.progress_percentage, expected.progress_message) == (80, "gravando")
+
+        async_bulk = await async_service.get_latest_progress_bulk([async_id])
+        sync_bulk = sync_service.get_latest_progress_bulk([sync_id])
+        assert {key[1]: progress.progress_percentage for key, progress in async_bulk.items()} == \
+            {key[1]: progress.progress_percentage for key, progress in sync_bulk.items()} == {id_system: 80}
@@ -0,0 +1,137 @@
+"""Testes da máquina de estados do circuit breaker e do limite AIMD (CircuitBreaker)."""
+
+from app.services.circuit_breaker import BreakerConfig, BreakerState, CircuitBreakerRegistry
+from app.services.instrumentation import metrics
+
+CONFIG = BreakerConfig(
+    window_size=10, min_calls=4, error_rate_threshold=0.5, latency_p95_threshold=1.0,
+    open_seconds=30.0, half_open_calls=2, min_limit=1, max_limit=8
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def breaker_with_clock(config: BreakerConfig = CONFIG):
+    clock = FakeClock()
+    registry = CircuitBreakerRegistry(config, clock)
+    return registry, registry.get(1), clock
+
+
+def record_calls(breaker, outcomes, latency: float = 0.1) -> None:
+    for ok in outcomes:
+        assert breaker.allow_request()
+        breaker.record(ok, latency)
+
+
+def open_breaker(breaker) -> None:
+    record_calls(breaker, [False] * CONFIG.min_calls)
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_opens_only_after_min_calls_at_error_rate():
+    _, breaker, _ = breaker_with_clock()
+
+    record_calls(breaker, [False] * (CONFIG.min_calls - 1))
+    assert breaker.state == BreakerState.CLOSED
+    record_calls(breaker, [False])
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_error_rate_below_threshold_keeps_closed():
+    _, breaker, _ = breaker_with_clock()
+
+    record_calls(breaker, [True, True, True, False] * 3)
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_slow_p95_opens():
+    _, breaker, _ = breaker_with_clock()
+
+    record_calls(breaker, [True] * CONFIG.min_calls, latency=2.0)
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_open_rejects_until_open_seconds_then_allows_limited_probes():
+    registry, breaker, clock = breaker_with_clock()
+    open_breaker(breaker)
+
+    assert not breaker.allow_request() and not breaker.allow_request()
+    assert breaker.snapshot()["rejected"] == 2
+    assert registry.open_systems() == [1]
+
+    clock.now += CONFIG.open_seconds
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert registry.open_systems() == []
+    assert [breaker.allow_request() for _ in range(CONFIG.half_open_calls + 1)] == [True, True, False]
+
+
+def test_successful_probes_close_the_circuit():
+    registry, breaker, clock = breaker_with_clock()
+    open_breaker(breaker)
+    clock.now += CONFIG.open_seconds
+
+    record_calls(breaker, [True] * CONFIG.half_open_calls)
+
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+    assert registry.stats()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_failed_or_slow_probe_reopens():
+    registry, breaker, clock = breaker_with_clock()
+    open_breaker(breaker)
+
+    clock.now += CONFIG.open_seconds
+    record_calls(breaker, [False])
+    assert breaker.state == BreakerState.OPEN
+
+    clock.now += CONFIG.open_seconds
+    record_calls(breaker, [True], latency=2.0)
+    assert breaker.state == BreakerState.OPEN
+    assert registry.stats()["transitions"]["half_open->open"] == 2
+
+
+def test_aimd_limit():
+    _, breaker, _ = breaker_with_clock(BreakerConfig(min_calls=100, max_limit=8, latency_p95_threshold=1.0))
+    assert breaker.limit == 8
+
+    breaker.record(False, 0.1)
+    assert breaker.limit == 4
+    breaker.record(True, 2.0)
+    assert breaker.limit == 2
+    for _ in range(5):
+        breaker.record(False, 0.1)
+    assert breaker.limit == 1
+
+    # Crescimento aditivo: cerca de +1 a cada "limite" chamadas bem-sucedidas
+    for _ in range(3):
+        breaker.record(True, 0.1)
+    assert breaker.limit == 2
+    for _ in range(100):
+        breaker.record(True, 0.1)
+    assert breaker.limit == 8
+
+
+def test_transitions_and_state_are_exported_as_metrics():
+    clock = FakeClock()
+    registry = CircuitBreakerRegistry(CONFIG, clock)
+    # ID fora dos usados nos demais testes: as métricas são globais
+    breaker = registry.get(901)
+    opened = metrics.breaker_transitions.value((901, "closed", "open"))
+    assert metrics.breaker_state.value((901,)) == 0
+
+    open_breaker(breaker)
+    assert metrics.breaker_transitions.value((901, "closed", "open")) == opened + 1
+    assert metrics.breaker_state.value((901,)) == 2
+    assert registry.open_systems() == [901]
+
+    clock.now += CONFIG.open_seconds
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert metrics.breaker_state.value((901,)) == 1
+    assert 'request_manager_circuit_breaker_state{system="901"} 1' in metrics.render()
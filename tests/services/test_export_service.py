@@ -0,0 +1,50 @@
+"""Testes da exportação das solicitações ativas e arquivadas (ExportService)."""
+
+from app.models.schemas import RequestCreate
+from app.services.archive_service import ArchiveService
+from app.services.export_service import ExportService
+from app.services.request_service import RequestService
+from collections import Counter
+from datetime import datetime
+
+
+def create_requests(db, systems, count: int):
+    requester, _ = systems
+    return RequestService(db).create_requests_bulk([
+        RequestCreate(nm_system=requester.nm_system, id_person=str(300000 + index), tp_document="CC")
+        for index in range(count)
+    ])
+
+
+def test_export_interleaves_active_and_archived_requests(db, systems):
+    request_ids = create_requests(db, systems, 3)
+    ArchiveService(db).archive_batch([request_ids[1]], datetime.now())
+
+    records = list(ExportService(db).iter_records())
+
+    assert [record["id_request"] for record in records] == sorted(record["id_request"] for record in records)
+    assert Counter(record["id_request"] for record in records) == {id_request: 3 for id_request in request_ids}
+    assert {record["id_request"] for record in records if record["archived"]} == {request_ids[1]}
+    assert not any(record["archived"] for record in ExportService(db).iter_records(include_archived=False))
+
+
+def test_request_archived_during_export_is_exported_once(db, session_factory, systems):
+    # Em WAL, o arquivamento é confirmado enquanto a exportação mantém o próprio snapshot
+    with session_factory.kw["bind"].connect() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    request_ids = create_requests(db, systems, 3)
+    db.commit()
+
+    records = ExportService(db, chunk_size=1).iter_records()
+    first = next(records)
+    archiver = session_factory()
+    try:
+        ArchiveService(archiver).archive_batch([request_ids[-1]], datetime.now())
+    finally:
+        archiver.close()
+    exported = [first] + list(records)
+
+    assert Counter(record["id_request"] for record in exported) == {id_request: 3 for id_request in request_ids}
+    # Depois do arquivamento, a solicitação sai uma única vez, pelas tabelas frias
+    archived = [record for record in ExportService(db).iter_records() if record["id_request"] == request_ids[-1]]
+    assert len(archived) == 3 and all(record["archived"] for record in archived)
@@ -0,0 +1,95 @@
+"""Testes da coordenação de jobs entre workers (JobCoordinator) sobre um mesmo banco."""
+
+from app.models.models import JobLock
+from app.services.job_coordinator import JobCoordinator, shard_job_name
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+import threading
+import time
+
+WORKERS = 4
+
+
+def coordinators(session_factory, count: int = 2):
+    return [JobCoordinator(session_factory, worker_id=f"worker-{index}") for index in range(count)]
+
+
+def expire(db, nm_job: str, **values) -> None:
+    """Simula a passagem do tempo para o lock de um job."""
+    db.execute(update(JobLock).where(JobLock.nm_job == nm_job).values(**values))
+    db.commit()
+
+
+def test_contended_lock_has_a_single_owner(session_factory):
+    workers = coordinators(session_factory, WORKERS)
+    barrier = threading.Barrier(WORKERS)
+
+    def acquire(coordinator):
+        barrier.wait()
+        return coordinator.try_acquire("monitor")
+
+    # Primeira execução do job: todos disputam a criação da linha
+    with ThreadPoolExecutor(WORKERS) as executor:
+        acquired = list(executor.map(acquire, workers))
+    assert acquired.count(True) == 1
+
+    owner = workers[acquired.index(True)]
+    others = [coordinator for coordinator in workers if coordinator is not owner]
+    assert not any(coordinator.try_acquire("monitor") for coordinator in others)
+    assert all(coordinator.stats()["contended"] == 2 for coordinator in others)
+    # O dono renova o próprio lock; liberado, outro worker o adquire
+    assert owner.try_acquire("monitor")
+    owner.release("monitor")
+    assert others[0].try_acquire("monitor")
+
+
+def test_run_once_with_interval_runs_once_per_interval(session_factory, db):
+    first, second = coordinators(session_factory)
+    runs = []
+
+    assert first.run_once("sweep", lambda: runs.append("worker-0") or "ok", interval=60) == "ok"
+    # O lock foi liberado, mas o job não está devido até o fim do intervalo
+    assert second.run_once("sweep", lambda: runs.append("worker-1"), interval=60) is None
+    assert first.run_once("sweep", lambda: runs.append("worker-0"), interval=60) is None
+
+    expire(db, "sweep", dt_last_run=datetime.now() - timedelta(seconds=61))
+    second.run_once("sweep", lambda: runs.append("worker-1"), interval=60)
+    assert runs == ["worker-0", "worker-1"]
+
+
+def test_expired_lease_is_taken_over(session_factory, db):
+    first, second = coordinators(session_factory)
+    assert first.try_acquire("relay")
+    assert not second.try_acquire("relay")
+
+    # first parou sem renovar: o lease vence e second assume
+    expire(db, "relay", dt_lease_expires=datetime.now() - timedelta(seconds=1))
+    assert second.try_acquire("relay")
+
+    # O heartbeat de first descobre a perda e não retoma o lock de second
+    assert first.heartbeat() == 0
+    assert first.stats()["lost"] == 1 and first.held == []
+    assert second.heartbeat() == 1
+    first.release("relay")
+    assert not first.try_acquire("relay")
+
+
+def test_run_sharded_workers_split_the_shards(session_factory, db):
+    workers = coordinators(session_factory, WORKERS)
+    shards = list(range(1, 13))
+    barrier = threading.Barrier(WORKERS)
+
+    def run(coordinator):
+        barrier.wait()
+        # Com intervalo, cada shard roda uma vez no cluster, em qualquer worker
+        return set(coordinator.run_sharded("timeout_sweep", shards, lambda shard: time.sleep(0.01), interval=60))
+
+    with ThreadPoolExecutor(WORKERS) as executor:
+        executed = list(executor.map(run, workers))
+
+    # Conjuntos disjuntos que cobrem todos os shards
+    assert sum(len(worker_shards) for worker_shards in executed) == len(shards)
+    assert set().union(*executed) == set(shards)
+    locks = {lock.nm_job for lock in db.query(JobLock)}
+    assert {shard_job_name("timeout_sweep", shard) for shard in shards} <= locks
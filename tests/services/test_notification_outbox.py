@@ -0,0 +1,239 @@
+"""Testes da entrega da outbox de notificações (OutboxRelay com OutboundDispatcher)."""
+
+from app.models.models import DomSystem, NotificationOutbox
+from app.services.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from app.models.schemas import RequestCreate
+from app.services.notification_outbox import (
+    OUTBOX_DELIVERED, OUTBOX_FAILED, OUTBOX_PENDING, OutboxRelay, build_outbox_rows
+)
+from app.services.outbound_dispatcher import OutboundDispatcher
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.system_registry import SystemRegistry
+from sqlalchemy import insert, select, update
+from typing import List
+import asyncio
+import httpx
+import json
+import pytest
+import time
+
+STATUS_ADDRESS = "http://requester.test/status"
+
+
+class TargetStub:
+    """Sistema solicitante simulado: grava os payloads recebidos e responde com o status configurado."""
+
+    def __init__(self):
+        self.received: List[dict] = []
+        self.status_code = 200
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.status_code >= 400:
+            return httpx.Response(self.status_code, text="indisponível")
+        self.received.append(json.loads(request.content))
+        return httpx.Response(self.status_code, json={"ok": True})
+
+
+@pytest.fixture
+def notified(db, systems):
+    """Solicitação com duas transições (verificação e processamento) em cada um de dois processos."""
+    requester, processors = systems
+    db.execute(update(DomSystem).where(DomSystem.id_dom_system == requester.id_dom_system).values(
+        api_status_address=STATUS_ADDRESS
+    ))
+    db.commit()
+    [id_request] = RequestService(db).create_requests_bulk(
+        [RequestCreate(nm_system=requester.nm_system, id_person="123456", tp_document="CC")]
+    )
+    service = ProcessService(db)
+    for system in processors[:2]:
+        assert service.update_verification_status(id_request, system.id_dom_system, 1)
+        assert service.update_processing_status(id_request, system.id_dom_system, 1)
+    return id_request
+
+
+def relay_once(session_factory, target: TargetStub, max_attempts: int = 3, batch_size: int = 500,
+               max_concurrency: int = 10, breakers: CircuitBreakerRegistry = None):
+    async def run():
+        dispatcher = OutboundDispatcher(transport=httpx.MockTransport(target), max_concurrency_per_system=max_concurrency,
+                                        breakers=breakers)
+        try:
+            relay = OutboxRelay(session_factory, dispatcher, SystemRegistry(session_factory),
+                                batch_size=batch_size, max_attempts=max_attempts)
+            return await relay.relay_once()
+        finally:
+            await dispatcher.aclose()
+
+    return asyncio.run(run())
+
+
+def events_by_process(target: TargetStub):
+    events = {}
+    for payload in target.received:
+        events.setdefault(payload["id_system_process"], []).append(payload["event"])
+    return events
+
+
+def outbox(db) -> List[NotificationOutbox]:
+    db.expire_all()
+    return db.execute(select(NotificationOutbox).order_by(NotificationOutbox.id_outbox)).scalars().all()
+
+
+def make_due(db):
+    """Simula o fim do atraso das notificações reagendadas."""
+    db.execute(update(NotificationOutbox).values(dt_next_attempt=None))
+    db.commit()
+
+
+def test_relay_delivers_in_order_per_process(session_factory, db, notified):
+    target = TargetStub()
+
+    report = relay_once(session_factory, target)
+
+    assert (report.read, report.delivered, report.failed) == (4, 4, 0)
+    assert {row.st_delivery for row in outbox(db)} == {OUTBOX_DELIVERED}
+    assert list(events_by_process(target).values()) == [["verify", "request"]] * 2
+    assert relay_once(session_factory, target).read == 0
+
+
+def test_failed_notification_defers_the_rest_of_its_process(session_factory, db, notified):
+    target = TargetStub()
+    target.status_code = 503
+
+    report = relay_once(session_factory, target)
+
+    # A primeira notificação do primeiro processo falha; o outro processo, do mesmo destino,
+    # não é tentado nesta passada; as seguintes de cada processo são adiadas
+    assert (report.failed, report.skipped, report.deferred, report.delivered) == (1, 1, 2, 0)
+    rows = outbox(db)
+    assert sorted(row.qt_attempts for row in rows if row.tp_event == "verify") == [0, 1]
+    assert {row.st_delivery for row in rows} == {OUTBOX_PENDING}
+    assert all(row.dt_next_attempt for row in rows if row.tp_event == "verify")
+
+    # Antes do atraso, nenhuma notificação dos dois processos sai da fila (nem as adiadas)
+    target.status_code = 200
+    assert relay_once(session_factory, target).read == 0
+
+    make_due(db)
+    assert relay_once(session_factory, target).delivered == 4
+    assert list(events_by_process(target).values()) == [["verify", "request"]] * 2
+
+
+def test_exhausted_notification_stops_blocking(session_factory, db, notified):
+    target = TargetStub()
+    target.status_code = 503
+
+    relay_once(session_factory, target, max_attempts=1)
+    rows = outbox(db)
+    assert sorted(row.st_delivery for row in rows if row.tp_event == "verify") == [OUTBOX_PENDING, OUTBOX_FAILED]
+
+    target.status_code = 200
+    make_due(db)
+    report = relay_once(session_factory, target, max_attempts=1)
+    assert (report.read, report.delivered) == (3, 3)
+    assert sorted(events_by_process(target).values()) == [["request"], ["verify", "request"]]
+
+
+def test_unknown_target_counts_as_failure(session_factory, db, notified):
+    db.execute(update(NotificationOutbox).values(id_system_target=None))
+    db.commit()
+
+    report = relay_once(session_factory, TargetStub())
+
+    assert (report.failed, report.deferred, report.delivered) == (2, 2, 0)
+    assert all(row.ds_last_error for row in outbox(db) if row.tp_event == "verify")
+
+
+def seed_dead_target_backlog(db, systems):
+    """Backlog de 5 processos para um destino fora do ar, à frente de 2 para o destino saudável."""
+    requester, processors = systems
+    dead = processors[0]
+    db.execute(update(DomSystem).where(DomSystem.id_dom_system == requester.id_dom_system).values(
+        api_status_address=STATUS_ADDRESS
+    ))
+    db.execute(update(DomSystem).where(DomSystem.id_dom_system == dead.id_dom_system).values(
+        api_status_address="http://dead.test/status"
+    ))
+    backlog = [(id_request, processors[1].id_dom_system, dead.id_dom_system) for id_request in range(1, 6)]
+    healthy = [(id_request, processors[1].id_dom_system, requester.id_dom_system) for id_request in range(6, 8)]
+    db.execute(insert(NotificationOutbox), build_outbox_rows(backlog + healthy, "request", {"st_system_request": 1}))
+    db.commit()
+    return dead
+
+
+def open_breaker(id_system: int) -> CircuitBreakerRegistry:
+    registry = CircuitBreakerRegistry(BreakerConfig(window_size=1, min_calls=1, open_seconds=600.0))
+    registry.get(id_system).record(False, 0.0)
+    return registry
+
+
+def test_unreachable_target_does_not_starve_other_targets(session_factory, db, systems):
+    seed_dead_target_backlog(db, systems)
+    dead_calls = []
+    target = TargetStub()
+
+    def route(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "dead.test":
+            dead_calls.append(request)
+            return httpx.Response(503, text="indisponível")
+        return target(request)
+
+    first = relay_once(session_factory, route, batch_size=5, max_concurrency=2)
+    # No máximo a primeira onda (2 chamadas) é tentada; as demais do destino são reagendadas
+    # sem consumir tentativas
+    assert (first.read, first.failed + first.skipped, first.delivered) == (5, 5, 0)
+    assert 1 <= len(dead_calls) == first.failed <= 2
+    assert sum(row.qt_attempts for row in outbox(db)[:5]) == first.failed
+    assert all(row.dt_next_attempt for row in outbox(db)[:5])
+
+    second = relay_once(session_factory, route, batch_size=5, max_concurrency=2)
+    assert (second.read, second.delivered) == (2, 2)
+    assert [payload["id_request"] for payload in target.received] == [6, 7]
+
+
+def test_open_breaker_target_is_left_out_of_the_batch(session_factory, db, systems):
+    dead = seed_dead_target_backlog(db, systems)
+    breakers = open_breaker(dead.id_dom_system)
+    target = TargetStub()
+
+    report = relay_once(session_factory, target, batch_size=5, breakers=breakers)
+
+    # O lote não é ocupado pelo destino com circuito aberto, cujas linhas ficam intactas
+    assert (report.read, report.delivered) == (2, 2)
+    assert [payload["id_request"] for payload in target.received] == [6, 7]
+    assert all(row.qt_attempts == 0 and row.dt_next_attempt is None for row in outbox(db)[:5])
+
+
+def test_short_circuited_batch_is_rescheduled_and_relay_waits(session_factory, db, systems):
+    dead = seed_dead_target_backlog(db, systems)
+    breakers = open_breaker(dead.id_dom_system)
+    # Circuito aberto por outra passada depois da leitura do lote: nada é excluído na consulta
+    breakers.open_systems = lambda: []
+    passes = []
+
+    async def run():
+        dispatcher = OutboundDispatcher(transport=httpx.MockTransport(TargetStub()), breakers=breakers)
+        relay = OutboxRelay(session_factory, dispatcher, SystemRegistry(session_factory), batch_size=5)
+        relay_once = relay.relay_once
+
+        async def counted():
+            report = await relay_once()
+            passes.append(report)
+            return report
+
+        relay.relay_once = counted
+        stop_event = asyncio.Event()
+        task = asyncio.create_task(relay.run(stop_event, interval=0.2))
+        await asyncio.sleep(0.5)
+        stop_event.set()
+        await task
+        await dispatcher.aclose()
+
+    started = time.monotonic()
+    asyncio.run(run())
+
+    # As recusadas pelo breaker são reagendadas sem consumir tentativas, e o relay não gira em vazio
+    assert (passes[0].read, passes[0].delivered, passes[0].skipped) == (5, 0, 5)
+    assert len(passes) <= 4 and time.monotonic() - started < 2.0
+    assert all(row.qt_attempts == 0 and row.dt_next_attempt for row in outbox(db)[:5])
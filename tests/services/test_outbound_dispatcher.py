@@ -0,0 +1,119 @@
+"""Testes do envio concorrente aos sistemas de processamento (OutboundDispatcher)."""
+
+from app.services.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from app.services.outbound_dispatcher import OutboundDispatcher
+from app.services.system_registry import SystemInfo
+from typing import Dict
+import asyncio
+import httpx
+import time
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """Transporte com atraso e status por host, que mede as chamadas simultâneas de cada host.
+
+    Como um transporte de rede, respeita o timeout de leitura da requisição: se o atraso
+    passar dele, levanta httpx.ReadTimeout ao fim do timeout.
+    """
+
+    def __init__(self, delays: Dict[str, float] = None, status_codes: Dict[str, int] = None):
+        self.delays = delays or {}
+        self.status_codes = status_codes or {}
+        self.in_flight: Dict[str, int] = {}
+        self.max_in_flight: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.calls[host] = self.calls.get(host, 0) + 1
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+        try:
+            delay = self.delays.get(host, 0.0)
+            read_timeout = request.extensions.get("timeout", {}).get("read")
+            if read_timeout is not None and delay > read_timeout:
+                await asyncio.sleep(read_timeout)
+                raise httpx.ReadTimeout("timeout de leitura", request=request)
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight[host] -= 1
+        return httpx.Response(self.status_codes.get(host, 200), json={"host": host})
+
+
+def system(id_system: int, host: str) -> SystemInfo:
+    return SystemInfo(
+        id_dom_system=id_system, nm_system=host, system_type="process",
+        api_verify_address=f"http://{host}/verify", api_request_address=f"http://{host}/request",
+        api_status_address=f"http://{host}/status",
+        verification_timeout_days=7, processing_timeout_days=30, max_retry_attempts=5
+    )
+
+
+def timed(dispatcher: OutboundDispatcher, send):
+    """Executa send(dispatcher) em um event loop próprio e retorna (resultados, duração)."""
+    async def run():
+        try:
+            started = time.perf_counter()
+            results = await send(dispatcher)
+            return results, time.perf_counter() - started
+        finally:
+            await dispatcher.aclose()
+
+    return asyncio.run(run())
+
+
+def dispatch(dispatcher: OutboundDispatcher, calls):
+    return timed(dispatcher, lambda current: current.dispatch("verify", calls))
+
+
+def test_concurrency_is_limited_per_system():
+    for breakers in (None, CircuitBreakerRegistry(BreakerConfig(max_limit=2))):
+        transport = StubTransport(delays={"a.test": 0.05, "b.test": 0.05})
+        dispatcher = OutboundDispatcher(max_concurrency_per_system=2, transport=transport, breakers=breakers)
+        calls = [(system(1, "a.test"), {"n": index}) for index in range(6)]
+        calls += [(system(2, "b.test"), {"n": index}) for index in range(2)]
+
+        results, _ = dispatch(dispatcher, calls)
+
+        assert all(result.ok for result in results)
+        assert transport.calls == {"a.test": 6, "b.test": 2}
+        # O limite é por sistema: b.test não espera pela fila de a.test
+        assert transport.max_in_flight == {"a.test": 2, "b.test": 2}
+
+
+def test_slow_call_times_out_without_delaying_the_others():
+    transport = StubTransport(delays={"slow.test": 5.0, "fast.test": 0.01})
+    dispatcher = OutboundDispatcher(timeout=0.1, transport=transport)
+
+    results, elapsed = dispatch(dispatcher, [(system(1, "slow.test"), {}), (system(2, "fast.test"), {})])
+
+    slow, fast = results
+    assert not slow.ok and slow.status_code is None and "ReadTimeout" in slow.error
+    assert 0.1 <= slow.elapsed_seconds < 1.0
+    assert fast.ok
+    assert elapsed < 1.0
+    assert dispatcher.stats()["failed"] == 1
+
+
+def test_failed_responses_are_returned_not_raised():
+    transport = StubTransport(status_codes={"down.test": 503})
+    dispatcher = OutboundDispatcher(transport=transport)
+
+    results, _ = dispatch(dispatcher, [(system(1, "down.test"), {}), (system(2, "up.test"), {})])
+
+    assert [(result.ok, result.status_code) for result in results] == [(False, 503), (True, 200)]
+    assert results[1].body == {"host": "up.test"}
+
+
+def test_fan_out_latency_is_the_slowest_call_not_the_sum():
+    delays = {"a.test": 0.2, "b.test": 0.25, "c.test": 0.3}
+    transport = StubTransport(delays=delays)
+    dispatcher = OutboundDispatcher(transport=transport)
+    systems = [system(index, host) for index, host in enumerate(delays, start=1)]
+
+    results, elapsed = timed(dispatcher, lambda current: current.fan_out("verify", systems, {"id_request": 1}))
+
+    assert [result.nm_system for result in results] == list(delays)
+    assert all(result.ok for result in results)
+    # Soma sequencial seria 0,75 s; em paralelo, a chamada mais lenta (0,3 s)
+    assert max(delays.values()) <= elapsed < sum(delays.values()) * 0.8
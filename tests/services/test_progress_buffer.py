@@ -0,0 +1,97 @@
+"""Testes do buffer write-behind de progresso sob falhas de gravação."""
+
+from app.services.progress_buffer import ProgressWriteBuffer
+import time
+
+
+class FailingSession:
+    """Sessão cujas gravações falham sempre."""
+
+    def execute(self, *args, **kwargs):
+        raise RuntimeError("banco indisponível")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def failing_buffer(**kwargs) -> ProgressWriteBuffer:
+    options = {"max_pending": 10, "max_buffered": 20, "flush_interval": 60.0, "max_backoff": 600.0}
+    options.update(kwargs)
+    return ProgressWriteBuffer(FailingSession, **options)
+
+
+def test_failed_flush_backs_off_instead_of_retrying_on_every_add():
+    buffer = failing_buffer()
+    for id_request in range(1, 11):
+        buffer.add(id_request, 1, 50)
+
+    stats = buffer.stats()
+    assert stats["flush_errors"] == 1
+    assert stats["pending"] == 10
+
+    # Durante o backoff, novos registros acima de max_pending não disparam outro flush
+    for id_request in range(11, 16):
+        buffer.add(id_request, 1, 50)
+    assert buffer.stats()["flush_errors"] == 1
+
+    # Vencido o backoff, o próximo add volta a tentar e o backoff dobra
+    buffer._retry_at = 0.0
+    started = time.monotonic()
+    buffer.add(16, 1, 50)
+    assert buffer.stats()["flush_errors"] == 2
+    assert buffer._retry_at - started >= 120.0
+
+
+def test_buffer_is_capped_dropping_oldest_non_terminal_entries():
+    buffer = failing_buffer()
+    buffer.add(1, 1, 100, "concluído")
+    for id_request in range(2, 41):
+        buffer.add(id_request, 1, 50)
+
+    stats = buffer.stats()
+    assert stats["pending"] == 20
+    assert stats["dropped"] == 20
+    assert stats["received"] == stats["pending"] + stats["dropped"] + stats["coalesced"]
+
+    kept = set(buffer._latest) | {(entry.id_request, entry.id_system_process) for entry in buffer._durable}
+    # O progresso terminal sobrevive; entre os intermediários, ficam os mais recentes
+    assert (1, 1) in kept
+    assert {(id_request, 1) for id_request in range(22, 41)} <= kept
+
+
+def test_failed_batch_coalesces_with_updates_received_during_the_flush():
+    buffer = failing_buffer(max_pending=1000, max_buffered=1000)
+    buffer.add(1, 1, 30, "lendo")
+    buffer.add(2, 1, 40, "lendo")
+
+    original_factory = buffer.session_factory
+
+    def factory():
+        # Chegam atualizações mais novas enquanto o lote é gravado
+        buffer.add(1, 1, 60, "lendo")
+        buffer.add(2, 1, 70, "gravando")
+        return original_factory()
+
+    buffer.session_factory = factory
+    assert buffer.flush() == 0
+
+    latest = {key: entry.progress_percentage for key, entry in buffer._latest.items()}
+    assert latest == {(1, 1): 60, (2, 1): 70}
+    # A mudança de mensagem preserva o registro anterior; o intermediário repetido é coalescido
+    assert [entry.progress_percentage for entry in buffer._durable] == [40]
+    assert buffer.stats()["coalesced"] == 1
+
+
+def test_recently_updated_process_is_not_dropped_first():
+    buffer = failing_buffer()
+    for id_request in range(1, 21):
+        buffer.add(id_request, 1, 10)
+    # O processo 1 é o mais antigo, mas recebeu a atualização mais recente
+    buffer.add(1, 1, 20)
+    buffer.add(21, 1, 10)
+
+    assert list(buffer._latest) == [(id_request, 1) for id_request in [*range(3, 21), 1, 21]]
+    assert buffer.stats()["dropped"] == 1
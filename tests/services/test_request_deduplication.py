@@ -0,0 +1,87 @@
+"""Testes da deduplicação de submissões (RequestService)."""
+
+from app.models.models import Process, RequestArchive
+from app.models.schemas import RequestCreate
+from app.services.archive_service import ArchiveService
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from datetime import datetime
+from sqlalchemy import func, select
+
+
+def submission(requester, person: str = "123456") -> RequestCreate:
+    return RequestCreate(nm_system=requester.nm_system, id_person=person, tp_document="CC")
+
+
+def test_create_request_never_deduplicates(db, systems):
+    requester, processors = systems
+    service = RequestService(db)
+    process_service = ProcessService(db)
+
+    ids = []
+    for _ in range(2):
+        request = service.create_request(submission(requester))
+        for system in processors:
+            process_service.create_process_entry(
+                request.id_request, system.id_dom_system, requester.id_dom_system, "123456", "CC"
+            )
+        ids.append(request.id_request)
+
+    assert ids[0] != ids[1]
+    assert db.execute(select(func.count()).select_from(Process)).scalar() == 2 * len(processors)
+
+
+def test_pending_submission_is_reused(db, systems):
+    requester, _ = systems
+    service = RequestService(db)
+
+    [id_request] = service.create_requests_bulk([submission(requester)])
+    request, created = service.create_or_get_request(submission(requester))
+
+    assert (request.id_request, created) == (id_request, False)
+    assert service.create_requests_bulk([submission(requester)]) == [id_request]
+
+
+def test_rejected_request_is_not_reused(db, systems):
+    requester, processors = systems
+    service = RequestService(db)
+    [id_request] = service.create_requests_bulk([submission(requester)])
+
+    # Uma única recusa bloqueia a solicitação, mesmo com os demais processos em aberto
+    ProcessService(db).update_verification_status(id_request, processors[0].id_dom_system, 2, "Recusado")
+
+    request, created = service.create_or_get_request(submission(requester))
+    assert created and request.id_request != id_request
+    [bulk_id] = service.create_requests_bulk([submission(requester, "654321")])
+    [resubmitted] = service.create_requests_bulk([submission(requester)])
+    assert resubmitted == request.id_request and bulk_id not in (id_request, request.id_request)
+
+
+def test_fully_rejected_request_is_not_reused_in_bulk(db, systems):
+    requester, processors = systems
+    service = RequestService(db)
+    [id_request] = service.create_requests_bulk([submission(requester)])
+    for system in processors:
+        ProcessService(db).update_verification_status(id_request, system.id_dom_system, 2, "Recusado")
+
+    [resubmitted] = service.create_requests_bulk([submission(requester)])
+    assert resubmitted != id_request
+
+
+def test_idempotency_key_survives_archival(db, systems):
+    requester, processors = systems
+    service = RequestService(db)
+    keyed = RequestCreate(nm_system=requester.nm_system, id_person="123456", tp_document="CC",
+                          idempotency_key="key-archived")
+    request, created = service.create_or_get_request(keyed)
+    id_request = request.id_request
+    assert created
+    ArchiveService(db).archive_batch([id_request], datetime.now())
+
+    # Repetida após o arquivamento, a submissão devolve a requisição arquivada, sem novos processos
+    archived, created_again = service.create_or_get_request(keyed)
+    assert isinstance(archived, RequestArchive)
+    assert (archived.id_request, created_again) == (id_request, False)
+    assert service.create_or_get_requests_bulk([keyed, submission(requester, "654321")])[1] == 1
+    assert service.create_requests_bulk([keyed]) == [id_request]
+    assert db.execute(select(func.count()).select_from(Process)).scalar() == len(processors)
@@ -0,0 +1,100 @@
+"""Testes do agendador de retentativas (RetryScheduler)."""
+
+from app.models.models import Process
+from app.models.schemas import RequestCreate
+from app.services.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from app.services.request_service import RequestService
+from app.services.retry_scheduler import RetryScheduler
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+import threading
+
+
+def schedule_all(db, systems, offsets):
+    """Cria uma solicitação por deslocamento e agenda seus processos para agora + deslocamento (s)."""
+    requester, _ = systems
+    request_ids = RequestService(db).create_requests_bulk([
+        RequestCreate(nm_system=requester.nm_system, id_person=str(100000 + index), tp_document="CC")
+        for index in range(len(offsets))
+    ])
+    now = datetime.now()
+    for id_request, offset in zip(request_ids, offsets):
+        db.execute(update(Process).where(Process.id_request == id_request).values(
+            dt_next_attempt=now + timedelta(seconds=offset)
+        ))
+    db.commit()
+    return {tuple(row) for row in db.execute(select(Process.id_request, Process.id_system_process))}
+
+
+def run_until(scheduler: RetryScheduler, expected: int):
+    batches = []
+    done = threading.Event()
+
+    def handler(keys):
+        batches.append(keys)
+        if sum(len(batch) for batch in batches) >= expected:
+            done.set()
+
+    scheduler.start(handler)
+    try:
+        assert done.wait(5)
+    finally:
+        scheduler.close()
+    return batches
+
+
+def test_close_due_times_are_dispatched_together(session_factory, db, systems):
+    keys = schedule_all(db, systems, [0.05, 0.1, 0.15, 0.2])
+    scheduler = RetryScheduler(session_factory, dispatch_window=0.3)
+
+    batches = run_until(scheduler, len(keys))
+
+    assert len(batches) == 1 and set(batches[0]) == keys
+    assert scheduler.stats()["reloads"] == 1
+
+
+def test_spread_due_times_are_dispatched_separately_without_reloading(session_factory, db, systems):
+    keys = schedule_all(db, systems, [0.05, 0.6])
+    scheduler = RetryScheduler(session_factory, dispatch_window=0.1)
+
+    batches = run_until(scheduler, len(keys))
+
+    assert len(batches) == 2 and set(batches[0]) | set(batches[1]) == keys
+    stats = scheduler.stats()
+    assert (stats["reloads"], stats["dispatches"], stats["dispatched"]) == (1, 2, len(keys))
+
+
+def test_scheduled_earlier_key_wakes_the_loop(session_factory, db, systems):
+    key = sorted(schedule_all(db, systems, [30]))[0]
+    scheduler = RetryScheduler(session_factory, dispatch_window=0)
+    dispatched = threading.Event()
+    scheduler.start(lambda keys: dispatched.set() if key in keys else None)
+    try:
+        # Como em record_attempts: o novo vencimento é gravado e então informado ao agendador
+        when = datetime.now() + timedelta(seconds=0.05)
+        db.execute(update(Process).where(
+            Process.id_request == key[0], Process.id_system_process == key[1]
+        ).values(dt_next_attempt=when))
+        db.commit()
+        scheduler.schedule(key, when)
+        assert dispatched.wait(2)
+    finally:
+        scheduler.close()
+    assert scheduler.stats()["reloads"] == 1
+
+
+def test_open_breaker_keys_are_parked_instead_of_dispatched(session_factory, db, systems):
+    _, processors = systems
+    keys = schedule_all(db, systems, [0.05])
+    parked = processors[0].id_dom_system
+    breakers = CircuitBreakerRegistry(BreakerConfig(window_size=1, min_calls=1, open_seconds=600.0))
+    breakers.get(parked).record(False, 0.0)
+    scheduler = RetryScheduler(session_factory, dispatch_window=0, breakers=breakers)
+
+    batches = run_until(scheduler, len(keys) - 1)
+
+    assert {key for batch in batches for key in batch} == {key for key in keys if key[1] != parked}
+    # A chave estacionada volta ao heap para depois de open_seconds
+    stats = scheduler.stats()
+    assert (stats["parked"], stats["pending"]) == (1, 1)
+    assert 590 < scheduler.seconds_until_due() <= 600
@@ -0,0 +1,85 @@
+"""Testes do roteamento de leituras entre primário e réplica (RoutingSession e @read_only)."""
+
+from app.db.routing import HAS_WRITTEN, RoutingSession
+from app.models.models import ProcessProgress
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from datetime import datetime
+from sqlalchemy import create_engine
+import pytest
+import shutil
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, session_factory, db, systems):
+    """Solicitação replicada com os processos pendentes; no primário, um deles já foi aprovado."""
+    requester, processors = systems
+    [id_request] = RequestService(db).create_requests_bulk(
+        [RequestCreate(nm_system=requester.nm_system, id_person="123456", tp_document="CC")]
+    )
+    primary = session_factory.kw["bind"]
+    # A réplica é uma cópia do primário neste instante; as escritas seguintes não chegam a ela
+    shutil.copyfile(primary.url.database, tmp_path / "replica.db")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    assert ProcessService(db).update_verification_status(id_request, processors[0].id_dom_system, 1)
+    yield primary, replica, id_request
+    replica.dispose()
+
+
+def routing_session(primary, replica) -> RoutingSession:
+    return RoutingSession(primary=primary, replica=replica, bind=primary, autoflush=False)
+
+
+def approved(processes) -> int:
+    return sum(1 for process in processes if process.st_system_verify == 1)
+
+
+def test_read_only_methods_read_from_the_replica(lagging_replica):
+    primary, replica, id_request = lagging_replica
+    session = routing_session(primary, replica)
+    try:
+        service = ProcessService(session)
+        assert approved(service.get_processes_for_request(id_request)) == 0
+        # Fora de @read_only (ex.: verificação que antecede uma escrita), a leitura vai ao primário
+        assert session.get_bind() is primary
+        assert not session.info.get(HAS_WRITTEN)
+    finally:
+        session.close()
+
+
+def test_update_switches_the_session_to_the_primary(lagging_replica, systems):
+    _, processors = systems
+    primary, replica, id_request = lagging_replica
+    session = routing_session(primary, replica)
+    try:
+        service = ProcessService(session)
+        assert service.update_verification_status(id_request, processors[1].id_dom_system, 1)
+        assert session.info.get(HAS_WRITTEN)
+
+        # Read-your-writes: as leituras seguintes da sessão, mesmo @read_only, vêm do primário
+        assert approved(service.get_processes_for_request(id_request)) == 2
+        assert approved(service.get_processes_for_request(id_request)) == 2
+    finally:
+        session.close()
+
+
+def test_flush_switches_the_session_to_the_primary(lagging_replica, systems):
+    _, processors = systems
+    primary, replica, id_request = lagging_replica
+    session = routing_session(primary, replica)
+    try:
+        service = ProcessService(session)
+        assert service.get_latest_progress(id_request, processors[0].id_dom_system) is None
+
+        session.add(ProcessProgress(id_request=id_request, id_system_process=processors[0].id_dom_system,
+                                    dt_progress_update=datetime.now(), progress_percentage=50))
+        session.flush()
+        assert session.info.get(HAS_WRITTEN)
+
+        # O progresso ainda não confirmado só existe na transação do primário
+        assert service.get_latest_progress(id_request, processors[0].id_dom_system).progress_percentage == 50
+        assert approved(service.get_processes_for_request(id_request)) == 1
+    finally:
+        session.rollback()
+        session.close()
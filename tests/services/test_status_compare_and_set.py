@@ -0,0 +1,73 @@
+"""Testes das atualizações de status compare-and-set (ProcessService) sob concorrência."""
+
+from app.models.models import NotificationOutbox, Process
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService, UpdateOutcome
+from app.services.request_service import RequestService
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, select
+import threading
+
+WRITERS = 8
+
+
+def create_request(db, systems) -> int:
+    requester, _ = systems
+    [id_request] = RequestService(db).create_requests_bulk(
+        [RequestCreate(nm_system=requester.nm_system, id_person="123456", tp_document="CC")]
+    )
+    return id_request
+
+
+def race(session_factory, update) -> Counter:
+    """Executa update(service) em WRITERS threads, cada uma com sua sessão, liberadas ao mesmo tempo."""
+    barrier = threading.Barrier(WRITERS)
+
+    def writer(_):
+        session = session_factory()
+        try:
+            service = ProcessService(session)
+            barrier.wait()
+            return update(service).outcome
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(WRITERS) as executor:
+        return Counter(executor.map(writer, range(WRITERS)))
+
+
+def test_concurrent_verification_updates_apply_once(session_factory, db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    id_system = processors[0].id_dom_system
+
+    outcomes = race(session_factory, lambda service: service.update_verification_status(id_request, id_system, 1))
+
+    assert outcomes == Counter({UpdateOutcome.UPDATED: 1, UpdateOutcome.REJECTED: WRITERS - 1})
+    db.expire_all()
+    assert db.get(Process, (id_request, id_system)).st_system_verify == 1
+    assert db.execute(select(func.count()).select_from(NotificationOutbox)).scalar() == 1
+
+
+def test_concurrent_processing_updates_apply_once(session_factory, db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    id_system = processors[0].id_dom_system
+    assert ProcessService(db).update_verification_status(id_request, id_system, 1)
+
+    outcomes = race(session_factory, lambda service: service.update_processing_status(id_request, id_system, 1))
+
+    assert outcomes == Counter({UpdateOutcome.UPDATED: 1, UpdateOutcome.REJECTED: WRITERS - 1})
+
+
+def test_missing_process_is_not_found(db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    service = ProcessService(db)
+
+    id_system = processors[0].id_dom_system
+
+    assert service.update_verification_status(id_request + 1, id_system, 1).outcome is UpdateOutcome.NOT_FOUND
+    assert service.update_processing_status(id_request, 999, 1).outcome is UpdateOutcome.NOT_FOUND
+    assert service.update_verification_status(id_request, id_system, 1).outcome is UpdateOutcome.UPDATED
@@ -0,0 +1,140 @@
+"""Testes da finalização de solicitações pelo rollup de status (StatusRollupService)."""
+
+from app.models.models import Process, Request, RequestStatus
+from app.models.schemas import RequestCreate
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.status_rollup_service import (
+    REQUEST_FINISHED, REQUEST_PENDING, ROLLUP_BLOCKED, ROLLUP_IN_PROGRESS, ROLLUP_PENDING, StatusRollupService
+)
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import delete, event, update
+import threading
+
+
+def create_request(db, systems, id_person: str = "123456") -> int:
+    requester, _ = systems
+    [id_request] = RequestService(db).create_requests_bulk(
+        [RequestCreate(nm_system=requester.nm_system, id_person=id_person, tp_document="CC")]
+    )
+    return id_request
+
+
+def st_request(db, id_request: int) -> int:
+    db.expire_all()
+    return db.get(Request, id_request).st_request
+
+
+def test_request_finishes_when_processes_end_at_verification(db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    service = ProcessService(db)
+
+    service.update_verification_status(id_request, processors[0].id_dom_system, 2, "Recusado")
+    service.update_verification_status(id_request, processors[1].id_dom_system, 4, "Timeout")
+    assert st_request(db, id_request) == REQUEST_PENDING
+    assert service.get_pending_processes_page()[0]
+
+    service.update_verification_status(id_request, processors[2].id_dom_system, 2, "Recusado")
+
+    assert st_request(db, id_request) == REQUEST_FINISHED
+    assert StatusRollupService(db).get_rollup(id_request).st_request_overall == ROLLUP_BLOCKED
+    assert RequestService(db).get_pending_requests_page()[0] == []
+    assert service.get_pending_processes_page()[0] == []
+
+
+def test_request_with_open_process_stays_pending(db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    service = ProcessService(db)
+
+    service.update_verification_status(id_request, processors[0].id_dom_system, 2, "Recusado")
+    service.update_verification_status(id_request, processors[1].id_dom_system, 1, "Aprovado")
+    service.update_processing_status(id_request, processors[1].id_dom_system, 1)
+    service.update_verification_status(id_request, processors[2].id_dom_system, 1, "Aprovado")
+
+    assert st_request(db, id_request) == REQUEST_PENDING
+    service.update_processing_status(id_request, processors[2].id_dom_system, 4)
+    assert st_request(db, id_request) == REQUEST_FINISHED
+
+
+def test_reconcile_finishes_verification_terminal_requests(db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    service = ProcessService(db)
+    for system in processors:
+        service.update_verification_status(id_request, system.id_dom_system, 4, "Timeout")
+
+    db.execute(update(Request).where(Request.id_request == id_request).values(st_request=REQUEST_PENDING))
+    db.commit()
+
+    report = StatusRollupService(db).reconcile()
+    assert report.drifted == 1 and report.fixed == 1
+    assert st_request(db, id_request) == REQUEST_FINISHED
+    assert StatusRollupService(db).reconcile().drifted == 0
+
+
+def test_refresh_counts_every_request_in_one_batch(db, systems):
+    _, processors = systems
+    first, second, empty, without_rollup = (
+        create_request(db, systems, str(200000 + index)) for index in range(4)
+    )
+    service = ProcessService(db)
+    service.update_verification_status(first, processors[0].id_dom_system, 1, "Aprovado")
+    service.update_verification_status(second, processors[1].id_dom_system, 2, "Recusado")
+
+    db.execute(delete(Process).where(Process.id_request == empty))
+    db.execute(delete(RequestStatus).where(RequestStatus.id_request == without_rollup))
+    StatusRollupService(db).refresh([first, second, empty, without_rollup])
+    db.commit()
+    db.expire_all()
+
+    rollups = {id_request: db.get(RequestStatus, id_request) for id_request in (first, second, empty, without_rollup)}
+    assert (rollups[first].qt_verify_approved, rollups[first].qt_verify_pending) == (1, 2)
+    assert rollups[first].st_request_overall == ROLLUP_IN_PROGRESS
+    assert (rollups[second].qt_verify_rejected, rollups[second].st_request_overall) == (1, ROLLUP_BLOCKED)
+    assert (rollups[empty].qt_process, rollups[empty].st_request_overall) == (0, ROLLUP_PENDING)
+    assert (rollups[without_rollup].qt_process, rollups[without_rollup].qt_request_pending) == (3, 3)
+    assert StatusRollupService(db).reconcile().drifted == 0
+
+
+def test_rollup_row_is_locked_before_the_process_update(session_factory, db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            statements.append(statement.split()[1])
+
+    engine = session_factory.kw["bind"]
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert ProcessService(db).update_verification_status(id_request, processors[0].id_dom_system, 1)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    # A trava do rollup vem antes do compare-and-set do processo, que vem antes do recálculo
+    assert statements[:3] == ["tb_request_status", "tb_process", "tb_request_status"]
+
+
+def test_concurrent_updates_of_one_request_keep_the_rollup_exact(session_factory, db, systems):
+    _, processors = systems
+    id_request = create_request(db, systems)
+    barrier = threading.Barrier(len(processors))
+
+    def approve(system):
+        session = session_factory()
+        try:
+            barrier.wait()
+            return bool(ProcessService(session).update_verification_status(id_request, system.id_dom_system, 1))
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(len(processors)) as executor:
+        assert all(executor.map(approve, processors))
+
+    db.expire_all()
+    rollup = db.get(RequestStatus, id_request)
+    assert (rollup.qt_verify_approved, rollup.qt_verify_pending) == (len(processors), 0)
+    assert StatusRollupService(db).reconcile(fix=False).drifted == 0
@@ -0,0 +1,81 @@
+"""Testes da varredura de timeouts (TimeoutSweeper)."""
+
+from app.models.models import NotificationOutbox, Process, Request
+from app.models.schemas import RequestCreate
+from app.services.progress_events import get_event_bus
+from app.services.request_service import RequestService
+from app.services.status_rollup_service import REQUEST_FINISHED, REQUEST_PENDING
+from app.services.timeout_sweeper import TimeoutSweeper, select_timed_out_processes
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+import asyncio
+
+
+def overdue_request(db, systems, days: int = 8) -> int:
+    requester, _ = systems
+    [id_request] = RequestService(db).create_requests_bulk(
+        [RequestCreate(nm_system=requester.nm_system, id_person="123456", tp_document="CC")]
+    )
+    db.execute(update(Process).where(Process.id_request == id_request).values(
+        st_system_verify=0, dt_system_verify=datetime.now() - timedelta(days=days)
+    ))
+    db.commit()
+    return id_request
+
+
+def test_verify_timeouts_finish_request_and_notify(db, systems):
+    _, processors = systems
+    id_request = overdue_request(db, systems)
+
+    report = TimeoutSweeper(db).sweep()
+
+    assert report.verify_timeouts == len(processors)
+    db.expire_all()
+    assert db.get(Request, id_request).st_request == REQUEST_FINISHED
+    outbox = db.execute(select(NotificationOutbox).where(NotificationOutbox.id_request == id_request)).scalars().all()
+    assert sorted(row.id_system_process for row in outbox) == sorted(system.id_dom_system for system in processors)
+    assert {(row.tp_event, row.ct_payload["st_system_verify"]) for row in outbox} == {("verify", 4)}
+    assert {row.id_system_target for row in outbox} == {systems[0].id_dom_system}
+
+    # Uma nova varredura não marca nem notifica de novo
+    assert TimeoutSweeper(db).sweep().verify_timeouts == 0
+    assert len(db.execute(select(NotificationOutbox)).scalars().all()) == len(processors)
+
+
+def test_processes_within_deadline_are_untouched(db, systems):
+    id_request = overdue_request(db, systems, days=1)
+
+    assert TimeoutSweeper(db).sweep().verify_timeouts == 0
+    db.expire_all()
+    assert db.get(Request, id_request).st_request == REQUEST_PENDING
+    assert db.execute(select(NotificationOutbox)).first() is None
+
+
+def test_sweep_publishes_progress_events_after_commit(db, systems):
+    _, processors = systems
+    id_request = overdue_request(db, systems)
+
+    async def sweep_with_subscriber():
+        subscription = get_event_bus().subscribe(id_request)
+        try:
+            TimeoutSweeper(db).sweep()
+            return [await asyncio.wait_for(subscription.get(), 1) for _ in processors]
+        finally:
+            subscription.close()
+
+    events = asyncio.run(sweep_with_subscriber())
+    assert {event.tp_event for event in events} == {"verify"}
+    assert sorted(event.id_system_process for event in events) == sorted(system.id_dom_system for system in processors)
+
+
+def test_timed_out_processes_without_returning(db, systems):
+    _, processors = systems
+    id_request = overdue_request(db, systems)
+    now = datetime.now()
+    db.execute(update(Process).where(Process.id_system_process == processors[0].id_dom_system).values(
+        st_system_verify=4, dt_system_verify_response=now
+    ))
+
+    rows = db.execute(select_timed_out_processes("verify", processors[0].id_dom_system, [id_request], now)).all()
+    assert [tuple(row) for row in rows] == [(id_request, processors[0].id_dom_system, systems[0].id_dom_system)]
+    assert db.execute(select_timed_out_processes("verify", processors[1].id_dom_system, [id_request], now)).first() is None
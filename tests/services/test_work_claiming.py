@@ -0,0 +1,145 @@
+"""Testes da reivindicação de trabalho com lease (ProcessService.claim_due_processes)."""
+
+from app.models.models import Process
+from app.models.schemas import RequestCreate
+from app.services.circuit_breaker import BreakerConfig, CircuitBreakerRegistry
+from app.services.process_service import ProcessService
+from app.services.request_service import RequestService
+from app.services.retry_scheduler import select_next_attempts
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import update
+import threading
+
+REQUESTS = 20
+WORKERS = 4
+
+
+def create_requests(db, systems, count: int = REQUESTS) -> int:
+    """Cria as solicitações e retorna a quantidade de processos devidos na verificação."""
+    requester, processors = systems
+    RequestService(db).create_requests_bulk([
+        RequestCreate(nm_system=requester.nm_system, id_person=str(100000 + index), tp_document="CC")
+        for index in range(count)
+    ])
+    return count * len(processors)
+
+
+def claim(service, worker_id: str, **kwargs):
+    # Processos criados agora já são devidos, sem esperar VERIFY_RETRY_INTERVAL
+    return service.claim_due_processes(worker_id, "verify", due_before=datetime.now(), **kwargs)
+
+
+def keys(processes):
+    return [(process.id_request, process.id_system_process) for process in processes]
+
+
+def test_concurrent_workers_never_claim_the_same_process(session_factory, db, systems):
+    due = create_requests(db, systems)
+    barrier = threading.Barrier(WORKERS)
+
+    def worker(index: int):
+        session = session_factory()
+        try:
+            service = ProcessService(session)
+            barrier.wait()
+            claimed = []
+            while True:
+                batch = claim(service, f"worker-{index}", batch_size=5)
+                if not batch:
+                    return claimed
+                claimed.extend(keys(batch))
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(WORKERS) as executor:
+        claims = list(executor.map(worker, range(WORKERS)))
+
+    claimed = [key for worker_claims in claims for key in worker_claims]
+    assert len(claimed) == len(set(claimed)) == due
+    db.expire_all()
+    owners = {(process.id_request, process.id_system_process): process.id_lease_owner
+              for process in db.query(Process)}
+    for index, worker_claims in enumerate(claims):
+        assert all(owners[key] == f"worker-{index}" for key in worker_claims)
+
+
+def test_valid_lease_blocks_other_workers(db, systems):
+    create_requests(db, systems, 1)
+    service = ProcessService(db)
+
+    claimed = keys(claim(service, "worker-a"))
+    assert claimed
+    assert claim(service, "worker-b") == []
+    assert service.renew_leases("worker-b", claimed) == 0
+    assert service.renew_leases("worker-a", claimed) == len(claimed)
+
+
+def test_expired_lease_is_reclaimed(db, systems):
+    create_requests(db, systems, 1)
+    service = ProcessService(db)
+    claimed = keys(claim(service, "worker-a"))
+
+    # worker-a parou: o lease vence sem ser renovado
+    db.execute(update(Process).values(dt_lease_expires=datetime.now() - timedelta(seconds=1)))
+    db.commit()
+
+    reclaimed = claim(service, "worker-b")
+    assert sorted(keys(reclaimed)) == sorted(claimed)
+    assert {process.id_lease_owner for process in reclaimed} == {"worker-b"}
+    # O worker antigo não renova nem libera um lease que já não é seu
+    assert service.renew_leases("worker-a", claimed) == 0
+    assert service.release_leases("worker-a", claimed) == 0
+
+
+def test_released_leases_return_to_the_queue(db, systems):
+    _, processors = systems
+    create_requests(db, systems, 1)
+    service = ProcessService(db)
+    claimed = keys(claim(service, "worker-a"))
+
+    assert service.release_leases("worker-a", claimed) == len(claimed)
+    excluded = processors[0].id_dom_system
+    reclaimed = keys(claim(service, "worker-b", exclude_systems=[excluded]))
+    assert sorted(reclaimed) == sorted(key for key in claimed if key[1] != excluded)
+
+
+def test_open_breaker_parks_the_system_processes(db, systems):
+    _, processors = systems
+    create_requests(db, systems, 1)
+    parked = processors[0].id_dom_system
+    breakers = CircuitBreakerRegistry(BreakerConfig(window_size=1, min_calls=1, open_seconds=600.0))
+    breakers.get(parked).record(False, 0.0)
+    service = ProcessService(db, breakers=breakers)
+
+    claimed = keys(claim(service, "worker-a"))
+    assert claimed and all(key[1] != parked for key in claimed)
+
+    # Pelo agendador, a chave vencida do sistema estacionado também não é reivindicada
+    [id_request] = {key[0] for key in claimed}
+    db.execute(update(Process).values(dt_next_attempt=datetime.now() - timedelta(seconds=1),
+                                      id_lease_owner=None, dt_lease_expires=None))
+    db.commit()
+    scheduled = keys(service.claim_scheduled_processes("worker-b", [(id_request, parked)] + claimed))
+    assert sorted(scheduled) == sorted(claimed)
+
+
+def test_partial_processing_is_not_reclaimed_by_the_scheduler(db, systems):
+    _, processors = systems
+    create_requests(db, systems, 1)
+    service = ProcessService(db)
+    [id_request] = {process.id_request for process in db.query(Process)}
+    scheduled = [(id_request, system.id_dom_system) for system in processors[:2]]
+    for _, id_system in scheduled:
+        assert service.update_verification_status(id_request, id_system, 1)
+    # Tentativa de processamento com erro agendou a próxima, vencida
+    db.execute(update(Process).values(dt_next_attempt=datetime.now() - timedelta(seconds=1)))
+    db.commit()
+
+    # Processamento parcial (2) não zera o agendamento, mas encerra a retentativa
+    assert service.update_processing_status(id_request, scheduled[0][1], 2)
+    due = [(row.id_request, row.id_system_process) for row in db.execute(select_next_attempts(10, datetime.now()))]
+    assert scheduled[0] not in due and scheduled[1] in due
+
+    claimed = keys(service.claim_scheduled_processes("worker-a", scheduled))
+    assert claimed == [scheduled[1]]